@@ -0,0 +1,188 @@
+"""按类型导出时扫描输入目录下的配置文件
+
+多进程并行解析各个XML，结果按文件路径排序后合并，与并行完成的先后无关；
+解析结果按 (路径, 修改时间, 文件大小) 缓存在磁盘上，未改动的文件再次导出时不再解析。
+"""
+import hashlib
+import os
+import pickle
+
+# 不扫描的目录（按目录名匹配，整个子树跳过）
+SKIP_DIR_NAMES = frozenset((
+    ".gradle", ".IntelliJIdea", "AndroidStudioProjects", "build", "target", "bin",
+    "intermediates", "lint_vital_partial_results",
+))
+# 待解析文件少于该数量时直接在当前进程中解析，省去启动进程的开销
+PARALLEL_MIN_FILES = 4
+CACHE_FORMAT_VERSION = 2
+
+_worker_controller = None
+
+
+def _skip_dir(root, name):
+    """是否跳过该子目录：系统/构建目录与Android资源目录"""
+    if name in SKIP_DIR_NAMES:
+        return True
+    return name.startswith("values") and os.path.basename(root) == "res"
+
+
+def count_xml_files(directory):
+    """目录（含子目录）下的XML文件数"""
+    return sum(1 for _, _, files in os.walk(directory) for name in files if name.endswith(".xml"))
+
+
+def iter_config_files(config_dir, on_skipped_dir=None):
+    """按路径顺序列出目录下的所有XML文件，跳过的目录不再进入，改为调用on_skipped_dir(目录路径)"""
+    for root, dirs, files in os.walk(config_dir):
+        kept = []
+        for name in sorted(dirs):
+            if _skip_dir(root, name):
+                print(f"跳过目录: {os.path.join(root, name)}")
+                if on_skipped_dir is not None:
+                    on_skipped_dir(os.path.join(root, name))
+            else:
+                kept.append(name)
+        dirs[:] = kept
+        for name in sorted(files):
+            if name.endswith(".xml"):
+                yield os.path.join(root, name)
+
+
+def read_config_steps(file_path):
+    """解析单个配置文件，返回序列化后的StepModel列表（在工作进程中执行）"""
+    global _worker_controller
+    if _worker_controller is None:
+        from controllers.file_controller import FileController
+        from main_model import DataModel
+        _worker_controller = FileController(DataModel(), None, None, None, None, None)
+    return pickle.dumps(_worker_controller.read_steps_from_xml(file_path), pickle.HIGHEST_PROTOCOL)
+
+
+class ScanCache:
+    """解析结果的磁盘缓存，每个配置文件对应一个缓存文件"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _cache_path(self, file_path):
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    @staticmethod
+    def _stamp(file_stat):
+        return CACHE_FORMAT_VERSION, file_stat.st_mtime_ns, file_stat.st_size
+
+    def get(self, file_path, file_stat):
+        """返回缓存的序列化步骤，文件已改动或没有缓存时返回None"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(file_path), "rb") as f:
+                path, stamp, data = pickle.load(f)
+        except Exception:
+            # 缓存不存在或已损坏时重新解析
+            return None
+        if path != os.path.abspath(file_path) or stamp != self._stamp(file_stat):
+            return None
+        return data
+
+    def put(self, file_path, file_stat, data):
+        if not self.cache_dir:
+            return
+        cache_path = self._cache_path(file_path)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((os.path.abspath(file_path), self._stamp(file_stat), data), f,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"写入解析缓存失败: {file_path}, 错误: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _parse_files(paths, max_workers):
+    """解析多个文件，返回 {路径: 序列化步骤或异常}"""
+    results = {}
+    if len(paths) >= PARALLEL_MIN_FILES and max_workers != 1:
+        # 进程池相关模块导入较慢，只在按类型导出时导入
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {path: pool.submit(read_config_steps, path) for path in paths}
+                for path, future in futures.items():
+                    try:
+                        results[path] = future.result()
+                    except Exception as e:
+                        results[path] = e
+            return results
+        except Exception as e:
+            # 无法创建进程池时（如受限环境）退回当前进程解析
+            print(f"并行解析失败，改为逐个解析: {e}")
+            results.clear()
+    for path in paths:
+        try:
+            results[path] = read_config_steps(path)
+        except Exception as e:
+            results[path] = e
+    return results
+
+
+def scan_config_steps(config_dir, cache_dir=None, max_workers=None):
+    """扫描目录下的配置文件，返回 (steps_by_type, 统计信息)
+
+    steps_by_type按文件路径顺序、文件内步骤顺序合并；统计信息包含
+    total（XML文件数，含跳过目录下的文件）、processed（找到步骤的文件数）、
+    skipped（跳过目录下的文件、读取失败或没有步骤的文件数）、cached（命中缓存的文件数）。
+    """
+    cache = ScanCache(cache_dir)
+    stats = {"total": 0, "processed": 0, "skipped": 0, "cached": 0}
+    paths = []
+    stamps = {}
+    data_by_path = {}
+
+    def count_skipped_dir(directory):
+        # 跳过的目录不解析，其中的文件仍计入总数和跳过数
+        count = count_xml_files(directory)
+        stats["total"] += count
+        stats["skipped"] += count
+
+    for file_path in iter_config_files(config_dir, count_skipped_dir):
+        stats["total"] += 1
+        try:
+            file_stat = os.stat(file_path)
+        except OSError as e:
+            print(f"读取文件失败: {os.path.basename(file_path)}, 错误: {str(e)[:100]}")
+            stats["skipped"] += 1
+            continue
+        paths.append(file_path)
+        stamps[file_path] = file_stat
+        data = cache.get(file_path, file_stat)
+        if data is not None:
+            data_by_path[file_path] = data
+            stats["cached"] += 1
+
+    misses = [path for path in paths if path not in data_by_path]
+    for file_path, data in _parse_files(misses, max_workers).items():
+        if isinstance(data, Exception):
+            print(f"读取文件失败: {os.path.basename(file_path)}, 错误: {str(data)[:100]}")
+            continue
+        data_by_path[file_path] = data
+        cache.put(file_path, stamps[file_path], data)
+
+    steps_by_type = {}
+    for file_path in paths:
+        data = data_by_path.get(file_path)
+        steps = pickle.loads(data) if data is not None else None
+        if not steps:
+            stats["skipped"] += 1
+            continue
+        for step in steps:
+            steps_by_type.setdefault(step.get_step_type(), []).append(step)
+        stats["processed"] += 1
+        print(f"成功处理: {os.path.basename(file_path)} (找到 {len(steps)} 个步骤)")
+    return steps_by_type, stats
@@ -0,0 +1,1572 @@
+"""导出各协议的TXT测试数据（GLINK/1553-BC/串口/开关量/中断的port.config）
+
+不依赖界面：输入步骤列表和 协议 -> 输出目录 的映射，写出文本并返回导出结果；
+FileController.export_glink_txts 只负责从全局配置取输出目录和提示导出结果。
+"""
+import hashlib
+import html
+import json
+import os
+import struct
+from functools import partial
+
+import models.step_model as step_model
+from models.step_index import StepBucketIndex
+from models.template_manager import template_manager
+from utils.protocol_template_utils import (
+    calc_crc_tail_metrics,
+    calc_serial_extended_metrics,
+    calc_serial_standard_metrics,
+    normalize_data_region_value,
+)
+from utils.line_sink import LineSink
+from utils.row_source import RowSource
+
+# 需要输出目录的协议（interrupt输出port.config）
+PROTOCOL_KEYS = ("glink", "uart", "bc", "interrupt", "switch")
+
+# 中断（port.config）的非周期/周期步骤类型
+INTERRUPT_STEP_TYPES = {"non": {7}, "per": {8}}
+
+# 输出目录中的导出清单文件名；导出格式改变时增加版本号，使旧清单失效
+MANIFEST_NAME = ".export_manifest.json"
+EXPORT_FORMAT_VERSION = 1
+
+# 至少有这么多个输出目录要导出步骤时，各目录在子进程中同时导出
+PARALLEL_MIN_DIRS = 2
+
+# 一个总线协议至少有这么多个分组文件时，各文件在子进程中同时写出
+PARALLEL_MIN_FILES = 8
+
+# 各协议的步骤类型、文件命名和写出方式
+PROTOCOL_SPECS = [
+    {
+        "protocol_key": "glink",
+        "display_name": "GLINK",
+        "step_types": {"non": {0}, "per": {1}},
+        "primary_prefix": "Nc",
+        "secondary_prefix": "Nt",
+        "secondary_non_filename": "NtRecv_NonPeriod.txt",
+        "strict_path": True,
+        "mode": "bus"
+    },
+    {
+        "protocol_key": "bc",
+        "display_name": "1553-BC",
+        "step_types": {"non": {4}, "per": {5}},
+        "primary_prefix": "Bc",
+        "secondary_prefix": "Bt",
+        "secondary_non_filename": "BtRecv_NonPeriod.txt",
+        "strict_path": True,
+        "mode": "bus"
+    },
+    {
+        "protocol_key": "uart",
+        "display_name": "串口",
+        "step_types": {"non": {2}, "per": {3}},
+        "non_file_pattern": "Uart_NonPeriod_recv_Com_ADD_{addr}.txt",
+        "per_file_pattern": "Uart_Period_recv_Com_ADD_{addr}.txt",
+        "strict_path": True,
+        "mode": "uart"
+    },
+    {
+        "protocol_key": "switch",
+        "display_name": "开关量",
+        "step_types": {"non": {6}, "per": set()},
+        "non_file_pattern": "Switch_NonPeriod_{addr}.txt",
+        "strict_path": True,
+        "mode": "switch"
+    }
+]
+
+LITTLE_ENDIAN_WORD_SWAP_DTYPES = {"UINT32", "FLOAT32", "REAL32", "FLOAT64", "REAL64", "DOUBLE"}
+
+def resolve_output_dir(path_value):
+    """输出目录配置转为绝对路径，未配置时返回空字符串"""
+    if not path_value:
+        return ""
+    path_value = str(path_value).strip()
+    if not path_value:
+        return ""
+    if path_value == ".":
+        return os.getcwd()
+    if os.path.isabs(path_value):
+        return path_value
+    return os.path.abspath(os.path.join(os.getcwd(), path_value))
+
+
+def records_digest(records):
+    """一个输出文件的内容摘要：由写出该文件的各条记录（时间、数据、周期、数据文件的标识）计算"""
+    text = json.dumps([EXPORT_FORMAT_VERSION, records], ensure_ascii=False, separators=(",", ":"),
+                      default=lambda value: value.fingerprint() if isinstance(value, RowSource) else str(value))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ExportManifest:
+    """输出目录中的导出清单（MANIFEST_NAME），记录各协议写出的文件及其内容摘要
+
+    内容摘要与上次相同、文件未被改动（大小和修改时间一致）的文件不再重写；
+    finish()删除目录中不属于任何协议本次或上次导出结果的txt文件（如已无对应步骤的分组文件）。
+    incremental为False时忽略旧清单，重写全部文件。
+    """
+
+    def __init__(self, out_dir, protocol_key, incremental=True):
+        self.out_dir = out_dir
+        self.protocol_key = protocol_key
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.protocols = {}  # 协议 -> {文件名: {"digest", "size", "mtime_ns"}}
+        if incremental:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                if manifest.get("version") == EXPORT_FORMAT_VERSION:
+                    self.protocols = manifest.get("protocols", {})
+            except (OSError, ValueError, AttributeError) as e:
+                if os.path.exists(self.path):
+                    print(f"读取导出清单失败，重写全部文件: {self.path}, 错误: {e}")
+        self.previous = self.protocols.get(protocol_key, {})
+        self.current = {}
+
+    def is_current(self, fpath, digest):
+        """fpath的内容与上次导出相同且未被改动时返回True，并保留该文件"""
+        name = os.path.basename(fpath)
+        entry = self.previous.get(name)
+        if not entry or entry.get("digest") != digest:
+            return False
+        try:
+            file_stat = os.stat(fpath)
+        except OSError:
+            return False
+        if [file_stat.st_size, file_stat.st_mtime_ns] != [entry.get("size"), entry.get("mtime_ns")]:
+            return False
+        self.current[name] = entry
+        return True
+
+    def record(self, fpath, digest):
+        """记录本次写出的文件"""
+        file_stat = os.stat(fpath)
+        self.current[os.path.basename(fpath)] = {
+            "digest": digest, "size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns}
+
+    def finish(self):
+        """删除过期的txt文件并保存清单"""
+        others = set()
+        for protocol_key, files in self.protocols.items():
+            if protocol_key != self.protocol_key:
+                others.update(files)
+        removed = 0
+        for name in os.listdir(self.out_dir):
+            path = os.path.join(self.out_dir, name)
+            if (name.lower().endswith(".txt") and name not in self.current and name not in others
+                    and os.path.isfile(path)):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except Exception as e:
+                    print(f"删除旧TXT失败: {path}, 错误: {e}")
+        if removed:
+            print(f"删除目录 {self.out_dir} 下 {removed} 个过期txt文件")
+        self.protocols[self.protocol_key] = self.current
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": EXPORT_FORMAT_VERSION, "protocols": self.protocols}, f,
+                          ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"保存导出清单失败: {self.path}, 错误: {e}")
+
+
+def skip_unchanged(protocol_name, manifest, fpath, digest, result):
+    """文件内容与上次导出相同时保留原文件并返回True"""
+    if not manifest.is_current(fpath, digest):
+        return False
+    print(f"  [{protocol_name}] 内容未变化，保留文件: {os.path.basename(fpath)}")
+    result["unchanged"].append(fpath)
+    return True
+
+
+def safe_parse_numeric(value, default=0):
+    """将各种格式的数值安全转换为整数"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        try:
+            return int(value)
+        except Exception:
+            return default
+    try:
+        text = str(value).strip()
+    except Exception:
+        return default
+    if not text:
+        return default
+    text = text.replace('×', 'x').replace('Ｘ', 'x')
+    sign = 1
+    if text.startswith('-'):
+        sign = -1
+        text = text[1:].strip()
+    lowered = text.lower()
+    try:
+        if lowered.startswith('0x'):
+            return sign * int(lowered, 16)
+        if lowered.startswith('0b'):
+            return sign * int(lowered, 2)
+        if lowered.startswith('0o'):
+            return sign * int(lowered, 8)
+        if '.' in lowered:
+            return sign * int(float(lowered))
+        return sign * int(lowered)
+    except Exception:
+        return default
+
+
+def split_array_values(value):
+    """将数组字段的文本拆分为列表"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        try:
+            decoded = json.loads(text)
+            if isinstance(decoded, list):
+                return decoded
+        except Exception:
+            pass
+        for sep in ('[', ']', ',', '，', ';', '；', '\t', '\r', '\n'):
+            text = text.replace(sep, ' ')
+        return [tok for tok in text.split(' ') if tok]
+    return [value]
+
+
+def _strip_hex_prefix(token: str) -> str:
+    if not token:
+        return ""
+    token = str(token).strip()
+    if not token:
+        return ""
+    if token.lower().startswith("0x"):
+        token = token[2:]
+    return token.replace(" ", "")
+
+
+def swap_16bit_words_for_little_endian(chunk_bytes):
+    """按16位（2字节）为单位反转顺序，实现小端输出"""
+    if not chunk_bytes or len(chunk_bytes) < 4:
+        return chunk_bytes
+    if len(chunk_bytes) % 2 != 0:
+        return chunk_bytes
+    words = [chunk_bytes[i:i+2] for i in range(0, len(chunk_bytes), 2)]
+    words.reverse()
+    return b"".join(words)
+
+
+def format_hex_items_for_output(hex_items):
+    """拼接所有字节后按16位（4个hex字符）切片输出，剩余2个字符按8位输出"""
+    if not hex_items:
+        return []
+    hex_stream = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
+    if not hex_stream:
+        return []
+    formatted = []
+    for idx in range(0, len(hex_stream), 4):
+        chunk = hex_stream[idx: idx + 4]
+        if not chunk:
+            continue
+        formatted.append(f"0x{chunk}")
+    return formatted
+
+
+def merge_adjacent_byte_tokens(hex_items):
+    """将相邻的8位标记与后续标记组合成16位输出，以满足0x12 0x3456 -> 0x1234 0x56的规则"""
+    if not hex_items:
+        return []
+
+    merged = []
+    i = 0
+    while i < len(hex_items):
+        item = hex_items[i]
+        stripped = _strip_hex_prefix(item)
+        if not stripped:
+            i += 1
+            continue
+
+        if len(stripped) <= 2:
+            val1 = int(stripped, 16) if stripped else 0
+            if i + 1 < len(hex_items):
+                next_item = hex_items[i + 1]
+                next_stripped = _strip_hex_prefix(next_item)
+                if next_stripped and len(next_stripped) <= 2:
+                    val2 = int(next_stripped, 16)
+                    merged.append(f"0x{((val1 << 8) | val2):04X}")
+                    i += 2
+                    continue
+                elif next_stripped and len(next_stripped) > 2:
+                    next_val = int(next_stripped, 16)
+                    high_byte = (next_val >> 8) & 0xFF
+                    low_byte = next_val & 0xFF
+                    merged.append(f"0x{((val1 << 8) | high_byte):04X}")
+                    merged.append(f"0x{low_byte:02X}")
+                    i += 2
+                    continue
+            merged.append(f"0x{val1:04X}")
+            i += 1
+        else:
+            merged.append(item)
+            i += 1
+    return merged
+
+
+def bytes_to_hex_words(byte_data: bytes, big_endian: bool):
+    """将字节序列按16位对齐转换为十六进制文本"""
+    if not byte_data:
+        return []
+    result = []
+    length = len(byte_data)
+    for idx in range(0, length, 2):
+        if idx + 1 < length:
+            if big_endian:
+                word = (byte_data[idx] << 8) | byte_data[idx + 1]
+            else:
+                word = byte_data[idx] | (byte_data[idx + 1] << 8)
+            result.append(f"0x{word:04X}")
+        else:
+            result.append(f"0x{byte_data[idx]:02X}")
+    return result
+
+
+def scalar_value_to_bytes(dtype_str: str, value, big_endian: bool):
+    """根据数据类型将值转换为字节序列"""
+    dtype = (dtype_str or "").upper()
+    endian_prefix = '>' if big_endian else '<'
+    try:
+        if dtype in ("UINT8", "INT8"):
+            val = safe_parse_numeric(value) & 0xFF
+            return bytes([val])
+        if dtype in ("UINT16", "INT16"):
+            val = safe_parse_numeric(value) & 0xFFFF
+            return bytes([(val >> 8) & 0xFF, val & 0xFF]) if big_endian else bytes([val & 0xFF, (val >> 8) & 0xFF])
+        if dtype in ("UINT32", "INT32"):
+            val = safe_parse_numeric(value) & 0xFFFFFFFF
+            if big_endian:
+                return bytes([
+                    (val >> 24) & 0xFF,
+                    (val >> 16) & 0xFF,
+                    (val >> 8) & 0xFF,
+                    val & 0xFF
+                ])
+            return bytes([
+                val & 0xFF,
+                (val >> 8) & 0xFF,
+                (val >> 16) & 0xFF,
+                (val >> 24) & 0xFF
+            ])
+        if dtype in ("UINT64", "INT64"):
+            val = safe_parse_numeric(value) & 0xFFFFFFFFFFFFFFFF
+            if big_endian:
+                return bytes([(val >> shift) & 0xFF for shift in range(56, -8, -8)])
+            return bytes([(val >> shift) & 0xFF for shift in range(0, 64, 8)])
+        if dtype in ("FLOAT32", "REAL32", "FLOAT", "REAL"):
+            if isinstance(value, str):
+                s_val = value.strip().lower()
+                if s_val.startswith("0x"):
+                    try:
+                        bits = int(s_val, 16) & 0xFFFFFFFF
+                        return bits.to_bytes(4, byteorder='big' if big_endian else 'little')
+                    except ValueError:
+                        pass
+            fv = float(value) if value not in (None, "") else 0.0
+            return struct.pack(endian_prefix + 'f', fv)
+        if dtype in ("FLOAT64", "REAL64", "DOUBLE"):
+            if isinstance(value, str):
+                s_val = value.strip().lower()
+                if s_val.startswith("0x"):
+                    try:
+                        bits = int(s_val, 16) & 0xFFFFFFFFFFFFFFFF
+                        return bits.to_bytes(8, byteorder='big' if big_endian else 'little')
+                    except ValueError:
+                        pass
+            fv = float(value) if value not in (None, "") else 0.0
+            return struct.pack(endian_prefix + 'd', fv)
+        if dtype in ("BOOL", "BOOLEAN"):
+            lv = str(value).strip().lower() if value is not None else "0"
+            iv = 1 if lv in ("1", "true", "yes", "y", "on", "是") else 0
+            return bytes([iv])
+        if dtype in ("STR", "STRING"):
+            return str(value or "").encode('utf-8')
+        # 默认按照16位处理
+        val = safe_parse_numeric(value) & 0xFFFF
+        return bytes([(val >> 8) & 0xFF, val & 0xFF]) if big_endian else bytes([val & 0xFF, (val >> 8) & 0xFF])
+    except Exception:
+        return b""
+
+
+def convert_template_fields_to_hex(step_obj, protocol_type_value, big_endian, defer_little_endian=False,
+                                   templates=template_manager):
+    """将协议模板的字段转换为十六进制序列（跳过“时间”字段）"""
+    try:
+        template = templates.get_template_by_step_and_protocol(
+            step_obj.get_step_type(),
+            protocol_type_value
+        )
+    except Exception:
+        template = None
+    if not template:
+        return [], 0, ""
+
+    protocol_data = step_obj.get_protocol_data() or {}
+    fields = sorted(template.get("fields", []), key=lambda f: f.get("seq", 0))
+    hex_items = []
+    total_bytes = 0
+    display_big_endian = True if defer_little_endian else big_endian
+    is_little_endian = not big_endian
+    raw_bytes = bytearray()
+    segment_lengths = []
+    time_field_index = -1  # 记录时间字段在hex_items中的起始位置
+    time_field_length = 0  # 记录时间字段的长度（16位值的个数）
+    template_id = template.get("id", "")
+    data_region_str = normalize_data_region_value(
+        step_obj.get_type_step_data().get("data_region")
+    )
+    special_metrics = {}
+    if template_id == "serial_std":
+        special_metrics = calc_serial_standard_metrics(data_region_str)
+    elif template_id == "serial_ext":
+        special_metrics = calc_serial_extended_metrics(data_region_str)
+    elif template_id == "crc_tail":
+        special_metrics = calc_crc_tail_metrics(data_region_str)
+    overrides = special_metrics.get("overrides") if special_metrics else {}
+
+    for field in fields:
+        element = field.get("element")
+        if not element:
+            continue
+        # 注意："时间"字段现在需要包含在导出数据中
+        dtype = str(field.get("dtype", "")).upper()
+        # 特殊处理"数据区"字段：从step的type_data中获取data_region
+        if element == "数据区":
+            if special_metrics:
+                raw_value = overrides.get("数据区", data_region_str)
+            else:
+                raw_value = step_obj.get_type_step_data().get("data_region")
+                if raw_value is None:
+                    raw_value = protocol_data.get(element)
+                if raw_value in (None, ""):
+                    raw_value = field.get("value", "")
+        else:
+            if overrides and element in overrides:
+                raw_value = overrides[element]
+            else:
+                raw_value = protocol_data.get(element)
+                if raw_value in (None, ""):
+                    raw_value = field.get("value", "")
+
+        field_hex = []
+        field_bytes = 0
+
+        # 特殊处理"数据区"字段：如果是union列表，使用normalize_hex_items处理
+        if element == "数据区" and special_metrics:
+            data_hex_items = special_metrics.get("data_hex_items", [])
+            byte_seq = special_metrics.get("data_bytes", [])
+            if data_hex_items:
+                field_hex = data_hex_items
+                field_bytes = len(byte_seq)
+                raw_bytes.extend(byte_seq)
+                segment_lengths.append(len(data_hex_items))
+        elif element == "数据区" and isinstance(raw_value, (list, dict)) and raw_value:
+            # 对于数据区，使用normalize_hex_items处理union列表
+            msg_len = step_obj.get_type_step_data().get("msg_len", 0)
+            data_hex_items, data_bytes, _, data_raw_hex, data_segments = normalize_hex_items(
+                raw_value,
+                msg_len,
+                big_endian,
+                defer_little_endian=defer_little_endian
+            )
+            if data_hex_items:
+                field_hex = data_hex_items
+                field_bytes = data_bytes
+                # 将raw_hex_string转换为字节并添加到raw_bytes
+                if data_raw_hex:
+                    try:
+                        data_bytes_obj = bytes.fromhex(data_raw_hex)
+                        raw_bytes.extend(data_bytes_obj)
+                    except ValueError:
+                        pass
+                segment_lengths.extend(data_segments)
+        elif dtype.endswith("_ARRAY"):
+            base_dtype = dtype[:-6]
+            base_dtype = base_dtype.upper()
+            values = split_array_values(raw_value)
+            for item in values:
+                chunk = scalar_value_to_bytes(base_dtype, item, display_big_endian)
+                if not chunk:
+                    continue
+                if is_little_endian and base_dtype in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
+                    chunk = swap_16bit_words_for_little_endian(chunk)
+                raw_bytes.extend(chunk)
+                chunk_words = bytes_to_hex_words(chunk, display_big_endian)
+                field_hex.extend(chunk_words)
+                if chunk_words:
+                    field_bytes += len(chunk)
+                    segment_lengths.append(len(chunk_words))
+        else:
+            dtype_upper = dtype.upper()
+            chunk = scalar_value_to_bytes(dtype_upper, raw_value, display_big_endian)
+            if chunk:
+                if is_little_endian and dtype_upper in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
+                    chunk = swap_16bit_words_for_little_endian(chunk)
+                raw_bytes.extend(chunk)
+                chunk_words = bytes_to_hex_words(chunk, display_big_endian)
+                field_hex.extend(chunk_words)
+                if chunk_words:
+                    field_bytes += len(chunk)
+                    segment_lengths.append(len(chunk_words))
+
+        # 记录时间字段的位置和长度
+        if element == "时间" and field_hex:
+            time_field_index = len(hex_items)
+            time_field_length = len(field_hex)
+
+        if field_hex:
+            hex_items.extend(field_hex)
+            total_bytes += field_bytes
+
+    # 特殊处理时间字段：如果是小端序，交换前4个和后4个字符（前两个16位值和后两个16位值）
+    if time_field_index >= 0 and time_field_length > 0 and not display_big_endian:
+        # 时间字段是32位（4字节），即2个16位值，需要交换它们
+        if time_field_length == 2 and time_field_index + 1 < len(hex_items):
+            # 交换两个16位值
+            hex_items[time_field_index], hex_items[time_field_index + 1] = \
+                hex_items[time_field_index + 1], hex_items[time_field_index]
+        elif time_field_length > 2:
+            # 如果时间字段超过2个16位值，交换前一半和后一半
+            half = time_field_length // 2
+            for i in range(half):
+                if time_field_index + i < len(hex_items) and time_field_index + time_field_length - 1 - i < len(hex_items):
+                    hex_items[time_field_index + i], hex_items[time_field_index + time_field_length - 1 - i] = \
+                        hex_items[time_field_index + time_field_length - 1 - i], hex_items[time_field_index + i]
+
+    if template.get("merge_8bit_to_16bit", True) and hex_items:
+        hex_items = merge_adjacent_byte_tokens(hex_items)
+
+    raw_hex_string = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
+    total_bytes = len(raw_hex_string) // 2
+    segment_lengths = [1] * len(hex_items)
+
+
+    return hex_items, total_bytes, raw_hex_string, segment_lengths
+
+
+def get_int(d, k, default=0):
+    try:
+        v = d.get(k, default)
+        return int(v)
+    except Exception:
+        return default
+
+
+def get_int_or_parse_hex(d, k, default=0):
+    """获取整数值，如果是字符串且为16进制格式则解析（支持全角乘号×）"""
+    try:
+        v = d.get(k, default)
+        print(f"get_int_or_parse_hex: k={k}, v={v}, type={type(v).__name__}")
+        if isinstance(v, str):
+            # 处理全角乘号×（U+00D7）和全角Ｘ（U+FF38），统一转换为小写x
+            v_str = v.strip()
+            if not v_str:
+                print("  值为空，返回默认")
+                return default
+            # 替换全角乘号×为半角x
+            v_str = v_str.replace('×', 'x').replace('Ｘ', 'x').replace('×', 'x')
+            v_str = v_str.lower()
+            print(f"  处理后: '{v_str}'")
+            if v_str.startswith('0x'):
+                result = int(v_str, 16)
+                print(f"  解析16进制 '{v_str}' -> {result}")
+                return result
+            elif 'x' in v_str:
+                # 如果有x但没0x前缀（如"×15"或"0×15"），尝试添加0x前缀后解析
+                # 移除所有的x和开头的0
+                hex_part = v_str.replace('x', '').replace('X', '')
+                # 如果开头有0，去掉（因为我们要添加0x）
+                if hex_part.startswith('0'):
+                    hex_part = hex_part[1:]
+                v_str = '0x' + hex_part
+                result = int(v_str, 16)
+                print(f"  解析16进制（添加前缀） '{v_str}' -> {result}")
+                return result
+            else:
+                # 尝试解析为整数（十进制）
+                result = int(v_str)
+                print(f"  解析十进制 '{v_str}' -> {result}")
+                return result
+        else:
+            result = int(v)
+            print(f"  直接转换 {v} -> {result}")
+            return result
+    except Exception as e:
+        print(f"get_int_or_parse_hex 解析失败: k={k}, v={v}, error={e}")
+        return default
+
+
+def to_time3(x):
+    try:
+        return float(x)
+    except Exception:
+        return 0.0
+
+
+def _to_int(val):
+    """数据区中整数类型的值转为int，无法解析时为0"""
+    if isinstance(val, (int, float)):
+        return int(val)
+    if isinstance(val, str):
+        s = val.strip().lower()
+        if s.startswith('0x'):
+            return int(s, 16)
+        try:
+            return int(float(s))
+        except Exception:
+            return 0
+    return 0
+
+
+def _int_to_bytes(val, dtype_str, big_endian):
+    """将整数按数据类型和端序转换为字节数组（浮点类型由调用方单独处理）"""
+    u = dtype_str.upper()
+    try:
+        if u in ("UINT8", "INT8"):
+            return bytes([val & 0xFF])
+        elif u in ("UINT16", "INT16"):
+            val = val & 0xFFFF
+            if big_endian:
+                return bytes([val >> 8, val & 0xFF])
+            else:
+                return bytes([val & 0xFF, val >> 8])
+        elif u in ("UINT32", "INT32"):
+            val = val & 0xFFFFFFFF
+            if big_endian:
+                return bytes([val >> 24, (val >> 16) & 0xFF, (val >> 8) & 0xFF, val & 0xFF])
+            else:
+                return bytes([val & 0xFF, (val >> 8) & 0xFF, (val >> 16) & 0xFF, val >> 24])
+        elif u in ("BOOL", "BOOLEAN"):
+            iv = 1 if (str(val).strip().lower() in ("1", "true", "yes")) else 0
+            return bytes([iv])
+        elif u in ("STR", "STRING"):
+            return str(val).encode('utf-8')
+        else:
+            # 默认按16位处理
+            val = val & 0xFFFF
+            if big_endian:
+                return bytes([val >> 8, val & 0xFF])
+            else:
+                return bytes([val & 0xFF, val >> 8])
+    except Exception:
+        return bytes([0])
+
+
+def normalize_hex_items(data_region, msg_len, big_endian, defer_little_endian=False):
+    # 将 data_region 标准化为十六进制标记列表（0x前缀）。
+    # 支持 union 列表、JSON 字符串等来源；按数据类型区分：
+    # - UINT8/16/32: 固定宽度的十六进制单标记（0xXX/0xXXXX/0xXXXXXXXX）
+    # - INT8/16/32: 以补码形式输出固定宽度十六进制单标记
+    # - FLOAT32/64: 以配置端序输出为若干 0xXX 标记（大端='>'，小端='<'）
+    # - BOOL: 0x01/0x00
+    # - STR: 若已是以空格分隔的 0x.. 序列则直接拆分，否则按UTF-8字节输出 0xXX 序列
+    display_big_endian = True if defer_little_endian else big_endian
+    is_little_endian = not big_endian
+
+    # 归一化得到 union 列表
+    union_list = []
+    source_type = "normalized"
+    raw_hex_string = ""
+    segment_lengths = []
+    if data_region is None:
+        return [], 0, source_type, raw_hex_string, []
+    if isinstance(data_region, list):
+        if data_region and all(isinstance(item, str) for item in data_region):
+            raw_hex_string = "".join(_strip_hex_prefix(item) for item in data_region if item).upper()
+            segments = [1] * len(data_region)
+            return data_region, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
+        union_list = data_region
+    elif isinstance(data_region, str):
+        s = data_region.strip()
+        if not s:
+            return [], 0, source_type, raw_hex_string, []
+        # 可能是 JSON
+        decoded = html.unescape(s)
+        try:
+            obj = json.loads(decoded)
+            if isinstance(obj, list):
+                union_list = obj
+            else:
+                parts = [p for p in s.split() if p]
+                if all(p.lower().startswith('0x') for p in parts):
+                    raw_hex_string = "".join(_strip_hex_prefix(p) for p in parts if p).upper()
+                    segments = [1] * len(parts)
+                    return parts, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
+                raw_bytes = s.encode('utf-8')
+                raw_hex_string = raw_bytes.hex().upper()
+                raw_tokens = bytes_to_hex_words(raw_bytes, display_big_endian)
+                segments = [1] * len(raw_tokens)
+                return raw_tokens, len(raw_bytes), source_type, raw_hex_string, segments
+        except Exception:
+            parts = [p for p in s.split() if p]
+            if all(p.lower().startswith('0x') for p in parts):
+                raw_hex_string = "".join(_strip_hex_prefix(p) for p in parts if p).upper()
+                segments = [1] * len(parts)
+                return parts, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
+            raw_bytes = s.encode('utf-8')
+            raw_hex_string = raw_bytes.hex().upper()
+            raw_tokens = bytes_to_hex_words(raw_bytes, display_big_endian)
+            segments = [1] * len(raw_tokens)
+            return raw_tokens, len(raw_bytes), source_type, raw_hex_string, segments
+    else:
+        return [], 0, source_type, raw_hex_string, []
+
+    # 紧凑型存储：将所有数据转换为字节流，然后按16位分组显示
+    byte_stream = bytearray()
+    hex_items = []
+    total_bytes = 0
+
+    def append_and_track(chunk_bytes):
+        nonlocal total_bytes
+        if not chunk_bytes:
+            return
+        byte_stream.extend(chunk_bytes)
+        total_bytes += len(chunk_bytes)
+        words = bytes_to_hex_words(chunk_bytes, display_big_endian)
+        if words:
+            hex_items.extend(words)
+            segment_lengths.append(len(words))
+
+    for item in union_list:
+        if not isinstance(item, dict):
+            continue
+        dtype_idx = item.get('data_type')
+        value = item.get('value')
+        dtype_str = None
+        try:
+            dtype_str = step_model.SUPPORTED_DTYPES[dtype_idx] if isinstance(dtype_idx, int) and 0 <= dtype_idx < len(step_model.SUPPORTED_DTYPES) else None
+        except Exception:
+            dtype_str = None
+        if not dtype_str:
+            dtype_str = "UINT8"
+
+        u = dtype_str.upper()
+        try:
+            # 根据数据类型选择正确的转换方式
+            if u in ("FLOAT32", "REAL32", "FLOAT", "REAL", "FLOAT64", "REAL64", "DOUBLE"):
+                item_bytes = None
+                converted_display = value
+                if isinstance(value, str):
+                    s_val = value.strip().lower()
+                    if s_val.startswith("0x"):
+                        hex_part = s_val[2:]
+                        expected_bits = 32 if u in ("FLOAT32", "REAL32", "FLOAT", "REAL") else 64
+                        expected_bytes = expected_bits // 8
+                        try:
+                            bits_val = int(hex_part, 16) & ((1 << expected_bits) - 1)
+                            byteorder = 'big' if display_big_endian else 'little'
+                            item_bytes = bits_val.to_bytes(expected_bytes, byteorder=byteorder, signed=False)
+                            converted_display = f"0x{hex_part.upper()}"
+                        except ValueError:
+                            item_bytes = None
+                if item_bytes is None:
+                    try:
+                        converted_value = float(value) if value is not None else 0.0
+                    except (TypeError, ValueError):
+                        converted_value = 0.0
+                    converted_display = converted_value
+                    endian_prefix_local = '>' if display_big_endian else '<'
+                    fmt = 'f' if u in ("FLOAT32", "REAL32", "FLOAT", "REAL") else 'd'
+                    item_bytes = struct.pack(endian_prefix_local + fmt, converted_value)
+                print(f"    处理 {u}: 原始值={value}, 转换后={converted_display}")
+            else:
+                # 整数类型使用to_int转换
+                iv = _to_int(value)
+                print(f"    处理 {u}: 原始值={value}, 转换后={iv}")
+                item_bytes = _int_to_bytes(iv, dtype_str, display_big_endian)
+            if is_little_endian and u in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
+                item_bytes = swap_16bit_words_for_little_endian(item_bytes)
+
+            append_and_track(item_bytes)
+            print(f"    字节: {item_bytes.hex()}")
+        except Exception as err:
+            print(f"    处理 {u} 时出错，使用默认值0，错误: {err}")
+            append_and_track(bytes([0]))
+
+    # 将字节流转换为十六进制显示
+    raw_hex_string = byte_stream.hex().upper()
+
+    display_hex_items = format_hex_items_for_output(hex_items)
+
+    print(f"    最终字节流: {byte_stream.hex()}")
+    print(f"    最终显示: {display_hex_items}")
+    print(f"    总字节数: {total_bytes}")
+
+    return hex_items, total_bytes, source_type, raw_hex_string, segment_lengths
+
+def parse_hex_line(s, msg_len):
+    """解析一行HEX文本为 List[str]，按16位（4个字符）分组，最后一个字节不补零"""
+    s = s.replace("\t", " ").replace(",", " ")
+    s = s.replace("0x", "").replace("0X", "")
+    s = "".join(s.split())
+    row = []
+    for i in range(0, len(s), 4):
+        if i + 4 <= len(s):
+            # 完整的16位
+            row.append(f"0x{s[i:i+4].upper()}")
+        else:
+            # 最后一个不完整的字节，不补零
+            remaining = s[i:]
+            if len(remaining) == 2:
+                row.append(f"0x{remaining.upper()}")
+            elif len(remaining) == 1:
+                row.append(f"0x{remaining.upper()}")
+    if msg_len and isinstance(msg_len, int) and msg_len > 0:
+        row = row[:msg_len]
+    return row
+
+
+def read_hex_sequences_from_files(path_field, msg_len):
+    """从 file_path 指定的一个或多个文件读取HEX行，返回按需逐行读取的RowSource（每行为 List[str]）"""
+    if not path_field:
+        return RowSource([])
+    # 支持以 ; 或 , 分隔的多个文件
+    parts = []
+    if isinstance(path_field, str):
+        parts = [p.strip() for p in path_field.replace("\n", ",").split(",") if p.strip()]
+    elif isinstance(path_field, (list, tuple)):
+        parts = [str(p).strip() for p in path_field if str(p).strip()]
+    return RowSource(parts, partial(parse_hex_line, msg_len=msg_len), errors="ignore")
+
+
+def iter_period_lines(base_time, period_value, sequences, default_hex):
+    """生成周期行，若文件包含多行则依次按周期累加时间，否则仅使用默认数据。"""
+    if sequences:
+        for idx, seq in enumerate(sequences):
+            yield base_time + period_value * idx, seq, idx  # 返回时间、序列和行索引
+    else:
+        yield base_time, default_hex, 0  # 返回时间、默认序列和行索引0
+
+
+def prepare_step_payload(step, non_types, per_types, bucket_index, templates=template_manager):
+    """整理一个步骤的导出数据，不属于non_types/per_types或被忽略的步骤返回None"""
+    base = step.get_base_step_data() or {}
+    type_data = step.get_type_step_data() or {}
+    stype = step.get_step_type()
+
+    is_non_step = stype in non_types
+    is_per_step = stype in per_types
+    if not (is_non_step or is_per_step):
+        return None
+
+    if bucket_index.is_ignored(step):
+        return None
+
+    # 获取通用字段（站点号/子地址/长度已由分桶索引解析）
+    site_type = get_int(type_data, 'site_type', 0)
+    recip, sub_addr, msg_len = bucket_index.group_key(step)
+    data_region = type_data.get('data_region')
+    file_path_field = type_data.get('file_path')
+    file_hex_sequences = None
+
+    # 获取开关量协议特定字段
+    address = get_int_or_parse_hex(type_data, 'address', None)
+    switch_type = get_int(type_data, 'switch_type', 8)
+    switch_value = get_int(type_data, 'switch_value', 0)
+
+    # 如果是开关量协议，直接返回基本信息，不需要处理hex数据
+    if stype == 6:  # switch_quantity_fileds
+        payload = {
+            "step": step,
+            "base": base,
+            "type_data": type_data,
+            "is_non_step": is_non_step,
+            "is_per_step": is_per_step,
+            "address": address,
+            "switch_type": switch_type,
+            "switch_value": switch_value,
+            "hex_items": [],
+            "file_hex_sequences": None,
+            "actual_byte_len": 0,
+            "base_time": to_time3(base.get('time', 0.0)),
+            "period_value": to_time3(type_data.get('period', 0.0)),
+            "serial_id": 0
+        }
+        return payload
+
+    # 其他协议的处理逻辑
+    is_big_endian = base.get('endian', 0) == 0
+    hex_items, data_bytes, hex_source, raw_hex_string, hex_segments = normalize_hex_items(
+        data_region,
+        msg_len,
+        is_big_endian,
+        defer_little_endian=not is_big_endian
+    )
+
+    if not hex_items and file_path_field:
+        file_hex_seqs = read_hex_sequences_from_files(file_path_field, msg_len)
+        first_seq = next(iter(file_hex_seqs), None)
+        if first_seq:
+            file_hex_sequences = file_hex_seqs
+            hex_items = first_seq
+            data_bytes = len(hex_items) * 2
+            hex_source = "raw_hex"
+            raw_hex_string = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
+            hex_segments = [1] * len(hex_items)
+
+    proto_type_raw = type_data.get('protocol_type', -1)
+    try:
+        proto_type_val = int(proto_type_raw)
+    except (TypeError, ValueError):
+        proto_type_val = -1
+    if proto_type_val is not None and proto_type_val >= 0:
+        protocol_hex_items, protocol_bytes, protocol_raw_hex, protocol_segments = convert_template_fields_to_hex(
+            step,
+            proto_type_val,
+            is_big_endian,
+            defer_little_endian=not is_big_endian,
+            templates=templates
+        )
+        if protocol_hex_items:
+            hex_items = protocol_hex_items
+            data_bytes = protocol_bytes
+            hex_source = "normalized"
+            raw_hex_string = protocol_raw_hex
+            hex_segments = protocol_segments
+
+    if hex_items:
+        msg_len = len(hex_items)
+    elif msg_len > 0:
+        hex_items = ["0x0000"] * msg_len
+        data_bytes = msg_len * 2
+        raw_hex_string = "0000" * msg_len
+        hex_segments = [1] * len(hex_items)
+
+    actual_byte_len = data_bytes
+
+    if file_hex_sequences:
+        # 写出时才逐行读取文件，大文件不整体读入内存
+        file_hex_sequences = file_hex_sequences.map(format_hex_items_for_output)
+
+    if hex_items:
+        hex_items = format_hex_items_for_output(hex_items)
+
+    payload = {
+        "step": step,
+        "base": base,
+        "type_data": type_data,
+        "is_non_step": is_non_step,
+        "is_per_step": is_per_step,
+        "site_type": site_type,
+        "recip": recip,
+        "sub_addr": sub_addr,
+        "hex_items": hex_items,
+        "file_hex_sequences": file_hex_sequences,
+        "actual_byte_len": actual_byte_len,
+        "base_time": to_time3(base.get('time', 0.0)),
+        "period_value": to_time3(type_data.get('period', 0.0)),
+        "serial_id": get_int(type_data, 'serialID', 0)
+    }
+    return payload
+
+
+def process_interrupt_steps(out_dir, bucket_index, result):
+    """按需求生成中断 port.config 文件"""
+    interrupt_per_types = INTERRUPT_STEP_TYPES["per"]
+    relevant_types = INTERRUPT_STEP_TYPES["non"] | interrupt_per_types
+    relevant_steps = bucket_index.steps_of_types(relevant_types)
+    if not out_dir or not relevant_steps:
+        return None
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    def format_interrupt_display(raw_value):
+        if raw_value is None:
+            return "0"
+        text = str(raw_value).strip()
+        return text if text else "0"
+
+    periodic_map = {}
+    periodic_sort_key = {}
+    non_periodic_map = {}
+    non_periodic_sort_key = {}
+
+    for step in relevant_steps:
+        if bucket_index.is_ignored(step):
+            continue
+        base = step.get_base_step_data() or {}
+        type_data = step.get_type_step_data() or {}
+        interrupt_raw = type_data.get("interrupt_num")
+        interrupt_display = format_interrupt_display(interrupt_raw)
+        interrupt_int = get_int_or_parse_hex(
+            {"interrupt_num": interrupt_raw}, "interrupt_num", 0
+        )
+        step_type = step.get_step_type()
+
+        if step_type in interrupt_per_types:
+            period_value = to_time3(type_data.get("period", 0.0))
+            period_ms = int(round(period_value * 1000))
+            if period_ms < 0:
+                period_ms = 0
+            periodic_map[interrupt_display] = period_ms
+            periodic_sort_key[interrupt_display] = interrupt_int
+        else:
+            time_value = to_time3(base.get("time", 0.0))
+            time_ms = int(round(time_value * 1000))
+            if time_ms < 0:
+                time_ms = 0
+            non_periodic_map.setdefault(interrupt_display, []).append(time_ms)
+            non_periodic_sort_key[interrupt_display] = interrupt_int
+
+    def _format_comment_text(int_key, times_ms):
+        if not times_ms:
+            return "；仿真时间10s时触发90号中断"
+        first_time_ms = min(times_ms)
+        seconds_str = f"{first_time_ms/1000:g}"
+        return f"；仿真时间{seconds_str}s时触发{int_key}号中断"
+
+    periodic_lines = [
+        "#对中断周期的配置,注意此处只需要配周期性中断，其余均认为是非周期中断",
+        "",
+        "#中断号=周期值(ms)",
+        "",
+        "[INT_PERIOD]"
+    ]
+    if periodic_map:
+        for key in sorted(periodic_map.keys(), key=lambda k: (periodic_sort_key.get(k, 0), k)):
+            periodic_lines.append(f"{key}={periodic_map[key]}")
+    periodic_lines.append("")
+    periodic_lines.append("#忽略的中断号")
+    periodic_lines.append("")
+    periodic_lines.append("[IGNORE_INT]")
+    periodic_lines.append("")
+    periodic_lines.append("；核间通信中断")
+    periodic_lines.append("")
+
+    non_periodic_lines = [
+        "#单次触发中断配置#对于数据触发的中断可在底层驱动中通过读文件控制数据何时到来，不在此处配置",
+        "",
+        "#中断号=触发时间(ms)",
+        "",
+        "[ISINGLE_TRIGGER_INTJ]"
+    ]
+
+    if non_periodic_map:
+        first_key = min(non_periodic_map.keys(), key=lambda k: (non_periodic_sort_key.get(k, 0), k))
+        comment_line = _format_comment_text(first_key, non_periodic_map[first_key])
+    else:
+        comment_line = "；仿真时间10s时触发90号中断"
+    non_periodic_lines.append(comment_line)
+
+    if non_periodic_map:
+        for key in sorted(non_periodic_map.keys(), key=lambda k: (non_periodic_sort_key.get(k, 0), k)):
+            times = sorted(set(non_periodic_map[key]))
+            times_str = ",".join(str(val) for val in times)
+            non_periodic_lines.append(f"中断：{key}={times_str}")
+    else:
+        non_periodic_lines.append("中断：")
+
+    port_config_content = "\n".join(periodic_lines + non_periodic_lines).rstrip() + "\n"
+    port_config_path = os.path.join(out_dir, "port.config")
+    with open(port_config_path, "w", encoding="utf-8") as f:
+        f.write(port_config_content)
+    result["files"].append(port_config_path)
+    return port_config_path
+
+
+def bus_record_lines(rows):
+    """生成一个分组文件的各行：记录为非周期 (时间, 数据) 或周期 (时间, 默认数据, 周期, 文件数据)"""
+    for record in rows:
+        if len(record) == 2:
+            t, hexlist = record
+            line = f"{t:.3f}"
+            if hexlist:
+                line += "\t" + "\t".join(hexlist)
+            yield line
+        else:
+            t, hexlist, period, sequences = record
+            for time_val, seq, line_idx in iter_period_lines(t, period, sequences, hexlist):
+                # 对于周期GLINK的每行，重新计算时间戳、帧计数和CRC
+                modified_seq = seq.copy()
+
+                # 1. 更新时间戳字段（索引0-1，UINT32拆分为两个UINT16）
+                if len(modified_seq) > 1:
+                    # 将time_val转换为毫秒并取整
+                    timestamp_ms = int(round(time_val * 1000))
+                    # 拆分UINT32为两个UINT16（低16位和高16位）
+                    time_low = timestamp_ms & 0xFFFF
+                    time_high = (timestamp_ms >> 16) & 0xFFFF
+                    # 更新时间戳字段
+                    modified_seq[0] = f"0x{time_high:04X}"
+                    modified_seq[1] = f"0x{time_low:04X}"
+
+                # 2. 更新帧计数字段（索引4）
+                if len(modified_seq) > 4:
+                    # 计算帧计数：行索引+1，确保在0x0000-0xFFFF范围内
+                    frame_count = (line_idx + 1) & 0xFFFF
+                    modified_seq[4] = f"0x{frame_count:04X}"
+
+                # 3. 重新计算CRC校验和（如果需要）
+                if len(modified_seq) > 5:
+                    # 提取数据区（从索引5开始到倒数第二个元素）
+                    data_region = modified_seq[5:-1] if len(modified_seq) > 6 else []
+                    # 将数据区转换为字符串
+                    data_region_str = " ".join(data_region)
+                    # 计算CRC
+                    special_metrics = calc_crc_tail_metrics(data_region_str)
+                    crc_value = special_metrics.get("overrides", {}).get("数据区crc校验和", "0x0000")
+                    # 更新CRC字段
+                    modified_seq[-1] = crc_value
+
+                line = f"{time_val:.3f}"
+                if modified_seq:
+                    line += "\t" + "\t".join(modified_seq)
+                yield line
+
+
+def write_group_file(fpath, groups):
+    """写出一个分组文件；groups为依次写入同一文件的记录列表（后写的覆盖先写的，与逐组写出一致）"""
+    for rows in groups:
+        with LineSink(fpath) as sink:
+            sink.write_lines(bus_record_lines(rows))
+
+
+def _process_pool(workers):
+    """新建进程池；子进程以spawn方式启动，不从带Qt线程的界面进程fork（打包程序需调用freeze_support）"""
+    # 进程池相关模块导入较慢，只在需要并行导出时导入
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def write_group_files(jobs, max_workers=None):
+    """写出多个分组文件，jobs为 [(文件路径, groups)]，返回与jobs对应的异常列表（成功为None）
+
+    文件不少于PARALLEL_MIN_FILES个时在进程池中同时编码写出（max_workers=1时逐个写出）。
+    """
+    outcomes = [None] * len(jobs)
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if len(jobs) >= PARALLEL_MIN_FILES and workers > 1:
+        try:
+            with _process_pool(workers) as pool:
+                futures = [pool.submit(write_group_file, fpath, groups) for fpath, groups in jobs]
+                for pos, future in enumerate(futures):
+                    outcomes[pos] = future.exception()
+            return outcomes
+        except Exception as e:
+            # 无法创建进程池或传递数据时（如受限环境）退回当前进程写出
+            print(f"并行写出失败，改为逐个写出: {e}")
+    for pos, (fpath, groups) in enumerate(jobs):
+        try:
+            write_group_file(fpath, groups)
+            outcomes[pos] = None
+        except Exception as exc:
+            outcomes[pos] = exc
+    return outcomes
+
+
+def process_bus_protocol(protocol_name, spec, payloads, out_dir, result, manifest, max_workers=None):
+    primary_non = {}
+    primary_period = {}
+    secondary_non_lines = []
+    secondary_period = {}
+
+    for payload in payloads:
+        if payload["is_non_step"]:
+            t = payload["base_time"]
+            if payload["site_type"] == 0:
+                key = (payload["recip"], payload["sub_addr"], payload["actual_byte_len"])
+                primary_non.setdefault(key, []).append((t, payload["hex_items"]))
+            else:
+                desc = f"ID0x{payload['recip']:03X}_SA{payload['sub_addr']:02X}_Len{payload['actual_byte_len']}"
+                secondary_non_lines.append((t, desc, payload["hex_items"]))
+        else:
+            t = payload["base_time"]
+            period = payload["period_value"]
+            key = (payload["recip"], payload["sub_addr"], payload["actual_byte_len"])
+            target = primary_period if payload["site_type"] == 0 else secondary_period
+            target.setdefault(key, []).append((t, payload["hex_items"], period, payload["file_hex_sequences"]))
+
+    primary_prefix = spec.get("primary_prefix", "Nc")
+    secondary_prefix = spec.get("secondary_prefix", "Nt")
+    file_pattern = spec.get("file_pattern", "{prefix}Recv_ID0x{recip:03X}_SA{sa:02X}_Len{ln}.txt")
+    secondary_non_filename = spec.get("secondary_non_filename") or f"{secondary_prefix}Recv_NonPeriod.txt"
+
+    print(f"\n[{protocol_name}] 分类结果:")
+    print(f"  {primary_prefix} 非周期: {len(primary_non)} 个文件")
+    print(f"  {primary_prefix} 周期: {len(primary_period)} 个文件")
+    print(f"  {secondary_prefix} 非周期: {len(secondary_non_lines)} 行")
+    print(f"  {secondary_prefix} 周期: {len(secondary_period)} 个文件")
+
+    def group_jobs(containers):
+        """分组文件 [(文件路径, 依次写入的记录列表)]，非周期与周期分组同名时后写的周期数据覆盖前者"""
+        jobs = {}
+        for container, prefix_label in containers:
+            for (recip, sa, ln), rows in container.items():
+                rows.sort(key=lambda x: x[0])
+                fname = file_pattern.format(prefix=prefix_label, recip=recip, sa=sa, ln=ln)
+                jobs.setdefault(os.path.join(out_dir, fname), []).append(rows)
+        return list(jobs.items())
+
+    def report(jobs):
+        for fpath, _ in jobs:
+            fname = os.path.basename(fpath)
+            if fpath not in outcomes:
+                print(f"  [{protocol_name}] 内容未变化，保留文件: {fname}")
+                result["unchanged"].append(fpath)
+                continue
+            exc = outcomes[fpath]
+            if exc is None:
+                print(f"  [{protocol_name}] 写入文件: {fname}")
+                result["files"].append(fpath)
+                manifest.record(fpath, digests[fpath])
+            elif isinstance(exc, PermissionError):
+                print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
+                result["errors"].append((fpath, str(exc)))
+            else:
+                print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
+                result["errors"].append((fpath, str(exc)))
+
+    primary_jobs = group_jobs(((primary_non, primary_prefix), (primary_period, primary_prefix)))
+    secondary_jobs = group_jobs(((secondary_period, secondary_prefix),))
+    # 内容有变化的分组文件一起写出，按文件汇总结果
+    digests = {fpath: records_digest(groups) for fpath, groups in primary_jobs + secondary_jobs}
+    changed = [(fpath, groups) for fpath, groups in primary_jobs + secondary_jobs
+               if not manifest.is_current(fpath, digests[fpath])]
+    outcomes = dict(zip((fpath for fpath, _ in changed), write_group_files(changed, max_workers)))
+    report(primary_jobs)
+
+    if secondary_non_lines:
+        secondary_non_lines.sort(key=lambda x: x[0])
+        fpath = os.path.join(out_dir, secondary_non_filename)
+        digest = records_digest(secondary_non_lines)
+        if not skip_unchanged(protocol_name, manifest, fpath, digest, result):
+            try:
+                with LineSink(fpath) as sink:
+                    sink.write_lines(
+                        f"{t:.3f}\t{desc}\t" + "\t".join(hexlist) if hexlist else f"{t:.3f}\t{desc}"
+                        for t, desc, hexlist in secondary_non_lines
+                    )
+                print(f"  [{protocol_name}] 写入文件: {secondary_non_filename}")
+                result["files"].append(fpath)
+                manifest.record(fpath, digest)
+            except PermissionError as exc:
+                print(f"  [{protocol_name}] 权限错误，跳过文件: {secondary_non_filename}")
+                result["errors"].append((fpath, str(exc)))
+            except Exception as exc:
+                print(f"  [{protocol_name}] 写入文件 {secondary_non_filename} 时出错: {exc}")
+                result["errors"].append((fpath, str(exc)))
+
+    report(secondary_jobs)
+    return out_dir
+
+
+def process_uart_protocol(protocol_name, spec, payloads, out_dir, result, manifest):
+    non_pattern = spec.get("non_file_pattern", "Uart_NonPeriod_recv_Com_ADD_{addr}.txt")
+    per_pattern = spec.get("per_file_pattern", "Uart_Period_recv_Com_ADD_{addr}.txt")
+    group_non = {}
+    group_period = {}
+
+    for payload in payloads:
+        serial_id_val = payload.get("serial_id")
+        if serial_id_val is None:
+            print(f"[{protocol_name}] 步骤缺少串口号，已跳过: step={payload.get('step')}")
+            continue
+        addr_str = f"{int(serial_id_val):02d}"
+
+        if payload["is_non_step"]:
+            group_non.setdefault(addr_str, []).append((payload["base_time"], payload["hex_items"]))
+        else:
+            group_period.setdefault(addr_str, []).append(
+                (payload["base_time"], payload["hex_items"], payload["period_value"], payload["file_hex_sequences"])
+            )
+
+    print(f"\n[{protocol_name}] 分类结果:")
+    print(f"  非周期基地址文件: {len(group_non)} 个")
+    print(f"  周期基地址文件: {len(group_period)} 个")
+
+    for addr, rows in group_non.items():
+        rows.sort(key=lambda x: x[0])
+        fname = non_pattern.format(addr=addr)
+        fpath = os.path.join(out_dir, fname)
+        digest = records_digest(rows)
+        if skip_unchanged(protocol_name, manifest, fpath, digest, result):
+            continue
+        try:
+            with LineSink(fpath) as sink:
+                sink.write_lines(
+                    f"{t:.3f}\t" + "\t".join(hexlist) if hexlist else f"{t:.3f}"
+                    for t, hexlist in rows
+                )
+            print(f"  [{protocol_name}] 写入文件: {fname}")
+            result["files"].append(fpath)
+            manifest.record(fpath, digest)
+        except PermissionError as exc:
+            print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
+            result["errors"].append((fpath, str(exc)))
+        except Exception as exc:
+            print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
+            result["errors"].append((fpath, str(exc)))
+
+    for addr, rows in group_period.items():
+        rows.sort(key=lambda x: x[0])
+        fname = per_pattern.format(addr=addr)
+        fpath = os.path.join(out_dir, fname)
+        digest = records_digest(rows)
+        if skip_unchanged(protocol_name, manifest, fpath, digest, result):
+            continue
+        try:
+            with LineSink(fpath) as sink:
+                sink.write_lines(
+                    f"{time_val:.3f}\t" + "\t".join(seq) if seq else f"{time_val:.3f}"
+                    for t, hexlist, period, sequences in rows
+                    for time_val, seq, _ in iter_period_lines(t, period, sequences, hexlist)
+                )
+            print(f"  [{protocol_name}] 写入文件: {fname}")
+            result["files"].append(fpath)
+            manifest.record(fpath, digest)
+        except PermissionError as exc:
+            print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
+            result["errors"].append((fpath, str(exc)))
+        except Exception as exc:
+            print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
+            result["errors"].append((fpath, str(exc)))
+
+    if not group_non and not group_period:
+        return None
+    return out_dir
+
+
+def switch_hex_value(switch_value, switch_type):
+    """根据switch_type将switch_value转换为对应的十六进制格式"""
+    if switch_type == 8:
+        return f"{int(switch_value):02x}"  # 8位开关量，2位十六进制
+    elif switch_type == 16:
+        return f"{int(switch_value):04x}"  # 16位开关量，4位十六进制
+    elif switch_type == 32:
+        return f"{int(switch_value):08x}"  # 32位开关量，8位十六进制
+    return f"{int(switch_value):x}"  # 默认格式
+
+
+def process_switch_protocol(protocol_name, spec, payloads, out_dir, result, manifest):
+    """处理开关量协议的导出逻辑"""
+    non_pattern = spec.get("non_file_pattern", "Switch_NonPeriod_{addr}.txt")
+
+    # 按地址分组数据
+    group_non = {}
+
+    for payload in payloads:
+        address = payload.get("address")
+        if address is None:
+            print(f"[{protocol_name}] 步骤缺少地址，已跳过: step={payload.get('step')}")
+            continue
+
+        addr_str = f"{int(address):02x}"  # 地址转换为两位十六进制字符串
+
+        if payload["is_non_step"]:
+            group_non.setdefault(addr_str, []).append((payload["base_time"], payload["hex_items"], payload.get("switch_value", 0), payload.get("switch_type", 8)))
+
+    print(f"\n[{protocol_name}] 分类结果:")
+    print(f"  非周期地址文件: {len(group_non)} 个")
+
+    for addr, rows in group_non.items():
+        rows.sort(key=lambda x: x[0])
+        fname = non_pattern.format(addr=addr)
+        fpath = os.path.join(out_dir, fname)
+        digest = records_digest(rows)
+        if skip_unchanged(protocol_name, manifest, fpath, digest, result):
+            continue
+        try:
+            with LineSink(fpath) as sink:
+                sink.write_lines(
+                    f"{t:.3f}\t{switch_hex_value(switch_value, switch_type)}"
+                    for t, hexlist, switch_value, switch_type in rows
+                )
+            print(f"  [{protocol_name}] 写入文件: {fname}")
+            result["files"].append(fpath)
+            manifest.record(fpath, digest)
+        except PermissionError as exc:
+            print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
+            result["errors"].append((fpath, str(exc)))
+        except Exception as exc:
+            print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
+            result["errors"].append((fpath, str(exc)))
+
+    return out_dir
+
+
+def export_protocol(spec, out_dir, bucket_index, result, templates=template_manager, max_workers=None,
+                    incremental=True):
+    """按协议配置导出到out_dir，返回输出目录，没有可导出的步骤时返回None
+
+    内容未变化的文件保留不动，只写出有变化的文件并删除过期的txt（见ExportManifest，
+    incremental为False时重写全部文件）；max_workers为总线协议同时写出分组文件的进程数（见write_group_files）。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = ExportManifest(out_dir, spec.get("protocol_key", ""), incremental)
+    result_dir = _export_protocol_files(spec, out_dir, bucket_index, result, templates, max_workers, manifest)
+    manifest.finish()
+    return result_dir
+
+
+def _export_protocol_files(spec, out_dir, bucket_index, result, templates, max_workers, manifest):
+    protocol_name = spec.get("display_name", spec.get("protocol_key", "未知协议"))
+    step_types = spec.get("step_types", {})
+    non_types = set(step_types.get("non", set()))
+    per_types = set(step_types.get("per", set()))
+    relevant_types = non_types | per_types
+    if not relevant_types:
+        return None
+
+    relevant_steps = bucket_index.steps_of_types(relevant_types)
+    if not relevant_steps:
+        print(f"{protocol_name}: 无匹配步骤，跳过导出。")
+        return None
+
+    payloads = []
+    for step in relevant_steps:
+        payload = prepare_step_payload(step, non_types, per_types, bucket_index, templates)
+        if payload:
+            payloads.append(payload)
+
+    if not payloads:
+        print(f"{protocol_name}: 无有效步骤，跳过导出。")
+        return None
+
+    mode = spec.get("mode", "bus").lower()
+    if mode == "uart":
+        return process_uart_protocol(protocol_name, spec, payloads, out_dir, result, manifest)
+    elif mode == "switch":
+        return process_switch_protocol(protocol_name, spec, payloads, out_dir, result, manifest)
+    return process_bus_protocol(protocol_name, spec, payloads, out_dir, result, manifest, max_workers)
+
+
+def _new_result():
+    return {"exported": [], "missing_dirs": [], "files": [], "unchanged": [], "errors": []}
+
+
+def _task_step_types(specs):
+    """导出任务涉及的步骤类型，specs为None表示中断"""
+    if specs is None:
+        return INTERRUPT_STEP_TYPES["non"] | INTERRUPT_STEP_TYPES["per"]
+    step_types = set()
+    for spec in specs:
+        step_types.update(spec.get("step_types", {}).get("non", ()))
+        step_types.update(spec.get("step_types", {}).get("per", ()))
+    return step_types
+
+
+def _run_task(specs, out_dir, bucket_index, templates, max_workers=None, incremental=True):
+    """导出一个输出目录，返回 [(协议显示名, 输出目录或None)], 结果
+
+    输出到同一目录的各协议依次导出（每个协议先清空目录中的txt），specs为None时生成中断port.config。
+    """
+    result = _new_result()
+    if specs is None:
+        return [("中断", process_interrupt_steps(out_dir, bucket_index, result))], result
+    exported = []
+    for spec in specs:
+        protocol_name = spec.get("display_name", spec.get("protocol_key", ""))
+        exported.append((protocol_name, export_protocol(spec, out_dir, bucket_index, result, templates,
+                                                        max_workers, incremental)))
+    return exported, result
+
+
+def _failed_task(specs, out_dir, exc):
+    """子进程中导出一个目录出错时的结果：错误记入errors，该目录的协议都按无导出内容报告"""
+    print(f"导出目录失败: {out_dir}, 错误: {exc}")
+    result = _new_result()
+    result["errors"].append((out_dir, str(exc)))
+    if specs is None:
+        return [("中断", None)], result
+    return [(spec.get("display_name", spec.get("protocol_key", "")), None) for spec in specs], result
+
+
+def _run_task_in_worker(specs, out_dir, steps, templates, incremental):
+    """子进程中导出一个输出目录，steps为该目录涉及类型的步骤（各目录已在不同进程中，分组文件不再另开进程写出）"""
+    bucket_index = StepBucketIndex()
+    bucket_index.sync(steps)
+    return _run_task(specs, out_dir, bucket_index, templates, 1, incremental)
+
+
+def export_txts(steps, protocol_dirs, bucket_index=None, templates=template_manager,
+                max_workers=None, on_protocol_done=None, incremental=True):
+    """导出steps到各协议的输出目录（protocol_dirs: 协议 -> 目录，键见PROTOCOL_KEYS，未配置的协议不导出）
+
+    bucket_index为已与steps同步的StepBucketIndex（如DataModel.step_buckets()），为None时按steps新建。
+    各输出目录互不相关，有步骤要导出的目录不少于PARALLEL_MIN_DIRS个时在进程池中同时导出
+    （进程数默认不超过CPU核数，max_workers=1时逐个导出），只有一个目录时其中的分组文件同时写出；
+    每个协议完成时调用on_protocol_done(协议显示名, 输出目录或None)。
+    子进程中导出某个目录出错时错误记入errors；进程池不可用时尚未完成的目录改在当前进程中导出。
+    默认只重写内容有变化的文件（见ExportManifest），incremental为False时重写全部文件。
+    返回结果的顺序固定，与逐个导出时相同：
+    {"exported": [(协议显示名, 输出目录或文件)], "missing_dirs": [未配置输出目录的协议显示名],
+     "files": [写出的文件], "unchanged": [内容未变化、保留的文件], "errors": [(文件或输出目录, 错误信息)]}
+    """
+    if bucket_index is None:
+        # 按step_type/站点子地址/忽略标志分桶，各协议直接取对应的步骤，不再逐个扫描全部步骤
+        bucket_index = StepBucketIndex()
+        bucket_index.sync(steps)
+    result = _new_result()
+    specs_by_dir = {}  # 输出目录 -> 协议配置列表（保持PROTOCOL_SPECS中的顺序）
+    for spec in PROTOCOL_SPECS:
+        out_dir = resolve_output_dir(protocol_dirs.get(spec.get("protocol_key", "")))
+        if out_dir:
+            specs_by_dir.setdefault(out_dir, []).append(spec)
+        elif spec.get("strict_path", False):
+            result["missing_dirs"].append(spec.get("display_name", spec.get("protocol_key", "")))
+    # 中断只写port.config、不清空目录，与其它协议共用目录时也可同时导出
+    tasks = [(specs, out_dir) for out_dir, specs in specs_by_dir.items()]
+    tasks.append((None, resolve_output_dir(protocol_dirs.get("interrupt"))))
+    tasks = [(specs, out_dir, bucket_index.steps_of_types(_task_step_types(specs))) for specs, out_dir in tasks]
+
+    task_results = [None] * len(tasks)
+
+    def finish(pos, task_result):
+        task_results[pos] = task_result
+        if on_protocol_done is not None:
+            for protocol_name, result_dir in task_result[0]:
+                on_protocol_done(protocol_name, result_dir)
+
+    busy = [pos for pos, (_, out_dir, task_steps) in enumerate(tasks) if out_dir and task_steps]
+    workers = max_workers or min(len(busy), os.cpu_count() or 1)
+    if len(busy) >= PARALLEL_MIN_DIRS and workers > 1:
+        from concurrent.futures import as_completed
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with _process_pool(workers) as pool:
+                futures = {pool.submit(_run_task_in_worker, *tasks[pos], templates, incremental): pos for pos in busy}
+                for future in as_completed(futures):
+                    pos = futures[future]
+                    try:
+                        task_result = future.result()
+                    except BrokenProcessPool:
+                        continue  # 子进程异常退出，该目录下面在当前进程中导出
+                    except Exception as e:
+                        task_result = _failed_task(tasks[pos][0], tasks[pos][1], e)
+                    finish(pos, task_result)
+        except Exception as e:
+            # 无法创建进程池时（如受限环境）退回当前进程导出
+            print(f"并行导出失败，未完成的目录改为逐个导出: {e}")
+    # 只导出尚无结果的目录，已完成的目录不重复导出、不重复回调
+    for pos, (specs, out_dir, _) in enumerate(tasks):
+        if task_results[pos] is None:
+            finish(pos, _run_task(specs, out_dir, bucket_index, templates, max_workers, incremental))
+
+    # 按PROTOCOL_SPECS的顺序汇总，与完成先后无关
+    order = {spec.get("display_name", spec.get("protocol_key", "")): pos for pos, spec in enumerate(PROTOCOL_SPECS)}
+    exported = []
+    for task_exported, task_result in task_results:
+        exported.extend(item for item in task_exported if item[1])
+        result["files"].extend(task_result["files"])
+        result["unchanged"].extend(task_result["unchanged"])
+        result["errors"].extend(task_result["errors"])
+    result["exported"] = sorted(exported, key=lambda item: order.get(item[0], len(order)))
+    return result
@@ -3,28 +3,117 @@ import xml.etree.ElementTree as ET
 import json
 import struct
 import uuid
-from PyQt5.QtCore import QStandardPaths
-from PyQt5.QtWidgets import (QFileDialog, QMessageBox,
+import copy
+import stat
+import tempfile
+from PyQt5.QtCore import QStandardPaths, QThread, Qt, pyqtSignal
+from PyQt5.QtWidgets import (QApplication, QFileDialog, QMessageBox, QProgressDialog,
 )
-from models.step_model import StepModel
+from models.step_model import FIELD_DECODERS, LazyDetails, StepModel, decode_field_text
+from models.periodic_table import CHUNK_ROWS, PeriodicTable
 from models.template_manager import template_manager
+from controllers.config_scanner import scan_config_steps
+from controllers.export_engine import PROTOCOL_KEYS, export_txts
 from config import (
     GLINK_TEST_HEADER, DEFAULT_TIMEOUT_KEY, MAX_RETRIES_KEY, ENVIRONMENT_KEY,
     STEP_NAME_KEY, STEP_TIME_KEY, STEP_PROTOCOL_KEY, STEP_DATA_FORMAT_KEY,
     STEP_DATA_CONTENT_KEY, STEP_EXPECT_KEY, HEX_FORMAT, BINARY_FORMAT
 )
 import traceback
-from xml.dom import minidom
 import os
+import io
+import weakref
+from sys import intern
 from utils.glink_config import get_glink_config
 from views.global_config_view import ConfigManager
-from utils.protocol_template_utils import (
-    calc_crc_tail_metrics,
-    calc_serial_extended_metrics,
-    calc_serial_standard_metrics,
-    normalize_data_region_value,
+from utils.protocol_template_utils import glink_crc16_rows
+from utils.xml_writer import XmlStreamWriter
+from utils.flow_db import (
+    FLOW_DB_EXTENSION,
+    element_to_entry,
+    is_flow_db,
+    is_flow_db_path,
+    LoadCancelled,
+    read_flow_db,
+    read_xml_document,
+    write_flow_db,
+    write_step_entry,
+    xml_roundtrip_entry,
 )
 
+# 保存配置时的文件写缓冲区大小
+SAVE_BUFFER_SIZE = 1 << 20
+# 周期GLINK按行展开时追加到expand中的分组字段
+PERIODIC_GROUP_KEYS = ("periodic_group_id", "periodic_group_index", "periodic_group_first")
+# 后台保存时每写出多少个未修改步骤上报一次进度
+SAVE_PROGRESS_INTERVAL = 200
+# 加载flowdb时每处理多少个步骤上报一次进度
+LOAD_PROGRESS_INTERVAL = 200
+# 打开/保存对话框的文件类型
+CONFIG_FILE_FILTER = "流程配置文件 (*.xml)"
+FLOW_DB_FILE_FILTER = f"流程数据库文件 (*{FLOW_DB_EXTENSION})"
+
+
+class ConfigSaveThread(QThread):
+    """后台保存线程：把界面线程生成的快照写入临时文件，完成后替换目标文件"""
+    save_progress = pyqtSignal(int, int)
+    save_done = pyqtSignal(str)
+    save_error = pyqtSignal(str)
+    save_cancelled = pyqtSignal(str)
+
+    def __init__(self, controller, snapshot, file_path):
+        super().__init__()
+        self.controller = controller
+        self.snapshot = snapshot
+        self.file_path = file_path
+        self.rendered = []  # (step, version, XML片段或保存条目)，保存完成后由界面线程写入缓存
+
+    def run(self):
+        try:
+            completed = self.controller._write_snapshot_atomic(
+                self.snapshot,
+                self.file_path,
+                progress=self.save_progress.emit,
+                cancelled=self.isInterruptionRequested,
+                rendered=self.rendered,
+            )
+        except Exception as e:
+            print(traceback.format_exc())
+            self.save_error.emit(str(e))
+            return
+        if completed:
+            self.save_done.emit(self.file_path)
+        else:
+            self.save_cancelled.emit(self.file_path)
+
+
+class ExportThread(QThread):
+    """后台导出线程：在界面线程之外调用export_txts，导出结果交回界面线程提示"""
+    export_done = pyqtSignal(object)
+    export_error = pyqtSignal(str)
+
+    def __init__(self, steps, protocol_dirs, bucket_index, templates):
+        super().__init__()
+        self.steps = steps
+        self.protocol_dirs = protocol_dirs
+        self.bucket_index = bucket_index
+        self.templates = templates
+
+    @staticmethod
+    def _protocol_done(protocol_name, result_dir):
+        print(f"{protocol_name} 导出完成: {result_dir}" if result_dir else f"{protocol_name} 无导出内容")
+
+    def run(self):
+        try:
+            result = export_txts(self.steps, self.protocol_dirs, self.bucket_index, self.templates,
+                                 on_protocol_done=self._protocol_done)
+        except Exception as e:
+            print(traceback.format_exc())
+            self.export_error.emit(str(e))
+            return
+        self.export_done.emit(result)
+
+
 class FileController:
     def __init__(self, model, main_window, global_controller, 
                  window_controller, step_list_controller, step_detail_controller):
@@ -36,6 +125,13 @@ class FileController:
         self.step_list_controller = step_list_controller  # 步骤列表控制器
         self.step_detail_controller = step_detail_controller
         self.template_manager = template_manager
+        # 步骤 -> (version, 已序列化的XML片段)，保存时未修改的步骤直接复用
+        self._step_fragments = weakref.WeakKeyDictionary()
+        # 步骤 -> (version, 保存条目)，保存为flowdb时未修改的步骤直接复用
+        self._step_entries = weakref.WeakKeyDictionary()
+        self._save_thread = None  # 正在进行的后台保存
+        self._queued_saves = []  # 保存进行中收到的保存请求 [(文件路径, [回调])]
+        self._export_thread = None  # 正在进行的后台导出
         
     # 负责文件保存、打开等逻辑
 
@@ -91,495 +187,16 @@ class FileController:
         self.window_controller.update_window_title()
 
     def save_to_file(self, file_path):
-        """保存到指定XML文件"""
+        """保存到指定文件（扩展名为.flowdb时保存为数据库格式，否则为XML），在当前线程中同步完成
+
+        返回写入文件的保存快照（见_take_save_snapshot），保存失败时返回None。
+        """
         ##目前打开保存后的文件再添加中断或开关量还会有data_region字段
         try:
-            import json  # 确保json模块在函数内部可用
-            self.global_controller.update_global_model()
-            root = ET.Element("config")
-            config_manager = ConfigManager()
-            protocol_configs = config_manager.get_all_protocol_configs()
-
-            # 保存路径设置（12条路径）
-            if protocol_configs:
-                path_elem = ET.SubElement(root, "path_settings")
-                for proto, cfg in protocol_configs.items():
-                    proto_elem = ET.SubElement(path_elem, "protocol")
-                    proto_elem.set("name", proto)
-                    keys_to_save = ("input_path", "output_path", "config_path")
-                    if proto == "interrupt":
-                        keys_to_save = ("output_path",)
-                    for key in keys_to_save:
-                        value = cfg.get(key, "")
-                        value = "" if value is None else str(value)
-                        sub_elem = ET.SubElement(proto_elem, key)
-                        sub_elem.text = value
-                        root.set(f"{proto}_{key}", value)
-                # 兼容旧字段：使用当前协议的路径写入通用属性
-                try:
-                    current_proto = self.global_controller.global_view.get_current_protocol_key()
-                except Exception:
-                    current_proto = "glink"
-                active_cfg = protocol_configs.get(current_proto, {})
-                if current_proto == "interrupt":
-                    keys_to_copy = ("output_path",)
-                else:
-                    keys_to_copy = ("input_path", "output_path", "config_path")
-                for key in keys_to_copy:
-                    value = active_cfg.get(key, "")
-                    if value is not None:
-                        root.set(key, str(value))
-                self.model.global_params["protocols"] = protocol_configs
-
-            # 全局参数
-            global_elem = ET.SubElement(root, "global_params")
-            for k, v in self.model.global_params.items():
-                if k == "protocols":
-                    continue
-                param = ET.SubElement(global_elem, k)
-                param.text = str(v)
-
-            # 步骤
-            # steps_elem = ET.SubElement(root, "steps")
-            # for step in self.model.steps:
-            #     step_elem = ET.SubElement(steps_elem, "step")
-            #     for k, v in step.items():
-            #         field = ET.SubElement(step_elem, k)
-            #         field.text = str(v)
-
-            ####
-            steps_elem = ET.SubElement(root, "steps")
-            for step in self.model.steps:
-                # 检查是否是周期GLINK且包含文件数据
-                step_type = step.get_base_step_data().get("step_type", -1)
-                expand_data = step.get_expand_step_data()
-                periodic_file_data = expand_data.get("periodic_file_data")
-                
-                # 只处理周期GLINK (step_type == 1) 且有文件数据的情况
-                if step_type == 1 and periodic_file_data:  # glink_fileds_periodic
-                    print(f"检测到周期GLINK步骤，包含 {len(periodic_file_data)} 行数据，开始展开...")
-                    # 展开为多个步骤
-                    base_data = step.get_base_step_data()
-                    type_data = step.get_type_step_data()
-                    file_path_value = type_data.get("file_path") or expand_data.get("periodic_file_path")
-                    period_value = type_data.get("period")
-                    group_id = expand_data.get("periodic_group_id")
-                    if not group_id:
-                        group_id = f"periodic_{uuid.uuid4().hex}"
-                        expand_data["periodic_group_id"] = group_id
-                    if file_path_value:
-                        expand_data["periodic_file_path"] = file_path_value
-                        type_data["file_path"] = file_path_value
-                    
-                    # 第一行的time来自base_step_data中的time（仿真时间）
-                    first_time = float(base_data.get("time", 0.0))
-                    period = float(period_value if period_value not in (None, "") else 0.0)
-                    
-                    for row_idx, row_data in enumerate(periodic_file_data):
-                        step_elem = ET.SubElement(steps_elem, "step")
-                        
-                        # 保存base字典（更新time字段：第一行=first_time，往后每行+period）
-                        base_elem = ET.SubElement(step_elem, "base")
-                        base_data_copy = base_data.copy()
-                        base_data_copy["time"] = first_time + row_idx * period
-                        for k, v in base_data_copy.items():
-                            print(f"save field: {k} value: {v}")
-                            field = ET.SubElement(base_elem, k)
-                            field.text = str(v)
-                        
-                        # 保存type字典（更新data_region，移除start_time、period、file_path）
-                        type_elem = ET.SubElement(step_elem, "type")
-                        type_data_copy = {}
-                        for k, v in type_data.items():
-                            # 跳过start_time字段，period/file_path需要保存
-                            if k in ("start_time",):
-                                continue
-                            type_data_copy[k] = v
-                        if file_path_value is not None:
-                            type_data_copy["file_path"] = file_path_value
-                        if period_value is not None:
-                            type_data_copy["period"] = period_value
-                        
-                        # 设置data_region为当前行的数据
-                        type_data_copy["data_region"] = row_data
-                        
-                        for k, v in type_data_copy.items():
-                            print(f"save field: {k} value: {v}")
-                            field = ET.SubElement(type_elem, k)
-                            if k == "data_region":
-                                if isinstance(v, (list, dict)):
-                                    if v:  # 非空列表或字典
-                                        field.text = json.dumps(v, ensure_ascii=False)
-                                    else:  # 空列表或字典
-                                        field.text = "[]"
-                                elif v is None:
-                                    field.text = "None"
-                                else:
-                                    field.text = str(v)
-                            else:
-                                # 对于local_site、recip_site、sub_address字段，直接保存字符串（保留16进制格式）
-                                field.text = str(v)
-                        
-                        # 保存expand字典（移除periodic_file_data，追加分组信息）
-                        expand_elem = ET.SubElement(step_elem, "expand")
-                        for k, v in expand_data.items():
-                            if k in ("periodic_file_data", "periodic_file_path"):
-                                continue
-                            print(f"save field: {k} value: {v}")
-                            field = ET.SubElement(expand_elem, k)
-                            field.text = str(v)
-                        field = ET.SubElement(expand_elem, "periodic_group_id")
-                        field.text = group_id
-                        field = ET.SubElement(expand_elem, "periodic_group_index")
-                        field.text = str(row_idx)
-                        field = ET.SubElement(expand_elem, "periodic_group_first")
-                        field.text = "1" if row_idx == 0 else "0"
-                        if file_path_value:
-                            field = ET.SubElement(expand_elem, "periodic_file_path")
-                            field.text = str(file_path_value)
-                        
-                        # 保存protocol_data字典
-                        protocol_elem = ET.SubElement(step_elem, "protocol")
-                        # 检查协议类型，如果为-1（无），则不保存protocol_data
-                        protocol_type = step.get_type_step_data().get("protocol_type", -1)
-                        if protocol_type == -1:
-                            # 协议类型为"无"，清空protocol_data并只保存空的protocol元素
-                            step.set_protocol_data({})
-                            print("协议类型为'无'，已清空protocol_data（周期步骤）")
-                        else:
-                            # 设置协议数据
-                            protocol_data = step.get_protocol_data()
-                            
-                            # 检查是否需要计算CRC
-                            ctrl_word_str = protocol_data.get("消息控制字", "0")
-                            try:
-                                if isinstance(ctrl_word_str, str):
-                                    ctrl_word_str = ctrl_word_str.strip().lower().replace('×', 'x').replace('Ｘ', 'x')
-                                    if ctrl_word_str.startswith('0x'):
-                                        ctrl_word = int(ctrl_word_str, 16)
-                                    else:
-                                        ctrl_word = int(ctrl_word_str, 16) if all(c in '0123456789abcdef' for c in ctrl_word_str) else int(float(ctrl_word_str))
-                                else:
-                                    ctrl_word = int(ctrl_word_str)
-                                
-                                # 如果需要计算CRC（位1=1），则重新计算
-                                if (ctrl_word & 0x02) == 0x02:
-                                    # 不再自动更新协议时间，保持用户输入的值不变
-                                    
-                                    # 实现与StepDetailView.calc_glink_fields方法相同的CRC计算逻辑
-                                    try:
-                                        def safe_hex_to_int(s):
-                                            """安全地将十六进制字符串转换为整数"""
-                                            if isinstance(s, (int, float)):
-                                                return int(s)
-                                            s = str(s).strip().lower().replace('×', 'x').replace('Ｘ', 'x')
-                                            if not s:
-                                                return 0
-                                            if s.startswith('0x'):
-                                                return int(s, 16)
-                                            try:
-                                                return int(s, 16) if all(c in '0123456789abcdef' for c in s) else int(float(s))
-                                            except (ValueError, TypeError):
-                                                return 0
-                                        
-                                        # CRC-16/CCITT查表法
-                                        crc_ta = [
-                                            0x0000, 0x1021, 0x2042, 0x3063, 0x4084, 0x50a5, 0x60c6, 0x70e7,
-                                            0x8108, 0x9129, 0xa14a, 0xb16b, 0xc18c, 0xd1ad, 0xe1ce, 0xf1ef,
-                                            0x1231, 0x0210, 0x3273, 0x2252, 0x52b5, 0x4294, 0x72f7, 0x62d6,
-                                            0x9339, 0x8318, 0xb37b, 0xa35a, 0xd3bd, 0xc39c, 0xf3ff, 0xe3de,
-                                            0x2462, 0x3443, 0x0420, 0x1401, 0x64e6, 0x74c7, 0x44a4, 0x5485,
-                                            0xa56a, 0xb54b, 0x8528, 0x9509, 0xe5ee, 0xf5cf, 0xc5ac, 0xd58d,
-                                            0x3653, 0x2672, 0x1611, 0x0630, 0x76d7, 0x66f6, 0x5695, 0x46b4,
-                                            0xb75b, 0xa77a, 0x9719, 0x8738, 0xf7df, 0xe7fe, 0xd79d, 0xc7bc,
-                                            0x48c4, 0x58e5, 0x6886, 0x78a7, 0x0840, 0x1861, 0x2802, 0x3823,
-                                            0xc9cc, 0xd9ed, 0xe98e, 0xf9af, 0x8948, 0x9969, 0xa90a, 0xb92b,
-                                            0x5af5, 0x4ad4, 0x7ab7, 0x6a96, 0x1a71, 0x0a50, 0x3a33, 0x2a12,
-                                            0xdbfd, 0xcbdc, 0xfbbf, 0xeb9e, 0x9b79, 0x8b58, 0xbb3b, 0xab1a,
-                                            0x6ca6, 0x7c87, 0x4ce4, 0x5cc5, 0x2c22, 0x3c03, 0x0c60, 0x1c41,
-                                            0xedae, 0xfd8f, 0xcdec, 0xddcd, 0xad2a, 0xbd0b, 0x8d68, 0x9d49,
-                                            0x7e97, 0x6eb6, 0x5ed5, 0x4ef4, 0x3e13, 0x2e32, 0x1e51, 0x0e70,
-                                            0xff9f, 0xefbe, 0xdfdd, 0xcffc, 0xbf1b, 0xaf3a, 0x9f59, 0x8f78,
-                                            0x9188, 0x81a9, 0xb1ca, 0xa1eb, 0xd10c, 0xc12d, 0xf14e, 0xe16f,
-                                            0x1080, 0x00a1, 0x30c2, 0x20e3, 0x5004, 0x4025, 0x7046, 0x6067,
-                                            0x83b9, 0x9398, 0xa3fb, 0xb3da, 0xc33d, 0xd31c, 0xe37f, 0xf35e,
-                                            0x02b1, 0x1290, 0x22f3, 0x32d2, 0x4235, 0x5214, 0x6277, 0x7256,
-                                            0x7367, 0x6346, 0x5325, 0x4304, 0x33e3, 0x23c2, 0x13a1, 0x0380,
-                                            0xf26f, 0xe24e, 0xd22d, 0xc20c, 0xb2eb, 0xa2ca, 0x92a9, 0x8288,
-                                            0x7156, 0x6177, 0x5114, 0x4135, 0x31d2, 0x21f3, 0x1190, 0x01b1,
-                                            0xf05e, 0xe07f, 0xd01c, 0xc03d, 0xb0da, 0xa0fb, 0x9098, 0x80b9,
-                                            0x47c5, 0x57e4, 0x6787, 0x77a6, 0x0741, 0x1760, 0x2703, 0x3722,
-                                            0xc6cd, 0xd6ec, 0xe68f, 0xf6ae, 0x8649, 0x9668, 0xa60b, 0xb62a,
-                                            0x45f4, 0x55d5, 0x65b6, 0x7597, 0x0570, 0x1551, 0x2532, 0x3513,
-                                            0xc4fc, 0xd4dd, 0xe4be, 0xf49f, 0x8478, 0x9459, 0xa43a, 0xb41b,
-                                            0x4b63, 0x5b42, 0x6b21, 0x7b00, 0x0be7, 0x1bc6, 0x2ba5, 0x3b84,
-                                            0xca6b, 0xda4a, 0xea29, 0xfa08, 0x8aef, 0x9ace, 0xaaad, 0xba8c,
-                                            0x4952, 0x5973, 0x6910, 0x7931, 0x09d6, 0x19f7, 0x2994, 0x39b5,
-                                            0xc85a, 0xd87b, 0xe818, 0xf839, 0x88de, 0x98ff, 0xa89c, 0xb8bd,
-                                            0x4f21, 0x5f00, 0x6f63, 0x7f42, 0x0fa5, 0x1f84, 0x2fe7, 0x3fc6,
-                                            0xce29, 0xde08, 0xee6b, 0xfe4a, 0x8ead, 0x9e8c, 0xaeef, 0xbece,
-                                            0x4d10, 0x5d31, 0x6d52, 0x7d73, 0x0d94, 0x1db5, 0x2dd6, 0x3df7,
-                                            0xcc18, 0xdc39, 0xec5a, 0xfc7b, 0x8c9c, 0x9cbd, 0xacde, 0xbcff,
-                                        ]
-                                        
-                                        def update_crc_with_value(crc_val, value, byte_count):
-                                            """将值按字节加入CRC计算"""
-                                            for i in range(byte_count):
-                                                byte_val = (value >> (8 * (byte_count - 1 - i))) & 0xFF
-                                                idx = ((crc_val >> 8) ^ byte_val) & 0xFF
-                                                if 0 <= idx < len(crc_ta):
-                                                    crc_val = ((crc_val << 8) ^ crc_ta[idx]) & 0xFFFF
-                                            return crc_val
-                                        
-                                        crc = 0xFFFF
-                                        
-                                        # 1. 仿真时间 (time) - UINT32, 4字节
-                                        try:
-                                            step_time = first_time + row_idx * period
-                                            time_val = int(step_time) & 0xFFFFFFFF
-                                            crc = update_crc_with_value(crc, time_val, 4)
-                                            print(f"周期步骤CRC计算: 仿真时间 = {time_val} (0x{time_val:08X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取仿真时间失败: {e}")
-                                        
-                                        # 2. 自身站点号 (local_site) - UINT16
-                                        try:
-                                            # 从原始step的type_data中获取local_site
-                                            local_site_val = 0
-                                            if hasattr(step, "get_type_step_data"):
-                                                local_site_val = safe_hex_to_int(step.get_type_step_data().get("local_site", "0")) & 0xFFFF
-                                            crc = update_crc_with_value(crc, local_site_val, 2)
-                                            print(f"周期步骤CRC计算: 自身站点号 = {local_site_val} (0x{local_site_val:04X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取自身站点号失败: {e}")
-                                        
-                                        # 3. 对方站点号 (recip_site) - UINT16
-                                        try:
-                                            # 从原始step的type_data中获取recip_site
-                                            recip_site_val = 0
-                                            if hasattr(step, "get_type_step_data"):
-                                                recip_site_val = safe_hex_to_int(step.get_type_step_data().get("recip_site", "0")) & 0xFFFF
-                                            crc = update_crc_with_value(crc, recip_site_val, 2)
-                                            print(f"周期步骤CRC计算: 对方站点号 = {recip_site_val} (0x{recip_site_val:04X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取对方站点号失败: {e}")
-                                        
-                                        # 4. 子地址 (sub_address) - UINT16
-                                        try:
-                                            sub_address = protocol_data.get("子地址", "0")
-                                            sub_address_val = safe_hex_to_int(sub_address) & 0xFFFF
-                                            crc = update_crc_with_value(crc, sub_address_val, 2)
-                                            print(f"周期步骤CRC计算: 子地址 = {sub_address_val} (0x{sub_address_val:04X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取子地址失败: {e}")
-                                        
-                                        # 5. GLINK协议时间 - UINT32, 4字节
-                                        try:
-                                            protocol_time_val = int(protocol_data.get("时间", "0")) & 0xFFFFFFFF
-                                            crc = update_crc_with_value(crc, protocol_time_val, 4)
-                                            print(f"周期步骤CRC计算: 协议时间 = {protocol_time_val} (0x{protocol_time_val:08X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取协议时间失败: {e}")
-                                        
-                                        # 6. 消息控制字 - UINT16, 2字节
-                                        crc = update_crc_with_value(crc, ctrl_word, 2)
-                                        print(f"周期步骤CRC计算: 消息控制字 = {ctrl_word} (0x{ctrl_word:04X})")
-                                        
-                                        # 7. 消息ID - UINT16, 2字节
-                                        try:
-                                            msg_id_str = protocol_data.get("消息ID", "0")
-                                            msg_id_val = safe_hex_to_int(msg_id_str) & 0xFFFF
-                                            crc = update_crc_with_value(crc, msg_id_val, 2)
-                                            print(f"周期步骤CRC计算: 消息ID = {msg_id_val} (0x{msg_id_val:04X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取消息ID失败: {e}")
-                                        
-                                        # 8. 帧计数 - UINT16, 2字节
-                                        try:
-                                            frame_count_str = protocol_data.get("帧计数", "0")
-                                            frame_count = safe_hex_to_int(frame_count_str) & 0xFFFF
-                                            crc = update_crc_with_value(crc, frame_count, 2)
-                                            print(f"周期步骤CRC计算: 帧计数 = {frame_count} (0x{frame_count:04X})")
-                                        except Exception as e:
-                                            print(f"周期步骤CRC计算: 获取帧计数失败: {e}")
-                                        
-                                        # 9. 数据区
-                                        data_value = protocol_data.get("数据区", "")
-                                        if data_value:
-                                            # 处理数据区：可能是空格分隔的16进制字符串
-                                            for word in data_value.split():
-                                                try:
-                                                    w = safe_hex_to_int(word)
-                                                    # 按字节计算CRC
-                                                    # 高字节（高8位）
-                                                    idx = ((crc >> 8) ^ (w >> 8)) & 0xFF
-                                                    if 0 <= idx < len(crc_ta):
-                                                        crc = ((crc << 8) ^ crc_ta[idx]) & 0xFFFF
-                                                    # 低字节（低8位）
-                                                    idx = ((crc >> 8) ^ (w & 0xFF)) & 0xFF
-                                                    if 0 <= idx < len(crc_ta):
-                                                        crc = ((crc << 8) ^ crc_ta[idx]) & 0xFFFF
-                                                except (ValueError, IndexError) as e:
-                                                    print(f"周期步骤CRC计算错误: {e}, word={word}")
-                                                    pass
-                                            print(f"周期步骤CRC计算: 数据区已处理")
-                                        
-                                        # 更新协议数据中的CRC字段
-                                        protocol_data["数据区crc校验和"] = f"0x{crc:04X}"
-                                        print(f"为周期步骤重新计算CRC: 第{row_idx+1}行，时间={first_time + row_idx * period}秒，CRC={protocol_data['数据区crc校验和']}")
-                                    except Exception as e:
-                                        print(f"计算CRC时出错: {e}")
-                                        import traceback
-                                        traceback.print_exc()
-                            except (ValueError, TypeError) as e:
-                                print(f"解析消息控制字失败: {ctrl_word_str}, 错误: {e}")
-                            
-                            if protocol_data:
-                                # 检查消息控制字，如果是0x0001或0x0003，添加帧计数属性
-                                ctrl_word_str = protocol_data.get("消息控制字", "0")
-                                try:
-                                    # 安全转换消息控制字
-                                    if isinstance(ctrl_word_str, str):
-                                        ctrl_word_str = ctrl_word_str.strip().lower().replace('×', 'x').replace('Ｘ', 'x')
-                                        if ctrl_word_str.startswith('0x'):
-                                            ctrl_word = int(ctrl_word_str, 16)
-                                        else:
-                                            ctrl_word = int(ctrl_word_str, 16) if all(c in '0123456789abcdef' for c in ctrl_word_str) else int(float(ctrl_word_str))
-                                    else:
-                                        ctrl_word = int(ctrl_word_str)
-                                    
-                                    # 如果消息控制字的位1=1（即0x0002或0x0003），添加帧计数属性
-                                    if (ctrl_word & 0x02) == 0x02:
-                                        protocol_elem.set("帧计数", "true")
-                                        print(f"保存protocol: 消息控制字为0x{ctrl_word:04X}，添加帧计数属性")
-                                except (ValueError, TypeError) as e:
-                                    print(f"保存protocol: 解析消息控制字失败: {ctrl_word_str}, 错误: {e}")
-                                
-                                for k, v in protocol_data.items():
-                                    print(f"save protocol field: {k} value: {v}")
-                                    field = ET.SubElement(protocol_elem, k)
-                                    field.text = str(v) if v is not None else ""
-                else:
-                    # 普通步骤，正常保存
-                    step_elem = ET.SubElement(steps_elem, "step")
-                    
-                    # 保存base字典
-                    base_elem = ET.SubElement(step_elem, "base")
-                    for k, v in step.get_base_step_data().items():
-                        print(f"save field: {k} value: {v}")
-                        field = ET.SubElement(base_elem, k)
-                        field.text = str(v)
-                    
-                    # 保存type字典
-                    type_elem = ET.SubElement(step_elem, "type")
-                    for k, v in step.get_type_step_data().items():
-                        print(f"save field: {k} value: {v}, type: {type(v)}")
-                        field = ET.SubElement(type_elem, k)
-                        # 这里可以用k对应的dtype是否为union代替
-                        # 将union的列表结构序列化为json字段
-                        if k == "data_region":
-                            if isinstance(v, (list, dict)):
-                                if v:  # 非空列表或字典
-                                    field.text = json.dumps(v, ensure_ascii=False)
-                                else:  # 空列表或字典
-                                    field.text = "[]"
-                            elif v is None:
-                                field.text = "None"
-                            else:
-                                field.text = str(v)
-                        elif k in ("local_site", "recip_site", "sub_address", "base_address"):
-                            # 对于这些字段，优先使用全局原始输入字符串，如果没有则使用当前值
-                            raw_input = step.get_raw_input_string(k)
-                            if raw_input is not None:
-                                # 使用全局原始输入字符串保存（保留16进制格式如0x11）
-                                field.text = raw_input
-                                print(f"  保存 {k} 使用原始输入字符串: '{raw_input}'")
-                            elif v is None:
-                                field.text = ""
-                            elif isinstance(v, str):
-                                # 已经是字符串，直接保存（保留0x前缀）
-                                field.text = v
-                                print(f"  保存 {k} 为字符串: '{v}'")
-                            else:
-                                # 如果是数字，转换为字符串（但会丢失16进制格式，这种情况不应该发生）
-                                field.text = str(v)
-                                print(f"  警告：{k} 的值 {v} 不是字符串，转换为 '{field.text}'（可能丢失16进制格式）")
-                        else:
-                            field.text = str(v)
-                    
-                    # 保存expand字典
-                    expand_elem = ET.SubElement(step_elem, "expand")
-                    for k, v in step.get_expand_step_data().items():
-                        if k not in ("periodic_file_data", "periodic_file_path"):  # 不保存临时数据
-                            print(f"save field: {k} value: {v}")
-                            field = ET.SubElement(expand_elem, k)
-                            field.text = str(v)
-                    
-                    # 保存protocol_data字典
-                    protocol_elem = ET.SubElement(step_elem, "protocol")
-                    # 检查协议类型，如果为-1（无），则不保存protocol_data
-                    protocol_type = step.get_type_step_data().get("protocol_type", -1)
-                    if protocol_type == -1:
-                        # 协议类型为"无"，清空protocol_data并只保存空的protocol元素
-                        step.set_protocol_data({})
-                        print("协议类型为'无'，已清空protocol_data")
-                    else:
-                        protocol_data = step.get_protocol_data()
-                        if protocol_data:
-                            # 检查消息控制字，如果是0x0001或0x0003，添加帧计数属性
-                            ctrl_word_str = protocol_data.get("消息控制字", "0")
-                            try:
-                                # 安全转换消息控制字
-                                if isinstance(ctrl_word_str, str):
-                                    ctrl_word_str = ctrl_word_str.strip().lower().replace('×', 'x').replace('Ｘ', 'x')
-                                    if ctrl_word_str.startswith('0x'):
-                                        ctrl_word = int(ctrl_word_str, 16)
-                                    else:
-                                        ctrl_word = int(ctrl_word_str, 16) if all(c in '0123456789abcdef' for c in ctrl_word_str) else int(float(ctrl_word_str))
-                                else:
-                                    ctrl_word = int(ctrl_word_str)
-                                
-                                # 如果消息控制字的位1=1（即0x0002或0x0003），添加帧计数属性
-                                if (ctrl_word & 0x02) == 0x02:
-                                    protocol_elem.set("帧计数", "true")
-                                    print(f"保存protocol: 消息控制字为0x{ctrl_word:04X}，添加帧计数属性")
-                            except (ValueError, TypeError) as e:
-                                print(f"保存protocol: 解析消息控制字失败: {ctrl_word_str}, 错误: {e}")
-                            
-                            for k, v in protocol_data.items():
-                                print(f"save protocol field: {k} value: {v}")
-                                field = ET.SubElement(protocol_elem, k)
-                                field.text = str(v) if v is not None else ""
-
-
-            ####
-
-            # tree = ET.ElementTree(root)
-            # tree.write(file_path, encoding="utf-8", xml_declaration=True)
-
-
-            #####
-            # 创建XML树
-            tree = ET.ElementTree(root)
-            
-            # 使用minidom美化XML输出
-            rough_string = ET.tostring(root, encoding="utf-8", method="xml")
-            reparsed = minidom.parseString(rough_string)
-            
-            # 使用2空格缩进
-            pretty_xml = reparsed.toprettyxml(indent="  ", encoding="utf-8")
-            
-            # 移除多余的空白行（minidom会添加空行）
-            pretty_xml_str = b'\n'.join(
-                line for line in pretty_xml.splitlines() 
-                if line.strip()
-            ).decode("utf-8")
-            
-            # 写入文件
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(pretty_xml_str)
-
-            #####
+            snapshot = self._take_save_snapshot(file_path)
+            rendered = []
+            self._write_snapshot_atomic(snapshot, file_path, rendered=rendered)
+            self._store_step_fragments(rendered)
 
             self.model.reset_dirty()
             QMessageBox.information(
@@ -587,14 +204,685 @@ class FileController:
                 "保存成功",
                 f"配置已保存到: {file_path}"
             )
+            return snapshot
+        except Exception as e:
+            print(traceback.format_exc())
+            QMessageBox.critical(
+                self.main_window,
+                "保存错误",
+                f"保存文件时出错: {str(e)}"
+            )
+            return None
+
+    def save_to_file_async(self, file_path, on_saved=None):
+        """在后台线程中保存到指定文件，界面保持响应；保存成功后调用on_saved(file_path, snapshot)，
+        snapshot为写入文件的保存快照
+
+        已有保存任务正在进行时排队，等当前保存结束后再按当时的模型生成快照保存。
+        """
+        if self.is_saving():
+            self._queue_save(file_path, on_saved)
+            return
+        try:
+            snapshot = self._take_save_snapshot(file_path)
         except Exception as e:
-            import traceback  # 确保traceback模块可用
             print(traceback.format_exc())
             QMessageBox.critical(
                 self.main_window,
                 "保存错误",
                 f"保存文件时出错: {str(e)}"
             )
+            return
+
+        total = len(snapshot["steps"])
+        progress = QProgressDialog("正在保存流程配置...", "取消", 0, total, self.main_window)
+        progress.setWindowTitle("保存")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+
+        thread = ConfigSaveThread(self, snapshot, file_path)
+        self._save_thread = thread
+
+        def on_progress(done, count):
+            progress.setValue(done)
+
+        def on_done(path):
+            progress.close()
+            self._store_step_fragments(thread.rendered)
+            # 保存期间模型未再修改时才清除修改标志
+            if self._snapshot_is_current(snapshot):
+                self.model.reset_dirty()
+            if self.window_controller:
+                self.window_controller.update_window_title()
+            QMessageBox.information(
+                self.main_window,
+                "保存成功",
+                f"配置已保存到: {path}"
+            )
+            if callable(on_saved):
+                on_saved(path, snapshot)
+
+        def on_error(message):
+            progress.close()
+            QMessageBox.critical(
+                self.main_window,
+                "保存错误",
+                f"保存文件时出错: {message}"
+            )
+
+        def on_cancelled(path):
+            progress.close()
+            print(f"保存已取消，原文件未改动: {path}")
+
+        thread.save_progress.connect(on_progress)
+        thread.save_done.connect(on_done)
+        thread.save_error.connect(on_error)
+        thread.save_cancelled.connect(on_cancelled)
+        progress.canceled.connect(thread.requestInterruption)
+        # 线程结束后（无论成功、出错或取消）再开始排队的保存
+        thread.finished.connect(lambda: self._start_queued_save(thread))
+        thread.start()
+
+    def _queue_save(self, file_path, on_saved):
+        """记下保存进行中收到的保存请求，连续请求保存到同一文件时合并为一次"""
+        queued = self._queued_saves
+        if queued and queued[-1][0] == file_path:
+            callbacks = queued[-1][1]
+        else:
+            callbacks = []
+            queued.append((file_path, callbacks))
+        if callable(on_saved):
+            callbacks.append(on_saved)
+        print(f"已有保存任务正在进行，完成后再保存: {file_path}")
+
+    def _pop_queued_save(self):
+        """取出最早排队的保存请求 (文件路径, 回调列表)，没有时返回None"""
+        return self._queued_saves.pop(0) if self._queued_saves else None
+
+    def _start_queued_save(self, finished_thread):
+        """上一个保存线程结束后开始最早排队的保存，重新生成快照"""
+        # finished信号送达时线程可能尚未完全退出，isRunning()仍为True
+        finished_thread.wait()
+        if self.is_saving():
+            return
+        request = self._pop_queued_save()
+        if request is None:
+            return
+        file_path, callbacks = request
+
+        def on_saved(path, snapshot):
+            for callback in callbacks:
+                callback(path, snapshot)
+
+        self.save_to_file_async(file_path, on_saved=on_saved if callbacks else None)
+
+    def is_saving(self):
+        """是否有后台保存任务正在进行"""
+        thread = getattr(self, "_save_thread", None)
+        return thread is not None and thread.isRunning()
+
+    def wait_for_pending_save(self):
+        """等待后台保存任务结束，并在当前线程中完成排队的保存（关闭窗口前调用）"""
+        thread = getattr(self, "_save_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.wait()
+        request = self._pop_queued_save()
+        while request is not None:
+            file_path, callbacks = request
+            snapshot = self.save_to_file(file_path)
+            if snapshot is not None:
+                for callback in callbacks:
+                    callback(file_path, snapshot)
+            request = self._pop_queued_save()
+
+    def _take_save_snapshot(self, file_path):
+        """在界面线程中生成保存快照，后台线程只读取快照，不再访问模型
+
+        未修改的步骤直接引用上次保存缓存的XML片段（flowdb为保存条目）或读出时的原始条目
+        （未加载的步骤不会因保存而加载），只有修改过的步骤复制一份数据，由后台线程序列化。
+        """
+        self.global_controller.update_global_model()
+        root_attrs, path_settings = self._collect_path_settings()
+        global_fields = [
+            (k, str(v)) for k, v in self.model.global_params.items() if k != "protocols"
+        ]
+        save_as_db = is_flow_db_path(file_path)
+        steps = []
+        for step in self.model.steps:
+            if step.is_loaded():
+                # 未加载的步骤保存的是读出时的原始条目，无需整理
+                self._prepare_step_for_save(step)
+            cached = (self._step_entries if save_as_db else self._step_fragments).get(step)
+            source = step.source_entry()
+            if cached is not None and cached[0] == step.version:
+                steps.append((step, step.version, cached[1], None))
+            elif source is not None:
+                steps.append((step, step.version, source, None))
+            else:
+                steps.append((step, step.version, None, self._copy_step_for_save(step)))
+        # steps中每项为 (步骤, version, 缓存的XML片段或保存条目或None, 修改过的步骤的副本或None)
+        return {
+            "root_attrs": root_attrs,
+            "path_settings": path_settings,
+            "global_fields": global_fields,
+            "steps": steps,
+            "format": "flowdb" if save_as_db else "xml",
+            "file_mode": self._target_file_mode(file_path),
+        }
+
+    @staticmethod
+    def _target_file_mode(file_path):
+        """替换后文件应有的权限：沿用原文件权限，新文件按umask"""
+        try:
+            return stat.S_IMODE(os.stat(file_path).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    @staticmethod
+    def _copy_step_for_save(step):
+        """深拷贝步骤的各数据（含data_region等嵌套的列表和字典），供后台线程序列化
+
+        PeriodicTable的深拷贝返回自身，周期数据表仍与模型共用。
+        """
+        step_copy = copy.copy(step)
+        step_copy.base_step_data = copy.deepcopy(step.get_base_step_data())
+        step_copy.type_step_data = copy.deepcopy(step.get_type_step_data())
+        step_copy.expand_step_data = copy.deepcopy(step.get_expand_step_data())
+        step_copy.protocol_data = copy.deepcopy(step.get_protocol_data())
+        step_copy.raw_input_strings = copy.deepcopy(step.raw_input_strings)
+        return step_copy
+
+    def _snapshot_is_current(self, snapshot):
+        """快照之后模型中的步骤是否未再变化"""
+        steps = self.model.steps
+        if len(steps) != len(snapshot["steps"]):
+            return False
+        return all(
+            step is entry[0] and step.version == entry[1]
+            for step, entry in zip(steps, snapshot["steps"])
+        )
+
+    def _store_step_fragments(self, rendered):
+        """记录本次新序列化的步骤片段（XML片段或flowdb保存条目），下次保存时复用"""
+        for step, version, saved in rendered:
+            cache = self._step_fragments if isinstance(saved, str) else self._step_entries
+            cache[step] = (version, saved)
+
+    def _write_snapshot_atomic(self, snapshot, file_path, progress=None, cancelled=None, rendered=None):
+        """先写入同目录下的临时文件，完成后再用os.replace替换目标文件
+
+        中途出错或取消时删除临时文件，原文件保持不变。返回是否完成保存。
+        """
+        target_dir = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=target_dir
+        )
+        try:
+            if snapshot.get("format") == "flowdb":
+                os.close(fd)
+                completed = self._write_snapshot_db(tmp_path, snapshot, progress, cancelled, rendered)
+                if completed:
+                    with open(tmp_path, "rb+") as f:
+                        os.fsync(f.fileno())
+            else:
+                # 流式写出：各元素生成后直接写入带缓冲的文件，不再在内存中构建整棵树
+                with os.fdopen(fd, "w", encoding="utf-8", buffering=SAVE_BUFFER_SIZE) as f:
+                    completed = self._write_snapshot(f, snapshot, progress, cancelled, rendered)
+                    if completed:
+                        f.flush()
+                        os.fsync(f.fileno())
+            if not completed:
+                os.remove(tmp_path)
+                return False
+            if snapshot.get("file_mode") is not None:
+                os.chmod(tmp_path, snapshot["file_mode"])
+            os.replace(tmp_path, file_path)
+            return True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _write_snapshot(self, fp, snapshot, progress=None, cancelled=None, rendered=None):
+        """将快照流式写入fp，cancelled()返回True时中止并返回False"""
+        writer = XmlStreamWriter(fp)
+        writer.write_declaration()
+        writer.start("config", snapshot["root_attrs"])
+
+        if snapshot["path_settings"] is not None:
+            writer.start("path_settings")
+            for proto, fields in snapshot["path_settings"]:
+                writer.section("protocol", fields, {"name": proto})
+            writer.end()
+
+        # 全局参数
+        writer.section("global_params", snapshot["global_fields"])
+
+        # 步骤：未修改的步骤直接写入缓存的片段或原始条目，其余逐个序列化
+        writer.start("steps")
+        total = len(snapshot["steps"])
+        for idx, (step, version, saved, step_copy) in enumerate(snapshot["steps"]):
+            if cancelled is not None and cancelled():
+                return False
+            if isinstance(saved, dict):
+                write_step_entry(writer, saved)
+            else:
+                if saved is None:
+                    buf = io.StringIO()
+                    self._serialize_step(XmlStreamWriter(buf, depth=writer.depth, first_line=False), step_copy)
+                    saved = buf.getvalue()
+                    if rendered is not None:
+                        rendered.append((step, version, saved))
+                writer.write_fragment(saved)
+            if progress is not None and (idx % SAVE_PROGRESS_INTERVAL == 0 or step_copy is not None):
+                progress(idx + 1, total)
+        writer.end()
+        writer.end()
+        if progress is not None:
+            progress(total, total)
+        return True
+
+    def _write_snapshot_db(self, db_path, snapshot, progress=None, cancelled=None, rendered=None):
+        """将快照写为flowdb文件，cancelled()返回True时中止并返回False"""
+        total = len(snapshot["steps"])
+
+        def entries():
+            for idx, (step, version, saved, step_copy) in enumerate(snapshot["steps"]):
+                if saved is None:
+                    saved = self._step_entry(step_copy)
+                    if rendered is not None:
+                        rendered.append((step, version, saved))
+                yield saved
+                if progress is not None:
+                    progress(idx + 1, total)
+
+        document = {
+            "root_attrs": snapshot["root_attrs"],
+            "path_settings": snapshot["path_settings"],
+            "global_fields": snapshot["global_fields"],
+            "steps": entries(),
+        }
+        return write_flow_db(db_path, document, cancelled=cancelled)
+
+    def _prepare_step_for_save(self, step):
+        """保存前整理步骤数据（分配周期分组ID、清空无协议步骤的protocol_data），直接作用于模型"""
+        type_data = step.get_type_step_data()
+        expand_data = step.get_expand_step_data()
+        changed = False
+        if step.get_base_step_data().get("step_type", -1) == 1 and expand_data.get("periodic_file_data"):
+            file_path_value = type_data.get("file_path") or expand_data.get("periodic_file_path")
+            if not expand_data.get("periodic_group_id"):
+                expand_data["periodic_group_id"] = f"periodic_{uuid.uuid4().hex}"
+                changed = True
+            if file_path_value and (expand_data.get("periodic_file_path") != file_path_value
+                                    or type_data.get("file_path") != file_path_value):
+                expand_data["periodic_file_path"] = file_path_value
+                type_data["file_path"] = file_path_value
+                changed = True
+        if changed:
+            step.mark_dirty()
+        # 协议类型为"无"时清空protocol_data
+        if type_data.get("protocol_type", -1) == -1 and step.get_protocol_data() != {}:
+            step.set_protocol_data({})
+
+    def _serialize_step(self, writer, step):
+        """写出单个步骤，带文件数据的周期GLINK写为<periodic_group>"""
+        write_step_entry(writer, self._step_entry(step))
+
+    def _step_entry(self, step):
+        """生成步骤的保存条目（格式见utils.flow_db），XML与flowdb共用"""
+        # 检查是否是周期GLINK且包含文件数据
+        step_type = step.get_base_step_data().get("step_type", -1)
+        periodic_file_data = step.get_expand_step_data().get("periodic_file_data")
+
+        # 只处理周期GLINK (step_type == 1) 且有文件数据的情况
+        if step_type == 1 and periodic_file_data:  # glink_fileds_periodic
+            return self._periodic_group_entry(step, periodic_file_data)
+        return {"kind": "step", "sections": self._step_sections(step)}
+
+    def _collect_path_settings(self):
+        """收集根节点属性与路径设置，返回 (root_attrs, path_settings)"""
+        root_attrs = {}
+        path_settings = None
+        config_manager = ConfigManager()
+        protocol_configs = config_manager.get_all_protocol_configs()
+
+        # 保存路径设置（12条路径）
+        if protocol_configs:
+            path_settings = []
+            for proto, cfg in protocol_configs.items():
+                keys_to_save = ("input_path", "output_path", "config_path")
+                if proto == "interrupt":
+                    keys_to_save = ("output_path",)
+                fields = []
+                for key in keys_to_save:
+                    value = cfg.get(key, "")
+                    value = "" if value is None else str(value)
+                    fields.append((key, value))
+                    root_attrs[f"{proto}_{key}"] = value
+                path_settings.append((proto, fields))
+            # 兼容旧字段：使用当前协议的路径写入通用属性
+            try:
+                current_proto = self.global_controller.global_view.get_current_protocol_key()
+            except Exception:
+                current_proto = "glink"
+            active_cfg = protocol_configs.get(current_proto, {})
+            if current_proto == "interrupt":
+                keys_to_copy = ("output_path",)
+            else:
+                keys_to_copy = ("input_path", "output_path", "config_path")
+            for key in keys_to_copy:
+                value = active_cfg.get(key, "")
+                if value is not None:
+                    root_attrs[key] = str(value)
+            self.model.global_params["protocols"] = protocol_configs
+        return root_attrs, path_settings
+
+    @staticmethod
+    def _parse_ctrl_word(ctrl_word_str):
+        """解析消息控制字，失败时抛出 ValueError/TypeError"""
+        if isinstance(ctrl_word_str, str):
+            ctrl_word_str = ctrl_word_str.strip().lower().replace('×', 'x').replace('Ｘ', 'x')
+            if ctrl_word_str.startswith('0x'):
+                return int(ctrl_word_str, 16)
+            return int(ctrl_word_str, 16) if all(c in '0123456789abcdef' for c in ctrl_word_str) else int(float(ctrl_word_str))
+        return int(ctrl_word_str)
+
+    def _protocol_section(self, protocol_data):
+        """生成protocol区段 (tag, attrs, fields)"""
+        attrs = None
+        fields = []
+        if protocol_data:
+            # 检查消息控制字，如果位1=1（即0x0002或0x0003），添加帧计数属性
+            ctrl_word_str = protocol_data.get("消息控制字", "0")
+            try:
+                ctrl_word = self._parse_ctrl_word(ctrl_word_str)
+                if (ctrl_word & 0x02) == 0x02:
+                    attrs = {"帧计数": "true"}
+            except (ValueError, TypeError) as e:
+                print(f"保存protocol: 解析消息控制字失败: {ctrl_word_str}, 错误: {e}")
+            fields = [(k, str(v) if v is not None else "") for k, v in protocol_data.items()]
+        return ("protocol", attrs, fields)
+
+    @staticmethod
+    def _data_region_text(v):
+        """将union列表结构序列化为json字段"""
+        if isinstance(v, (list, dict)):
+            return json.dumps(v, ensure_ascii=False) if v else "[]"
+        if v is None:
+            return "None"
+        return str(v)
+
+    def _step_sections(self, step):
+        """生成普通步骤的 base/type/expand/protocol 四个区段，每个区段为 (tag, attrs, fields)"""
+        base_fields = [(k, str(v)) for k, v in step.get_base_step_data().items()]
+
+        type_fields = []
+        for k, v in step.get_type_step_data().items():
+            # 这里可以用k对应的dtype是否为union代替
+            if k == "data_region":
+                text = self._data_region_text(v)
+            elif k in ("local_site", "recip_site", "sub_address", "base_address"):
+                # 对于这些字段，优先使用全局原始输入字符串（保留16进制格式如0x11），如果没有则使用当前值
+                raw_input = step.get_raw_input_string(k)
+                if raw_input is not None:
+                    text = raw_input
+                elif v is None:
+                    text = ""
+                elif isinstance(v, str):
+                    text = v
+                else:
+                    # 如果是数字，转换为字符串（但会丢失16进制格式，这种情况不应该发生）
+                    text = str(v)
+                    print(f"  警告：{k} 的值 {v} 不是字符串，转换为 '{text}'（可能丢失16进制格式）")
+            else:
+                text = str(v)
+            type_fields.append((k, text))
+
+        # 不保存临时数据
+        expand_fields = [
+            (k, str(v)) for k, v in step.get_expand_step_data().items()
+            if k not in ("periodic_file_data", "periodic_file_path")
+        ]
+
+        # 检查协议类型，如果为-1（无），只保存空的protocol元素（protocol_data已在保存前清空）
+        protocol_type = step.get_type_step_data().get("protocol_type", -1)
+        if protocol_type == -1:
+            protocol_section = ("protocol", None, [])
+        else:
+            protocol_section = self._protocol_section(step.get_protocol_data())
+
+        return [
+            ("base", None, base_fields),
+            ("type", None, type_fields),
+            ("expand", None, expand_fields),
+            protocol_section,
+        ]
+
+    @staticmethod
+    def _periodic_row_columns(rows):
+        """取第一行的data_type序列作为周期分组的列定义，无法紧凑存储时返回None"""
+        if isinstance(rows, PeriodicTable):
+            columns = list(rows.data_types)
+            if not columns or any(type(data_type) is not int for data_type in columns):
+                return None
+            return columns
+        row = rows[0]
+        if not isinstance(row, list) or not row:
+            return None
+        columns = []
+        for item in row:
+            if not isinstance(item, dict) or list(item) != ["data_type", "value"]:
+                return None
+            data_type = item["data_type"]
+            if type(data_type) is not int:
+                return None
+            columns.append(data_type)
+        return columns
+
+    @staticmethod
+    def _compact_row_text(row, columns):
+        """按列定义把一行数据写为空格分隔的值，不符合列定义时返回None（改用JSON）"""
+        if columns is None or not isinstance(row, list) or len(row) != len(columns):
+            return None
+        values = []
+        for item, data_type in zip(row, columns):
+            if not isinstance(item, dict) or list(item) != ["data_type", "value"]:
+                return None
+            value = item["value"]
+            if (item["data_type"] != data_type or type(item["data_type"]) is not int
+                    or not isinstance(value, str) or not value or len(value.split()) != 1
+                    or value != value.strip()):
+                return None
+            values.append(value)
+        return " ".join(values)
+
+    def _periodic_group_entry(self, step, periodic_file_data):
+        """周期GLINK文件数据保存为周期分组：共用字段只写一次，各行只保存数据区、时间和CRC"""
+        print(f"检测到周期GLINK步骤，包含 {len(periodic_file_data)} 行数据，按周期分组保存...")
+        base_data = step.get_base_step_data()
+        type_data = step.get_type_step_data()
+        expand_data = step.get_expand_step_data()
+        file_path_value = type_data.get("file_path") or expand_data.get("periodic_file_path")
+        period_value = type_data.get("period")
+        # 分组ID与文件路径已由_prepare_step_for_save写入模型
+        group_id = expand_data.get("periodic_group_id")
+
+        # 第一行的time来自base_step_data中的time（仿真时间），往后每行+period
+        first_time = float(base_data.get("time", 0.0))
+        period = float(period_value if period_value not in (None, "") else 0.0)
+
+        base_data_copy = base_data.copy()
+        base_data_copy["time"] = first_time
+        base_fields = [(k, str(v)) for k, v in base_data_copy.items()]
+
+        # type字典移除start_time，data_region只保留位置，由各行数据填充
+        type_data_copy = {}
+        for k, v in type_data.items():
+            if k in ("start_time",):
+                continue
+            type_data_copy[k] = v
+        if file_path_value is not None:
+            type_data_copy["file_path"] = file_path_value
+        if period_value is not None:
+            type_data_copy["period"] = period_value
+        type_data_copy["data_region"] = ""
+        type_fields = [(k, str(v)) for k, v in type_data_copy.items()]
+
+        # 分组信息由<periodic_group>本身记录
+        expand_fields = [
+            (k, str(v)) for k, v in expand_data.items()
+            if k not in ("periodic_file_data", "periodic_file_path") and k not in PERIODIC_GROUP_KEYS
+        ]
+
+        # 检查协议类型，如果为-1（无），则不保存protocol_data
+        protocol_data = None
+        ctrl_word = None
+        protocol_type = type_data.get("protocol_type", -1)
+        if protocol_type == -1:
+            protocol_section = ("protocol", None, [])
+        else:
+            protocol_data = step.get_protocol_data()
+            # 检查是否需要计算CRC（位1=1）
+            ctrl_word_str = protocol_data.get("消息控制字", "0")
+            try:
+                ctrl_word = self._parse_ctrl_word(ctrl_word_str)
+            except (ValueError, TypeError) as e:
+                print(f"解析消息控制字失败: {ctrl_word_str}, 错误: {e}")
+            if ctrl_word is not None and (ctrl_word & 0x02) != 0x02:
+                ctrl_word = None
+
+        step_times = [first_time + row_idx * period for row_idx in range(len(periodic_file_data))]
+        crc_texts = [None] * len(step_times)
+        if ctrl_word is not None:
+            # 一次算出所有行的CRC，共用的protocol区段记录第一行的CRC
+            crc_texts = self._apply_periodic_rows_crc(step, protocol_data, ctrl_word, step_times)
+        if protocol_data is not None:
+            protocol_section = self._protocol_section(protocol_data)
+
+        columns = self._periodic_row_columns(periodic_file_data)
+        # 按列存放的数据直接取各列字符串，不生成每格的字典
+        column_values = (periodic_file_data.row_values if isinstance(periodic_file_data, PeriodicTable)
+                         and periodic_file_data.tokens_only and columns is not None else None)
+
+        rows = []
+        for row_idx, (step_time, crc_text) in enumerate(zip(step_times, crc_texts)):
+            row_format = None
+            if column_values is not None:
+                row_text = " ".join(column_values(row_idx))
+            else:
+                row_data = periodic_file_data[row_idx]
+                row_text = self._compact_row_text(row_data, columns)
+                if row_text is None:
+                    row_format = "json"
+                    row_text = self._data_region_text(row_data)
+            rows.append((str(step_time), crc_text, row_format, row_text))
+
+        return {
+            "kind": "periodic_group",
+            "attrs": {"id": group_id, "count": str(len(periodic_file_data))},
+            "sections": [
+                ("base", None, base_fields),
+                ("type", None, type_fields),
+                ("expand", None, expand_fields),
+                protocol_section,
+            ],
+            "columns": None if columns is None else " ".join(str(c) for c in columns),
+            "rows": rows,
+        }
+
+    def _apply_periodic_rows_crc(self, step, protocol_data, ctrl_word, step_times):
+        """计算各行的数据区crc校验和，第一行的结果写回protocol_data，返回各行要保存的CRC文本"""
+        try:
+            crcs = self._calc_periodic_rows_crc(step, protocol_data, ctrl_word, step_times)
+        except Exception as e:
+            print(f"计算CRC时出错: {e}")
+            traceback.print_exc()
+            # 计算失败时各行沿用已有的CRC
+            if "数据区crc校验和" not in protocol_data:
+                return [None] * len(step_times)
+            crc_value = protocol_data["数据区crc校验和"]
+            return [str(crc_value) if crc_value is not None else ""] * len(step_times)
+        crc_texts = [f"0x{crc:04X}" for crc in crcs]
+        if crc_texts:
+            protocol_data["数据区crc校验和"] = crc_texts[0]
+        return crc_texts
+
+    @staticmethod
+    def _calc_periodic_rows_crc(step, protocol_data, ctrl_word, step_times):
+        """与StepDetailView.calc_glink_fields相同的CRC计算逻辑，批量计算各行的数据区crc校验和
+
+        各行只有仿真时间不同，其余字段按16位字只整理一次，交给glink_crc16_rows一次算完。
+        """
+        def safe_hex_to_int(s):
+            """安全地将十六进制字符串转换为整数"""
+            if isinstance(s, (int, float)):
+                return int(s)
+            s = str(s).strip().lower().replace('×', 'x').replace('Ｘ', 'x')
+            if not s:
+                return 0
+            if s.startswith('0x'):
+                return int(s, 16)
+            try:
+                return int(s, 16) if all(c in '0123456789abcdef' for c in s) else int(float(s))
+            except (ValueError, TypeError):
+                return 0
+
+        def value_words(value, byte_count):
+            """按高字节在前拆分为16位字"""
+            return [(value >> (16 * i)) & 0xFFFF for i in reversed(range(byte_count // 2))]
+
+        type_data = step.get_type_step_data()
+        # 仿真时间之后参与计算的字段依次为：自身站点号、对方站点号、子地址、协议时间、消息控制字、消息ID、帧计数
+        # 某个字段取值失败时跳过该字段
+        header_fields = (
+            ("自身站点号", lambda: safe_hex_to_int(type_data.get("local_site", "0")) & 0xFFFF, 2),
+            ("对方站点号", lambda: safe_hex_to_int(type_data.get("recip_site", "0")) & 0xFFFF, 2),
+            ("子地址", lambda: safe_hex_to_int(protocol_data.get("子地址", "0")) & 0xFFFF, 2),
+            ("协议时间", lambda: int(protocol_data.get("时间", "0")) & 0xFFFFFFFF, 4),
+            ("消息控制字", lambda: ctrl_word, 2),
+            ("消息ID", lambda: safe_hex_to_int(protocol_data.get("消息ID", "0")) & 0xFFFF, 2),
+            ("帧计数", lambda: safe_hex_to_int(protocol_data.get("帧计数", "0")) & 0xFFFF, 2),
+        )
+        shared_words = []
+        for label, getter, byte_count in header_fields:
+            try:
+                shared_words.extend(value_words(getter(), byte_count))
+            except Exception as e:
+                print(f"周期步骤CRC计算: 获取{label}失败: {e}")
+
+        # 数据区：空格分隔的16进制字，按高、低字节计算
+        data_value = protocol_data.get("数据区", "")
+        if data_value:
+            for word in data_value.split():
+                try:
+                    shared_words.append(safe_hex_to_int(word) & 0xFFFF)
+                except (ValueError, IndexError) as e:
+                    print(f"周期步骤CRC计算错误: {e}, word={word}")
+
+        # 每行4字节仿真时间；无法取整的时间（如inf/nan）跳过该字段
+        time_rows = []
+        skipped = []
+        for row_idx, step_time in enumerate(step_times):
+            try:
+                time_rows.append(value_words(int(step_time) & 0xFFFFFFFF, 4))
+            except (ValueError, OverflowError) as e:
+                print(f"周期步骤CRC计算: 获取仿真时间失败: {e}")
+                skipped.append(row_idx)
+                time_rows.append(None)
+        if not skipped:
+            return glink_crc16_rows(time_rows, suffix=shared_words)
+        crcs = glink_crc16_rows([row for row in time_rows if row is not None], suffix=shared_words)
+        skipped_crc = glink_crc16_rows([[]], suffix=shared_words)[0]
+        result = []
+        valid = iter(crcs)
+        for row in time_rows:
+            result.append(skipped_crc if row is None else next(valid))
+        return result
 
     def open_config(self):
         """打开XML配置文件"""
@@ -616,27 +904,44 @@ class FileController:
             self.main_window,
             "打开流程配置",
             default_dir,
-            "流程配置文件 (*.xml);;所有文件 (*)"
+            f"流程配置文件 (*.xml *{FLOW_DB_EXTENSION});;{CONFIG_FILE_FILTER};;{FLOW_DB_FILE_FILTER};;所有文件 (*)"
         )
 
         if file_path:
+            progress = QProgressDialog("正在打开流程配置...", "取消", 0, 1000, self.main_window)
+            progress.setWindowTitle("打开")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(500)
+
+            def on_progress(done, total):
+                if total:
+                    progress.setValue(min(999, int(done * 1000 / total)))
+                QApplication.processEvents()
+
             try:
-                tree = ET.parse(file_path)
-                root = tree.getroot()
+                # 先读完整个文件再替换当前模型，取消或出错时当前流程不受影响
+                try:
+                    # 步骤列表只需要base字段，其余数据在选中步骤时再解析
+                    document, steps = self.load_steps(file_path, progress=on_progress,
+                                                      cancelled=progress.wasCanceled, lazy=True)
+                except LoadCancelled:
+                    print(f"已取消打开: {file_path}")
+                    return
+                finally:
+                    progress.close()
+                root_attrs = document["root_attrs"]
                 self.model.file_path = file_path
                 config_manager = ConfigManager()
 
                 # 解析全局参数
-                global_elem = root.find("global_params")
                 global_params = {}
-                if global_elem is not None:
-                    for child in global_elem:
-                        global_params[child.tag] = child.text if child.text is not None else ""
+                for tag, text in document["global_fields"] or []:
+                    global_params[tag] = text if text is not None else ""
 
                 # 根节点上通用的输入/输出/配置路径属性
                 root_general_attrs = {}
                 for key in ("input_path", "output_path", "config_path"):
-                    attr_val = root.get(key)
+                    attr_val = root_attrs.get(key)
                     if attr_val is not None:
                         root_general_attrs[key] = attr_val
                         global_params[key] = attr_val
@@ -650,21 +955,18 @@ class FileController:
                 for proto in protocol_keys:
                     for key in ("input_path", "output_path", "config_path"):
                         attr_name = f"{proto}_{key}"
-                        attr_value = root.get(attr_name)
+                        attr_value = root_attrs.get(attr_name)
                         if attr_value is not None:
                             protocol_updates.setdefault(proto, {})[key] = attr_value
 
                 # 读取 path_settings 节点
-                path_settings_elem = root.find("path_settings")
-                if path_settings_elem is not None:
-                    for proto_elem in path_settings_elem.findall("protocol"):
-                        proto_name = proto_elem.get("name")
-                        if not proto_name:
-                            continue
-                        for key in ("input_path", "output_path", "config_path"):
-                            node = proto_elem.find(key)
-                            if node is not None and node.text is not None:
-                                protocol_updates.setdefault(proto_name, {})[key] = node.text
+                for proto_name, fields in document["path_settings"] or []:
+                    if not proto_name:
+                        continue
+                    for key in ("input_path", "output_path", "config_path"):
+                        text = next((text for tag, text in fields if tag == key), None)
+                        if text is not None:
+                            protocol_updates.setdefault(proto_name, {})[key] = text
 
                 # 如果只有通用属性，则默认归入 glink
                 if root_general_attrs and "glink" in protocol_keys:
@@ -699,63 +1001,7 @@ class FileController:
                 # self.model.file_path = file_path
 
                 ####
-                steps = []
-                steps_elem = root.find("steps")
-                if steps_elem is not None:
-                    for step_elem in steps_elem.findall("step"):
-                        # 创建新的StepModel实例
-                        step = StepModel()
-                        
-                        # 读取base字典
-                        stype = 0
-                        base_elem = step_elem.find("base")
-                        if base_elem is not None:
-                            base_dict = {}
-                            self.load_data_to_dict(base_dict, base_elem)
-                            # base_dict = {child.tag: child.text for child in base_elem}
-                            step.update_base_data(base_dict)
-                            stype = step.get_step_type()
-                        
-                        # 读取type字典
-                        type_elem = step_elem.find("type")
-                        
-                        if type_elem is not None:
-                            type_dict = {}
-                            self.load_data_to_dict(type_dict, type_elem)
-                        #     type_dict = {}
-                        #     for child in type_elem:
-                        #         if child.tag == "data_region":
-                        #             text = child.text
-                        #             if text and text.startswith("<![CDATA[") and text.endswith("]]>"):
-                        #                 text = text[9:-3]
-                        #             try:
-                        #                 type_dict[child.tag] = json.loads(text)
-                        #             except Exception:
-                        #                 type_dict[child.tag] = text
-                        #         else:
-                        #             type_dict[child.tag] = child.text
-                            step.update_type_data(stype, type_dict)
-                        
-                        # 读取expand字典
-                        #expand字典可以同样用type_data的方法
-                        expand_elem = step_elem.find("expand")
-                        if expand_elem is not None:
-                            expand_dict = {}
-                            self.load_data_to_dict(expand_dict, expand_elem)
-                            # expand_dict = {child.tag: child.text for child in expand_elem}
-                            step.update_expand_data(expand_dict)
-                        
-                        # 读取protocol字典
-                        protocol_elem = step_elem.find("protocol")
-                        if protocol_elem is not None:
-                            protocol_dict = {}
-                            for child in protocol_elem:
-                                protocol_dict[child.tag] = child.text if child.text else ""
-                            step.set_protocol_data(protocol_dict)
-                        
-                        steps.append(step)
-
-
+                # 周期分组已在加载时构造为合并后的单个步骤
                 ####
                 merged_steps = self._merge_periodic_steps(steps)
                 self.model.steps = merged_steps
@@ -777,70 +1023,295 @@ class FileController:
                 )
 
     def load_data_to_dict(self, dict, data_elem):
-        for child in data_elem:
-            dict[child.tag] = self.text2dtype(child.tag, child.text)
-            # if child.tag == "data_region":
-            #     text = child.text
-            #     if text and text.startswith("<![CDATA[") and text.endswith("]]>"):
-            #         text = text[9:-3]
-            #     try:
-            #         dict[child.tag] = json.loads(text)
-            #     except Exception:
-            #         dict[child.tag] = text
-            # else:
-            #     dict[child.tag] = self.text2dtype(child.tag, child.text)
-        # expand_dict = {child.tag: self.text2dtype(child.tag, child.text) for child in expand_elem}
+        self._load_items_to_dict(dict, ((child.tag, child.text) for child in data_elem))
+
+    def _load_items_to_dict(self, dict, items):
+        decoders = FIELD_DECODERS
+        for tag, text in items:
+            decoder = decoders.get(tag)
+            # 字段名驻留，所有步骤共用同一个键对象
+            dict[intern(tag)] = decoder(text) if decoder is not None else str(text)
+
+    @staticmethod
+    def _section_items(parent_elem, tag):
+        """读取区段下各字段的 (tag, text) 列表，区段不存在时返回None"""
+        elem = parent_elem.find(tag)
+        if elem is None:
+            return None
+        return [(child.tag, child.text) for child in elem]
+
+    def _build_step(self, base_items, type_items, expand_items, protocol_items, keep_raw_input=False,
+                    lazy=False, finish=None, source=None):
+        """由 base/type/expand/protocol 各区段的 (tag, text) 列表构造StepModel
+
+        lazy为True时只解析base区段（步骤列表所需），其余区段保留原始文本，首次访问时再解析，
+        source为步骤读出时的原始条目（未修改时保存直接写出）；finish(step)在其余区段解析完后调用。
+        """
+        # 读取base字典
+        base_dict = None
+        if base_items is not None:
+            base_dict = {}
+            self._load_items_to_dict(base_dict, base_items)
+
+        def fill_details(step):
+            self._fill_step_details(step, type_items, expand_items, protocol_items, keep_raw_input)
+            if finish is not None:
+                finish(step)
+
+        if lazy:
+            sections = {"type": type_items, "expand": expand_items, "protocol": protocol_items}
+            return StepModel.lazy(base_dict or {}, LazyDetails(sections, fill_details), source)
+        step = StepModel()
+        if base_dict is not None:
+            step.update_base_data(base_dict)
+        fill_details(step)
+        return step
+
+    def _fill_step_details(self, step, type_items, expand_items, protocol_items, keep_raw_input=False):
+        """解析type/expand/protocol区段并写入步骤"""
+        stype = step.get_step_type()
+        # 读取type字典
+        if type_items is not None:
+            type_dict = {}
+            self._load_items_to_dict(type_dict, type_items)
+            step.update_type_data(stype, type_dict)
+            if keep_raw_input:
+                # 从XML加载后，如果字段是字符串格式（可能是16进制），保存到全局原始输入字符串
+                for field in ("local_site", "recip_site", "sub_address", "base_address"):
+                    if field in type_dict:
+                        value = type_dict[field]
+                        if isinstance(value, str):
+                            step.set_raw_input_string(field, value)
+                            print(f"从XML加载原始输入字符串: {field} = '{value}'")
+        # 读取expand字典，expand字典可以同样用type_data的方法
+        if expand_items is not None:
+            expand_dict = {}
+            self._load_items_to_dict(expand_dict, expand_items)
+            step.update_expand_data(expand_dict)
+        # 读取protocol字典
+        if protocol_items is not None:
+            step.set_protocol_data({tag: text if text else "" for tag, text in protocol_items})
+
+    def _step_from_element(self, step_elem, keep_raw_input=False):
+        """由<step>元素构造StepModel"""
+        return self._step_from_entry(element_to_entry(step_elem), keep_raw_input)
+
+    def _step_from_entry(self, entry, keep_raw_input=False, lazy=False):
+        """由普通步骤条目（XML或flowdb读出）构造StepModel"""
+        sections = {tag: fields for tag, attrs, fields in entry["sections"]}
+        if lazy and any(tag == "periodic_group_id" and text for tag, text in sections.get("expand") or []):
+            # 旧格式按行拆分的周期步骤需要在加载后合并，立即解析
+            lazy = False
+        return self._build_step(
+            *(sections.get(tag) for tag in ("base", "type", "expand", "protocol")),
+            keep_raw_input=keep_raw_input, lazy=lazy, source=entry if lazy else None
+        )
 
-    def text2dtype(self, dtype_tag, text):
-        import models.step_model as step_model
-        dtype = str(dtype_tag)
-        print(f"text2dtype dtype: {dtype}, text: {text}, text type: {type(text)}")
-        filed_type = step_model.get_field_type(dtype)
-        # print(f"text2dtype dtype: {dtype}")
-        if filed_type != 'union':
-            # 对于local_site、recip_site、sub_address、base_address字段，保留原始字符串格式
-            if dtype in ("local_site", "recip_site", "sub_address", "base_address"):
-                # 确保返回字符串，即使text是None也要处理
-                if text is None:
-                    return ""
-                # 保留原始字符串，不转换为int
-                # 注意：保留原始输入格式，包括全角乘号×（保存时保留）
-                result = str(text).strip()
-                print(f"text2dtype 保留字符串格式: {dtype} = '{result}'")
-                return result
-            pdtype = step_model.get_dtype(dtype)
-            val = pdtype(text)
-            print(f"text2dtype dtype_tag: {dtype_tag};text: {text} pdtype: {pdtype} val type {type(val)}")
-            return val
-        else:
-            # 容错解析 union：空/None/非法JSON 返回空列表
+    def _read_periodic_group(self, group_elem):
+        """解析<periodic_group>，返回 (group_id, 共用区段, 列定义, 各行(time, crc, format, text))"""
+        return self._group_from_entry(element_to_entry(group_elem))
+
+    def _group_from_entry(self, entry):
+        """由周期分组条目得到 (group_id, 共用区段, 列定义, 各行(time, crc, format, text))"""
+        group_id = entry["attrs"].get("id", "")
+        sections = {tag: fields for tag, attrs, fields in entry["sections"]}
+        sections = {tag: sections.get(tag) or [] for tag in ("base", "type", "expand", "protocol")}
+        columns = None
+        if entry["columns"] is not None:
             try:
-                raw = (text or "").strip()
-                if raw.lower() in ("none", ""):
-                    return []
-                data_list = json.loads(raw)
-                if not isinstance(data_list, list):
-                    return []
-                val = []
-                for item in data_list:
-                    # 支持对象或原始值
-                    if isinstance(item, dict) and "data_type" in item and "value" in item:
-                        data_type = item.get("data_type")
-                        value = item.get("value")
-                        pdtype = step_model.get_dtype_by_idx(int(data_type))
-                        print(f"union {item} data_type:{data_type}, value: {value} pdtye:{pdtype}")
-                        val.append({
-                            "data_type": int(data_type),
-                            "value": pdtype(value)
-                        })
-                    else:
-                        # 保留原值，后续导出阶段会统一标准化为HEX
-                        val.append(item)
-                return val
-            except Exception:
-                return []
+                columns = [int(c) for c in entry["columns"].split()]
+            except ValueError:
+                print(f"周期分组 {group_id} 的列定义无效: {entry['columns']}")
+        return group_id, sections, columns, list(entry["rows"])
 
+    def _steps_from_entries(self, entries, expand_groups=False, lazy=False):
+        """由文档中的步骤条目构造StepModel列表
 
+        expand_groups为False时周期分组合并为单个步骤（用于编辑），
+        为True时按行展开为多个步骤（用于导出，与旧格式逐行保存的<step>一致）。
+        lazy为True时步骤延迟加载（见_build_step），仅用于合并模式。
+        """
+        steps = []
+        for entry in entries:
+            if entry["kind"] != "periodic_group":
+                steps.append(self._step_from_entry(entry, keep_raw_input=expand_groups,
+                                                   lazy=lazy and not expand_groups))
+                continue
+            group = self._group_from_entry(entry)
+            if expand_groups:
+                for row_idx in range(len(group[3])):
+                    steps.append(self._build_step(*self._periodic_row_items(group, row_idx),
+                                                  keep_raw_input=True))
+            else:
+                steps.append(self._merged_periodic_step(group, lazy=lazy, source=entry if lazy else None))
+        return steps
+
+    def read_config_document(self, file_path, start=0, count=None):
+        """读取配置文件为文档（格式见utils.flow_db）；flowdb文件可只读取部分步骤"""
+        if is_flow_db(file_path):
+            return read_flow_db(file_path, start, count)
+        end = None if count is None else start + count
+        selected = []
+        index = 0
+
+        def on_entry(entry):
+            # 只保留需要的步骤，其余读完即丢弃
+            nonlocal index
+            if index >= start and (end is None or index < end):
+                selected.append(entry)
+            index += 1
+
+        document = read_xml_document(file_path, on_entry)
+        document["steps"] = selected
+        return document
+
+    def load_steps(self, file_path, expand_groups=False, progress=None, cancelled=None, lazy=False):
+        """读取配置文件（XML或flowdb），返回 (文档, StepModel列表)，文档中不含steps
+
+        XML流式解析，每个步骤元素读完即构造StepModel并释放元素，内存与文件大小无关。
+        progress(已完成, 总量)定期调用；cancelled()返回True时抛出LoadCancelled。
+        lazy为True时步骤只解析base区段，其余数据在首次访问时解析。
+        """
+        steps = []
+
+        def on_entry(entry):
+            steps.extend(self._steps_from_entries([entry], expand_groups, lazy))
+
+        if not is_flow_db(file_path):
+            document = read_xml_document(file_path, on_entry, progress, cancelled)
+            return document, steps
+
+        document = read_flow_db(file_path)
+        entries, document["steps"] = document["steps"], []
+        for idx, entry in enumerate(entries):
+            if idx % LOAD_PROGRESS_INTERVAL == 0:
+                if cancelled is not None and cancelled():
+                    raise LoadCancelled()
+                if progress is not None:
+                    progress(idx, len(entries))
+            on_entry(entry)
+        if progress is not None:
+            progress(len(entries), len(entries))
+        return document, steps
+
+    def read_step_range(self, file_path, start=0, count=None):
+        """只读取文件中从start开始的count个步骤（周期分组合并为单个步骤），flowdb文件无需读取整个文件"""
+        document = self.read_config_document(file_path, start, count)
+        return self._steps_from_entries(document["steps"])
+
+    @staticmethod
+    def _replace_item(items, key, text):
+        """返回替换（或追加）key对应文本后的新字段列表"""
+        replaced = False
+        result = []
+        for tag, value in items:
+            if tag == key:
+                value = text
+                replaced = True
+            result.append((tag, value))
+        if not replaced:
+            result.append((key, text))
+        return result
+
+    def _periodic_row_json(self, columns, row):
+        """将周期分组中的一行还原为旧格式中data_region的JSON文本"""
+        time_text, crc_text, row_format, text = row
+        if row_format == "json":
+            return text
+        values = text.split()
+        if columns is None or len(values) != len(columns):
+            return "[]"
+        return json.dumps(
+            [{"data_type": data_type, "value": value} for data_type, value in zip(columns, values)],
+            ensure_ascii=False
+        )
+
+    def _decode_periodic_row(self, columns, row):
+        """解析周期分组中的一行数据区，结果与text2dtype解析旧格式JSON一致"""
+        import models.step_model as step_model
+        time_text, crc_text, row_format, text = row
+        if row_format == "json":
+            return self.text2dtype("data_region", text)
+        values = text.split()
+        if columns is None or len(values) != len(columns):
+            return []
+        try:
+            return [
+                {"data_type": data_type, "value": step_model.get_dtype_by_idx(data_type)(value)}
+                for data_type, value in zip(columns, values)
+            ]
+        except Exception:
+            return []
+
+    def _periodic_row_items(self, group, row_idx):
+        """生成周期分组第row_idx行对应的各区段字段，与旧格式中展开的<step>一致"""
+        group_id, sections, columns, rows = group
+        base_items = sections["base"]
+        type_items = sections["type"]
+        protocol_items = sections["protocol"]
+        if row_idx < len(rows):
+            row = rows[row_idx]
+            if row[0] is not None:
+                base_items = self._replace_item(base_items, "time", row[0])
+            type_items = self._replace_item(type_items, "data_region", self._periodic_row_json(columns, row))
+            if row[1] is not None:
+                protocol_items = self._replace_item(protocol_items, "数据区crc校验和", row[1])
+        expand_items = sections["expand"] + [
+            ("periodic_group_id", group_id),
+            ("periodic_group_index", str(row_idx)),
+            ("periodic_group_first", "1" if row_idx == 0 else "0"),
+        ]
+        file_path = dict(sections["type"]).get("file_path")
+        if file_path:
+            expand_items.append(("periodic_file_path", file_path))
+        return base_items, type_items, expand_items, protocol_items
+
+    @staticmethod
+    def _periodic_rows_table(columns, rows):
+        """紧凑格式的各行直接按列存入PeriodicTable（不逐格生成字典），有JSON行或列数不符时返回None"""
+        import models.step_model as step_model
+        if not columns or not rows or any(step_model.get_dtype_by_idx(c) is not str for c in columns):
+            return None
+        table = PeriodicTable(columns)
+        pending = []
+        for time_text, crc_text, row_format, text in rows:
+            values = text.split() if text is not None else []
+            if row_format == "json" or len(values) != len(columns):
+                return None
+            pending.append(values)
+            if len(pending) >= CHUNK_ROWS:
+                table.extend(pending)
+                pending = []
+        table.extend(pending)
+        return table
+
+    def _merged_periodic_step(self, group, lazy=False, source=None):
+        """由周期分组构造单个周期步骤，结果与旧格式经_merge_periodic_steps合并后一致
+
+        lazy、source见_build_step，source为周期分组的原始条目。
+        """
+        group_id, sections, columns, rows = group
+
+        def attach_rows(step):
+            data_rows = self._periodic_rows_table(columns, rows)
+            if data_rows is None:
+                data_rows = [self._decode_periodic_row(columns, row) for row in rows]
+            type_data = step.get_type_step_data()
+            expand = step.get_expand_step_data()
+            expand["periodic_file_data"] = data_rows
+            file_path = type_data.get("file_path") or expand.get("periodic_file_path")
+            if file_path:
+                expand["periodic_file_path"] = file_path
+                type_data["file_path"] = file_path
+            if data_rows:
+                type_data["data_region"] = data_rows[0]
+
+        return self._build_step(*self._periodic_row_items(group, 0), lazy=lazy, finish=attach_rows,
+                                source=source)
+
+    def text2dtype(self, dtype_tag, text):
+        """按字段类型把XML文本转换为字段值（见models.step_model.FIELD_DECODERS）"""
+        return decode_field_text(str(dtype_tag), text)
 
     def _safe_int(self, value, default=0):
         try:
@@ -862,9 +1333,14 @@ class FileController:
         grouped = {}
         merged = []
         for step in steps:
+            if not step.is_loaded():
+                # 延迟加载的步骤不会是按行拆分的周期步骤（见_step_from_entry）
+                merged.append(step)
+                continue
             expand = step.get_expand_step_data() or {}
             group_id = expand.get("periodic_group_id")
-            if group_id:
+            # 已带有periodic_file_data的步骤来自<periodic_group>，无需再合并
+            if group_id and not expand.get("periodic_file_data"):
                 grouped.setdefault(group_id, []).append(step)
             else:
                 merged.append(step)
@@ -893,7 +1369,8 @@ class FileController:
                         file_path = fp
 
             expand = first.get_expand_step_data()
-            expand["periodic_file_data"] = data_rows
+            table = PeriodicTable.from_rows(data_rows)
+            expand["periodic_file_data"] = table if table is not None else data_rows
             if file_path:
                 expand["periodic_file_path"] = file_path
                 first.get_type_step_data()["file_path"] = file_path
@@ -916,7 +1393,7 @@ class FileController:
             traceback.print_exc()
         
         if self.model.file_path:
-            self.save_to_file(self.model.file_path)
+            self.save_to_file_async(self.model.file_path)
         else:
             self.save_config_as()
 
@@ -933,21 +1410,19 @@ class FileController:
             import traceback
             traceback.print_exc()
         
-        # 确保已保存到文件
+        # 保存成功后直接由写入文件的保存快照导出，不再重新解析刚保存的文件
+        def export_after_save(file_path, snapshot):
+            self.export_glink_txts(steps=self.export_steps_snapshot(snapshot))
+
+        # 确保已保存到文件；用户取消另存为或保存失败时不导出
         if not self.model.file_path:
-            self.save_config_as()
-            if not self.model.file_path:
-                # 用户取消保存
-                return
+            self.save_config_as(on_saved=export_after_save)
         else:
             # 已有路径则直接保存一次
-            self.save_to_file(self.model.file_path)
-
-        # 保存成功后执行目录批量导出（读取输入目录下所有XML）
-        self.export_glink_txts()
+            self.save_to_file_async(self.model.file_path, on_saved=export_after_save)
 
-    def save_config_as(self):
-        """另存为XML配置"""
+    def save_config_as(self, on_saved=None):
+        """另存为XML配置（后台保存，成功后调用on_saved(file_path, snapshot)）"""
         # 先同步一次全局配置，确保使用最新的输入路径
         try:
             self.global_controller.update_global_model()
@@ -955,18 +1430,24 @@ class FileController:
             pass
         default_dir = self.model.global_params.get("input_path", QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation))
         # default_dir = QStandardPaths.writableLocation(QStandardPaths.DocumentsLocation)
-        file_path, _ = QFileDialog.getSaveFileName(
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self.main_window,
             "保存流程配置",
             default_dir,
-            "流程配置文件 (*.xml);;所有文件 (*)"
+            f"{CONFIG_FILE_FILTER};;{FLOW_DB_FILE_FILTER};;所有文件 (*)"
         )
         if file_path:
-            if not file_path.endswith('.xml'):
-                file_path += '.xml'
-            self.save_to_file(file_path)
-            self.model.file_path = file_path
-            self.window_controller.update_window_title()
+            if not file_path.endswith(('.xml', FLOW_DB_EXTENSION)):
+                file_path += FLOW_DB_EXTENSION if selected_filter == FLOW_DB_FILE_FILTER else '.xml'
+
+            def on_file_saved(path, snapshot):
+                self.model.file_path = path
+                self.window_controller.update_window_title()
+                # 菜单triggered信号会传入checked参数，这里只接受回调
+                if callable(on_saved):
+                    on_saved(path, snapshot)
+
+            self.save_to_file_async(file_path, on_saved=on_file_saved)
     
     def export_data(self):
         """导出测试数据"""
@@ -1191,57 +1672,20 @@ class FileController:
         }
         field_separator = sep_map.get(separator, "\t")
         
-        # 3. 遍历所有xml文件
-        steps_by_type = {}
+        # 3. 并行解析目录下所有xml文件，未改动的文件直接使用缓存的解析结果
         # config_dir = os.path.dirname(file_path)
         config_dir = input_dir if input_dir else default_dir
-        
-        # 统计信息
-        total_files = 0
-        processed_files = 0
-        skipped_files = 0
-        
         print(f"开始扫描目录: {config_dir}")
-        
-        for root, dirs, files in os.walk(config_dir):
-            for file in files:
-                if file.endswith('.xml'):
-                    total_files += 1
-                    file_path_xml = os.path.join(root, file)
-                    
-                    # 跳过一些明显不是配置文件的目录
-                    skip_dirs = ['.gradle', '.IntelliJIdea', 'AndroidStudioProjects', 'build', 'target', 'bin', 'intermediates', 'lint_vital_partial_results']
-                    if any(skip_dir in root for skip_dir in skip_dirs):
-                        print(f"跳过系统目录: {os.path.basename(file_path_xml)}")
-                        skipped_files += 1
-                        continue
-                    
-                    # 跳过Android资源文件目录
-                    if 'res/values' in root or 'res/values-' in root:
-                        print(f"跳过Android资源目录: {os.path.basename(file_path_xml)}")
-                        skipped_files += 1
-                        continue
-                    
-                    try:
-                        steps = self.read_steps_from_xml(file_path_xml)
-                        if steps:
-                            for step in steps:
-                                step_type = step.get_step_type()
-                                if step_type not in steps_by_type:
-                                    steps_by_type[step_type] = []
-                                steps_by_type[step_type].append(step)
-                            processed_files += 1
-                            print(f"成功处理: {os.path.basename(file_path_xml)} (找到 {len(steps)} 个步骤)")
-                        else:
-                            skipped_files += 1
-                    except Exception as e:
-                        print(f"读取文件失败: {os.path.basename(file_path_xml)}, 错误: {str(e)[:100]}")
-                        skipped_files += 1
-        
+        cache_dir = os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "config_scan"
+        )
+        steps_by_type, stats = scan_config_steps(config_dir, cache_dir)
+
         print(f"\n扫描完成:")
-        print(f"  总文件数: {total_files}")
-        print(f"  成功处理: {processed_files}")
-        print(f"  跳过文件: {skipped_files}")
+        print(f"  总文件数: {stats['total']}")
+        print(f"  成功处理: {stats['processed']}")
+        print(f"  跳过文件: {stats['skipped']}")
+        print(f"  使用缓存: {stats['cached']}")
         
         if not steps_by_type:
             QMessageBox.warning(
@@ -1278,141 +1722,32 @@ class FileController:
             )
 
     def read_steps_from_xml(self, file_path):
-        """从xml文件读取所有StepModel，增强错误处理"""
-        import xml.etree.ElementTree as ET
-        from models.step_model import StepModel
-        import time
-        
+        """从xml（或flowdb）文件读取所有StepModel（周期分组按行展开），增强错误处理"""
         steps = []
         
         try:
-            # 首先检查文件大小，跳过过大的文件
-            file_size = os.path.getsize(file_path)
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                print(f"跳过大文件: {os.path.basename(file_path)} (大小: {file_size / 1024 / 1024:.1f}MB)")
-                return steps
-            
             # 检查文件是否为空
-            if file_size == 0:
+            if os.path.getsize(file_path) == 0:
                 print(f"跳过空文件: {os.path.basename(file_path)}")
                 return steps
-            
-            # 尝试快速验证XML格式
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    first_line = f.readline().strip()
-                    if not first_line.startswith('<?xml') and not first_line.startswith('<'):
-                        print(f"跳过非XML文件: {os.path.basename(file_path)}")
-                        return steps
-            except Exception:
-                # 如果读取失败，尝试二进制模式
-                try:
-                    with open(file_path, 'rb') as f:
-                        first_bytes = f.read(100)
-                        if not first_bytes.startswith(b'<?xml') and not first_bytes.startswith(b'<'):
-                            print(f"跳过非XML文件: {os.path.basename(file_path)}")
-                            return steps
-                except Exception:
-                    print(f"无法读取文件: {os.path.basename(file_path)}")
+
+            # 快速验证文件格式（只读取文件头）
+            if not is_flow_db(file_path):
+                with open(file_path, 'rb') as f:
+                    first_bytes = f.read(100).lstrip(b'\xef\xbb\xbf \t\r\n')
+                if not first_bytes.startswith(b'<'):
+                    print(f"跳过非XML文件: {os.path.basename(file_path)}")
                     return steps
-            
-            # 设置解析超时
-            start_time = time.time()
-            timeout = 5  # 5秒超时
-            
-            # 使用更安全的解析方式
+
+            # 流式解析，不限制文件大小；非配置文件（如Android资源文件）中没有步骤，返回空列表
             try:
-                # 先尝试快速解析
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    if time.time() - start_time > timeout:
-                        print(f"文件读取超时: {os.path.basename(file_path)}")
-                        return steps
-                
-                # 检查内容是否包含必要的标签
-                # 支持多种配置文件格式（不要求step标签）
-                if ('<config>' in content or '<configuration>' in content or
-                    '<settings>' in content or '<data>' in content or
-                    '<workflow>' in content or '<steps>' in content):
-                    # 这是配置文件
-                    pass
-                elif '<resources>' in content and ('<string>' in content or '<dimen>' in content or '<bool>' in content):
-                    # 这是Android资源文件，跳过
-                    print(f"跳过Android资源文件: {os.path.basename(file_path)}")
-                    return steps
-                else:
-                    print(f"跳过非配置文件: {os.path.basename(file_path)}")
-                    return steps
-                
-                # 解析XML
-                if time.time() - start_time > timeout:
-                    print(f"文件解析超时: {os.path.basename(file_path)}")
-                    return steps
-                
-                tree = ET.parse(file_path)
-                root = tree.getroot()
-                
-                if time.time() - start_time > timeout:
-                    print(f"XML解析超时: {os.path.basename(file_path)}")
-                    return steps
-                
-                # 支持任意层级的 steps/step 结构
-                step_nodes = []
-                steps_elem = root.find("steps")
-                if steps_elem is not None:
-                    step_nodes.extend(steps_elem.findall("step"))
-                # 同时查找任意层级的 step
-                if not step_nodes:
-                    step_nodes.extend(root.findall('.//step'))
-
-                for step_elem in step_nodes:
-                    step = StepModel()
-                    # base
-                    base_elem = step_elem.find("base")
-                    if base_elem is not None:
-                        base_dict = {}
-                        self.load_data_to_dict(base_dict, base_elem)
-                        step.update_base_data(base_dict)
-                    # type
-                    type_elem = step_elem.find("type")
-                    if type_elem is not None:
-                        type_dict = {}
-                        self.load_data_to_dict(type_dict, type_elem)
-                        step.update_type_data(step.get_step_type(), type_dict)
-                        
-                        # 从XML加载后，如果字段是字符串格式（可能是16进制），保存到全局原始输入字符串
-                        for field in ("local_site", "recip_site", "sub_address", "base_address"):
-                            if field in type_dict:
-                                value = type_dict[field]
-                                if isinstance(value, str):
-                                    step.set_raw_input_string(field, value)
-                                    print(f"从XML加载原始输入字符串: {field} = '{value}'")
-                    # expand
-                    expand_elem = step_elem.find("expand")
-                    if expand_elem is not None:
-                        expand_dict = {}
-                        self.load_data_to_dict(expand_dict, expand_elem)
-                        step.update_expand_data(expand_dict)
-                    # protocol
-                    protocol_elem = step_elem.find("protocol")
-                    if protocol_elem is not None:
-                        protocol_dict = {}
-                        for child in protocol_elem:
-                            protocol_dict[child.tag] = child.text if child.text else ""
-                        step.set_protocol_data(protocol_dict)
-                    steps.append(step)
-                    
-                    # 检查是否超时
-                    if time.time() - start_time > timeout:
-                        print(f"步骤处理超时: {os.path.basename(file_path)}")
-                        break
-                            
+                _, steps = self.load_steps(file_path, expand_groups=True)
             except ET.ParseError as e:
                 print(f"XML格式错误，跳过文件: {os.path.basename(file_path)}, 错误: {str(e)[:100]}")
-                return steps
+                return []
             except Exception as e:
                 print(f"解析文件失败: {os.path.basename(file_path)}, 错误: {str(e)[:100]}")
-                return steps
+                return []
                 
         except Exception as e:
             print(f"读取文件失败: {os.path.basename(file_path)}, 错误: {str(e)[:100]}")
@@ -1420,50 +1755,46 @@ class FileController:
             
         return steps
 
-    def export_glink_txts(self):
-        """按需求导出四类GLINK文本数据，按(站点/子地址/长度)分文件或汇总文件"""
-        from PyQt5.QtWidgets import QMessageBox
-        config_manager = ConfigManager()
+    def export_steps_snapshot(self, snapshot):
+        """由保存快照（save_to_file的返回值或on_saved收到的snapshot）生成导出用的步骤列表（周期分组按行展开）
 
-        def resolve_path(path_value):
-            if not path_value:
-                return ""
-            path_value = str(path_value).strip()
-            if not path_value:
-                return ""
-            if path_value == ".":
-                return os.getcwd()
-            if os.path.isabs(path_value):
-                return path_value
-            return os.path.abspath(os.path.join(os.getcwd(), path_value))
+        结果与read_steps_from_xml读取由该快照写出的文件一致；只使用快照中的数据，不读取模型。
+        """
+        as_xml = snapshot.get("format") != "flowdb"
 
+        def entries():
+            for step, version, saved, step_copy in snapshot["steps"]:
+                if isinstance(saved, str):
+                    # 缓存的XML片段按读取文件的方式解析
+                    yield element_to_entry(ET.fromstring(saved.strip()))
+                    continue
+                entry = saved if saved is not None else self._step_entry(step_copy)
+                # 按XML写出再读回的规则处理文本（空文本为None、去掉空白行等）
+                yield xml_roundtrip_entry(entry) if as_xml else entry
+        return self._steps_from_entries(entries(), expand_groups=True)
+
+    def export_glink_txts(self, steps=None):
+        """按需求导出四类GLINK文本数据，按(站点/子地址/长度)分文件或汇总文件
+
+        steps为None时从当前配置文件重新读取步骤，否则直接导出给定的步骤（见export_steps_snapshot）。
+        导出在后台线程中进行，界面保持响应，完成后提示导出结果。
+        """
+        from PyQt5.QtWidgets import QMessageBox
+        if self.is_exporting():
+            print("已有导出任务正在进行，忽略本次导出请求")
+            return
+        config_manager = ConfigManager()
         protocol_dirs = {}
-        interrupt_output_dir = ""
-        for key in ("glink", "uart", "bc", "interrupt", "switch"):
+        for key in PROTOCOL_KEYS:
             cfg = config_manager.get_protocol_config(key) or {}
-            if key == "interrupt":
-                interrupt_output_dir = resolve_path(cfg.get("output_path", ""))
-            protocol_dirs[key] = resolve_path(cfg.get("output_path", ""))  # 开关量协议使用output_path作为输出目录
+            protocol_dirs[key] = cfg.get("output_path", "")  # 开关量协议使用output_path作为输出目录
 
-        def clear_txt_files(target_dir):
-            """清空导出目录下的所有txt文件"""
-            if not target_dir or not os.path.isdir(target_dir):
-                return
-            removed = 0
-            for name in os.listdir(target_dir):
-                path = os.path.join(target_dir, name)
-                if os.path.isfile(path) and name.lower().endswith(".txt"):
-                    try:
-                        os.remove(path)
-                        removed += 1
-                    except Exception as e:
-                        print(f"删除旧TXT失败: {path}, 错误: {e}")
-            if removed:
-                print(f"清空目录 {target_dir} 下 {removed} 个txt文件")
-
-        steps_from_file = []
+        # 菜单triggered信号会传入checked参数，这里只接受步骤列表
+        if not isinstance(steps, list):
+            steps = None
+        steps_from_file = steps or []
         current_file = getattr(self.model, "file_path", None)
-        if current_file and os.path.isfile(current_file):
+        if steps is None and current_file and os.path.isfile(current_file):
             try:
                 steps_from_file = self.read_steps_from_xml(current_file)
             except Exception as e:
@@ -1473,1367 +1804,54 @@ class FileController:
         if not all_steps:
             QMessageBox.warning(self.main_window, "未找到配置", "当前流程没有可导出的步骤，请先保存流程。")
             return
-
-        # 使用配置加载工具，根据step_type动态加载配置
-        from utils.config_loader import get_config_by_step_type
-        
-        # 配置缓存，避免重复加载
-        config_cache = {}
-        
-        def get_config_for_step(step_type: int):
-            """根据step_type获取配置，使用缓存避免重复加载"""
-            if step_type not in config_cache:
-                config_cache[step_type] = get_config_by_step_type(step_type)
-            return config_cache[step_type]
-        
-        def output_allowed(name: str, step_type: int) -> bool:
-            """根据step_type检查输出是否被允许
-            注意：所有txt文件都要输出，和keep all逻辑一致。
-            配置字段只用于保存到config文件，不影响导出逻辑。
-            """
-            # 始终返回True，所有文件都导出（相当于keep all逻辑）
-            return True
-
-        def safe_parse_numeric(value, default=0):
-            """将各种格式的数值安全转换为整数"""
-            if value is None:
-                return default
-            if isinstance(value, (int, float)):
-                try:
-                    return int(value)
-                except Exception:
-                    return default
-            try:
-                text = str(value).strip()
-            except Exception:
-                return default
-            if not text:
-                return default
-            text = text.replace('×', 'x').replace('Ｘ', 'x')
-            sign = 1
-            if text.startswith('-'):
-                sign = -1
-                text = text[1:].strip()
-            lowered = text.lower()
-            try:
-                if lowered.startswith('0x'):
-                    return sign * int(lowered, 16)
-                if lowered.startswith('0b'):
-                    return sign * int(lowered, 2)
-                if lowered.startswith('0o'):
-                    return sign * int(lowered, 8)
-                if '.' in lowered:
-                    return sign * int(float(lowered))
-                return sign * int(lowered)
-            except Exception:
-                return default
-
-        def split_array_values(value):
-            """将数组字段的文本拆分为列表"""
-            if value is None:
-                return []
-            if isinstance(value, list):
-                return value
-            if isinstance(value, str):
-                text = value.strip()
-                if not text:
-                    return []
-                try:
-                    decoded = json.loads(text)
-                    if isinstance(decoded, list):
-                        return decoded
-                except Exception:
-                    pass
-                for sep in ('[', ']', ',', '，', ';', '；', '\t', '\r', '\n'):
-                    text = text.replace(sep, ' ')
-                return [tok for tok in text.split(' ') if tok]
-            return [value]
-
-        def _strip_hex_prefix(token: str) -> str:
-            if not token:
-                return ""
-            token = str(token).strip()
-            if not token:
-                return ""
-            if token.lower().startswith("0x"):
-                token = token[2:]
-            return token.replace(" ", "")
-
-        def _tokens_to_byte_stream(tokens):
-            """将normalize后的0xXXXX标记还原为实际字节序列（字符串形式，每字节2位）"""
-            byte_chunks = []
-            for token in tokens or []:
-                stripped = _strip_hex_prefix(token)
-                if not stripped:
-                    continue
-                if len(stripped) % 2 == 1:
-                    stripped = "0" + stripped
-                try:
-                    value = int(stripped, 16)
-                except ValueError:
-                    continue
-                byte_count = len(stripped) // 2
-                for i in range(byte_count):
-                    byte_val = (value >> (8 * i)) & 0xFF
-                    byte_chunks.append(f"{byte_val:02X}")
-            return "".join(byte_chunks)
-
-        LITTLE_ENDIAN_WORD_SWAP_DTYPES = {"UINT32", "FLOAT32", "REAL32", "FLOAT64", "REAL64", "DOUBLE"}
-
-        def swap_16bit_words_for_little_endian(chunk_bytes):
-            """按16位（2字节）为单位反转顺序，实现小端输出"""
-            if not chunk_bytes or len(chunk_bytes) < 4:
-                return chunk_bytes
-            if len(chunk_bytes) % 2 != 0:
-                return chunk_bytes
-            words = [chunk_bytes[i:i+2] for i in range(0, len(chunk_bytes), 2)]
-            words.reverse()
-            return b"".join(words)
-
-        def format_hex_items_for_output(hex_items):
-            """拼接所有字节后按16位（4个hex字符）切片输出，剩余2个字符按8位输出"""
-            if not hex_items:
-                return []
-            hex_stream = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
-            if not hex_stream:
-                return []
-            formatted = []
-            for idx in range(0, len(hex_stream), 4):
-                chunk = hex_stream[idx: idx + 4]
-                if not chunk:
-                    continue
-                formatted.append(f"0x{chunk}")
-            return formatted
-
-        def merge_adjacent_byte_tokens(hex_items):
-            """将相邻的8位标记与后续标记组合成16位输出，以满足0x12 0x3456 -> 0x1234 0x56的规则"""
-            if not hex_items:
-                return []
-
-            merged = []
-            i = 0
-            while i < len(hex_items):
-                item = hex_items[i]
-                stripped = _strip_hex_prefix(item)
-                if not stripped:
-                    i += 1
-                    continue
-
-                if len(stripped) <= 2:
-                    val1 = int(stripped, 16) if stripped else 0
-                    if i + 1 < len(hex_items):
-                        next_item = hex_items[i + 1]
-                        next_stripped = _strip_hex_prefix(next_item)
-                        if next_stripped and len(next_stripped) <= 2:
-                            val2 = int(next_stripped, 16)
-                            merged.append(f"0x{((val1 << 8) | val2):04X}")
-                            i += 2
-                            continue
-                        elif next_stripped and len(next_stripped) > 2:
-                            next_val = int(next_stripped, 16)
-                            high_byte = (next_val >> 8) & 0xFF
-                            low_byte = next_val & 0xFF
-                            merged.append(f"0x{((val1 << 8) | high_byte):04X}")
-                            merged.append(f"0x{low_byte:02X}")
-                            i += 2
-                            continue
-                    merged.append(f"0x{val1:04X}")
-                    i += 1
-                else:
-                    merged.append(item)
-                    i += 1
-            return merged
-
-        def bytes_to_hex_words(byte_data: bytes, big_endian: bool):
-            """将字节序列按16位对齐转换为十六进制文本"""
-            if not byte_data:
-                return []
-            result = []
-            length = len(byte_data)
-            for idx in range(0, length, 2):
-                if idx + 1 < length:
-                    if big_endian:
-                        word = (byte_data[idx] << 8) | byte_data[idx + 1]
-                    else:
-                        word = byte_data[idx] | (byte_data[idx + 1] << 8)
-                    result.append(f"0x{word:04X}")
-                else:
-                    result.append(f"0x{byte_data[idx]:02X}")
-            return result
-
-        def scalar_value_to_bytes(dtype_str: str, value, big_endian: bool):
-            """根据数据类型将值转换为字节序列"""
-            dtype = (dtype_str or "").upper()
-            endian_prefix = '>' if big_endian else '<'
-            try:
-                if dtype in ("UINT8", "INT8"):
-                    val = safe_parse_numeric(value) & 0xFF
-                    return bytes([val])
-                if dtype in ("UINT16", "INT16"):
-                    val = safe_parse_numeric(value) & 0xFFFF
-                    return bytes([(val >> 8) & 0xFF, val & 0xFF]) if big_endian else bytes([val & 0xFF, (val >> 8) & 0xFF])
-                if dtype in ("UINT32", "INT32"):
-                    val = safe_parse_numeric(value) & 0xFFFFFFFF
-                    if big_endian:
-                        return bytes([
-                            (val >> 24) & 0xFF,
-                            (val >> 16) & 0xFF,
-                            (val >> 8) & 0xFF,
-                            val & 0xFF
-                        ])
-                    return bytes([
-                        val & 0xFF,
-                        (val >> 8) & 0xFF,
-                        (val >> 16) & 0xFF,
-                        (val >> 24) & 0xFF
-                    ])
-                if dtype in ("UINT64", "INT64"):
-                    val = safe_parse_numeric(value) & 0xFFFFFFFFFFFFFFFF
-                    if big_endian:
-                        return bytes([(val >> shift) & 0xFF for shift in range(56, -8, -8)])
-                    return bytes([(val >> shift) & 0xFF for shift in range(0, 64, 8)])
-                if dtype in ("FLOAT32", "REAL32", "FLOAT", "REAL"):
-                    if isinstance(value, str):
-                        s_val = value.strip().lower()
-                        if s_val.startswith("0x"):
-                            try:
-                                bits = int(s_val, 16) & 0xFFFFFFFF
-                                return bits.to_bytes(4, byteorder='big' if big_endian else 'little')
-                            except ValueError:
-                                pass
-                    fv = float(value) if value not in (None, "") else 0.0
-                    return struct.pack(endian_prefix + 'f', fv)
-                if dtype in ("FLOAT64", "REAL64", "DOUBLE"):
-                    if isinstance(value, str):
-                        s_val = value.strip().lower()
-                        if s_val.startswith("0x"):
-                            try:
-                                bits = int(s_val, 16) & 0xFFFFFFFFFFFFFFFF
-                                return bits.to_bytes(8, byteorder='big' if big_endian else 'little')
-                            except ValueError:
-                                pass
-                    fv = float(value) if value not in (None, "") else 0.0
-                    return struct.pack(endian_prefix + 'd', fv)
-                if dtype in ("BOOL", "BOOLEAN"):
-                    lv = str(value).strip().lower() if value is not None else "0"
-                    iv = 1 if lv in ("1", "true", "yes", "y", "on", "是") else 0
-                    return bytes([iv])
-                if dtype in ("STR", "STRING"):
-                    return str(value or "").encode('utf-8')
-                # 默认按照16位处理
-                val = safe_parse_numeric(value) & 0xFFFF
-                return bytes([(val >> 8) & 0xFF, val & 0xFF]) if big_endian else bytes([val & 0xFF, (val >> 8) & 0xFF])
-            except Exception:
-                return b""
-
-        def convert_template_fields_to_hex(step_obj, protocol_type_value, big_endian, defer_little_endian=False):
-            """将协议模板的字段转换为十六进制序列（跳过“时间”字段）"""
-            try:
-                template = self.template_manager.get_template_by_step_and_protocol(
-                    step_obj.get_step_type(),
-                    protocol_type_value
-                )
-            except Exception:
-                template = None
-            if not template:
-                return [], 0, ""
-
-            protocol_data = step_obj.get_protocol_data() or {}
-            fields = sorted(template.get("fields", []), key=lambda f: f.get("seq", 0))
-            hex_items = []
-            total_bytes = 0
-            display_big_endian = True if defer_little_endian else big_endian
-            is_little_endian = not big_endian
-            raw_bytes = bytearray()
-            segment_lengths = []
-            time_field_index = -1  # 记录时间字段在hex_items中的起始位置
-            time_field_length = 0  # 记录时间字段的长度（16位值的个数）
-            template_id = template.get("id", "")
-            data_region_str = normalize_data_region_value(
-                step_obj.get_type_step_data().get("data_region")
-            )
-            special_metrics = {}
-            if template_id == "serial_std":
-                special_metrics = calc_serial_standard_metrics(data_region_str)
-            elif template_id == "serial_ext":
-                special_metrics = calc_serial_extended_metrics(data_region_str)
-            elif template_id == "crc_tail":
-                special_metrics = calc_crc_tail_metrics(data_region_str)
-            overrides = special_metrics.get("overrides") if special_metrics else {}
-
-            for field in fields:
-                element = field.get("element")
-                if not element:
-                    continue
-                # 注意："时间"字段现在需要包含在导出数据中
-                dtype = str(field.get("dtype", "")).upper()
-                # 特殊处理"数据区"字段：从step的type_data中获取data_region
-                if element == "数据区":
-                    if special_metrics:
-                        raw_value = overrides.get("数据区", data_region_str)
-                    else:
-                        raw_value = step_obj.get_type_step_data().get("data_region")
-                        if raw_value is None:
-                            raw_value = protocol_data.get(element)
-                        if raw_value in (None, ""):
-                            raw_value = field.get("value", "")
-                else:
-                    if overrides and element in overrides:
-                        raw_value = overrides[element]
-                    else:
-                        raw_value = protocol_data.get(element)
-                        if raw_value in (None, ""):
-                            raw_value = field.get("value", "")
-
-                field_hex = []
-                field_bytes = 0
-
-                # 特殊处理"数据区"字段：如果是union列表，使用normalize_hex_items处理
-                if element == "数据区" and special_metrics:
-                    data_hex_items = special_metrics.get("data_hex_items", [])
-                    byte_seq = special_metrics.get("data_bytes", [])
-                    if data_hex_items:
-                        field_hex = data_hex_items
-                        field_bytes = len(byte_seq)
-                        raw_bytes.extend(byte_seq)
-                        segment_lengths.append(len(data_hex_items))
-                elif element == "数据区" and isinstance(raw_value, (list, dict)) and raw_value:
-                    # 对于数据区，使用normalize_hex_items处理union列表
-                    msg_len = step_obj.get_type_step_data().get("msg_len", 0)
-                    data_hex_items, data_bytes, _, data_raw_hex, data_segments = normalize_hex_items(
-                        raw_value,
-                        msg_len,
-                        big_endian,
-                        defer_little_endian=defer_little_endian
-                    )
-                    if data_hex_items:
-                        field_hex = data_hex_items
-                        field_bytes = data_bytes
-                        # 将raw_hex_string转换为字节并添加到raw_bytes
-                        if data_raw_hex:
-                            try:
-                                data_bytes_obj = bytes.fromhex(data_raw_hex)
-                                raw_bytes.extend(data_bytes_obj)
-                            except ValueError:
-                                pass
-                        segment_lengths.extend(data_segments)
-                elif dtype.endswith("_ARRAY"):
-                    base_dtype = dtype[:-6]
-                    base_dtype = base_dtype.upper()
-                    values = split_array_values(raw_value)
-                    for item in values:
-                        chunk = scalar_value_to_bytes(base_dtype, item, display_big_endian)
-                        if not chunk:
-                            continue
-                        if is_little_endian and base_dtype in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
-                            chunk = swap_16bit_words_for_little_endian(chunk)
-                        raw_bytes.extend(chunk)
-                        chunk_words = bytes_to_hex_words(chunk, display_big_endian)
-                        field_hex.extend(chunk_words)
-                        if chunk_words:
-                            field_bytes += len(chunk)
-                            segment_lengths.append(len(chunk_words))
-                else:
-                    dtype_upper = dtype.upper()
-                    chunk = scalar_value_to_bytes(dtype_upper, raw_value, display_big_endian)
-                    if chunk:
-                        if is_little_endian and dtype_upper in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
-                            chunk = swap_16bit_words_for_little_endian(chunk)
-                        raw_bytes.extend(chunk)
-                        chunk_words = bytes_to_hex_words(chunk, display_big_endian)
-                        field_hex.extend(chunk_words)
-                        if chunk_words:
-                            field_bytes += len(chunk)
-                            segment_lengths.append(len(chunk_words))
-
-                # 记录时间字段的位置和长度
-                if element == "时间" and field_hex:
-                    time_field_index = len(hex_items)
-                    time_field_length = len(field_hex)
-
-                if field_hex:
-                    hex_items.extend(field_hex)
-                    total_bytes += field_bytes
-
-            # 特殊处理时间字段：如果是小端序，交换前4个和后4个字符（前两个16位值和后两个16位值）
-            if time_field_index >= 0 and time_field_length > 0 and not display_big_endian:
-                # 时间字段是32位（4字节），即2个16位值，需要交换它们
-                if time_field_length == 2 and time_field_index + 1 < len(hex_items):
-                    # 交换两个16位值
-                    hex_items[time_field_index], hex_items[time_field_index + 1] = \
-                        hex_items[time_field_index + 1], hex_items[time_field_index]
-                elif time_field_length > 2:
-                    # 如果时间字段超过2个16位值，交换前一半和后一半
-                    half = time_field_length // 2
-                    for i in range(half):
-                        if time_field_index + i < len(hex_items) and time_field_index + time_field_length - 1 - i < len(hex_items):
-                            hex_items[time_field_index + i], hex_items[time_field_index + time_field_length - 1 - i] = \
-                                hex_items[time_field_index + time_field_length - 1 - i], hex_items[time_field_index + i]
-
-            if template.get("merge_8bit_to_16bit", True) and hex_items:
-                hex_items = merge_adjacent_byte_tokens(hex_items)
-
-            raw_hex_string = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
-            total_bytes = len(raw_hex_string) // 2
-            segment_lengths = [1] * len(hex_items)
-                
-            
-            return hex_items, total_bytes, raw_hex_string, segment_lengths
-
-        # 分类并导出
-        non_period_nc = {}  # key=(recip_site, sub_address, msg_len) -> list of (time, hexlist)
-        period_nc = {}
-        non_period_nt_lines = []  # (time, desc, hexlist)
-        period_nt = {}
-
-        def get_int(d, k, default=0):
-            try:
-                v = d.get(k, default)
-                return int(v)
-            except Exception:
-                return default
-        
-        def get_int_or_parse_hex(d, k, default=0):
-            """获取整数值，如果是字符串且为16进制格式则解析（支持全角乘号×）"""
-            try:
-                v = d.get(k, default)
-                print(f"get_int_or_parse_hex: k={k}, v={v}, type={type(v).__name__}")
-                if isinstance(v, str):
-                    # 处理全角乘号×（U+00D7）和全角Ｘ（U+FF38），统一转换为小写x
-                    v_str = v.strip()
-                    if not v_str:
-                        print("  值为空，返回默认")
-                        return default
-                    # 替换全角乘号×为半角x
-                    v_str = v_str.replace('×', 'x').replace('Ｘ', 'x').replace('×', 'x')
-                    v_str = v_str.lower()
-                    print(f"  处理后: '{v_str}'")
-                    if v_str.startswith('0x'):
-                        result = int(v_str, 16)
-                        print(f"  解析16进制 '{v_str}' -> {result}")
-                        return result
-                    elif 'x' in v_str:
-                        # 如果有x但没0x前缀（如"×15"或"0×15"），尝试添加0x前缀后解析
-                        # 移除所有的x和开头的0
-                        hex_part = v_str.replace('x', '').replace('X', '')
-                        # 如果开头有0，去掉（因为我们要添加0x）
-                        if hex_part.startswith('0'):
-                            hex_part = hex_part[1:]
-                        v_str = '0x' + hex_part
-                        result = int(v_str, 16)
-                        print(f"  解析16进制（添加前缀） '{v_str}' -> {result}")
-                        return result
-                    else:
-                        # 尝试解析为整数（十进制）
-                        result = int(v_str)
-                        print(f"  解析十进制 '{v_str}' -> {result}")
-                        return result
-                else:
-                    result = int(v)
-                    print(f"  直接转换 {v} -> {result}")
-                    return result
-            except Exception as e:
-                print(f"get_int_or_parse_hex 解析失败: k={k}, v={v}, error={e}")
-                return default
-        
-        def format_recip_for_filename(recip_value):
-            """格式化recip_site用于文件名（16进制格式）"""
-            if isinstance(recip_value, str):
-                recip_str = recip_value.strip().lower()
-                if recip_str.startswith('0x'):
-                    recip_int = int(recip_str, 16)
-                else:
-                    try:
-                        recip_int = int(recip_str, 16)
-                    except ValueError:
-                        recip_int = int(recip_str)
-            else:
-                recip_int = int(recip_value)
-            return f"0x{recip_int:03X}"
-        
-        def format_subaddr_for_filename(subaddr_value):
-            """格式化sub_address用于文件名（十进制格式，无0x前缀）"""
-            if isinstance(subaddr_value, str):
-                subaddr_str = subaddr_value.strip().lower()
-                if subaddr_str.startswith('0x'):
-                    subaddr_int = int(subaddr_str, 16)
-                else:
-                    subaddr_int = int(subaddr_str)
-            else:
-                subaddr_int = int(subaddr_value)
-            return f"{subaddr_int:02d}"
-
-        def to_time3(x):
-            try:
-                return float(x)
-            except Exception:
-                return 0.0
-
-        def normalize_hex_items(data_region, msg_len, big_endian, defer_little_endian=False):
-            # 将 data_region 标准化为十六进制标记列表（0x前缀）。
-            # 支持 union 列表、JSON 字符串等来源；按数据类型区分：
-            # - UINT8/16/32: 固定宽度的十六进制单标记（0xXX/0xXXXX/0xXXXXXXXX）
-            # - INT8/16/32: 以补码形式输出固定宽度十六进制单标记
-            # - FLOAT32/64: 以配置端序输出为若干 0xXX 标记（大端='>'，小端='<'）
-            # - BOOL: 0x01/0x00
-            # - STR: 若已是以空格分隔的 0x.. 序列则直接拆分，否则按UTF-8字节输出 0xXX 序列
-            import html
-            import struct as _struct
-            import json as _json
-            from typing import Any
-            try:
-                import models.step_model as step_model
-            except Exception:
-                step_model = None
-
-            display_big_endian = True if defer_little_endian else big_endian
-            is_little_endian = not big_endian
-            endian_prefix = '>' if display_big_endian else '<'
-
-            def to_int(val: Any) -> int:
-                if isinstance(val, (int, float)):
-                    return int(val)
-                if isinstance(val, str):
-                    s = val.strip().lower()
-                    if s.startswith('0x'):
-                        return int(s, 16)
-                    try:
-                        return int(float(s))
-                    except Exception:
-                        return 0
-                return 0
-
-            def value_to_bytes(val: Any, dtype_str: str, big_endian: bool) -> bytes:
-                """将值转换为字节数组，考虑端序"""
-                u = dtype_str.upper()
-                endian_prefix_local = '>' if big_endian else '<'
-                try:
-                    if u in ("UINT8", "INT8"):
-                        return bytes([val & 0xFF])
-                    elif u in ("UINT16", "INT16"):
-                        val = val & 0xFFFF
-                        if big_endian:
-                            return bytes([val >> 8, val & 0xFF])
-                        else:
-                            return bytes([val & 0xFF, val >> 8])
-                    elif u in ("UINT32", "INT32"):
-                        val = val & 0xFFFFFFFF
-                        if big_endian:
-                            return bytes([val >> 24, (val >> 16) & 0xFF, (val >> 8) & 0xFF, val & 0xFF])
-                        else:
-                            return bytes([val & 0xFF, (val >> 8) & 0xFF, (val >> 16) & 0xFF, val >> 24])
-                    elif u in ("FLOAT32", "REAL32", "FLOAT", "REAL"):
-                        if isinstance(val, str):
-                            s_val = val.strip().lower()
-                        if s_val.startswith("0x"):
-                            try:
-                                bits = int(s_val, 16) & 0xFFFFFFFF
-                                return bits.to_bytes(4, byteorder='big' if big_endian else 'little')
-                            except ValueError:
-                                pass
-                        fv = float(val) if val is not None else 0.0
-                        return _struct.pack(endian_prefix_local + 'f', fv)
-                    elif u in ("FLOAT64", "REAL64", "DOUBLE"):
-                        if isinstance(val, str):
-                            s_val = val.strip().lower()
-                        if s_val.startswith("0x"):
-                            try:
-                                bits = int(s_val, 16) & 0xFFFFFFFFFFFFFFFF
-                                return bits.to_bytes(8, byteorder='big' if big_endian else 'little')
-                            except ValueError:
-                                pass
-                        fv = float(val) if val is not None else 0.0
-                        return _struct.pack(endian_prefix_local + 'd', fv)
-                    elif u in ("BOOL", "BOOLEAN"):
-                        iv = 1 if (str(val).strip().lower() in ("1", "true", "yes")) else 0
-                        return bytes([iv])
-                    elif u in ("STR", "STRING"):
-                        s = str(val) if val is not None else ""
-                        parts = [p for p in s.split() if p]
-                        if parts and all(p.lower().startswith('0x') for p in parts):
-                            # 解析十六进制字符串
-                            result = []
-                            for part in parts:
-                                hex_val = int(part, 16)
-                                if hex_val <= 0xFF:
-                                    result.append(hex_val)
-                                else:
-                                    # 大于255的值按16位处理
-                                    result.extend([hex_val >> 8, hex_val & 0xFF])
-                            return bytes(result)
-                        else:
-                            return s.encode('utf-8')
-                    else:
-                        # 默认按16位处理
-                        val = val & 0xFFFF
-                        if big_endian:
-                            return bytes([val >> 8, val & 0xFF])
-                        else:
-                            return bytes([val & 0xFF, val >> 8])
-                except Exception:
-                    return bytes([0])
-
-            def bytes_to_hex_list(b: bytes):
-                # 按16位（2字节）分组输出，最后一个字节单独输出；
-                # 大端：高字节在前；小端：低字节在前（以16位为单位解释端序）
-                result = []
-                for i in range(0, len(b), 2):
-                    if i + 1 < len(b):
-                        if display_big_endian:
-                            val = (b[i] << 8) | b[i + 1]
-                        else:
-                            # 小端按16位单位解释：低字节在前，从而对32/64位类型自然呈现为低16位在前
-                            val = b[i] | (b[i + 1] << 8)
-                        result.append(f"0x{val:04X}")
-                    else:
-                        result.append(f"0x{b[i]:02X}")
-                return result
-
-            # 归一化得到 union 列表
-            union_list = []
-            source_type = "normalized"
-            raw_hex_string = ""
-            segment_lengths = []
-            if data_region is None:
-                return [], 0, source_type, raw_hex_string, []
-            if isinstance(data_region, list):
-                if data_region and all(isinstance(item, str) for item in data_region):
-                    raw_hex_string = "".join(_strip_hex_prefix(item) for item in data_region if item).upper()
-                    segments = [1] * len(data_region)
-                    return data_region, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
-                union_list = data_region
-            elif isinstance(data_region, str):
-                s = data_region.strip()
-                if not s:
-                    return [], 0, source_type, raw_hex_string, []
-                # 可能是 JSON
-                decoded = html.unescape(s)
-                try:
-                    obj = _json.loads(decoded)
-                    if isinstance(obj, list):
-                        union_list = obj
-                    else:
-                        parts = [p for p in s.split() if p]
-                        if all(p.lower().startswith('0x') for p in parts):
-                            raw_hex_string = "".join(_strip_hex_prefix(p) for p in parts if p).upper()
-                            segments = [1] * len(parts)
-                            return parts, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
-                        raw_bytes = s.encode('utf-8')
-                        raw_hex_string = raw_bytes.hex().upper()
-                        raw_tokens = bytes_to_hex_list(raw_bytes)
-                        segments = [1] * len(raw_tokens)
-                        return raw_tokens, len(raw_bytes), source_type, raw_hex_string, segments
-                except Exception:
-                    parts = [p for p in s.split() if p]
-                    if all(p.lower().startswith('0x') for p in parts):
-                        raw_hex_string = "".join(_strip_hex_prefix(p) for p in parts if p).upper()
-                        segments = [1] * len(parts)
-                        return parts, len(raw_hex_string) // 2, "raw_hex", raw_hex_string, segments
-                    raw_bytes = s.encode('utf-8')
-                    raw_hex_string = raw_bytes.hex().upper()
-                    raw_tokens = bytes_to_hex_list(raw_bytes)
-                    segments = [1] * len(raw_tokens)
-                    return raw_tokens, len(raw_bytes), source_type, raw_hex_string, segments
-            else:
-                return [], 0, source_type, raw_hex_string, []
-
-            # 紧凑型存储：将所有数据转换为字节流，然后按16位分组显示
-            byte_stream = bytearray()
-            hex_items = []
-            total_bytes = 0
-
-            def append_and_track(chunk_bytes):
-                nonlocal total_bytes
-                if not chunk_bytes:
-                    return
-                byte_stream.extend(chunk_bytes)
-                total_bytes += len(chunk_bytes)
-                words = bytes_to_hex_list(chunk_bytes)
-                if words:
-                    hex_items.extend(words)
-                    segment_lengths.append(len(words))
-
-            for item in union_list:
-                if not isinstance(item, dict):
-                    continue
-                dtype_idx = item.get('data_type')
-                value = item.get('value')
-                dtype_str = None
-                if step_model is not None:
-                    try:
-                        dtype_str = step_model.SUPPORTED_DTYPES[dtype_idx] if isinstance(dtype_idx, int) and 0 <= dtype_idx < len(step_model.SUPPORTED_DTYPES) else None
-                    except Exception:
-                        dtype_str = None
-                if not dtype_str:
-                    dtype_str = "UINT8"
-
-                u = dtype_str.upper()
-                try:
-                    # 根据数据类型选择正确的转换方式
-                    if u in ("FLOAT32", "REAL32", "FLOAT", "REAL", "FLOAT64", "REAL64", "DOUBLE"):
-                        item_bytes = None
-                        converted_display = value
-                        if isinstance(value, str):
-                            s_val = value.strip().lower()
-                            if s_val.startswith("0x"):
-                                hex_part = s_val[2:]
-                                expected_bits = 32 if u in ("FLOAT32", "REAL32", "FLOAT", "REAL") else 64
-                                expected_bytes = expected_bits // 8
-                                try:
-                                    bits_val = int(hex_part, 16) & ((1 << expected_bits) - 1)
-                                    byteorder = 'big' if display_big_endian else 'little'
-                                    item_bytes = bits_val.to_bytes(expected_bytes, byteorder=byteorder, signed=False)
-                                    converted_display = f"0x{hex_part.upper()}"
-                                except ValueError:
-                                    item_bytes = None
-                        if item_bytes is None:
-                            try:
-                                converted_value = float(value) if value is not None else 0.0
-                            except (TypeError, ValueError):
-                                converted_value = 0.0
-                            converted_display = converted_value
-                            endian_prefix_local = '>' if display_big_endian else '<'
-                            fmt = 'f' if u in ("FLOAT32", "REAL32", "FLOAT", "REAL") else 'd'
-                            item_bytes = _struct.pack(endian_prefix_local + fmt, converted_value)
-                        print(f"    处理 {u}: 原始值={value}, 转换后={converted_display}")
-                    else:
-                        # 整数类型使用to_int转换
-                        iv = to_int(value)
-                        print(f"    处理 {u}: 原始值={value}, 转换后={iv}")
-                        item_bytes = value_to_bytes(iv, dtype_str, display_big_endian)
-                    if is_little_endian and u in LITTLE_ENDIAN_WORD_SWAP_DTYPES:
-                        item_bytes = swap_16bit_words_for_little_endian(item_bytes)
-
-                    append_and_track(item_bytes)
-                    print(f"    字节: {item_bytes.hex()}")
-                except Exception as err:
-                    print(f"    处理 {u} 时出错，使用默认值0，错误: {err}")
-                    append_and_track(bytes([0]))
-
-            # 将字节流转换为十六进制显示
-            raw_hex_string = byte_stream.hex().upper()
-
-            display_hex_items = format_hex_items_for_output(hex_items)
-            
-            print(f"    最终字节流: {byte_stream.hex()}")
-            print(f"    最终显示: {display_hex_items}")
-            print(f"    总字节数: {total_bytes}")
-
-            return hex_items, total_bytes, source_type, raw_hex_string, segment_lengths
-
-        def read_hex_sequences_from_files(path_field, msg_len):
-            """从 file_path 指定的一个或多个文件读取HEX行，返回 List[List[str]]"""
-            seqs = []
-            if not path_field:
-                return seqs
-            # 支持以 ; 或 , 分隔的多个文件
-            parts = []
-            if isinstance(path_field, str):
-                parts = [p.strip() for p in path_field.replace("\n", ",").split(",") if p.strip()]
-            elif isinstance(path_field, (list, tuple)):
-                parts = [str(p).strip() for p in path_field if str(p).strip()]
-            for p in parts:
-                try:
-                    with open(p, 'r', encoding='utf-8', errors='ignore') as fh:
-                        for line in fh:
-                            s = line.strip()
-                            if not s:
-                                continue
-                            # 解析一行HEX
-                            s = s.replace("\t", " ").replace(",", " ")
-                            s = s.replace("0x", "").replace("0X", "")
-                            s = "".join(s.split())
-                            # 按16位（4个字符）分组，最后一个字节不补零
-                            row = []
-                            for i in range(0, len(s), 4):
-                                if i + 4 <= len(s):
-                                    # 完整的16位
-                                    row.append(f"0x{s[i:i+4].upper()}")
-                                else:
-                                    # 最后一个不完整的字节，不补零
-                                    remaining = s[i:]
-                                    if len(remaining) == 2:
-                                        row.append(f"0x{remaining.upper()}")
-                                    elif len(remaining) == 1:
-                                        row.append(f"0x{remaining.upper()}")
-                        if msg_len and isinstance(msg_len, int) and msg_len > 0:
-                            row = row[:msg_len]
-                        if row:
-                            seqs.append(row)
-                except Exception:
-                    continue
-            return seqs
-
-        def build_meta_columns(base, type_data):
-            cols = []
-            # base 关键信息
-            if 'name' in base: cols.append(f"name={base.get('name')}")
-            if 'step_type' in base: cols.append(f"step_type={base.get('step_type')}")
-            if 'is_ignore' in base: cols.append(f"is_ignore={base.get('is_ignore')}")
-            if 'endian' in base: cols.append(f"endian={base.get('endian')}")
-            # type 关键信息
-            for key in ('site_type','local_site','recip_site','sub_address','msg_len','protocol_type'):
-                if key in type_data:
-                    cols.append(f"{key}={type_data.get(key)}")
-            return cols
-
-        def iter_period_lines(base_time, period_value, sequences, default_hex):
-            """生成周期行，若文件包含多行则依次按周期累加时间，否则仅使用默认数据。"""
-            if sequences:
-                for idx, seq in enumerate(sequences):
-                    yield base_time + period_value * idx, seq, idx  # 返回时间、序列和行索引
-            else:
-                yield base_time, default_hex, 0  # 返回时间、默认序列和行索引0
-
-        def prepare_step_payload(step, non_types, per_types):
-            base = step.get_base_step_data() or {}
-            type_data = step.get_type_step_data() or {}
-            stype = step.get_step_type()
-
-            is_non_step = stype in non_types
-            is_per_step = stype in per_types
-            if not (is_non_step or is_per_step):
-                return None
-
-            if get_int(base, 'is_ignore', 0) == 1:
-                return None
-
-            # 获取通用字段
-            site_type = get_int(type_data, 'site_type', 0)
-            recip = get_int_or_parse_hex(type_data, 'recip_site', 0)
-            sub_addr = get_int_or_parse_hex(type_data, 'sub_address', 0)
-            msg_len = get_int(type_data, 'msg_len', 0)
-            data_region = type_data.get('data_region')
-            file_path_field = type_data.get('file_path')
-            file_hex_sequences = None
-            
-            # 获取开关量协议特定字段
-            address = get_int_or_parse_hex(type_data, 'address', None)
-            switch_type = get_int(type_data, 'switch_type', 8)
-            switch_value = get_int(type_data, 'switch_value', 0)
-
-            # 如果是开关量协议，直接返回基本信息，不需要处理hex数据
-            if stype == 6:  # switch_quantity_fileds
-                payload = {
-                    "step": step,
-                    "base": base,
-                    "type_data": type_data,
-                    "is_non_step": is_non_step,
-                    "is_per_step": is_per_step,
-                    "address": address,
-                    "switch_type": switch_type,
-                    "switch_value": switch_value,
-                    "hex_items": [],
-                    "file_hex_sequences": None,
-                    "actual_byte_len": 0,
-                    "base_time": to_time3(base.get('time', 0.0)),
-                    "period_value": to_time3(type_data.get('period', 0.0)),
-                    "serial_id": 0
-                }
-                return payload
-
-            # 其他协议的处理逻辑
-            is_big_endian = base.get('endian', 0) == 0
-            hex_items, data_bytes, hex_source, raw_hex_string, hex_segments = normalize_hex_items(
-                data_region,
-                msg_len,
-                is_big_endian,
-                defer_little_endian=not is_big_endian
+        # 从文件读取的步骤另建分桶索引，当前模型直接复用其索引
+        bucket_index = None if steps_from_file else self.model.step_buckets()
+
+        # 导出期间窗口模态，避免修改正在导出的模型步骤
+        progress = QProgressDialog("正在导出协议文本...", None, 0, 0, self.main_window)
+        progress.setWindowTitle("导出")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+
+        thread = ExportThread(all_steps, protocol_dirs, bucket_index, self.template_manager)
+        self._export_thread = thread
+
+        def on_done(result):
+            progress.close()
+            self._show_export_result(result)
+
+        def on_error(message):
+            progress.close()
+            QMessageBox.critical(self.main_window, "导出错误", f"导出时出错: {message}")
+
+        thread.export_done.connect(on_done)
+        thread.export_error.connect(on_error)
+        thread.start()
+
+    def is_exporting(self):
+        """是否有后台导出任务正在进行"""
+        thread = getattr(self, "_export_thread", None)
+        return thread is not None and thread.isRunning()
+
+    def wait_for_pending_export(self):
+        """等待后台导出任务结束（关闭窗口前调用）"""
+        thread = getattr(self, "_export_thread", None)
+        if thread is not None and thread.isRunning():
+            thread.wait()
+
+    def _show_export_result(self, result):
+        """提示export_txts的导出结果：未配置目录的协议、出错的文件或目录、导出的协议目录"""
+        from PyQt5.QtWidgets import QMessageBox
+        for protocol_name in result["missing_dirs"]:
+            QMessageBox.warning(
+                self.main_window,
+                "未找到配置",
+                f"请在全局设置中为{protocol_name}配置有效的输出目录"
             )
-
-            if not hex_items and file_path_field:
-                file_hex_seqs = read_hex_sequences_from_files(file_path_field, msg_len)
-                if file_hex_seqs:
-                    file_hex_sequences = file_hex_seqs
-                    hex_items = file_hex_seqs[0]
-                    data_bytes = len(hex_items) * 2
-                    hex_source = "raw_hex"
-                    raw_hex_string = "".join(_strip_hex_prefix(tok) for tok in hex_items if tok).upper()
-                    hex_segments = [1] * len(hex_items)
-
-            proto_type_raw = type_data.get('protocol_type', -1)
-            try:
-                proto_type_val = int(proto_type_raw)
-            except (TypeError, ValueError):
-                proto_type_val = -1
-            if proto_type_val is not None and proto_type_val >= 0:
-                protocol_hex_items, protocol_bytes, protocol_raw_hex, protocol_segments = convert_template_fields_to_hex(
-                    step,
-                    proto_type_val,
-                    is_big_endian,
-                    defer_little_endian=not is_big_endian
-                )
-                if protocol_hex_items:
-                    hex_items = protocol_hex_items
-                    data_bytes = protocol_bytes
-                    hex_source = "normalized"
-                    raw_hex_string = protocol_raw_hex
-                    hex_segments = protocol_segments
-
-            if hex_items:
-                msg_len = len(hex_items)
-            elif msg_len > 0:
-                hex_items = ["0x0000"] * msg_len
-                data_bytes = msg_len * 2
-                raw_hex_string = "0000" * msg_len
-                hex_segments = [1] * len(hex_items)
-
-            actual_byte_len = data_bytes
-
-            if file_hex_sequences:
-                file_hex_sequences = [
-                    format_hex_items_for_output(seq) for seq in file_hex_sequences
-                ]
-
-            if hex_items:
-                hex_items = format_hex_items_for_output(hex_items)
-
-            payload = {
-                "step": step,
-                "base": base,
-                "type_data": type_data,
-                "is_non_step": is_non_step,
-                "is_per_step": is_per_step,
-                "site_type": site_type,
-                "recip": recip,
-                "sub_addr": sub_addr,
-                "hex_items": hex_items,
-                "file_hex_sequences": file_hex_sequences,
-                "actual_byte_len": actual_byte_len,
-                "base_time": to_time3(base.get('time', 0.0)),
-                "period_value": to_time3(type_data.get('period', 0.0)),
-                "serial_id": get_int(type_data, 'serialID', 0)
-            }
-            return payload
-
-        def process_interrupt_steps(out_dir):
-            """按需求生成中断 port.config 文件"""
-            interrupt_non_types = {7}
-            interrupt_per_types = {8}
-            relevant_types = interrupt_non_types | interrupt_per_types
-            relevant_steps = [
-                step for step in all_steps if step.get_step_type() in relevant_types
-            ]
-            if not out_dir or not relevant_steps:
-                return None
-
-            os.makedirs(out_dir, exist_ok=True)
-
-            def format_interrupt_display(raw_value):
-                if raw_value is None:
-                    return "0"
-                text = str(raw_value).strip()
-                return text if text else "0"
-
-            periodic_map = {}
-            periodic_sort_key = {}
-            non_periodic_map = {}
-            non_periodic_sort_key = {}
-
-            for step in relevant_steps:
-                base = step.get_base_step_data() or {}
-                if get_int(base, "is_ignore", 0) == 1:
-                    continue
-                type_data = step.get_type_step_data() or {}
-                interrupt_raw = type_data.get("interrupt_num")
-                interrupt_display = format_interrupt_display(interrupt_raw)
-                interrupt_int = get_int_or_parse_hex(
-                    {"interrupt_num": interrupt_raw}, "interrupt_num", 0
-                )
-                step_type = step.get_step_type()
-
-                if step_type in interrupt_per_types:
-                    period_value = to_time3(type_data.get("period", 0.0))
-                    period_ms = int(round(period_value * 1000))
-                    if period_ms < 0:
-                        period_ms = 0
-                    periodic_map[interrupt_display] = period_ms
-                    periodic_sort_key[interrupt_display] = interrupt_int
-                else:
-                    time_value = to_time3(base.get("time", 0.0))
-                    time_ms = int(round(time_value * 1000))
-                    if time_ms < 0:
-                        time_ms = 0
-                    non_periodic_map.setdefault(interrupt_display, []).append(time_ms)
-                    non_periodic_sort_key[interrupt_display] = interrupt_int
-
-            def _format_comment_text(int_key, times_ms):
-                if not times_ms:
-                    return "；仿真时间10s时触发90号中断"
-                first_time_ms = min(times_ms)
-                seconds_str = f"{first_time_ms/1000:g}"
-                return f"；仿真时间{seconds_str}s时触发{int_key}号中断"
-
-            periodic_lines = [
-                "#对中断周期的配置,注意此处只需要配周期性中断，其余均认为是非周期中断",
-                "",
-                "#中断号=周期值(ms)",
-                "",
-                "[INT_PERIOD]"
-            ]
-            if periodic_map:
-                for key in sorted(periodic_map.keys(), key=lambda k: (periodic_sort_key.get(k, 0), k)):
-                    periodic_lines.append(f"{key}={periodic_map[key]}")
-            periodic_lines.append("")
-            periodic_lines.append("#忽略的中断号")
-            periodic_lines.append("")
-            periodic_lines.append("[IGNORE_INT]")
-            periodic_lines.append("")
-            periodic_lines.append("；核间通信中断")
-            periodic_lines.append("")
-
-            non_periodic_lines = [
-                "#单次触发中断配置#对于数据触发的中断可在底层驱动中通过读文件控制数据何时到来，不在此处配置",
-                "",
-                "#中断号=触发时间(ms)",
-                "",
-                "[ISINGLE_TRIGGER_INTJ]"
-            ]
-
-            if non_periodic_map:
-                first_key = min(non_periodic_map.keys(), key=lambda k: (non_periodic_sort_key.get(k, 0), k))
-                comment_line = _format_comment_text(first_key, non_periodic_map[first_key])
-            else:
-                comment_line = "；仿真时间10s时触发90号中断"
-            non_periodic_lines.append(comment_line)
-
-            if non_periodic_map:
-                for key in sorted(non_periodic_map.keys(), key=lambda k: (non_periodic_sort_key.get(k, 0), k)):
-                    times = sorted(set(non_periodic_map[key]))
-                    times_str = ",".join(str(val) for val in times)
-                    non_periodic_lines.append(f"中断：{key}={times_str}")
-            else:
-                non_periodic_lines.append("中断：")
-
-            port_config_content = "\n".join(periodic_lines + non_periodic_lines).rstrip() + "\n"
-            port_config_path = os.path.join(out_dir, "port.config")
-            with open(port_config_path, "w", encoding="utf-8") as f:
-                f.write(port_config_content)
-            return port_config_path
-
-        def process_bus_protocol(protocol_name, spec, payloads, out_dir):
-            primary_non = {}
-            primary_period = {}
-            secondary_non_lines = []
-            secondary_period = {}
-
-            for payload in payloads:
-                if payload["is_non_step"]:
-                    t = payload["base_time"]
-                    if payload["site_type"] == 0:
-                        key = (payload["recip"], payload["sub_addr"], payload["actual_byte_len"])
-                        primary_non.setdefault(key, []).append((t, payload["hex_items"]))
-                    else:
-                        desc = f"ID0x{payload['recip']:03X}_SA{payload['sub_addr']:02X}_Len{payload['actual_byte_len']}"
-                        secondary_non_lines.append((t, desc, payload["hex_items"]))
-                else:
-                    t = payload["base_time"]
-                    period = payload["period_value"]
-                    key = (payload["recip"], payload["sub_addr"], payload["actual_byte_len"])
-                    target = primary_period if payload["site_type"] == 0 else secondary_period
-                    target.setdefault(key, []).append((t, payload["hex_items"], period, payload["file_hex_sequences"]))
-
-            primary_prefix = spec.get("primary_prefix", "Nc")
-            secondary_prefix = spec.get("secondary_prefix", "Nt")
-            file_pattern = spec.get("file_pattern", "{prefix}Recv_ID0x{recip:03X}_SA{sa:02X}_Len{ln}.txt")
-            secondary_non_filename = spec.get("secondary_non_filename") or f"{secondary_prefix}Recv_NonPeriod.txt"
-
-            print(f"\n[{protocol_name}] 分类结果:")
-            print(f"  {primary_prefix} 非周期: {len(primary_non)} 个文件")
-            print(f"  {primary_prefix} 周期: {len(primary_period)} 个文件")
-            print(f"  {secondary_prefix} 非周期: {len(secondary_non_lines)} 行")
-            print(f"  {secondary_prefix} 周期: {len(secondary_period)} 个文件")
-
-            def write_primary_files(container, prefix_label):
-                for (recip, sa, ln), rows in container.items():
-                    rows.sort(key=lambda x: x[0])
-                    fname = file_pattern.format(prefix=prefix_label, recip=recip, sa=sa, ln=ln)
-                    fpath = os.path.join(out_dir, fname)
-                    try:
-                        with open(fpath, 'w', encoding='utf-8') as f:
-                            for record in rows:
-                                if len(record) == 2:
-                                    t, hexlist = record
-                                    line = f"{t:.3f}"
-                                    if hexlist:
-                                        line += "\t" + "\t".join(hexlist)
-                                    f.write(line + "\n")
-                                else:
-                                    t, hexlist, period, sequences = record
-                                    for time_val, seq, line_idx in iter_period_lines(t, period, sequences, hexlist):
-                                        # 对于周期GLINK的每行，重新计算时间戳、帧计数和CRC
-                                        modified_seq = seq.copy()
-                                        
-                                        # 1. 更新时间戳字段（索引0-1，UINT32拆分为两个UINT16）
-                                        if len(modified_seq) > 1:
-                                            # 将time_val转换为毫秒并取整
-                                            timestamp_ms = int(round(time_val * 1000))
-                                            # 拆分UINT32为两个UINT16（低16位和高16位）
-                                            time_low = timestamp_ms & 0xFFFF
-                                            time_high = (timestamp_ms >> 16) & 0xFFFF
-                                            # 更新时间戳字段
-                                            modified_seq[0] = f"0x{time_high:04X}"
-                                            modified_seq[1] = f"0x{time_low:04X}"
-                                        
-                                        # 2. 更新帧计数字段（索引4）
-                                        if len(modified_seq) > 4:
-                                            # 计算帧计数：行索引+1，确保在0x0000-0xFFFF范围内
-                                            frame_count = (line_idx + 1) & 0xFFFF
-                                            modified_seq[4] = f"0x{frame_count:04X}"
-                                        
-                                        # 3. 重新计算CRC校验和（如果需要）
-                                        if len(modified_seq) > 5:
-                                            # 提取数据区（从索引5开始到倒数第二个元素）
-                                            data_region = modified_seq[5:-1] if len(modified_seq) > 6 else []
-                                            # 将数据区转换为字符串
-                                            data_region_str = " ".join(data_region)
-                                            # 计算CRC
-                                            special_metrics = calc_crc_tail_metrics(data_region_str)
-                                            crc_value = special_metrics.get("overrides", {}).get("数据区crc校验和", "0x0000")
-                                            # 更新CRC字段
-                                            modified_seq[-1] = crc_value
-                                        
-                                        line = f"{time_val:.3f}"
-                                        if modified_seq:
-                                            line += "\t" + "\t".join(modified_seq)
-                                        f.write(line + "\n")
-                        print(f"  [{protocol_name}] 写入文件: {fname}")
-                    except PermissionError:
-                        print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
-                    except Exception as exc:
-                        print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
-
-            write_primary_files(primary_non, primary_prefix)
-            write_primary_files(primary_period, primary_prefix)
-
-            if secondary_non_lines:
-                secondary_non_lines.sort(key=lambda x: x[0])
-                fpath = os.path.join(out_dir, secondary_non_filename)
-                try:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        for t, desc, hexlist in secondary_non_lines:
-                            line = f"{t:.3f}\t{desc}"
-                            if hexlist:
-                                line += "\t" + "\t".join(hexlist)
-                            f.write(line + "\n")
-                    print(f"  [{protocol_name}] 写入文件: {secondary_non_filename}")
-                except PermissionError:
-                    print(f"  [{protocol_name}] 权限错误，跳过文件: {secondary_non_filename}")
-                except Exception as exc:
-                    print(f"  [{protocol_name}] 写入文件 {secondary_non_filename} 时出错: {exc}")
-
-            if secondary_period:
-                write_primary_files(secondary_period, secondary_prefix)
-
-            return out_dir
-
-        def process_uart_protocol(protocol_name, spec, payloads, out_dir):
-            non_pattern = spec.get("non_file_pattern", "Uart_NonPeriod_recv_Com_ADD_{addr}.txt")
-            per_pattern = spec.get("per_file_pattern", "Uart_Period_recv_Com_ADD_{addr}.txt")
-            group_non = {}
-            group_period = {}
-
-            for payload in payloads:
-                serial_id_val = payload.get("serial_id")
-                if serial_id_val is None:
-                    print(f"[{protocol_name}] 步骤缺少串口号，已跳过: step={payload.get('step')}")
-                    continue
-                addr_str = f"{int(serial_id_val):02d}"
-
-                if payload["is_non_step"]:
-                    group_non.setdefault(addr_str, []).append((payload["base_time"], payload["hex_items"]))
-                else:
-                    group_period.setdefault(addr_str, []).append(
-                        (payload["base_time"], payload["hex_items"], payload["period_value"], payload["file_hex_sequences"])
-                    )
-
-            print(f"\n[{protocol_name}] 分类结果:")
-            print(f"  非周期基地址文件: {len(group_non)} 个")
-            print(f"  周期基地址文件: {len(group_period)} 个")
-
-            for addr, rows in group_non.items():
-                rows.sort(key=lambda x: x[0])
-                fname = non_pattern.format(addr=addr)
-                fpath = os.path.join(out_dir, fname)
-                try:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        for t, hexlist in rows:
-                            line = f"{t:.3f}"
-                            if hexlist:
-                                line += "\t" + "\t".join(hexlist)
-                            f.write(line + "\n")
-                    print(f"  [{protocol_name}] 写入文件: {fname}")
-                except PermissionError:
-                    print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
-                except Exception as exc:
-                    print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
-
-            for addr, rows in group_period.items():
-                rows.sort(key=lambda x: x[0])
-                fname = per_pattern.format(addr=addr)
-                fpath = os.path.join(out_dir, fname)
-                try:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        for t, hexlist, period, sequences in rows:
-                            for time_val, seq in iter_period_lines(t, period, sequences, hexlist):
-                                line = f"{time_val:.3f}"
-                                if seq:
-                                    line += "\t" + "\t".join(seq)
-                                f.write(line + "\n")
-                    print(f"  [{protocol_name}] 写入文件: {fname}")
-                except PermissionError:
-                    print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
-                except Exception as exc:
-                    print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
-
-            if not group_non and not group_period:
-                return None
-            return out_dir
-
-        protocol_specs = [
-            {
-                "protocol_key": "glink",
-                "display_name": "GLINK",
-                "step_types": {"non": {0}, "per": {1}},
-                "primary_prefix": "Nc",
-                "secondary_prefix": "Nt",
-                "secondary_non_filename": "NtRecv_NonPeriod.txt",
-                "strict_path": True,
-                "mode": "bus"
-            },
-            {
-                "protocol_key": "bc",
-                "display_name": "1553-BC",
-                "step_types": {"non": {4}, "per": {5}},
-                "primary_prefix": "Bc",
-                "secondary_prefix": "Bt",
-                "secondary_non_filename": "BtRecv_NonPeriod.txt",
-                "strict_path": True,
-                "mode": "bus"
-            },
-            {
-                "protocol_key": "uart",
-                "display_name": "串口",
-                "step_types": {"non": {2}, "per": {3}},
-                "non_file_pattern": "Uart_NonPeriod_recv_Com_ADD_{addr}.txt",
-                "per_file_pattern": "Uart_Period_recv_Com_ADD_{addr}.txt",
-                "strict_path": True,
-                "mode": "uart"
-            },
-            {
-                "protocol_key": "switch",
-                "display_name": "开关量",
-                "step_types": {"non": {6}, "per": set()},
-                "non_file_pattern": "Switch_NonPeriod_{addr}.txt",
-                "strict_path": True,
-                "mode": "switch"
-            }
-        ]
-
-        def process_switch_protocol(protocol_name, spec, payloads, out_dir):
-            """处理开关量协议的导出逻辑"""
-            non_pattern = spec.get("non_file_pattern", "Switch_NonPeriod_{addr}.txt")
-            
-            # 按地址分组数据
-            group_non = {}
-            
-            for payload in payloads:
-                address = payload.get("address")
-                if address is None:
-                    print(f"[{protocol_name}] 步骤缺少地址，已跳过: step={payload.get('step')}")
-                    continue
-                
-                addr_str = f"{int(address):02x}"  # 地址转换为两位十六进制字符串
-                
-                if payload["is_non_step"]:
-                    group_non.setdefault(addr_str, []).append((payload["base_time"], payload["hex_items"], payload.get("switch_value", 0), payload.get("switch_type", 8)))
-            
-            print(f"\n[{protocol_name}] 分类结果:")
-            print(f"  非周期地址文件: {len(group_non)} 个")
-            
-            for addr, rows in group_non.items():
-                rows.sort(key=lambda x: x[0])
-                fname = non_pattern.format(addr=addr)
-                fpath = os.path.join(out_dir, fname)
-                try:
-                    with open(fpath, 'w', encoding='utf-8') as f:
-                        for t, hexlist, switch_value, switch_type in rows:
-                            line = f"{t:.3f}"
-                            # 根据switch_type将switch_value转换为对应的十六进制格式
-                            if switch_type == 8:
-                                hex_value = f"{int(switch_value):02x}"  # 8位开关量，2位十六进制
-                            elif switch_type == 16:
-                                hex_value = f"{int(switch_value):04x}"  # 16位开关量，4位十六进制
-                            elif switch_type == 32:
-                                hex_value = f"{int(switch_value):08x}"  # 32位开关量，8位十六进制
-                            else:
-                                hex_value = f"{int(switch_value):x}"  # 默认格式
-                            line += f"\t{hex_value}"
-                            f.write(line + "\n")
-                    print(f"  [{protocol_name}] 写入文件: {fname}")
-                except PermissionError:
-                    print(f"  [{protocol_name}] 权限错误，跳过文件: {fname}")
-                except Exception as exc:
-                    print(f"  [{protocol_name}] 写入文件 {fname} 时出错: {exc}")
-            
-            return out_dir
-
-        def process_protocol(spec):
-            protocol_name = spec.get("display_name", spec.get("protocol_key", "未知协议"))
-            protocol_key = spec.get("protocol_key", "")
-            out_dir = protocol_dirs.get(protocol_key, "")
-            if not out_dir:
-                if spec.get("strict_path", False):
-                    QMessageBox.warning(
-                        self.main_window,
-                        "未找到配置",
-                        f"请在全局设置中为{protocol_name}配置有效的输出目录"
-                    )
-                return None
-            os.makedirs(out_dir, exist_ok=True)
-            clear_txt_files(out_dir)
-
-            step_types = spec.get("step_types", {})
-            non_types = set(step_types.get("non", set()))
-            per_types = set(step_types.get("per", set()))
-            relevant_types = non_types | per_types
-            if not relevant_types:
-                return None
-
-            relevant_steps = [
-                step for step in all_steps if step.get_step_type() in relevant_types
-            ]
-            if not relevant_steps:
-                print(f"{protocol_name}: 无匹配步骤，跳过导出。")
-                return None
-
-            payloads = []
-            for step in relevant_steps:
-                payload = prepare_step_payload(step, non_types, per_types)
-                if payload:
-                    payloads.append(payload)
-
-            if not payloads:
-                print(f"{protocol_name}: 无有效步骤，跳过导出。")
-                return None
-
-            mode = spec.get("mode", "bus").lower()
-            if mode == "uart":
-                return process_uart_protocol(protocol_name, spec, payloads, out_dir)
-            elif mode == "switch":
-                return process_switch_protocol(protocol_name, spec, payloads, out_dir)
-            return process_bus_protocol(protocol_name, spec, payloads, out_dir)
-
-        exported_dirs = []
-        for spec in protocol_specs:
-            result_dir = process_protocol(spec)
-            if result_dir:
-                exported_dirs.append((spec.get("display_name", spec.get("protocol_key", "")), result_dir))
-
-        interrupt_result = process_interrupt_steps(interrupt_output_dir)
-        if interrupt_result:
-            exported_dirs.append(("中断", interrupt_result))
-
+        if result["errors"]:
+            details = "\n".join(f"{path}: {message}" for path, message in result["errors"])
+            QMessageBox.warning(self.main_window, "导出出错", f"以下文件或目录导出失败:\n{details}")
+        exported_dirs = result["exported"]
         if exported_dirs:
             summary = "\n".join(f"{name}: {path}" for name, path in exported_dirs)
             QMessageBox.information(self.main_window, "导出完成", f"已导出以下协议文本:\n{summary}")
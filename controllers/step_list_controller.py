@@ -1,9 +1,13 @@
 # from views.dialog import StepConfigDialog
 from PyQt5.QtWidgets import QDialog
-from models.step_model import StepModel
-import pickle
+from models.step_model import StepModel, dumps_steps, loads_steps
+import uuid
 from PyQt5.QtCore import QMimeData, QByteArray, QTimer
-from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWidgets import QApplication, QInputDialog
+
+STEP_MIME_TYPE = "application/x-step-object"
+# 本进程复制时附带的标识，粘贴时据此直接复制内存中的步骤，不再反序列化
+STEP_TOKEN_MIME_TYPE = "application/x-step-token"
 
 class StepListController:
     def __init__(self, model, list_view, step_detail_controller, global_controller, strings):
@@ -12,6 +16,8 @@ class StepListController:
         self.step_detail_controller = step_detail_controller
         self.global_controller = global_controller
         self.STRINGS = strings
+        self._clipboard_token = None
+        self._clipboard_steps = []
     
     def connect_signals(self):
         """连接步骤列表视图信号"""
@@ -28,6 +34,7 @@ class StepListController:
         self.step_list_view.copy_btn.clicked.connect(self.copy_step)
         self.step_list_view.cut_btn.clicked.connect(self.cut_step)
         self.step_list_view.paste_btn.clicked.connect(self.paste_step)
+        self.step_list_view.duplicate_btn.clicked.connect(self.duplicate_step)
         self.step_list_view.step_moved.connect(self.move_step)
 
         self.step_detail_controller.step_save_signal_finish.connect(self.update_step_list)
@@ -174,13 +181,16 @@ class StepListController:
         """复制当前选中的步骤"""
         index = self.step_list_view.get_selected_index()
         if 0 <= index < len(self.model.steps):
-            # 序列化步骤对象
+            # 保存复制时的副本（周期行数据共用），并序列化供其它窗口粘贴
             step_data = self.model.steps[index]
-            serialized = pickle.dumps(step_data)
+            self._clipboard_steps = [step_data.clone()]
+            self._clipboard_token = uuid.uuid4().hex.encode("ascii")
+            serialized = dumps_steps(self._clipboard_steps)
             
             # 创建MIME数据
             mime_data = QMimeData()
-            mime_data.setData("application/x-step-object", QByteArray(serialized))
+            mime_data.setData(STEP_MIME_TYPE, QByteArray(serialized))
+            mime_data.setData(STEP_TOKEN_MIME_TYPE, QByteArray(self._clipboard_token))
             
             # 添加文本表示以便在其他程序中查看
             text_rep = f"Step: {step_data.get_name()}\nType: {step_data.get_step_type()}"
@@ -209,19 +219,15 @@ class StepListController:
         mime_data = clipboard.mimeData()
         
         # 检查是否有我们的步骤数据
-        if mime_data.hasFormat("application/x-step-object"):
+        if mime_data.hasFormat(STEP_MIME_TYPE):
             try:
-                # 获取并反序列化数据
-                byte_data = mime_data.data("application/x-step-object").data()
-                step_data = pickle.loads(byte_data)
-                
-                # 确保粘贴的是StepModel对象
-                if not isinstance(step_data, StepModel):
-                    raise ValueError("剪切板内容不是有效的步骤对象")
-                
-                # 深拷贝对象以避免引用问题
-                from copy import deepcopy
-                new_step = deepcopy(step_data)
+                token = mime_data.data(STEP_TOKEN_MIME_TYPE).data()
+                if self._clipboard_token and token == self._clipboard_token:
+                    # 本窗口复制的步骤：直接复制内存中的副本
+                    new_step = self._clipboard_steps[0].clone()
+                else:
+                    # 其它窗口复制的步骤：反序列化得到的已是独立对象
+                    new_step = loads_steps(mime_data.data(STEP_MIME_TYPE).data())[0]
                 # new_step.name = f"{new_step.get_name()} (副本)"  # 添加副本标记
 
                 new_step.set_name(f"{new_step.get_name()} (副本)")
@@ -231,7 +237,7 @@ class StepListController:
                 insert_index = index + 1 if index >= 0 else len(self.model.steps)
                 
                 # 插入步骤
-                self.model.steps.insert(insert_index, new_step)
+                self.model.insert_steps(insert_index, [new_step])
                 self.update_step_list()
                 self.step_list_view.set_selected_index(insert_index)
                 self.step_detail_controller.update_step_detail(insert_index)
@@ -256,4 +262,27 @@ class StepListController:
             return self._create_step_from_text(text)
         print("剪切板中没有可粘贴的内容")
         # self.global_controller.update_status("剪切板中没有可粘贴的内容")
-        return False
\ No newline at end of file
+        return False
+
+    def duplicate_step(self, count=None, time_offset=None):
+        """把当前选中的步骤复制count份插入其后，时间依次增加time_offset"""
+        index = self.step_list_view.get_selected_index()
+        if not 0 <= index < len(self.model.steps):
+            print("未选中步骤，无法批量复制")
+            return False
+        if not isinstance(count, int) or time_offset is None:
+            # 按钮clicked信号会传入checked参数，此时弹框输入
+            count, ok = QInputDialog.getInt(self.step_list_view, "批量复制", "复制数量:", 1, 1, 100000)
+            if not ok:
+                return False
+            time_offset, ok = QInputDialog.getDouble(self.step_list_view, "批量复制", "时间间隔(秒):", 0.0, -1e9, 1e9, 3)
+            if not ok:
+                return False
+        new_steps = self.model.steps[index].duplicate(count, time_offset)
+        self.model.insert_steps(index + 1, new_steps)
+        self.update_step_list()
+        self.step_list_view.set_selected_index(index + count)
+        self.step_detail_controller.update_step_detail(index + count)
+        self.global_controller.update_global_view()
+        print(f"已批量复制步骤: {self.model.steps[index].get_name()} x {count}")
+        return True
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from main_controller import MainController
 from app_manager import ApplicationManager
@@ -25,6 +26,8 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包后的程序启动解析子进程（按类型导出时并行扫描）需要
+    multiprocessing.freeze_support()
     main()
 
 
@@ -1,3 +1,6 @@
+from models.step_index import FrameCountIndex, StepBucketIndex, StepTimeIndex
+
+
 class DataModel:
     """存储测试配置的核心数据模型"""
     def __init__(self):
@@ -7,6 +10,9 @@ class DataModel:
         self.steps = []
         self.file_path = None
         self.dirty = False  # 标记数据是否已修改未保存
+        self._time_index = StepTimeIndex()  # 按时间排序的步骤索引
+        self._frame_count_indexes = {}  # 消息控制字位 -> 帧计数索引
+        self._bucket_index = StepBucketIndex()  # 按类型/协议/站点子地址/忽略标志分桶的索引
     
     def to_dict(self):
         """将模型数据转换为字典"""
@@ -16,17 +22,49 @@ class DataModel:
         }
     
     def sort_steps_by_time(self):
-        """根据步骤的 base_data["time"] 进行升序排序"""
-        # 使用 sorted() 函数和自定义排序键
-        sorted_steps = sorted(self.steps, key=lambda step: step.base_step_data.get("time", 0))
-        
-        # 检查排序是否改变了列表顺序
-        if sorted_steps != self.steps:
-            self.steps = sorted_steps
+        """根据步骤的 base_data["time"] 进行升序排序（稳定排序，同一时间的步骤保持原有先后）
+
+        由时间索引增量维护，只有时间变化的步骤需要重新定位。
+        """
+        if self._time_index.sync(self.steps):
             self.dirty = True
             return True  # 返回排序是否实际发生了改变
         return False
 
+    def steps_between(self, start_time, end_time):
+        """时间在[start_time, end_time]内的步骤，按时间顺序（会先按时间排序steps）"""
+        self.sort_steps_by_time()
+        return self._time_index.steps_between(start_time, end_time)
+
+    def next_step_after(self, time):
+        """时间大于time的第一个步骤，没有时返回None（会先按时间排序steps）"""
+        self.sort_steps_by_time()
+        return self._time_index.next_step_after(time)
+
+    def _frame_count_index(self, mask):
+        index = self._frame_count_indexes.get(mask)
+        if index is None:
+            index = self._frame_count_indexes[mask] = FrameCountIndex(mask)
+        index.sync(self.steps)
+        return index
+
+    def frame_count_groups(self, mask):
+        """消息控制字含mask位的步骤分组：(step_type, protocol_type) -> 按帧计数顺序（时间从大到小）排列的步骤"""
+        return self._frame_count_index(mask).groups()
+
+    def frame_count_of(self, step, mask):
+        """步骤在同组中的帧计数，不参与帧计数（不在steps中或控制字无mask位）时返回None"""
+        return self._frame_count_index(mask).frame_count(step)
+
+    def frame_count_for_time(self, group, time, mask):
+        """尚未参与帧计数的步骤按time加入group（同时间排在最后）时的帧计数"""
+        return self._frame_count_index(mask).frame_count_for_time(group, time)
+
+    def step_buckets(self):
+        """按step_type、协议、(recip, sub_addr, msg_len)、忽略标志分桶的步骤索引（已与steps同步）"""
+        self._bucket_index.sync(self.steps)
+        return self._bucket_index
+
     def from_dict(self, data):
         """从字典加载数据到模型"""
         self.global_params = data.get("global_params", {})
@@ -36,18 +74,30 @@ class DataModel:
     def add_step(self, step_data):
         """添加新步骤"""
         self.steps.append(step_data)
+        self._time_index.append(self.steps, step_data)
+        self._bucket_index.append(self.steps, step_data)
         self.dirty = True
     
+    def insert_steps(self, index, steps):
+        """在index处插入多个步骤（粘贴、批量复制）"""
+        self.steps[index:index] = steps
+        self._bucket_index.invalidate()
+        self.dirty = True
+
     def update_step(self, index, step_data):
         """更新步骤"""
         if 0 <= index < len(self.steps):
             self.steps[index] = step_data
+            self._time_index.replace(self.steps, index, step_data)
+            self._bucket_index.invalidate()
             self.dirty = True
     
     def remove_step(self, index):
         """删除步骤"""
         if 0 <= index < len(self.steps):
             del self.steps[index]
+            self._time_index.remove(self.steps, index)
+            self._bucket_index.invalidate()
             self.dirty = True
     
     def move_step(self, from_index, to_index):
@@ -55,6 +105,8 @@ class DataModel:
         if 0 <= from_index < len(self.steps) and 0 <= to_index < len(self.steps):
             step = self.steps.pop(from_index)
             self.steps.insert(to_index, step)
+            self._time_index.move(self.steps, from_index, to_index)
+            self._bucket_index.invalidate()
             self.dirty = True
     
     def set_global_param(self, key, value):
@@ -228,6 +228,10 @@ class MainWindow(QMainWindow):
                     event.ignore()
             else:
                 event.accept()
+            # 后台保存未完成时等待写完，避免留下临时文件；后台导出同样等待结束
+            if event.isAccepted() and hasattr(self, 'controller') and hasattr(self.controller, 'file_controller'):
+                self.controller.file_controller.wait_for_pending_save()
+                self.controller.file_controller.wait_for_pending_export()
         except Exception:
             event.accept()
 
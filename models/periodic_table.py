@@ -0,0 +1,202 @@
+"""周期GLINK文件数据（expand_step_data["periodic_file_data"]）的紧凑存储"""
+import re
+from array import array
+from itertools import islice, repeat
+
+# 每批按列处理的行数，逐行生成数据时按此分批调用extend
+CHUNK_ROWS = 4096
+
+_HEX_VALUE = re.compile(r"(0[xX])([0-9a-fA-F]+)")
+_DEC_VALUE = re.compile(r"-?(0|[1-9][0-9]*)")
+
+
+def _column_format(value):
+    """按列的第一个值确定该列的数值格式：(array类型码, 解析进制, 格式串)，不是整数时返回None"""
+    match = _HEX_VALUE.fullmatch(value)
+    if match:
+        prefix, digits = match.groups()
+        case = "x" if any(c in "abcdef" for c in digits) else "X"
+        return "Q", 16, f"{prefix}%0{len(digits)}{case}"
+    if _DEC_VALUE.fullmatch(value):
+        return "q", 10, "%d"
+    return None
+
+
+class _Column:
+    """一列数据：能由数值按列格式还原的值存入array，其余保留原字符串"""
+    __slots__ = ("values", "base", "fmt", "raw")
+
+    def __init__(self, value):
+        column_format = _column_format(value)
+        if column_format is None:
+            self.values = []  # 非整数列直接保存字符串
+            self.base = self.fmt = None
+        else:
+            typecode, self.base, self.fmt = column_format
+            self.values = array(typecode)
+        self.raw = {}  # 行号 -> 原字符串
+
+    def extend(self, values):
+        """追加多行的值：整批解析、格式化比对，都能还原时一次写入array并返回True"""
+        if self.fmt is None:
+            self.values.extend(values)
+            return False
+        try:
+            numbers = list(map(int, values, repeat(self.base)))
+            # 整批格式化后比对（能解析为整数的值不含"\0"，分隔符一一对应）
+            if (self.fmt + "\0") * len(numbers) % tuple(numbers) == "\0".join(values) + "\0":
+                # 先构造array，超出范围时在修改本列之前报错
+                self.values += array(self.values.typecode, numbers)
+                return True
+        except (ValueError, OverflowError):
+            pass
+        for value in values:
+            self.append(value)
+        return False
+
+    def extend_column(self, other):
+        """追加另一列的全部值，两列格式相同时直接拼接"""
+        if self.fmt == other.fmt and (self.fmt is None or self.values.typecode == other.values.typecode):
+            start = len(self.values)
+            self.raw.update((start + row, value) for row, value in other.raw.items())
+            self.values += other.values
+            return
+        self.extend([other.get(row) for row in range(len(other.values))])
+
+    def append(self, value):
+        try:
+            number = int(value, self.base)
+            if self.fmt % number == value:
+                self.values.append(number)
+                return
+        except (ValueError, OverflowError):
+            pass
+        self.raw[len(self.values)] = value
+        self.values.append(0)
+
+    def get(self, row):
+        if self.fmt is None:
+            return self.values[row]
+        value = self.raw.get(row)
+        if value is None:
+            return self.fmt % self.values[row]
+        return value
+
+
+class PeriodicTable:
+    """周期文件数据：各行共用一组数据类型，数据按列存放，可直接替代旧的行列表使用
+
+    按行读取（下标、遍历）得到与旧格式相同的 [{"data_type": ..., "value": "<原字符串>"}, ...]；
+    整数值按列存为64位数组，只有无法由数值原样还原的值（及非整数列）保留字符串。
+    与行列表一样，数据生成后只整体替换、不原地修改，复制步骤时共用同一对象。
+    """
+    __slots__ = ("data_types", "tokens_only", "_columns", "_count")
+
+    def __init__(self, data_types, value_rows=()):
+        """value_rows为各行的字符串值列表，列数需与data_types一致"""
+        self.data_types = list(data_types)
+        # 所有值都是不含空白的非空字符串，保存时可直接以空格连接
+        self.tokens_only = True
+        self._columns = None
+        self._count = 0
+        value_rows = iter(value_rows)
+        while True:
+            chunk = list(islice(value_rows, CHUNK_ROWS))
+            if not chunk:
+                break
+            self.extend(chunk)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由旧格式的行列表构造，各行数据类型不一致或格式不符时返回None"""
+        if not rows or not isinstance(rows[0], list) or not rows[0]:
+            return None
+        data_types = []
+        for item in rows[0]:
+            if not isinstance(item, dict) or list(item) != ["data_type", "value"]:
+                return None
+            data_types.append(item["data_type"])
+        value_rows = []
+        for row in rows:
+            if not isinstance(row, list) or len(row) != len(data_types):
+                return None
+            values = []
+            for item, data_type in zip(row, data_types):
+                if (not isinstance(item, dict) or list(item) != ["data_type", "value"]
+                        or item["data_type"] != data_type or not isinstance(item["value"], str)):
+                    return None
+                values.append(item["value"])
+            value_rows.append(values)
+        return cls(data_types, value_rows)
+
+    def extend(self, value_rows):
+        """按列追加多行，只在生成数据时调用"""
+        width = len(self.data_types)
+        if not value_rows:
+            return
+        # 整批检查列数，出错时再找出第一个不符的行
+        if set(map(len, value_rows)) != {width}:
+            values = next(values for values in value_rows if len(values) != width)
+            raise ValueError(f"数据列数 ({len(values)}) 与数据类型数量 ({width}) 不匹配")
+        if self._columns is None:
+            self._columns = [_Column(value) for value in value_rows[0]]
+        for column, values in zip(self._columns, zip(*value_rows)):
+            # 整批还原成功的整数列必为不含空白的非空值，其余列逐批检查
+            if (not column.extend(values) and self.tokens_only
+                    and " ".join(values).split() != list(values)):
+                self.tokens_only = False
+        self._count += len(value_rows)
+
+    def extend_table(self, other):
+        """追加另一个数据类型相同的表的全部行（分批解析的结果依次拼接）"""
+        if list(other.data_types) != self.data_types:
+            raise ValueError("数据类型不一致，无法拼接周期数据")
+        if not other._count:
+            return
+        if self._columns is None:
+            # 列格式由第一个值确定，与other各列一致
+            self._columns = [_Column(column.get(0)) for column in other._columns]
+        for column, other_column in zip(self._columns, other._columns):
+            column.extend_column(other_column)
+        self.tokens_only = self.tokens_only and other.tokens_only
+        self._count += other._count
+
+    def row_values(self, row):
+        """第row行各列的字符串值"""
+        return [column.get(row) for column in self._columns]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self._count))]
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError("PeriodicTable index out of range")
+        return [{"data_type": data_type, "value": column.get(row)}
+                for data_type, column in zip(self.data_types, self._columns)]
+
+    def __iter__(self):
+        for row in range(self._count):
+            yield self[row]
+
+    def __eq__(self, other):
+        if isinstance(other, PeriodicTable):
+            other = list(other)
+        elif not isinstance(other, list):
+            return NotImplemented
+        return len(other) == self._count and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # 内容不会原地修改，复制时共用
+        return self
+
+    def __repr__(self):
+        return f"PeriodicTable({self._count} rows x {len(self.data_types)} columns)"
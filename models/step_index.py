@@ -0,0 +1,402 @@
+"""流程步索引，由DataModel维护，避免每次编辑后全量排序/扫描"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import compress, islice
+from operator import is_not, le, ne
+
+
+def step_time(step):
+    """排序用的步骤时间（base_step_data中的time）"""
+    return step.base_step_data.get("time", 0)
+
+
+class StepTimeIndex:
+    """按时间升序的步骤索引，顺序与DataModel.steps一致
+
+    索引保存步骤列表的副本及各步骤的时间、version；时间相同的步骤保持列表中的先后（稳定排序）。
+    DataModel增删改步骤时调用append/remove/replace/move增量更新；其它地方直接修改steps
+    或步骤数据时，由sync()比对步骤对象与version找出变化，单个步骤变化时二分重新定位。
+    """
+
+    def __init__(self):
+        self._target = None  # 索引对应的步骤列表（DataModel.steps）
+        self._steps = []
+        self._times = []
+        self._versions = []
+        self._displaced = []  # 增量更新后可能不在正确位置的下标
+
+    def _in_sync(self, steps, length):
+        return steps is self._target and len(self._steps) == length
+
+    def sync(self, steps):
+        """使索引与steps一致，并原地把steps调整为按时间排序，返回顺序是否改变"""
+        if not self._in_sync(steps, len(steps)) or any(map(is_not, steps, self._steps)):
+            return self.rebuild(steps)
+        versions = [step.version for step in steps]
+        displaced = set(self._displaced)
+        self._displaced = []
+        if versions != self._versions:
+            for pos in compress(range(len(versions)), map(ne, versions, self._versions)):
+                self._versions[pos] = versions[pos]
+                time = step_time(steps[pos])
+                if time != self._times[pos]:
+                    self._times[pos] = time
+                    displaced.add(pos)
+        if not displaced:
+            return False
+        if len(displaced) > 1:
+            return self.rebuild(steps)
+        return self._reposition(displaced.pop())
+
+    def rebuild(self, steps):
+        """重建索引，steps未按时间排序时原地稳定排序，返回顺序是否改变"""
+        self._target = steps
+        self._displaced = []
+        times = [step_time(step) for step in steps]
+        changed = not all(map(le, times, islice(times, 1, None)))
+        if changed:
+            order = sorted(range(len(steps)), key=times.__getitem__)
+            steps[:] = [steps[i] for i in order]
+            times = [times[i] for i in order]
+        self._steps = list(steps)
+        self._times = times
+        self._versions = [step.version for step in steps]
+        return changed
+
+    def _reposition(self, pos):
+        """把pos处的步骤移到按时间排序的位置（其余步骤已有序），结果与稳定排序一致"""
+        time = self._times[pos]
+        # 前面时间相同的步骤仍在它之前，后面时间相同的仍在它之后
+        target = bisect_right(self._times, time, 0, pos)
+        if target == pos:
+            target = bisect_left(self._times, time, pos + 1) - 1
+            if target == pos:
+                return False
+        step = self._steps[pos]
+        version = self._versions[pos]
+        for values, value in ((self._target, step), (self._steps, step),
+                              (self._times, time), (self._versions, version)):
+            del values[pos]
+            values.insert(target, value)
+        return True
+
+    def _mark_displaced(self, pos):
+        times = self._times
+        if (pos > 0 and times[pos - 1] > times[pos]) or (pos + 1 < len(times) and times[pos] > times[pos + 1]):
+            self._displaced.append(pos)
+
+    def _can_update(self, steps, length):
+        """索引可以增量更新：与steps对应，且没有待重新定位的步骤（否则下次sync()重建）"""
+        if self._in_sync(steps, length) and not self._displaced:
+            return True
+        self._target = None
+        return False
+
+    # 以下在DataModel修改steps之后调用；索引已过期时忽略，下次sync()重建
+    def append(self, steps, step):
+        if self._can_update(steps, len(steps) - 1):
+            self._steps.append(step)
+            self._times.append(step_time(step))
+            self._versions.append(step.version)
+            self._mark_displaced(len(steps) - 1)
+
+    def remove(self, steps, pos):
+        if self._in_sync(steps, len(steps) + 1):
+            del self._steps[pos], self._times[pos], self._versions[pos]
+            self._displaced = [p - (p > pos) for p in self._displaced if p != pos]
+
+    def replace(self, steps, pos, step):
+        if self._can_update(steps, len(steps)):
+            self._steps[pos] = step
+            self._times[pos] = step_time(step)
+            self._versions[pos] = step.version
+            self._mark_displaced(pos)
+
+    def move(self, steps, from_pos, to_pos):
+        if self._can_update(steps, len(steps)):
+            for values in (self._steps, self._times, self._versions):
+                values.insert(to_pos, values.pop(from_pos))
+            self._mark_displaced(to_pos)
+
+    # 以下查询要求索引已sync()
+    def steps_between(self, start_time, end_time):
+        """时间在[start_time, end_time]内的步骤（按时间顺序）"""
+        lo = bisect_left(self._times, start_time)
+        hi = bisect_right(self._times, end_time)
+        return self._steps[lo:hi]
+
+    def next_step_after(self, time):
+        """时间大于time的第一个步骤，没有时返回None"""
+        pos = bisect_right(self._times, time)
+        return self._steps[pos] if pos < len(self._steps) else None
+
+
+def parse_ctrl_word(value):
+    """解析消息控制字（与StepDetailView.safe_hex_to_int一致），无法解析时为0"""
+    try:
+        if isinstance(value, str):
+            if value.lower().startswith("0x"):
+                return int(value, 16)
+            return int(value)
+        elif isinstance(value, int):
+            return value
+        return 0
+    except (ValueError, TypeError):
+        return 0
+
+
+class FrameCountIndex:
+    """参与帧计数的步骤索引：消息控制字含mask位的步骤按 (step_type, protocol_type) 分组，
+    组内按时间从大到小排列（时间相同按steps中的先后），帧计数即组内序号+1
+
+    各步骤的排序键为 (-时间, 在steps中的下标)。sync()比对步骤对象与version：只有步骤数据变化时
+    逐个二分更新；steps增删或重新排序后下标改变，整体重建。
+    """
+
+    def __init__(self, mask):
+        self.mask = mask
+        self._target = None
+        self._steps = []
+        self._versions = []
+        self._entries = {}  # step -> (分组, 排序键)
+        self._groups = {}  # 分组 -> (排序键列表, 步骤列表)
+
+    def _entry(self, step, pos):
+        protocol_type = step.get_base_step_data().get("protocol_type", 0)
+        # 只读取消息控制字，不加载延迟加载的步骤
+        ctrl_word = parse_ctrl_word(step.peek_value("protocol", "消息控制字", "0"))
+        if (ctrl_word & self.mask) != self.mask:
+            return None
+        return (step.get_step_type(), protocol_type), (-step.get_value("time", 0), pos)
+
+    def _add(self, step, entry):
+        group, key = entry
+        self._entries[step] = entry
+        keys, steps = self._groups.setdefault(group, ([], []))
+        pos = bisect_left(keys, key)
+        keys.insert(pos, key)
+        steps.insert(pos, step)
+
+    def _discard(self, step):
+        entry = self._entries.pop(step, None)
+        if entry is None:
+            return
+        group, key = entry
+        keys, steps = self._groups[group]
+        pos = bisect_left(keys, key)
+        del keys[pos], steps[pos]
+        if not keys:
+            del self._groups[group]
+
+    def sync(self, steps):
+        """使索引与steps一致"""
+        if steps is not self._target or len(steps) != len(self._steps) \
+                or any(map(is_not, steps, self._steps)):
+            self.rebuild(steps)
+            return
+        versions = [step.version for step in steps]
+        if versions == self._versions:
+            return
+        for pos in compress(range(len(versions)), map(ne, versions, self._versions)):
+            step = steps[pos]
+            entry = self._entry(step, pos)
+            if entry != self._entries.get(step):
+                self._discard(step)
+                if entry is not None:
+                    self._add(step, entry)
+        self._versions = versions
+
+    def rebuild(self, steps):
+        self._target = steps
+        self._steps = list(steps)
+        self._versions = [step.version for step in steps]
+        self._entries = {}
+        groups = {}
+        for pos, step in enumerate(steps):
+            entry = self._entry(step, pos)
+            if entry is not None:
+                self._entries[step] = entry
+                groups.setdefault(entry[0], []).append((entry[1], step))
+        self._groups = {}
+        for group, items in groups.items():
+            items.sort(key=lambda item: item[0])
+            self._groups[group] = ([key for key, _ in items], [step for _, step in items])
+
+    # 以下查询要求索引已sync()
+    def groups(self):
+        """分组 -> 按帧计数顺序排列的步骤列表"""
+        return {group: steps for group, (keys, steps) in self._groups.items()}
+
+    def frame_count(self, step):
+        """步骤的帧计数（组内序号+1），不参与帧计数时返回None"""
+        entry = self._entries.get(step)
+        if entry is None:
+            return None
+        group, key = entry
+        return bisect_left(self._groups[group][0], key) + 1
+
+    def frame_count_for_time(self, group, time):
+        """时间为time、排在同时间步骤之后的新步骤在group中的帧计数"""
+        keys = self._groups.get(group, ([], []))[0]
+        return bisect_left(keys, (-time, float("inf"))) + 1
+
+
+def parse_int(value, default=0):
+    """按int()解析字段值，失败时返回default（与导出中的get_int一致）"""
+    try:
+        return int(value)
+    except Exception:
+        return default
+
+
+def parse_site_value(value, default=0):
+    """解析站点号/子地址等字段：支持0x前缀、全角乘号×的16进制及十进制，失败时返回default"""
+    try:
+        if isinstance(value, str):
+            text = value.strip()
+            if not text:
+                return default
+            text = text.replace('×', 'x').replace('Ｘ', 'x').lower()
+            if text.startswith('0x'):
+                return int(text, 16)
+            if 'x' in text:
+                # 如"×15"或"0×15"，去掉x和开头的0后按16进制解析
+                hex_part = text.replace('x', '')
+                if hex_part.startswith('0'):
+                    hex_part = hex_part[1:]
+                return int('0x' + hex_part, 16)
+            return int(text)
+        return int(value)
+    except Exception:
+        return default
+
+
+def step_bucket_keys(step):
+    """步骤的分桶键：(step_type, (step_type, protocol_type), (recip, sub_addr, msg_len), 是否忽略)"""
+    base = step.get_base_step_data() or {}
+    # 只读取用到的type字段，不加载延迟加载的步骤
+    step_type = step.get_step_type()
+    protocol_type = parse_int(step.peek_value("type", 'protocol_type', -1), -1)
+    group = (parse_site_value(step.peek_value("type", 'recip_site', 0)),
+             parse_site_value(step.peek_value("type", 'sub_address', 0)),
+             parse_int(step.peek_value("type", 'msg_len', 0)))
+    return step_type, (step_type, protocol_type), group, parse_int(base.get('is_ignore', 0)) == 1
+
+
+class StepBucketIndex:
+    """按step_type、(step_type, protocol_type)、(recip, sub_addr, msg_len)、忽略标志分桶的步骤索引
+
+    每个桶保存步骤在steps中的下标（升序），取桶内步骤与steps顺序一致。各步骤的分桶键按version缓存，
+    sync()只重新解析version变化的步骤；steps增删或重新排序后整体重建，未变化的步骤沿用缓存的键。
+    索引在第一次查询时才建立，建立时只读取分桶用到的字段（见StepModel.peek_value），不加载延迟加载的步骤。
+    """
+
+    def __init__(self):
+        self._target = None
+        self._steps = []
+        self._versions = []
+        self._keys = {}  # step -> (version, 分桶键)
+        self._buckets = ({}, {}, {}, {})  # 各分桶键 -> 下标列表
+
+    def _step_keys(self, step):
+        cached = self._keys.get(step)
+        if cached is not None and cached[0] == step.version:
+            return cached[1]
+        keys = step_bucket_keys(step)
+        self._keys[step] = (step.version, keys)
+        return keys
+
+    def _add(self, pos, keys):
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [pos]
+            elif bucket[-1] < pos:
+                bucket.append(pos)
+            else:
+                insort(bucket, pos)
+
+    def _discard(self, pos, keys):
+        for buckets, key in zip(self._buckets, keys):
+            bucket = buckets[key]
+            del bucket[bisect_left(bucket, pos)]
+            if not bucket:
+                del buckets[key]
+
+    def sync(self, steps):
+        """使索引与steps一致"""
+        if steps is not self._target or len(steps) != len(self._steps) \
+                or any(map(is_not, steps, self._steps)):
+            self.rebuild(steps)
+            return
+        versions = [step.version for step in steps]
+        if versions == self._versions:
+            return
+        for pos in compress(range(len(versions)), map(ne, versions, self._versions)):
+            step = steps[pos]
+            old_keys = self._keys[step][1]
+            keys = self._step_keys(step)
+            if keys != old_keys:
+                self._discard(pos, old_keys)
+                self._add(pos, keys)
+        self._versions = versions
+
+    def rebuild(self, steps):
+        old_keys = self._keys
+        self._keys = {}
+        self._buckets = ({}, {}, {}, {})
+        for pos, step in enumerate(steps):
+            cached = old_keys.get(step)
+            if cached is not None and cached[0] == step.version:
+                self._keys[step] = cached
+                keys = cached[1]
+            else:
+                keys = self._step_keys(step)
+            for buckets, key in zip(self._buckets, keys):
+                buckets.setdefault(key, []).append(pos)
+        self._target = steps
+        self._steps = list(steps)
+        self._versions = [step.version for step in steps]
+
+    # 以下在DataModel修改steps之后调用；未建立或已过期的索引在下次sync()时重建
+    def append(self, steps, step):
+        if steps is self._target and len(self._steps) == len(steps) - 1:
+            pos = len(self._steps)
+            self._add(pos, self._step_keys(step))
+            self._steps.append(step)
+            self._versions.append(step.version)
+        else:
+            self._target = None
+
+    def invalidate(self):
+        """steps中间插入、删除或移动后调用，下标整体变化，下次sync()重建（沿用缓存的分桶键）"""
+        self._target = None
+
+    # 以下查询要求索引已sync()
+    def _bucket(self, which, key):
+        return [self._steps[pos] for pos in self._buckets[which].get(key, ())]
+
+    def steps_of_type(self, step_type):
+        return self._bucket(0, step_type)
+
+    def steps_of_types(self, step_types):
+        """多个step_type的步骤，按steps中的顺序"""
+        buckets = self._buckets[0]
+        positions = [pos for step_type in step_types for pos in buckets.get(step_type, ())]
+        positions.sort()
+        return [self._steps[pos] for pos in positions]
+
+    def steps_of_protocol(self, step_type, protocol_type):
+        return self._bucket(1, (step_type, protocol_type))
+
+    def steps_of_group(self, recip, sub_addr, msg_len):
+        return self._bucket(2, (recip, sub_addr, msg_len))
+
+    def ignored_steps(self, ignored=True):
+        return self._bucket(3, ignored)
+
+    def group_key(self, step):
+        """步骤的 (recip, sub_addr, msg_len)"""
+        return self._step_keys(step)[2]
+
+    def is_ignored(self, step):
+        return self._step_keys(step)[3]
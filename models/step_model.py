@@ -1,10 +1,32 @@
+import copy
 import json
+import os
+import pickle
+import sys
+import zlib
 from pathlib import Path
 
 CONFIG_PATH = Path(__file__).parent / "model_config.json"
 TEMPLATE_PATH = Path(__file__).parent / "protocol_templates.json"
-with open(CONFIG_PATH, encoding="utf-8") as f:
-    conf = json.load(f)
+
+_CONFIG_JSON_CACHE = {}  # 绝对路径 -> ((修改时间, 文件大小), 解析结果)
+
+
+def load_config_json(path):
+    """读取JSON配置文件，文件未改动时返回上次的解析结果（本模块与TemplateManager共用，调用方不应修改）"""
+    path = os.path.abspath(path)
+    file_stat = os.stat(path)
+    stamp = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _CONFIG_JSON_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    _CONFIG_JSON_CACHE[path] = (stamp, data)
+    return data
+
+
+conf = load_config_json(CONFIG_PATH)
 
 
 # 获取配置字符串
@@ -259,6 +281,69 @@ def get_dtype_by_idx(idx):
     # dtype = SUPPORTED_DTYPES[idx]
     return DTYPE_MAP.get(SUPPORTED_DTYPES[idx], str)
 
+# 保留原始字符串格式的字段（如0x11），加载时不转换为int
+RAW_STRING_FIELDS = ("local_site", "recip_site", "sub_address", "base_address")
+
+
+def _decode_raw_string(text):
+    if text is None:
+        return ""
+    # 站点/地址取值很少，驻留后各步骤共用同一个字符串对象
+    return sys.intern(str(text).strip())
+
+
+def _compile_union_decoder():
+    dtypes = [DTYPE_MAP.get(dtype, str) for dtype in SUPPORTED_DTYPES]
+
+    def decode_union(text):
+        # 容错解析 union：空/None/非法JSON 返回空列表
+        try:
+            raw = (text or "").strip()
+            if raw.lower() in ("none", ""):
+                return []
+            data_list = json.loads(raw)
+            if not isinstance(data_list, list):
+                return []
+            val = []
+            for item in data_list:
+                # 支持对象或原始值
+                if isinstance(item, dict) and "data_type" in item and "value" in item:
+                    data_type = int(item["data_type"])
+                    val.append({"data_type": data_type, "value": dtypes[data_type](item["value"])})
+                else:
+                    # 保留原值，后续导出阶段会统一标准化为HEX
+                    val.append(item)
+            return val
+        except Exception:
+            return []
+
+    return decode_union
+
+
+def compile_field_decoders():
+    """由model_config.json生成 字段名 -> 解析函数(text) 的表，加载配置文件时逐字段查表调用"""
+    decode_union = _compile_union_decoder()
+    decoders = {}
+    for field, field_type in FIELD_TYPES.items():
+        if field_type == "union":
+            decoders[field] = decode_union
+        elif field in RAW_STRING_FIELDS:
+            decoders[field] = _decode_raw_string
+        else:
+            decoders[field] = DTYPE_MAP.get(field_type, str)
+    for field in RAW_STRING_FIELDS:
+        decoders.setdefault(field, _decode_raw_string)
+    return decoders
+
+
+FIELD_DECODERS = compile_field_decoders()
+
+
+def decode_field_text(field, text):
+    """按字段类型把XML文本转换为字段值，未配置的字段按str处理"""
+    return FIELD_DECODERS.get(field, str)(text)
+
+
 def is_value_type_match(dtype, value):
     '''
     如果value是dtype代表的数据类型则返回True，否则False
@@ -286,42 +371,233 @@ def init_default_dict(dict, field_list):
         print(f"StepModel init field {field} default {default}, dtype: {dtype} type: {type(dict[field])}")
 
 
-with open(TEMPLATE_PATH, encoding="utf-8") as f:
-    template = json.load(f)
+template = load_config_json(TEMPLATE_PATH)
+
+def default_field_dict(field_list):
+    """字段列表对应的默认值字典（按init_default_dict规则），同一字段列表只计算一次，调用方需复制后使用"""
+    key = tuple(field_list)
+    defaults = _DEFAULT_FIELD_DICTS.get(key)
+    if defaults is None:
+        defaults = {}
+        init_default_dict(defaults, field_list)
+        _DEFAULT_FIELD_DICTS[key] = defaults
+    return defaults
+
+
+_DEFAULT_FIELD_DICTS = {}
+_MISSING = object()
+
+
+class LazyDetails:
+    """延迟加载步骤的加载函数：sections为尚未解析的type/expand/protocol区段（区段名 -> [(tag, text)]或None），
+    首次访问步骤数据时调用fill(step)解析"""
+    __slots__ = ("sections", "fill")
+
+    def __init__(self, sections, fill):
+        self.sections = sections
+        self.fill = fill
+
+    def __call__(self, step):
+        self.fill(step)
+
 
 class StepModel():
     PLACEHOLDER_FIELDS = ("time", "period", "local_site", "recip_site", "sub_address", "base_address", "address")
-
-    def __init__(self):
+    RAW_INPUT_FIELDS = ("local_site", "recip_site", "sub_address", "base_address", "address")
+
+    # 步骤数量可达十万级，用__slots__省去每个实例的__dict__
+    __slots__ = (
+        "step_type", "version", "_lazy_loader", "base_step_data", "_type_step_data",
+        "_expand_step_data", "_protocol_data", "_placeholder_state", "_raw_input_strings",
+        "_source", "__weakref__",
+    )
+    # 参与复制/序列化的属性（不含延迟加载函数和原始条目）
+    _STATE_SLOTS = __slots__[:2] + __slots__[3:-2]
+
+    def __init__(self, lazy_loader=None):
         #保留基础流程步字段
         self.step_type = 0
-        self.base_step_data = {}
-        self.type_step_data = {}
-        self.expand_step_data = {}
-        self.protocol_data = {}
-        self.placeholder_state = {field: True for field in self.PLACEHOLDER_FIELDS}
+        # 修改计数：每次通过接口修改数据时递增，保存时据此判断是否需要重新序列化
+        self.version = 0
+        # 延迟加载：type/expand/protocol数据在首次访问时由lazy_loader(step)填充
+        self._lazy_loader = lazy_loader
+        self.base_step_data = dict(default_field_dict(BASIC_TYPE_FIELDS))
+        # 以下数据为None时表示尚未单独分配（type为步骤类型0的默认值，expand/protocol为空），首次访问时再创建
+        self._type_step_data = None
+        self._expand_step_data = None
+        self._protocol_data = None
+        # 原始输入字符串在首次修改前共用默认字典；占位状态始终共用（见_set_placeholder_state）
+        self._placeholder_state = _DEFAULT_PLACEHOLDER_STATE
         # 全局保存local_site、recip_site、sub_address的原始输入字符串（如"0x11"）
-        self.raw_input_strings = {
-            "local_site": None,
-            "recip_site": None,
-            "sub_address": None,
-            "base_address": None,
-            "address": None
-        }
-        base_field_list = BASIC_TYPE_FIELDS
-        type_field_list = get_step_type_field_list(n=self.step_type)
-        init_default_dict(self.base_step_data, base_field_list)
-        init_default_dict(self.type_step_data, type_field_list)
+        self._raw_input_strings = _DEFAULT_RAW_INPUT_STRINGS
+        # 读出时的原始保存条目，见source_entry()
+        self._source = None
+
+    @classmethod
+    def lazy(cls, base_data, loader, source=None):
+        """创建延迟加载的步骤：只解析base数据（步骤列表所需），其余数据在首次访问时由loader(step)填充
+
+        loader为LazyDetails时，未加载前可由peek_value()只读取单个字段；
+        source为读出的原始保存条目（见utils.flow_db），步骤未修改时保存直接写出该条目。
+        """
+        step = cls(lazy_loader=loader)
+        step._source = source
+        step.step_type = int(base_data.get(STYPE, 0))
+        if step.step_type != 0:
+            # 与立即加载一致：只有步骤类型为0时保留该类型的默认字段
+            step._type_step_data = {}
+        step.update_step_data(step.base_step_data, base_data, BASIC_TYPE_FIELDS)
+        step.version = 0
+        return step
+
+    def is_loaded(self):
+        """type/expand/protocol数据是否已加载"""
+        return self._lazy_loader is None
+
+    def _ensure_loaded(self):
+        if self._lazy_loader is None:
+            return
+        loader, self._lazy_loader = self._lazy_loader, None
+        version = self.version
+        loader(self)
+        # 加载不算修改
+        self.version = version
+
+    def source_entry(self):
+        """读出后未修改（version为0）时返回读出时的原始保存条目，否则返回None"""
+        if self.version == 0:
+            return self._source
+        if self._lazy_loader is None:
+            # 已加载并修改过，原始条目不会再用到
+            self._source = None
+        return None
+
+    def peek_value(self, section, field, default=None):
+        """读取type或protocol区段中的单个字段，结果与加载后的get_type_step_data()/get_protocol_data()一致
+
+        尚未加载时只解析这一个字段，不加载整个步骤（供索引等只用到少数字段的地方使用）。
+        """
+        sections = getattr(self._lazy_loader, "sections", None)
+        if sections is None:
+            data = self.type_step_data if section == "type" else self.protocol_data
+            return data.get(field, default)
+        text = _MISSING
+        for tag, value in sections.get(section) or ():
+            if tag == field:
+                # 同名字段以最后一个为准，与加载时逐个写入字典一致
+                text = value
+        if section == "protocol":
+            return default if text is _MISSING else (text if text else "")
+        # 以下与update_type_data中update_step_data对单个字段的处理一致
+        if text is not _MISSING and field in get_step_type_field_list(n=self.step_type):
+            value = decode_field_text(field, text)
+            dtype = get_field_type(field)
+            if dtype == "union":
+                return value
+            if field in RAW_STRING_FIELDS:
+                if value is not None:
+                    return value if isinstance(value, str) else str(value)
+            elif value is not None and is_value_type_match(dtype, value):
+                return value
+        if self._type_step_data is None:
+            return default_field_dict(get_step_type_field_list(n=0)).get(field, default)
+        return self._type_step_data.get(field, default)
+
+    def __getstate__(self):
+        # 复制/序列化（如剪贴板）前先加载，延迟加载函数不可序列化
+        self._ensure_loaded()
+        return {name: getattr(self, name) for name in self._STATE_SLOTS}
+
+    def __setstate__(self, state):
+        self._lazy_loader = None
+        self._source = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def type_step_data(self):
+        self._ensure_loaded()
+        if self._type_step_data is None:
+            self._type_step_data = dict(default_field_dict(get_step_type_field_list(n=0)))
+        return self._type_step_data
+
+    @type_step_data.setter
+    def type_step_data(self, value):
+        self._ensure_loaded()
+        self._type_step_data = value
+
+    @property
+    def expand_step_data(self):
+        self._ensure_loaded()
+        if self._expand_step_data is None:
+            self._expand_step_data = {}
+        return self._expand_step_data
+
+    @expand_step_data.setter
+    def expand_step_data(self, value):
+        self._ensure_loaded()
+        self._expand_step_data = value
+
+    @property
+    def protocol_data(self):
+        self._ensure_loaded()
+        if self._protocol_data is None:
+            self._protocol_data = {}
+        return self._protocol_data
+
+    @protocol_data.setter
+    def protocol_data(self, value):
+        self._ensure_loaded()
+        self._protocol_data = value
+
+    @property
+    def placeholder_state(self):
+        if _PLACEHOLDER_STATES.get(tuple(self._placeholder_state.values())) is self._placeholder_state:
+            self._placeholder_state = dict(self._placeholder_state)
+        return self._placeholder_state
+
+    @placeholder_state.setter
+    def placeholder_state(self, value):
+        self._placeholder_state = value
+
+    @property
+    def raw_input_strings(self):
+        self._ensure_loaded()
+        if self._raw_input_strings is _DEFAULT_RAW_INPUT_STRINGS:
+            self._raw_input_strings = dict(_DEFAULT_RAW_INPUT_STRINGS)
+        return self._raw_input_strings
+
+    @raw_input_strings.setter
+    def raw_input_strings(self, value):
+        self._ensure_loaded()
+        self._raw_input_strings = value
+
+    def mark_dirty(self):
+        """标记步骤数据已修改（直接修改各数据字典后需调用）"""
+        self.version += 1
 
     def _set_placeholder_state(self, field, value):
-        if field not in self.placeholder_state:
+        state = self._placeholder_state
+        if field not in state:
             return
         if value is None:
-            self.placeholder_state[field] = True
+            placeholder = True
         elif isinstance(value, str):
-            self.placeholder_state[field] = (value.strip() == "")
+            placeholder = (value.strip() == "")
         else:
-            self.placeholder_state[field] = False
+            placeholder = False
+        self._store_placeholder_state(field, placeholder)
+
+    def _store_placeholder_state(self, field, placeholder):
+        state = self._placeholder_state
+        if state.get(field) == placeholder:
+            return
+        # 占位状态组合很少，相同组合的步骤共用同一个字典
+        key = tuple(placeholder if name == field else state.get(name, True) for name in self.PLACEHOLDER_FIELDS)
+        shared = _PLACEHOLDER_STATES.get(key)
+        if shared is None:
+            shared = _PLACEHOLDER_STATES[key] = dict(zip(self.PLACEHOLDER_FIELDS, key))
+        self._placeholder_state = shared
 
 
         
@@ -336,9 +612,10 @@ class StepModel():
             if default is None:
                 default = 0
         
+        placeholder_state = self._placeholder_state
         value = self.base_step_data.get(field, None)
         if value is not None:
-            if field in self.placeholder_state and self.placeholder_state[field]:
+            if field in placeholder_state and placeholder_state[field]:
                 return default
             # 如果是这三个字段且值是字符串，转换为数值
             if field in ("local_site", "recip_site", "sub_address", "base_address", "address") and isinstance(value, str):
@@ -346,7 +623,7 @@ class StepModel():
             return value
         value = self.type_step_data.get(field, None)
         if value is not None:
-            if field in self.placeholder_state and self.placeholder_state[field]:
+            if field in placeholder_state and placeholder_state[field]:
                 return default
             # 如果是这三个字段且值是字符串，转换为数值
             if field in ("local_site", "recip_site", "sub_address", "base_address", "address") and isinstance(value, str):
@@ -372,11 +649,11 @@ class StepModel():
     
     def get_display_value(self, field, default):
         """获取字段的显示值（对于local_site、recip_site、sub_address，返回原始输入字符串）"""
-        if field in self.placeholder_state and self.placeholder_state[field]:
+        if self._placeholder_state.get(field):
             return ""
         # 对于local_site、recip_site、sub_address字段，优先返回原始输入字符串
-        if field in ("local_site", "recip_site", "sub_address", "base_address", "address"):
-            raw_input = self.raw_input_strings.get(field)
+        if field in self.RAW_INPUT_FIELDS:
+            raw_input = self.get_raw_input_string(field)
             if raw_input is not None:
                 return raw_input
         
@@ -386,12 +663,14 @@ class StepModel():
     def set_raw_input_string(self, field, raw_string):
         """设置字段的原始输入字符串（全局保存）"""
         if field in ("local_site", "recip_site", "sub_address", "base_address", "address"):
-            self.placeholder_state[field] = not bool(raw_string)
+            self._store_placeholder_state(field, not bool(raw_string))
             self.raw_input_strings[field] = raw_string if raw_string else None
+            self.version += 1
     
     def get_raw_input_string(self, field):
         """获取字段的原始输入字符串"""
-        return self.raw_input_strings.get(field)
+        self._ensure_loaded()
+        return self._raw_input_strings.get(field)
     
     def get_union_data(self):
         """假设只有一个union_data"""
@@ -405,6 +684,7 @@ class StepModel():
     
     def set_name(self, text):
         self.base_step_data['name'] = text
+        self.version += 1
     
     def get_step_type(self):
         return self.step_type
@@ -425,7 +705,12 @@ class StepModel():
         print(f"set_step_type before {self.step_type} to {step_type}")
         # 只有在step_type确实改变时才清空type_step_data
         if step_type != self.step_type and step_type is not None:
-            self.type_step_data.clear()
+            if self._lazy_loader is None and self._type_step_data is None:
+                # 默认值尚未分配，直接换成空字典
+                self._type_step_data = {}
+            else:
+                self.type_step_data.clear()
+            self.version += 1
         if step_type is not None:
             self.step_type = step_type
         
@@ -433,9 +718,11 @@ class StepModel():
     def add_extension(self, key, value):
         """添加扩展数据"""
         self.expand_step_data[key] = value
+        self.version += 1
 
     def del_extension(self, key):
         self.expand_step_data.pop(key, None)
+        self.version += 1
 
     def get_extension_item(self, key):
         return self.expand_step_data.get(key, None)
@@ -457,8 +744,10 @@ class StepModel():
     
     def update_expand_data(self, step_data):
         self.expand_step_data = step_data
+        self.version += 1
 
     def update_step_data(self, step_dict, step_data, field_list=[]):
+        self.version += 1
         #检测所有字段都有
         for field in field_list:
             dtype = get_field_type(field)
@@ -477,7 +766,7 @@ class StepModel():
                     if isinstance(value, str):
                         step_dict[field] = value
                         # 同时保存到全局原始输入字符串
-                        if hasattr(self, 'raw_input_strings'):
+                        if self._raw_input_strings.get(field, self) != value:
                             self.raw_input_strings[field] = value
                         print(f"update_step_data: {field} 保存字符串值 '{value}' (类型: {type(value).__name__})")
                         self._set_placeholder_state(field, value)
@@ -485,7 +774,7 @@ class StepModel():
                         # 如果是数字，转为字符串（但无法保留16进制格式，这是旧数据的限制）
                         step_dict[field] = str(value)
                         # 如果原始输入字符串不存在，使用转换后的字符串
-                        if hasattr(self, 'raw_input_strings') and field not in self.raw_input_strings:
+                        if field not in self._raw_input_strings:
                             self.raw_input_strings[field] = step_dict[field]
                         print(f"update_step_data: {field} 值 {value} 是数字，转为字符串 '{step_dict[field]}'（旧数据，无法保留16进制格式）")
                         self._set_placeholder_state(field, step_dict[field])
@@ -505,11 +794,72 @@ class StepModel():
     def set_protocol_data(self, data):
         """设置协议模板数据"""
         self.protocol_data = data
+        self.version += 1
     
     def get_protocol_data(self):
         """获取协议模板数据"""
         return self.protocol_data
 
+    def _clone_memo(self):
+        """clone用的deepcopy memo：周期行数据与共用的默认字典不复制"""
+        memo = {id(_DEFAULT_RAW_INPUT_STRINGS): _DEFAULT_RAW_INPUT_STRINGS,
+                id(self._placeholder_state): self._placeholder_state}
+        # 周期行数据只会整体替换、不会原地修改，副本与原步骤共用（写时复制）；data_region即第一行
+        rows = (self._expand_step_data or {}).get("periodic_file_data")
+        if isinstance(rows, list):
+            memo[id(rows)] = rows
+            if rows:
+                memo[id(rows[0])] = rows[0]
+        return memo
+
+    def clone(self):
+        """复制步骤（粘贴用），除周期行数据外与原步骤互不影响"""
+        self._ensure_loaded()
+        return copy.deepcopy(self, self._clone_memo())
+
+    def duplicate(self, count, time_offset):
+        """批量复制count个步骤，第i个副本的时间为原时间加i*time_offset"""
+        self._ensure_loaded()
+        memo = self._clone_memo()
+        base_time = self.base_step_data.get("time", 0) or 0
+        name = self.base_step_data.get("name", "")
+        copies = []
+        for i in range(1, count + 1):
+            step = copy.deepcopy(self, dict(memo))
+            step.base_step_data["time"] = base_time + i * time_offset
+            step._set_placeholder_state("time", step.base_step_data["time"])
+            step.base_step_data["name"] = f"{name} (副本{i})"
+            step.version = 0
+            copies.append(step)
+        return copies
+
+
+# 剪贴板数据格式：标记 + zlib压缩的步骤列表pickle；没有标记的是旧版本直接pickle的单个步骤
+STEP_CLIPBOARD_MAGIC = b"STEPS\x01"
+
+
+def dumps_steps(steps):
+    """把步骤序列化为剪贴板数据"""
+    data = pickle.dumps(list(steps), pickle.HIGHEST_PROTOCOL)
+    return STEP_CLIPBOARD_MAGIC + zlib.compress(data, 1)
+
+
+def loads_steps(data):
+    """从剪贴板数据还原步骤列表，内容不是步骤时抛出ValueError"""
+    data = bytes(data)
+    if data.startswith(STEP_CLIPBOARD_MAGIC):
+        steps = pickle.loads(zlib.decompress(data[len(STEP_CLIPBOARD_MAGIC):]))
+    else:
+        steps = [pickle.loads(data)]
+    if not isinstance(steps, list) or not all(isinstance(step, StepModel) for step in steps):
+        raise ValueError("剪切板内容不是有效的步骤对象")
+    return steps
+
+
+_DEFAULT_PLACEHOLDER_STATE = {field: True for field in StepModel.PLACEHOLDER_FIELDS}
+# 共用的占位状态字典：各字段状态组合 -> 字典，只能整体替换，不能原地修改
+_PLACEHOLDER_STATES = {tuple(_DEFAULT_PLACEHOLDER_STATE.values()): _DEFAULT_PLACEHOLDER_STATE}
+_DEFAULT_RAW_INPUT_STRINGS = {field: None for field in StepModel.RAW_INPUT_FIELDS}
 
     
 
@@ -1,7 +1,8 @@
-import json
 import os
 from pathlib import Path
 
+from models.step_model import load_config_json
+
 """
 TemplateManager: 管理协议模板的单例类
 - 从配置文件加载模板及其适用的流程步类型
@@ -36,13 +37,14 @@ class TemplateManager:
         self.step_type_map = {name: idx for idx, name in enumerate(self.step_type_names)}
 
         try:
-            with open(template_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.templates = data.get("templates", [])
-                self.data_types = data.get("data_types", {})
-                none_opt = data.get("none_option", {})
-                self.none_value = none_opt.get("value", -1)
-                self.none_label = none_opt.get("label", "无")
+            # 与step_model共用解析结果，文件未改动时不再重复解析
+            data = load_config_json(template_file)
+            # _build_indices会给模板添加字段，复制一份，不修改共用的解析结果
+            self.templates = [dict(tpl) for tpl in data.get("templates", [])]
+            self.data_types = data.get("data_types", {})
+            none_opt = data.get("none_option", {})
+            self.none_value = none_opt.get("value", -1)
+            self.none_label = none_opt.get("label", "无")
         except Exception as exc:
             print(f"加载协议模板失败: {exc}")
             return
@@ -52,9 +54,8 @@ class TemplateManager:
 
     def _load_step_type_names(self, config_path: str):
         try:
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("step_types", {}).get("support_types", [])
+            data = load_config_json(config_path)
+            return data.get("step_types", {}).get("support_types", [])
         except Exception as exc:
             print(f"加载step_type配置失败: {exc}")
             return []
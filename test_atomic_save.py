@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from models.periodic_table import PeriodicTable
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def _leftover_temp_files(directory, file_path):
+    prefix = f".{os.path.basename(file_path)}."
+    return [name for name in os.listdir(directory) if name.startswith(prefix)]
+
+
+def test_save_replaces_target_without_temp_files():
+    """保存通过临时文件替换目标文件，完成后不留临时文件"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    tmp_dir = tempfile.mkdtemp()
+    xml_path = os.path.join(tmp_dir, "flow.xml")
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write("old")
+        model = create_model(num_rows=5)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(xml_path)
+        assert not MessageBoxStub.errors
+
+        with open(xml_path, encoding="utf-8") as f:
+            assert f.read().startswith('<?xml version="1.0" encoding="utf-8"?>')
+        assert _leftover_temp_files(tmp_dir, xml_path) == []
+        assert not model.is_dirty()
+    finally:
+        file_controller_module.QMessageBox = original_box
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def test_cancelled_save_keeps_original_file():
+    """取消保存时原文件不变，临时文件被删除"""
+    tmp_dir = tempfile.mkdtemp()
+    xml_path = os.path.join(tmp_dir, "flow.xml")
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write("old")
+        model = create_model(num_rows=5)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        snapshot = controller._take_save_snapshot(xml_path)
+
+        progress = []
+        completed = controller._write_snapshot_atomic(
+            snapshot, xml_path,
+            progress=lambda done, total: progress.append(done),
+            cancelled=lambda: len(progress) >= 1,
+        )
+        assert completed is False
+        with open(xml_path, encoding="utf-8") as f:
+            assert f.read() == "old"
+        assert _leftover_temp_files(tmp_dir, xml_path) == []
+    finally:
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def test_snapshot_not_shared_with_model():
+    """快照深拷贝步骤数据，保存过程中修改模型里的嵌套数据不影响快照，周期数据表仍共用"""
+    model = create_model(num_rows=5)
+    table = PeriodicTable.from_rows([[{"data_type": 1, "value": "1"}], [{"data_type": 1, "value": "2"}]])
+    model.steps[1].expand_step_data["periodic_file_data"] = table
+    controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+    snapshot = controller._take_save_snapshot("flow.xml")
+    step_copy = snapshot["steps"][0][3]
+    periodic_copy = snapshot["steps"][1][3]
+
+    model.steps[0].get_type_step_data()["data_region"][0]["value"] = "0xFFFF"
+    model.steps[0].get_type_step_data()["data_region"].append({"data_type": 1, "value": "0x0001"})
+    assert step_copy.get_type_step_data()["data_region"] == [{"data_type": 1, "value": "0x1234"}]
+    assert periodic_copy.get_expand_step_data()["periodic_file_data"] is table
+
+
+class _RunningThread:
+    """模拟正在进行的后台保存线程，wait()后结束"""
+
+    def __init__(self):
+        self.running = True
+
+    def isRunning(self):
+        return self.running
+
+    def wait(self):
+        self.running = False
+
+
+def test_save_requested_while_saving_is_queued():
+    """保存进行中再次请求保存时排队，等待保存结束后按最新的模型保存并调用回调"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    tmp_dir = tempfile.mkdtemp()
+    xml_path = os.path.join(tmp_dir, "flow.xml")
+    try:
+        model = create_model(num_rows=5)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller._save_thread = _RunningThread()
+        saved = []
+        controller.save_to_file_async(xml_path)
+        model.steps[0].update_base_data({"name": "修改后的步骤"})
+        controller.save_to_file_async(xml_path, on_saved=lambda path, snapshot: saved.append(path))
+        assert not os.path.exists(xml_path)
+
+        controller.wait_for_pending_save()
+        assert saved == [xml_path] and not MessageBoxStub.errors
+        with open(xml_path, encoding="utf-8") as f:
+            assert "修改后的步骤" in f.read()
+        assert controller._pop_queued_save() is None
+    finally:
+        file_controller_module.QMessageBox = original_box
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_save_replaces_target_without_temp_files()
+    test_cancelled_save_keeps_original_file()
+    test_snapshot_not_shared_with_model()
+    test_save_requested_while_saving_is_queued()
+    print("✅ 原子保存测试通过")
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.config_scanner import scan_config_steps
+from controllers.file_controller import FileController
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def step_names(steps_by_type):
+    return {step_type: [step.get_base_step_data()["name"] for step in steps]
+            for step_type, steps in steps_by_type.items()}
+
+
+def test_scan_merges_in_path_order_and_reuses_cache():
+    """并行扫描结果按路径顺序合并，未改动的文件使用缓存，改动的文件重新解析"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    with tempfile.TemporaryDirectory() as config_dir, tempfile.TemporaryDirectory() as cache_dir:
+        try:
+            paths = []
+            for idx in range(5):
+                model = create_model(num_rows=2)
+                model.steps[0].update_base_data({"name": f"步骤{idx}"})
+                sub_dir = os.path.join(config_dir, "build" if idx == 4 else f"dir{idx % 2}")
+                os.makedirs(sub_dir, exist_ok=True)
+                path = os.path.join(sub_dir, f"flow{idx}.xml")
+                FileController(model, None, GlobalControllerStub(), None, None, None).save_to_file(path)
+                paths.append(path)
+            with open(os.path.join(config_dir, "empty.xml"), "w"):
+                pass
+
+            steps_by_type, stats = scan_config_steps(config_dir, cache_dir, max_workers=2)
+            # build目录被跳过，其中的文件计入总数和跳过数
+            assert stats == {"total": 6, "processed": 4, "skipped": 2, "cached": 0}
+            # dir0: 0,2  dir1: 1,3
+            assert step_names(steps_by_type)[0] == ["步骤0", "步骤2", "步骤1", "步骤3"]
+            assert len(steps_by_type[1]) == 8
+
+            model = create_model(num_rows=2)
+            model.steps[0].update_base_data({"name": "已修改"})
+            FileController(model, None, GlobalControllerStub(), None, None, None).save_to_file(paths[1])
+            os.utime(paths[1], ns=(0, 0))
+            steps_by_type, stats = scan_config_steps(config_dir, cache_dir, max_workers=2)
+            assert stats["cached"] == 4
+            assert step_names(steps_by_type)[0] == ["步骤0", "步骤2", "已修改", "步骤3"]
+        finally:
+            file_controller_module.QMessageBox = original_box
+
+
+if __name__ == "__main__":
+    test_scan_merges_in_path_order_and_reuses_cache()
+    print("✅ 目录扫描测试通过")
@@ -0,0 +1,239 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.export_engine as export_engine_module
+from controllers.export_engine import MANIFEST_NAME, PARALLEL_MIN_FILES, PROTOCOL_KEYS, export_txts
+from models.step_model import StepModel
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_step(step_type, name, time_val, type_data):
+    step = StepModel()
+    step.update_base_data({"step_type": step_type, "name": name, "time": time_val})
+    step.update_type_data(step_type, type_data)
+    return step
+
+
+def create_steps(data_file):
+    with open(data_file, "w", encoding="utf-8") as f:
+        for row in range(5):
+            f.write(" ".join(f"0x{(row * 8 + col) & 0xFFFF:04X}" for col in range(8)) + "\n")
+    return [
+        create_step(0, "非周期", 0.5, {"site_type": 0, "recip_site": "0x02", "sub_address": "0x01", "msg_len": 4,
+                                       "protocol_type": -1, "data_region": "0x0001 0x0002 0x0003 0x0004"}),
+        create_step(1, "周期文件", 1.0, {"site_type": 0, "recip_site": "0x03", "sub_address": "0x02", "msg_len": 8,
+                                        "period": 0.5, "protocol_type": -1, "data_region": "",
+                                        "file_path": data_file}),
+    ]
+
+
+def test_import_without_qt():
+    """导出模块不导入PyQt5"""
+    code = ("import sys; import controllers.export_engine; "
+            "sys.exit(any(name.startswith('PyQt5') for name in sys.modules))")
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_export_result():
+    """返回导出的协议目录、写出的文件和未配置目录的协议，重复导出时先清空旧txt"""
+    tmp = tempfile.mkdtemp()
+    try:
+        steps = create_steps(os.path.join(tmp, "data.txt"))
+        glink_dir = os.path.join(tmp, "glink")
+        protocol_dirs = {"glink": glink_dir, "uart": "", "bc": None}
+        assert set(protocol_dirs) <= set(PROTOCOL_KEYS)
+        result = export_txts(steps, protocol_dirs)
+        assert result["exported"] == [("GLINK", glink_dir)]
+        assert result["missing_dirs"] == ["1553-BC", "串口", "开关量"]
+        assert not result["errors"]
+        assert sorted(result["files"]) == sorted(os.path.join(glink_dir, name) for name in os.listdir(glink_dir)
+                                                 if name != MANIFEST_NAME)
+        assert len(result["files"]) == 2
+        period_file = next(path for path in result["files"] if "ID0x003" in os.path.basename(path))
+        with open(period_file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert [line.split("\t")[0] for line in lines] == ["1.000", "1.500", "2.000", "2.500", "3.000"]
+
+        stale = os.path.join(glink_dir, "stale.txt")
+        with open(stale, "w", encoding="utf-8") as f:
+            f.write("old")
+        # 去掉周期步骤后其分组文件和不属于导出结果的txt被删除，未变化的文件保留
+        result = export_txts(steps[:1], protocol_dirs)
+        assert not os.path.exists(stale) and not os.path.exists(period_file)
+        assert result["files"] == [] and len(result["unchanged"]) == 1
+        assert export_txts([], {key: "" for key in PROTOCOL_KEYS})["exported"] == []
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def read_tree(root):
+    """目录下各导出文件的 {相对路径: 内容}（不含导出清单）"""
+    contents = {}
+    for base, _, names in os.walk(root):
+        for name in names:
+            if name == MANIFEST_NAME:
+                continue
+            path = os.path.join(base, name)
+            with open(path, encoding="utf-8") as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+def test_parallel_export_matches_sequential():
+    """多个协议在子进程中同时导出，文件和返回结果与逐个导出一致，每个协议完成时回调一次"""
+    tmp = tempfile.mkdtemp()
+    try:
+        steps = create_steps(os.path.join(tmp, "data.txt"))
+        steps.append(create_step(4, "BC", 2.0, {"site_type": 0, "recip_site": "0x04", "sub_address": "0x03",
+                                               "msg_len": 2, "protocol_type": -1, "data_region": "0x1234 0x5678"}))
+        outputs = []
+        for max_workers in (1, 2):
+            root = os.path.join(tmp, f"out{max_workers}")
+            protocol_dirs = {key: os.path.join(root, key) for key in PROTOCOL_KEYS}
+            done = []
+            result = export_txts(steps, protocol_dirs, max_workers=max_workers,
+                                 on_protocol_done=lambda name, path: done.append((name, path)))
+            assert sorted(done) == sorted([("GLINK", protocol_dirs["glink"]), ("1553-BC", protocol_dirs["bc"]),
+                                           ("串口", None), ("开关量", None), ("中断", None)])
+            summary = ([name for name, _ in result["exported"]],
+                       [os.path.relpath(path, root) for path in result["files"]])
+            outputs.append((summary, read_tree(root)))
+        assert outputs[0] == outputs[1]
+        assert outputs[0][0][0] == ["GLINK", "1553-BC"] and len(outputs[0][1]) == 3
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_group_files_written_in_pool():
+    """总线协议的各分组文件在进程池中写出，内容与逐个写出一致，出错的文件单独报告"""
+    tmp = tempfile.mkdtemp()
+    try:
+        steps = create_steps(os.path.join(tmp, "data.txt"))
+        for group in range(PARALLEL_MIN_FILES):
+            steps.append(create_step(0, f"分组{group}", 0.1 * group, {
+                "site_type": 0, "recip_site": f"0x{group + 0x10:02X}", "sub_address": "0x01", "msg_len": 2,
+                "protocol_type": -1, "data_region": f"0x{group:04X} 0x0001"}))
+        # 与周期文件步骤同一分组的非周期步骤，写出的文件仍以周期数据为准
+        steps.append(create_step(0, "同组非周期", 0.2, {"site_type": 0, "recip_site": "0x03", "sub_address": "0x02",
+                                                       "msg_len": 8, "protocol_type": -1,
+                                                       "data_region": " ".join(["0x0001"] * 8)}))
+        outputs = []
+        for max_workers in (1, 4):
+            glink_dir = os.path.join(tmp, f"glink{max_workers}")
+            # 与分组文件同名的目录无法写入
+            blocked = os.path.join(glink_dir, "NcRecv_ID0x010_SA01_Len4.txt")
+            os.makedirs(blocked)
+            result = export_txts(steps, {"glink": glink_dir}, max_workers=max_workers)
+            assert [path for path, _ in result["errors"]] == [blocked]
+            assert len(result["files"]) == PARALLEL_MIN_FILES + 1
+            contents = read_tree(glink_dir)
+            outputs.append(([os.path.basename(path) for path in result["files"]], contents))
+        assert outputs[0] == outputs[1]
+        period_lines = outputs[0][1]["NcRecv_ID0x003_SA02_Len16.txt"].splitlines()
+        assert [line.split("\t")[0] for line in period_lines] == ["1.000", "1.500", "2.000", "2.500", "3.000"]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_incremental_export():
+    """只重写内容有变化的分组文件：修改一个步骤、改动数据文件或输出文件时只重写对应文件"""
+    tmp = tempfile.mkdtemp()
+    try:
+        data_file = os.path.join(tmp, "data.txt")
+        steps = create_steps(data_file)
+        for group in range(20):
+            steps.append(create_step(0, f"分组{group}", 0.1 * group, {
+                "site_type": 0, "recip_site": f"0x{group + 0x10:02X}", "sub_address": "0x01", "msg_len": 2,
+                "protocol_type": -1, "data_region": f"0x{group:04X} 0x0001"}))
+        glink_dir = os.path.join(tmp, "glink")
+        protocol_dirs = {"glink": glink_dir, "bc": glink_dir}  # 与1553-BC共用目录时互不删除对方的文件
+        steps.append(create_step(4, "BC", 2.0, {"site_type": 0, "recip_site": "0x04", "sub_address": "0x03",
+                                               "msg_len": 2, "protocol_type": -1, "data_region": "0x1234 0x5678"}))
+        result = export_txts(steps, protocol_dirs, max_workers=1)
+        assert len(result["files"]) == 23 and not result["unchanged"]
+        expected = read_tree(glink_dir)
+
+        result = export_txts(steps, protocol_dirs, max_workers=1)
+        assert result["files"] == [] and len(result["unchanged"]) == 23
+        assert read_tree(glink_dir) == expected
+
+        steps[5].update_type_data(0, {"data_region": "0xAAAA 0x0001"})
+        result = export_txts(steps, protocol_dirs, max_workers=1)
+        assert [os.path.basename(path) for path in result["files"]] == ["NcRecv_ID0x013_SA01_Len4.txt"]
+        assert read_tree(glink_dir)["NcRecv_ID0x013_SA01_Len4.txt"] == "0.300\t0xAAAA\t0x0001\n"
+
+        # 数据文件改动后重写周期分组文件，输出文件被改动后重写该文件
+        with open(data_file, "a", encoding="utf-8") as f:
+            f.write(" ".join(["0x0001"] * 8) + "\n")
+        with open(os.path.join(glink_dir, "NcRecv_ID0x010_SA01_Len4.txt"), "w", encoding="utf-8") as f:
+            f.write("edited")
+        result = export_txts(steps, protocol_dirs, max_workers=1)
+        assert sorted(os.path.basename(path) for path in result["files"]) == [
+            "NcRecv_ID0x003_SA02_Len16.txt", "NcRecv_ID0x010_SA01_Len4.txt"]
+        assert len(read_tree(glink_dir)["NcRecv_ID0x003_SA02_Len16.txt"].splitlines()) == 6
+
+        result = export_txts(steps, protocol_dirs, max_workers=1, incremental=False)
+        assert len(result["files"]) == 23 and not result["unchanged"]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _exit_in_bc_worker(specs, out_dir, steps, templates, incremental):
+    """导出1553-BC目录的子进程直接退出，使进程池不可用"""
+    if os.path.basename(out_dir) == "bc":
+        os._exit(1)
+    return _run_task_in_worker(specs, out_dir, steps, templates, incremental)
+
+
+_run_task_in_worker = export_engine_module._run_task_in_worker
+
+
+def test_parallel_export_failures():
+    """子进程中导出出错时记入errors；进程池不可用时只逐个导出未完成的目录，每个协议只回调一次"""
+    tmp = tempfile.mkdtemp()
+    try:
+        steps = create_steps(os.path.join(tmp, "data.txt"))
+        steps.append(create_step(4, "BC", 2.0, {"site_type": 0, "recip_site": "0x04", "sub_address": "0x03",
+                                               "msg_len": 2, "protocol_type": -1, "data_region": "0x1234 0x5678"}))
+        # 与输出目录同名的文件无法创建目录
+        blocked = os.path.join(tmp, "blocked")
+        with open(blocked, "w", encoding="utf-8") as f:
+            f.write("")
+        bc_dir = os.path.join(tmp, "bc")
+        done = []
+        result = export_txts(steps, {"glink": blocked, "bc": bc_dir}, max_workers=2,
+                             on_protocol_done=lambda name, path: done.append((name, path)))
+        assert [path for path, _ in result["errors"]] == [blocked]
+        assert result["exported"] == [("1553-BC", bc_dir)]
+        assert sorted(done) == sorted([("GLINK", None), ("1553-BC", bc_dir), ("中断", None)])
+
+        glink_dir = os.path.join(tmp, "glink")
+        done = []
+        export_engine_module._run_task_in_worker = _exit_in_bc_worker
+        try:
+            result = export_txts(steps, {"glink": glink_dir, "bc": bc_dir}, max_workers=2,
+                                 on_protocol_done=lambda name, path: done.append((name, path)))
+        finally:
+            export_engine_module._run_task_in_worker = _run_task_in_worker
+        assert not result["errors"]
+        assert result["exported"] == [("GLINK", glink_dir), ("1553-BC", bc_dir)]
+        assert sorted(done) == sorted([("GLINK", glink_dir), ("1553-BC", bc_dir), ("中断", None)])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_import_without_qt()
+    test_export_result()
+    test_parallel_export_matches_sequential()
+    test_group_files_written_in_pool()
+    test_incremental_export()
+    test_parallel_export_failures()
+    print("✅ 无界面导出测试通过")
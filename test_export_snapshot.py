@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PyQt5.QtWidgets import QApplication
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def step_data(step):
+    return (step.get_base_step_data(), step.get_type_step_data(), step.get_expand_step_data(),
+            step.get_protocol_data(), step.raw_input_strings)
+
+
+def test_snapshot_matches_saved_file():
+    """内存快照导出的步骤与重新读取刚保存文件得到的步骤一致，且不修改模型"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    model = create_model(num_rows=6)
+    model.steps[0].set_protocol_data({"消息控制字": "0x0003", "备注": "第一行\n\n  \n第二行", "空": ""})
+    controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+    try:
+        for suffix in (".xml", ".flowdb"):
+            fd, file_path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            try:
+                # 第一次保存序列化全部步骤，第二次只有修改过的步骤重新序列化，其余复用缓存
+                for name in ("普通步骤", "改名后的步骤"):
+                    model.steps[0].set_name(name)
+                    saved = controller.save_to_file(file_path)
+                    versions = [step.version for step in model.steps]
+                    exported = controller.export_steps_snapshot(saved)
+                    assert len(exported) == 7
+                    assert [step_data(s) for s in exported] == \
+                        [step_data(s) for s in controller.read_steps_from_xml(file_path)]
+                    assert [step.version for step in model.steps] == versions
+            finally:
+                os.remove(file_path)
+        assert not MessageBoxStub.errors
+    finally:
+        file_controller_module.QMessageBox = original_box
+
+
+def test_export_after_async_save_ignores_later_edits():
+    """后台保存期间修改的步骤不影响导出：导出内容与写入文件的快照一致"""
+    app = QApplication.instance() or QApplication([])  # 保持引用
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    model = create_model(num_rows=6)
+    controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+    try:
+        for suffix in (".xml", ".flowdb"):
+            fd, file_path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            try:
+                controller.save_to_file(file_path)
+                model.steps[0].set_name("保存前修改")
+                exported = []
+                controller.save_to_file_async(
+                    file_path, on_saved=lambda path, snapshot: exported.append(
+                        controller.export_steps_snapshot(snapshot)))
+                # 保存进行中继续修改：改动过的步骤和复用缓存的步骤
+                model.steps[0].set_name("保存后修改")
+                model.steps[1].set_name("保存后修改")
+                deadline = time.time() + 30
+                while not exported and time.time() < deadline:
+                    app.processEvents()
+                    time.sleep(0.01)
+                controller.wait_for_pending_save()
+                assert len(exported) == 1
+                assert [step_data(s) for s in exported[0]] == \
+                    [step_data(s) for s in controller.read_steps_from_xml(file_path)]
+                names = [s.get_base_step_data()["name"] for s in exported[0]]
+                assert names[0] == "保存前修改" and "保存后修改" not in names
+                model.steps[1].set_name("周期步骤")
+            finally:
+                os.remove(file_path)
+        assert not MessageBoxStub.errors
+    finally:
+        file_controller_module.QMessageBox = original_box
+
+
+if __name__ == "__main__":
+    test_snapshot_matches_saved_file()
+    test_export_after_async_save_ignores_later_edits()
+    print("✅ 导出快照测试通过")
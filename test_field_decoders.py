@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import models.step_model as step_model
+from models.step_model import FIELD_DECODERS, FIELD_TYPES, decode_field_text
+
+
+def legacy_text2dtype(dtype_tag, text):
+    """旧的逐字段分支解析（FileController.text2dtype，去掉打印）"""
+    dtype = str(dtype_tag)
+    filed_type = step_model.get_field_type(dtype)
+    if filed_type != 'union':
+        if dtype in ("local_site", "recip_site", "sub_address", "base_address"):
+            if text is None:
+                return ""
+            return str(text).strip()
+        pdtype = step_model.get_dtype(dtype)
+        return pdtype(text)
+    try:
+        raw = (text or "").strip()
+        if raw.lower() in ("none", ""):
+            return []
+        data_list = json.loads(raw)
+        if not isinstance(data_list, list):
+            return []
+        val = []
+        for item in data_list:
+            if isinstance(item, dict) and "data_type" in item and "value" in item:
+                data_type = item.get("data_type")
+                pdtype = step_model.get_dtype_by_idx(int(data_type))
+                val.append({"data_type": int(data_type), "value": pdtype(item.get("value"))})
+            else:
+                val.append(item)
+        return val
+    except Exception:
+        return []
+
+
+def decode_or_error(func, tag, text):
+    try:
+        return func(tag, text)
+    except Exception as e:
+        return type(e)
+
+
+SAMPLE_TEXTS = [
+    None, "", "  ", "0", "12", "1.5", "0x11", " 0x22 ", "abc", "None", "[]", "{}",
+    '[{"data_type": 1, "value": 4660}, {"data_type": 8, "value": "x"}, 5]',
+    '[{"data_type": 99, "value": 1}]', '[{"data_type": "x", "value": 1}]', "[1, 2",
+]
+
+
+def test_decoders_match_legacy_dispatch():
+    """编译后的字段解析表与旧的逐字段分支解析结果一致"""
+    fields = list(FIELD_TYPES) + ["local_site", "periodic_group_id", "未配置字段"]
+    for field in fields:
+        for text in SAMPLE_TEXTS:
+            assert decode_or_error(decode_field_text, field, text) == \
+                decode_or_error(legacy_text2dtype, field, text), (field, text)
+    assert FIELD_DECODERS["local_site"]("  0x11 ") == "0x11"
+
+
+def benchmark(num_steps=50000):
+    """模拟解析num_steps个步骤的base/type字段，比较旧分支解析与查表解析的耗时"""
+    items = [
+        ("step_type", "0"), ("time", "1.0"), ("name", "步骤"), ("local_site", "0x11"),
+        ("recip_site", "0x22"), ("protocol_type", "0"),
+        ("data_region", '[{"data_type": 1, "value": "0x1234"}]'),
+    ]
+    items = [(tag, text) for tag, text in items if tag in FIELD_TYPES or tag in ("local_site", "recip_site")]
+    results = {}
+    for name, func in (("旧分支解析", legacy_text2dtype), ("查表解析", decode_field_text)):
+        start = time.perf_counter()
+        for _ in range(num_steps):
+            for tag, text in items:
+                func(tag, text)
+        results[name] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    test_decoders_match_legacy_dispatch()
+    for name, seconds in benchmark().items():
+        print(f"{name}: {seconds:.3f}s")
+    print("✅ 字段解析表测试通过")
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from utils.flow_db import (
+    convert_flow_db_to_xml,
+    convert_xml_to_flow_db,
+    flow_db_step_count,
+    is_flow_db,
+    read_flow_db,
+    read_xml_document,
+)
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def _normalized(document):
+    """忽略tuple/list差异比较文档"""
+    return json.loads(json.dumps(document, ensure_ascii=False))
+
+
+def test_xml_flow_db_roundtrip_is_lossless():
+    """XML -> flowdb -> XML 逐字节一致，flowdb保存结果与XML文档一致"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    tmp_dir = tempfile.mkdtemp()
+    xml_path = os.path.join(tmp_dir, "flow.xml")
+    db_path = os.path.join(tmp_dir, "flow.flowdb")
+    saved_db_path = os.path.join(tmp_dir, "saved.flowdb")
+    back_path = os.path.join(tmp_dir, "back.xml")
+    try:
+        model = create_model(num_rows=30)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(xml_path)
+        controller.save_to_file(saved_db_path)
+        assert not MessageBoxStub.errors
+
+        convert_xml_to_flow_db(xml_path, db_path)
+        assert is_flow_db(db_path) and not is_flow_db(xml_path)
+        convert_flow_db_to_xml(db_path, back_path)
+        with open(xml_path, encoding="utf-8") as f1, open(back_path, encoding="utf-8") as f2:
+            assert f1.read() == f2.read()
+
+        assert _normalized(read_flow_db(db_path)) == _normalized(read_xml_document(xml_path))
+
+        # 直接保存的flowdb与XML保存结果内容一致
+        convert_flow_db_to_xml(saved_db_path, back_path)
+        with open(xml_path, encoding="utf-8") as f1, open(back_path, encoding="utf-8") as f2:
+            assert f1.read() == f2.read()
+    finally:
+        file_controller_module.QMessageBox = original_box
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+def test_flow_db_step_subset():
+    """flowdb可只读取部分步骤，导出时周期分组按行展开"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "flow.flowdb")
+    try:
+        model = create_model(num_rows=12)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(db_path)
+        assert not MessageBoxStub.errors
+        assert flow_db_step_count(db_path) == 2
+
+        subset = controller.read_step_range(db_path, start=1, count=1)
+        assert len(subset) == 1
+        assert subset[0].get_base_step_data()["name"] == "周期步骤"
+        assert len(subset[0].get_expand_step_data()["periodic_file_data"]) == 12
+
+        expanded = controller.read_steps_from_xml(db_path)
+        assert len(expanded) == 1 + 12
+        assert [step.get_base_step_data()["time"] for step in expanded[1:]] == [2.0 + idx * 0.5 for idx in range(12)]
+    finally:
+        file_controller_module.QMessageBox = original_box
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    test_xml_flow_db_roundtrip_is_lossless()
+    test_flow_db_step_subset()
+    print("✅ flowdb格式测试通过")
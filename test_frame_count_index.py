@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main_model import DataModel
+from models.step_index import parse_ctrl_word
+
+
+class _Step:
+    """帧计数用到的最小步骤"""
+
+    def __init__(self, step_type, protocol_type, time, ctrl_word):
+        self.step_type = step_type
+        self.base_step_data = {"time": time, "protocol_type": protocol_type}
+        self.protocol_data = {"消息控制字": ctrl_word}
+        self.version = 0
+
+    def get_step_type(self):
+        return self.step_type
+
+    def get_base_step_data(self):
+        return self.base_step_data
+
+    def get_protocol_data(self):
+        return self.protocol_data
+
+    def get_value(self, field, default=None):
+        return self.base_step_data.get(field, default)
+
+    def peek_value(self, section, field, default=None):
+        return self.protocol_data.get(field, default)
+
+
+def reference_groups(steps, mask):
+    """旧的逐步扫描 + 组内按时间从大到小排序"""
+    groups = {}
+    for step in steps:
+        ctrl_word = parse_ctrl_word((step.get_protocol_data() or {}).get("消息控制字", "0"))
+        if (ctrl_word & mask) == mask:
+            key = (step.get_step_type(), step.get_base_step_data().get("protocol_type", 0))
+            groups.setdefault(key, []).append(step)
+    for group in groups.values():
+        group.sort(key=lambda x: x.get_value("time", 0), reverse=True)
+    return groups
+
+
+def _random_step(rng):
+    return _Step(rng.randrange(2), rng.randrange(3), float(rng.randrange(10)),
+                 rng.choice(["0x0001", "0x0002", "0x0003", "3", "0", "abc"]))
+
+
+def test_index_matches_full_scan():
+    """增量维护的帧计数索引与每次全量扫描排序的结果一致"""
+    rng = random.Random(11)
+    model = DataModel()
+    for _ in range(1500):
+        op = rng.randrange(6)
+        if op == 0 or not model.steps:
+            model.add_step(_random_step(rng))
+        elif op == 1:
+            model.remove_step(rng.randrange(len(model.steps)))
+        elif op == 2:
+            model.move_step(rng.randrange(len(model.steps)), rng.randrange(len(model.steps)))
+        elif op == 3:
+            # 修改时间
+            step = rng.choice(model.steps)
+            step.base_step_data["time"] = float(rng.randrange(10))
+            step.version += 1
+        elif op == 4:
+            # 修改消息控制字
+            step = rng.choice(model.steps)
+            step.protocol_data = {"消息控制字": rng.choice(["0x0001", "0x0002", "0x0003", "0"])}
+            step.version += 1
+        else:
+            model.sort_steps_by_time()
+
+        mask = rng.choice([0x01, 0x02])
+        expected = reference_groups(model.steps, mask)
+        assert model.frame_count_groups(mask) == expected
+        if not model.steps:
+            continue
+        step = rng.choice(model.steps)
+        group = (step.get_step_type(), step.get_base_step_data().get("protocol_type", 0))
+        members = expected.get(group, [])
+        if step in members:
+            assert model.frame_count_of(step, mask) == members.index(step) + 1
+        else:
+            assert model.frame_count_of(step, mask) is None
+            # 未参与帧计数的步骤按时间排在同时间步骤之后
+            time = step.get_value("time", 0)
+            assert model.frame_count_for_time(group, time, mask) == \
+                sum(1 for s in members if s.get_value("time", 0) >= time) + 1
+
+
+if __name__ == "__main__":
+    test_index_matches_full_scan()
+    print("✅ 帧计数索引测试通过")
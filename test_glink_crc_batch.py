@@ -0,0 +1,58 @@
+import os
+import sys
+import random
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils.protocol_template_utils as protocol_template_utils
+from utils.protocol_template_utils import GLINK_CRC_TABLE, glink_crc16_rows
+from controllers.file_controller import FileController
+from models.step_model import StepModel
+
+
+def reference_crc(words, initial=0xFFFF):
+    """逐字节查表计算（原保存流程的算法）"""
+    crc = initial
+    for word in words:
+        for byte in ((word >> 8) & 0xFF, word & 0xFF):
+            crc = ((crc << 8) ^ GLINK_CRC_TABLE[((crc >> 8) ^ byte) & 0xFF]) & 0xFFFF
+    return crc
+
+
+def test_batch_kernel_matches_reference():
+    """批量CRC（numpy与纯Python实现）与逐字节计算结果一致"""
+    rng = random.Random(1)
+    rows = [[rng.randrange(0x10000) for _ in range(2)] for _ in range(200)]
+    suffix = [rng.randrange(0x10000) for _ in range(9)]
+    expected = [reference_crc(row + suffix) for row in rows]
+    assert glink_crc16_rows(rows, suffix=suffix) == expected
+    assert glink_crc16_rows([[]], suffix=suffix) == [reference_crc(suffix)]
+
+    original_np = protocol_template_utils.np
+    protocol_template_utils.np = None
+    try:
+        assert glink_crc16_rows(rows, suffix=suffix) == expected
+    finally:
+        protocol_template_utils.np = original_np
+
+
+def test_periodic_rows_crc_matches_per_row():
+    """周期分组各行的CRC与逐行计算一致，取值失败的字段被跳过"""
+    step = StepModel()
+    step.update_base_data({"step_type": 1, "time": 2.5, "name": "周期步骤"})
+    step.update_type_data(1, {"local_site": "0x01", "recip_site": "0x02", "period": 0.5, "protocol_type": 0})
+    # 时间为16进制文本时int()失败，该字段不参与计算
+    protocol_data = {"消息控制字": "0x0003", "子地址": "0x10", "时间": "0x5",
+                     "消息ID": "7", "帧计数": "2", "数据区": "0x0102 zz 0xFFFFF"}
+    step_times = [2.5 + idx * 0.5 for idx in range(50)]
+    crcs = FileController._calc_periodic_rows_crc(step, protocol_data, 0x0003, step_times)
+
+    shared = [0x0001, 0x0002, 0x0010, 0x0003, 0x0007, 0x0002, 0x0102, 0x0000, 0xFFFF]
+    assert crcs == [reference_crc([0, int(t)] + shared) for t in step_times]
+
+
+if __name__ == "__main__":
+    test_batch_kernel_matches_reference()
+    test_periodic_rows_crc_matches_per_row()
+    print("✅ 批量CRC测试通过")
@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from main_model import DataModel
+from models.step_model import StepModel
+from utils.flow_db import FLOW_DB_EXTENSION
+from testing_helpers import GlobalControllerStub, StrictMessageBoxStub
+
+
+def create_model(num_steps):
+    model = DataModel()
+    for idx in range(num_steps):
+        step = StepModel()
+        step.update_base_data({"step_type": 0, "time": float(idx), "name": f"步骤{idx}"})
+        step.update_type_data(0, {"local_site": "0x11", "recip_site": "0x22",
+                                  "protocol_type": -1 if idx % 2 else 0})
+        step.set_protocol_data({"消息控制字": "0x0001", "数据区": "0x1234"})
+        model.steps.append(step)
+    return model
+
+
+def test_incremental_save_reuses_unmodified_steps():
+    """只有修改过的步骤会被重新序列化，输出与全量保存一致"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = StrictMessageBoxStub
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        model = create_model(6)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        serialized = []
+        original_serialize = controller._serialize_step
+
+        def counting_serialize(writer, step):
+            serialized.append(step)
+            original_serialize(writer, step)
+        controller._serialize_step = counting_serialize
+
+        controller.save_to_file(xml_path)
+        assert len(serialized) == 6
+        with open(xml_path, encoding="utf-8") as f:
+            first_content = f.read()
+
+        # 未修改时全部复用
+        serialized.clear()
+        controller.save_to_file(xml_path)
+        assert serialized == []
+        with open(xml_path, encoding="utf-8") as f:
+            assert f.read() == first_content
+
+        # 修改一个步骤后只重新序列化该步骤
+        model.steps[3].set_name("已修改")
+        serialized.clear()
+        controller.save_to_file(xml_path)
+        # 序列化的是保存快照中该步骤的副本
+        assert [step.get_base_step_data()["name"] for step in serialized] == ["已修改"]
+        assert serialized[0] is not model.steps[3]
+        with open(xml_path, encoding="utf-8") as f:
+            incremental_content = f.read()
+        assert "<name>已修改</name>" in incremental_content
+
+        # 与新控制器全量保存的结果一致
+        FileController(model, None, GlobalControllerStub(), None, None, None).save_to_file(xml_path)
+        with open(xml_path, encoding="utf-8") as f:
+            assert f.read() == incremental_content
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(xml_path)
+
+
+def test_snapshot_copies_only_modified_steps():
+    """保存快照只复制修改过的步骤，保存为flowdb时未修改的步骤复用上次的保存条目"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = StrictMessageBoxStub
+    fd, db_path = tempfile.mkstemp(suffix=FLOW_DB_EXTENSION)
+    os.close(fd)
+    try:
+        model = create_model(6)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        copied = []
+        original_copy = controller._copy_step_for_save
+
+        def counting_copy(step):
+            copied.append(step)
+            return original_copy(step)
+        controller._copy_step_for_save = counting_copy
+
+        assert controller.save_to_file(db_path)
+        assert copied == model.steps
+        with open(db_path, "rb") as f:
+            first_content = f.read()
+
+        copied.clear()
+        assert controller.save_to_file(db_path)
+        assert copied == []
+        with open(db_path, "rb") as f:
+            assert f.read() == first_content
+
+        model.steps[2].set_name("已修改")
+        copied.clear()
+        assert controller.save_to_file(db_path)
+        assert copied == [model.steps[2]]
+        _, steps = controller.load_steps(db_path)
+        assert [step.get_base_step_data()["name"] for step in steps] == [
+            "步骤0", "步骤1", "已修改", "步骤3", "步骤4", "步骤5"]
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(db_path)
+
+
+def test_step_version_tracks_modifications():
+    """StepModel的修改接口会递增version"""
+    step = StepModel()
+    version = step.version
+    step.set_protocol_data({"数据区": "0x01"})
+    assert step.version > version
+    version = step.version
+    step.get_expand_step_data()["periodic_file_data"] = [[]]
+    step.mark_dirty()
+    assert step.version > version
+
+
+if __name__ == "__main__":
+    test_incremental_save_reuses_unmodified_steps()
+    test_snapshot_copies_only_modified_steps()
+    test_step_version_tracks_modifications()
+    print("✅ 增量保存测试通过")
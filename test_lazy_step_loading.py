@@ -0,0 +1,100 @@
+import os
+import pickle
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from main_model import DataModel
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def step_data(step):
+    return (step.get_base_step_data(), step.get_type_step_data(),
+            step.get_expand_step_data(), step.get_protocol_data(), step.raw_input_strings)
+
+
+def test_lazy_steps_match_eager_load():
+    """延迟加载的步骤打开时只解析base，首次访问时解析出的数据与立即解析一致"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        controller = FileController(create_model(num_rows=5), None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(xml_path)
+
+        loader = FileController(DataModel(), None, GlobalControllerStub(), None, None, None)
+        _, eager = loader.load_steps(xml_path)
+        _, lazy = loader.load_steps(xml_path, lazy=True)
+        assert len(lazy) == len(eager) == 2
+        assert not any(step.is_loaded() for step in lazy)
+        assert [step.get_base_step_data() for step in lazy] == [step.get_base_step_data() for step in eager]
+        assert not any(step.is_loaded() for step in lazy)
+
+        # 剪贴板复制使用pickle，序列化前自动加载
+        copied = pickle.loads(pickle.dumps(lazy[1]))
+        assert lazy[1].is_loaded() and copied.is_loaded()
+        assert step_data(copied) == step_data(eager[1])
+
+        for lazy_step, eager_step in zip(lazy, eager):
+            version = lazy_step.version
+            assert step_data(lazy_step) == step_data(eager_step)
+            assert lazy_step.is_loaded()
+            assert lazy_step.version == version
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(xml_path)
+
+
+def test_lazy_steps_stay_unloaded_on_save_and_index():
+    """索引查询和保存不加载未改动的延迟步骤，保存结果与原文件一致"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    fd, copy_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        controller = FileController(create_model(num_rows=5), None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(xml_path)
+
+        model = DataModel()
+        loader = FileController(model, None, GlobalControllerStub(), None, None, None)
+        _, model.steps = loader.load_steps(xml_path, lazy=True)
+        buckets = model.step_buckets()
+        groups = model.frame_count_groups(0x0001)
+        assert sum(len(group) for group in groups.values()) == 2
+        assert len(buckets.steps_of_type(1)) == 1
+        assert loader.save_to_file(copy_path)
+        assert not any(step.is_loaded() for step in model.steps)
+        with open(xml_path, encoding="utf-8") as f, open(copy_path, encoding="utf-8") as g:
+            original, saved = f.read(), g.read()
+        assert saved[saved.index("<steps"):] == original[original.index("<steps"):]
+
+        _, eager = loader.load_steps(xml_path)
+        for lazy_step, eager_step in zip(model.steps, eager):
+            for field in ("protocol_type", "recip_site", "msg_len", "no_such_field"):
+                assert lazy_step.peek_value("type", field) == eager_step.get_type_step_data().get(field)
+            assert lazy_step.peek_value("protocol", "消息控制字") == eager_step.get_protocol_data()["消息控制字"]
+            assert not lazy_step.is_loaded()
+
+        # 改动过的步骤按当前数据保存
+        model.steps[0].update_base_data({"name": "改名"})
+        assert loader.save_to_file(copy_path)
+        _, reloaded = loader.load_steps(copy_path)
+        assert reloaded[0].get_base_step_data()["name"] == "改名"
+        assert step_data(reloaded[1]) == step_data(eager[1])
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(xml_path)
+        os.remove(copy_path)
+
+
+if __name__ == "__main__":
+    test_lazy_steps_match_eager_load()
+    test_lazy_steps_stay_unloaded_on_save_and_index()
+    print("✅ 延迟加载测试通过")
@@ -0,0 +1,52 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.line_sink import LineSink
+
+
+def test_line_sink_matches_text_write():
+    """分批缓冲写出的内容与逐行文本写出一致，统计写出的行数和字节数"""
+    tmp = tempfile.mkdtemp()
+    try:
+        lines = [f"{row * 0.5:.3f}\t0x{row:04X}\t中文" for row in range(10000)] + ["", "末行"]
+        expected = os.path.join(tmp, "expected.txt")
+        with open(expected, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+        for buffer_size in (1, 1000, 1 << 20):
+            path = os.path.join(tmp, f"sink{buffer_size}.txt")
+            with LineSink(path, buffer_size=buffer_size) as sink:
+                sink.write_lines(line for line in lines[:-1])
+                sink.write_line(lines[-1])
+            with open(path, "rb") as f, open(expected, "rb") as g:
+                assert f.read() == g.read()
+            assert sink.rows_written == len(lines)
+            assert sink.bytes_written == os.path.getsize(path)
+
+        # 生成行时出错，已完成的批次（每批4096行）仍写入文件
+        def failing_lines():
+            yield from lines[:5000]
+            raise ValueError("bad row")
+
+        path = os.path.join(tmp, "failed.txt")
+        try:
+            with LineSink(path, buffer_size=1 << 20) as sink:
+                sink.write_lines(lines[:10])
+                sink.write_lines(failing_lines())
+            assert False, "应抛出异常"
+        except ValueError:
+            pass
+        with open(path, encoding="utf-8") as f:
+            assert f.read().splitlines() == lines[:10] + lines[:4096]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_line_sink_matches_text_write()
+    print("✅ 缓冲按行写出测试通过")
@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from main_model import DataModel
+from testing_helpers import StrictMessageBoxStub, create_periodic_step, load_steps, save_model
+
+
+def test_periodic_group_round_trip():
+    """周期分组保存后可直接读回为单个步骤，按行展开后时间和CRC逐行对应"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = StrictMessageBoxStub
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        model = DataModel()
+        source = create_periodic_step(10)
+        model.steps.append(source)
+        controller = save_model(model, xml_path)
+
+        root = ET.parse(xml_path).getroot()
+        group = root.find("./steps/periodic_group")
+        assert group is not None and group.get("count") == "10"
+        assert group.find("columns").text == "1 0"
+        rows = group.findall("./rows/row")
+        assert rows[0].text == "0x0000 7"
+        assert rows[-1].get("format") == "json"
+
+        loaded = load_steps(controller, xml_path)
+        assert len(loaded) == 1
+        merged = loaded[0]
+        assert merged.get_expand_step_data()["periodic_file_data"] == \
+            source.get_expand_step_data()["periodic_file_data"]
+        assert merged.get_expand_step_data()["periodic_file_path"] == "periodic.txt"
+        assert merged.get_base_step_data()["time"] == 1.0
+
+        expanded = controller.read_steps_from_xml(xml_path)
+        assert len(expanded) == 10
+        assert [s.get_base_step_data()["time"] for s in expanded] == [1.0 + i * 0.25 for i in range(10)]
+        assert [s.get_protocol_data()["数据区crc校验和"] for s in expanded] == [r.get("crc") for r in rows]
+        assert expanded[3].get_expand_step_data()["periodic_group_index"] == "3"
+        assert expanded[3].get_type_step_data()["data_region"] == [
+            {"data_type": 1, "value": "0x0003"}, {"data_type": 0, "value": "7"}]
+
+        # 再次保存结果不变
+        with open(xml_path, encoding="utf-8") as f:
+            first_content = f.read()
+        model.steps = loaded
+        save_model(model, xml_path)
+        with open(xml_path, encoding="utf-8") as f:
+            assert f.read() == first_content
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(xml_path)
+
+
+LEGACY_XML = """<?xml version="1.0" encoding="utf-8"?>
+<config>
+  <global_params/>
+  <steps>
+    <step>
+      <base><step_type>1</step_type><name>周期步骤</name><time>2.0</time></base>
+      <type><period>1.0</period><data_region>[{"data_type": 1, "value": "0x0001"}]</data_region><file_path>a.txt</file_path></type>
+      <expand><periodic_group_id>g1</periodic_group_id><periodic_group_index>0</periodic_group_index><periodic_group_first>1</periodic_group_first></expand>
+      <protocol/>
+    </step>
+    <step>
+      <base><step_type>1</step_type><name>周期步骤</name><time>3.0</time></base>
+      <type><period>1.0</period><data_region>[{"data_type": 1, "value": "0x0002"}]</data_region><file_path>a.txt</file_path></type>
+      <expand><periodic_group_id>g1</periodic_group_id><periodic_group_index>1</periodic_group_index><periodic_group_first>0</periodic_group_first></expand>
+      <protocol/>
+    </step>
+  </steps>
+</config>"""
+
+
+def test_legacy_expanded_steps_still_merge():
+    """旧格式逐行展开的周期步骤仍按periodic_group_id合并"""
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write(LEGACY_XML)
+        controller = FileController(DataModel(), None, None, None, None, None)
+        loaded = load_steps(controller, xml_path)
+        assert len(loaded) == 1
+        assert [row[0]["value"] for row in loaded[0].get_expand_step_data()["periodic_file_data"]] == \
+            ["0x0001", "0x0002"]
+        assert len(controller.read_steps_from_xml(xml_path)) == 2
+    finally:
+        os.remove(xml_path)
+
+
+if __name__ == "__main__":
+    test_periodic_group_round_trip()
+    test_legacy_expanded_steps_still_merge()
+    print("✅ 周期分组保存/读取测试通过")
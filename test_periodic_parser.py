@@ -0,0 +1,159 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QTableWidget
+
+import views.step_detail_view as step_detail_view_module
+from models.periodic_table import CHUNK_ROWS, PeriodicTable
+from models.step_model import StepModel
+from views.step_detail_view import PeriodicFileParserThread, StepDetailView
+
+app = QApplication.instance() or QApplication([])
+
+
+class _MessageBox:
+    messages = []
+
+    @staticmethod
+    def information(*args):
+        _MessageBox.messages.append(("information", args[-1]))
+
+    @staticmethod
+    def warning(*args):
+        _MessageBox.messages.append(("warning", args[-1]))
+
+    @staticmethod
+    def critical(*args):
+        _MessageBox.messages.append(("critical", args[-1]))
+
+
+def write_rows(path, rows, columns=3, bad_line=None):
+    """写出rows行数据（每行后有一个空行），bad_line行少一列"""
+    with open(path, "w", encoding="utf-8") as f:
+        for row in range(rows):
+            count = columns - 1 if row + 1 == bad_line else columns
+            f.write(" ".join(f"0x{(row + col) & 0xFFFF:04X}" for col in range(count)) + "\n\n")
+
+
+def run_parser(thread):
+    """运行线程并处理排队的信号，返回收到的信号"""
+    events = []
+    thread.rows_ready.connect(lambda chunk: events.append(("rows", chunk)))
+    thread.parsing_progress.connect(lambda done, total: events.append(("progress", done, total)))
+    thread.parsing_done.connect(lambda path, count: events.append(("done", count)))
+    thread.parsing_error.connect(lambda message: events.append(("error", message)))
+    thread.parsing_cancelled.connect(lambda path: events.append(("cancelled",)))
+    thread.start()
+    thread.wait()
+    app.processEvents()
+    return events
+
+
+def wait_parsing(view):
+    deadline = time.time() + 30
+    while getattr(view, "parser_thread", None) is not None and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
+
+
+def test_parser_thread_chunks():
+    """分块解析的结果拼接后与逐行读取一致，列数不符时报告原始行号"""
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "rows.txt")
+        rows = CHUNK_ROWS * 2 + 10
+        write_rows(path, rows)
+        events = run_parser(PeriodicFileParserThread(path, [1, 1, 1]))
+        chunks = [event[1] for event in events if event[0] == "rows"]
+        assert len(chunks) == 3
+        table = PeriodicTable([1, 1, 1])
+        for chunk in chunks:
+            table.extend_table(chunk)
+        with open(path, encoding="utf-8") as f:
+            expected = [line.split() for line in f if line.strip()]
+        assert [table.row_values(i) for i in range(len(table))] == expected
+        assert events[0] == ("progress", 0, 0)
+        assert events[-2:] == [("progress", rows, rows), ("done", rows)]
+
+        write_rows(path, rows, bad_line=CHUNK_ROWS + 5)
+        events = run_parser(PeriodicFileParserThread(path, [1, 1, 1]))
+        assert events[-1] == ("error", f"第 {(CHUNK_ROWS + 5) * 2 - 1} 行数据列数 (2) 与数据类型数量 (3) 不匹配")
+
+        # 第一块之后取消，不再继续读取
+        write_rows(path, rows)
+        thread = PeriodicFileParserThread(path, [1, 1, 1])
+        thread.rows_ready.connect(thread.requestInterruption, Qt.DirectConnection)
+        events = run_parser(thread)
+        assert events[-1] == ("cancelled",) and len([e for e in events if e[0] == "rows"]) == 1
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def test_extend_table_mixed_formats():
+    """各块的列格式不同时拼接结果仍保留原字符串"""
+    blocks = [[["0x0001", "5"]], [["0x1", "-2"], ["abc", "0x10"]], [["0x00FF", "7"]]]
+    table = PeriodicTable([1, 0])
+    for block in blocks:
+        table.extend_table(PeriodicTable([1, 0], block))
+    assert [table.row_values(i) for i in range(len(table))] == [row for block in blocks for row in block]
+
+
+def create_view():
+    step = StepModel()
+    step.update_base_data({"step_type": 1, "name": "周期步骤", "time": 1.0})
+    view = StepDetailView(smodel=step)
+    view.refresh_fields(step)
+    table = view.field_widgets["data_region"].findChild(QTableWidget)
+    for _ in range(3):
+        view.add_union_row(table, 1, "0x0000")
+    return view, step
+
+
+def test_view_ignores_stale_parse():
+    """重新选择文件时不等待上一次解析，只采用最后一次的结果；切换步骤后不再填入"""
+    original_box = step_detail_view_module.QMessageBox
+    step_detail_view_module.QMessageBox = _MessageBox
+    tmp = tempfile.mkdtemp()
+    try:
+        first = os.path.join(tmp, "first.txt")
+        second = os.path.join(tmp, "second.txt")
+        write_rows(first, CHUNK_ROWS * 20)
+        write_rows(second, 7)
+        view, step = create_view()
+        view.load_periodic_data_from_file(first)
+        view.load_periodic_data_from_file(second)
+        wait_parsing(view)
+        data = step.get_expand_step_data()["periodic_file_data"]
+        assert isinstance(data, PeriodicTable) and len(data) == 7
+        assert step.get_expand_step_data()["periodic_file_path"] == second
+        assert _MessageBox.messages == [("information", "成功读取 7 行数据。保存时会根据周期展开为多个步骤。")]
+
+        other = StepModel()
+        other.update_base_data({"step_type": 1, "name": "另一步骤", "time": 1.0})
+        view.load_periodic_data_from_file(first)
+        view.refresh_fields(other)
+        wait_parsing(view)
+        assert "periodic_file_data" not in other.get_expand_step_data()
+        assert len(step.get_expand_step_data()["periodic_file_data"]) == 7
+        # 被取消的线程在下一块之前结束
+        for thread in view.findChildren(PeriodicFileParserThread):
+            assert thread.wait(10000)
+    finally:
+        step_detail_view_module.QMessageBox = original_box
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_parser_thread_chunks()
+    test_extend_table_mixed_formats()
+    test_view_ignores_stale_parse()
+    print("✅ 周期数据文件分块解析测试通过")
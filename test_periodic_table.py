@@ -0,0 +1,107 @@
+import copy
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from main_model import DataModel
+from models.periodic_table import PeriodicTable
+from testing_helpers import StrictMessageBoxStub, create_periodic_step, load_steps, save_model
+
+VALUES = [
+    ["0x0001", "7", "0xabcd", "1.5"],
+    ["0x1", "-3", "0xABCD", "x"],          # 位数不同、大小写不同的值保留原字符串
+    ["0x10000", "007", "0x1ffffffffffffffff", "2"],  # 超出64位、带前导0
+    ["0xFFFF", "0", "0x0000", ""],
+]
+
+
+def legacy_rows(data_types, value_rows):
+    return [[{"data_type": t, "value": v} for t, v in zip(data_types, values)] for values in value_rows]
+
+
+def test_table_matches_row_list():
+    table = PeriodicTable([1, 0, 2, 8], VALUES)
+    rows = legacy_rows([1, 0, 2, 8], VALUES)
+    assert [table.row_values(i) for i in range(len(VALUES))] == VALUES
+    assert table == rows and list(table) == rows
+    assert table[0] == rows[0] and table[-1] == rows[-1] and table[1:3] == rows[1:3]
+    assert not table.tokens_only  # 最后一行有空字符串
+    assert pickle.loads(pickle.dumps(table)) == rows
+    assert copy.deepcopy(table) is table
+    assert PeriodicTable.from_rows(rows) == rows
+    # 分批追加与一次构造结果一致，列数不符时报错
+    table = PeriodicTable([1, 0, 2, 8], VALUES[:1])
+    table.extend(VALUES[1:3])
+    table.extend(VALUES[3:])
+    assert table == rows and not table.tokens_only
+    assert PeriodicTable([1, 0, 2, 8], VALUES[:3]).tokens_only
+    try:
+        table.extend([["0x1"]])
+        assert False, "列数不符应报错"
+    except ValueError:
+        pass
+    assert PeriodicTable.from_rows([[{"data_type": 1, "value": "1"}], [{"data_type": 2, "value": "1"}]]) is None
+
+
+def test_table_memory():
+    """32列16进制数据，按列存放的内存比字典行列表小10倍以上"""
+    def value_rows():
+        return ([f"0x{(row * 31 + col) & 0xFFFF:04X}" for col in range(32)] for row in range(5000))
+
+    tracemalloc.start()
+    table = PeriodicTable([1] * 32, value_rows())
+    table_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    rows = legacy_rows([1] * 32, value_rows())
+    rows_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert table == rows
+    assert rows_size > table_size * 10, (rows_size, table_size)
+
+
+def test_table_save_and_load():
+    """按列存放的周期数据与行列表保存结果一致，读回后仍为PeriodicTable"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = StrictMessageBoxStub
+    tmp = tempfile.mkdtemp()
+    try:
+        outputs = []
+        for as_table in (False, True):
+            step = create_periodic_step(20)
+            step.expand_step_data["periodic_group_id"] = "periodic_table_test"
+            rows = step.expand_step_data["periodic_file_data"][:-1]
+            if as_table:
+                rows = PeriodicTable.from_rows(rows)
+            step.expand_step_data["periodic_file_data"] = rows
+            model = DataModel()
+            model.steps.append(step)
+            xml_path = os.path.join(tmp, f"table_{as_table}.xml")
+            controller = save_model(model, xml_path)
+            with open(xml_path, encoding="utf-8") as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1]
+
+        loaded = load_steps(controller, xml_path)[0]
+        data = loaded.get_expand_step_data()["periodic_file_data"]
+        assert isinstance(data, PeriodicTable)
+        assert data == rows
+        assert loaded.get_type_step_data()["data_region"] == rows[0]
+    finally:
+        file_controller_module.QMessageBox = original_box
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_table_matches_row_list()
+    test_table_memory()
+    test_table_save_and_load()
+    print("✅ 周期数据按列存储测试通过")
@@ -0,0 +1,112 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PyQt5.QtWidgets as QtWidgets
+from PyQt5.QtWidgets import QApplication
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from main_model import DataModel
+from models.step_model import StepModel
+from testing_helpers import GlobalControllerStub, MessageBoxStub
+from utils import row_source
+from utils.row_source import RowSource
+
+
+class _ConfigManager:
+    root = None
+
+    def get_protocol_config(self, key):
+        return {"output_path": os.path.join(_ConfigManager.root, key)}
+
+
+def write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_row_source_lines():
+    """跳过空行、行号与逐行读取一致，文件改动后重建索引"""
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "rows.txt")
+        empty = os.path.join(tmp, "empty.txt")
+        write_file(path, b"\n  a b \r\n\t\n\nc\n   \nd e")
+        write_file(empty, b"")
+        source = RowSource([path, empty, os.path.join(tmp, "missing.txt"), path])
+        assert list(source.numbered_lines()) == [(2, "a b"), (5, "c"), (7, "d e")] * 2
+        assert list(source.map(str.split)) == [["a", "b"], ["c"], ["d", "e"]] * 2
+        assert list(RowSource(path, lambda text: text if text != "c" else None)) == ["a b", "d e"]
+        assert RowSource(path) and not RowSource([empty])
+
+        offsets = row_source._LINE_INDEX_CACHE[os.path.abspath(path)][1]
+        list(RowSource(path))
+        assert row_source._LINE_INDEX_CACHE[os.path.abspath(path)][1] is offsets
+
+        write_file(path, b"x\ny y\n")
+        assert list(RowSource(path)) == ["x", "y y"]
+        try:
+            list(RowSource(os.path.join(tmp, "missing.txt"), skip_unreadable=False))
+            assert False, "文件不存在应报错"
+        except OSError:
+            pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def create_file_step(file_path, rows):
+    """数据区为空、数据来自文件的周期GLINK步骤"""
+    step = StepModel()
+    step.update_base_data({"step_type": 1, "name": "周期文件", "time": 1.0})
+    step.update_type_data(1, {"site_type": 0, "recip_site": "0x02", "sub_address": "0x01", "msg_len": 8,
+                           "period": 0.5, "protocol_type": -1, "data_region": "", "file_path": file_path})
+    with open(file_path, "w", encoding="utf-8") as f:
+        for row in range(rows):
+            f.write(" ".join(f"0x{(row * 8 + col) & 0xFFFF:04X}" for col in range(8)) + "\n\n")
+    return step
+
+
+def test_export_reads_every_file_row():
+    """导出时逐行读取数据文件，每行按周期生成一条记录"""
+    app = QApplication.instance() or QApplication([])  # 保持引用
+    original_box = QtWidgets.QMessageBox
+    original_config = file_controller_module.ConfigManager
+    QtWidgets.QMessageBox = MessageBoxStub  # export_glink_txts在函数内导入QMessageBox
+    file_controller_module.ConfigManager = _ConfigManager
+    tmp = tempfile.mkdtemp()
+    _ConfigManager.root = tmp
+    try:
+        model = DataModel()
+        model.steps.append(create_file_step(os.path.join(tmp, "data.txt"), 300))
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller.export_glink_txts()
+        # 导出在后台线程中进行，等待结束后处理结果提示
+        controller.wait_for_pending_export()
+        app.processEvents()
+
+        out_dir = os.path.join(tmp, "glink")
+        names = [name for name in os.listdir(out_dir) if name.endswith(".txt")]  # 另有导出清单
+        assert len(names) == 1, names
+        with open(os.path.join(out_dir, names[0]), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 300
+        assert [line.split("\t")[0] for line in lines[:3]] == ["1.000", "1.500", "2.000"]
+        # 帧计数（第5个字）按行递增
+        assert [line.split("\t")[5] for line in lines[-2:]] == ["0x012B", "0x012C"]
+        assert not MessageBoxStub.errors
+    finally:
+        QtWidgets.QMessageBox = original_box
+        file_controller_module.ConfigManager = original_config
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_row_source_lines()
+    test_export_reads_every_file_row()
+    print("✅ 数据文件按需读取测试通过")
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(ROOT)
+
+from models.step_model import load_config_json
+
+# 启动时不应导入的慢模块（只在批量CRC、flowdb、按类型导出时用到）
+DEFERRED_MODULES = ("numpy", "urllib.request", "concurrent.futures.process", "multiprocessing")
+
+STARTUP_SCRIPT = (
+    "import sys, json; import app_manager; "
+    f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+)
+
+
+def run_startup(pycache_prefix=None):
+    """在新进程中导入主程序模块，返回 (耗时秒, 已导入的慢模块)；pycache_prefix为字节码缓存目录"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    args = [sys.executable]
+    if pycache_prefix:
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        args += ["-X", f"pycache_prefix={pycache_prefix}"]
+    start = time.perf_counter()
+    result = subprocess.run(args + ["-c", STARTUP_SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_defers_heavy_imports():
+    _, loaded = run_startup()
+    assert loaded == []
+
+
+def test_config_json_parsed_once():
+    """文件未改动时返回同一解析结果，改动后重新解析"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conf.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": 1}, f)
+        first = load_config_json(path)
+        assert load_config_json(path) is first
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"a": 22}, f)
+        assert load_config_json(path) == {"a": 22}
+
+
+if __name__ == "__main__":
+    test_startup_defers_heavy_imports()
+    test_config_json_parsed_once()
+    # 冷启动：空的字节码缓存目录（需要编译所有模块）；热启动：复用同一目录
+    with tempfile.TemporaryDirectory() as prefix:
+        cold, _ = run_startup(prefix)
+        warm = min(run_startup(prefix)[0] for _ in range(3))
+    print(f"启动导入耗时: 冷启动 {cold:.3f}s, 热启动 {warm:.3f}s")
+    print("✅ 启动导入测试通过")
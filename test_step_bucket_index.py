@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main_model import DataModel
+from models.step_index import parse_int, parse_site_value
+
+
+class _Step:
+    """分桶用到的最小步骤"""
+
+    def __init__(self, step_type, type_data, is_ignore=0):
+        self.step_type = step_type
+        self.base_step_data = {"is_ignore": is_ignore}
+        self.type_step_data = type_data
+        self.version = 0
+
+    def get_step_type(self):
+        return self.step_type
+
+    def get_base_step_data(self):
+        return self.base_step_data
+
+    def get_type_step_data(self):
+        return self.type_step_data
+
+    def peek_value(self, section, field, default=None):
+        return self.type_step_data.get(field, default)
+
+
+def _random_type_data(rng):
+    return {
+        "protocol_type": rng.choice([-1, 0, 1, "2", "x"]),
+        "recip_site": rng.choice([0, 21, "0x15", "0×15", "21", "", None]),
+        "sub_address": rng.choice([1, "0x01", "1", "bad"]),
+        "msg_len": rng.choice([4, "4", 8, None]),
+    }
+
+
+def test_parse_site_value():
+    assert parse_site_value("0x15") == 21
+    assert parse_site_value("0×15") == 21
+    assert parse_site_value("×15") == 21
+    assert parse_site_value(" 21 ") == 21
+    assert parse_site_value("", 7) == 7
+    assert parse_site_value(None) == 0
+    assert parse_site_value("bad", -1) == -1
+
+
+def test_buckets_match_full_scan():
+    """增量维护的分桶与每次全量扫描的结果一致"""
+    rng = random.Random(5)
+    model = DataModel()
+    for _ in range(1500):
+        op = rng.randrange(6)
+        if op == 0 or not model.steps:
+            model.add_step(_Step(rng.randrange(5), _random_type_data(rng), rng.randrange(2)))
+        elif op == 1:
+            model.remove_step(rng.randrange(len(model.steps)))
+        elif op == 2:
+            model.move_step(rng.randrange(len(model.steps)), rng.randrange(len(model.steps)))
+        elif op == 3:
+            model.update_step(rng.randrange(len(model.steps)),
+                              _Step(rng.randrange(5), _random_type_data(rng)))
+        elif op == 4:
+            # 直接修改步骤数据
+            step = rng.choice(model.steps)
+            step.type_step_data = _random_type_data(rng)
+            step.base_step_data["is_ignore"] = rng.randrange(2)
+            step.version += 1
+        else:
+            # 绕过DataModel直接插入（如粘贴）
+            model.steps.insert(rng.randrange(len(model.steps) + 1), _Step(rng.randrange(5), _random_type_data(rng)))
+
+        buckets = model.step_buckets()
+        step_types = set(rng.sample(range(5), 2))
+        assert buckets.steps_of_types(step_types) == [s for s in model.steps if s.step_type in step_types]
+        assert buckets.steps_of_type(3) == [s for s in model.steps if s.step_type == 3]
+        assert buckets.ignored_steps() == [s for s in model.steps if s.base_step_data["is_ignore"] == 1]
+        if not model.steps:
+            continue
+        step = rng.choice(model.steps)
+        recip, sub_addr, msg_len = buckets.group_key(step)
+        assert recip == parse_site_value(step.type_step_data["recip_site"])
+        assert buckets.steps_of_group(recip, sub_addr, msg_len) == \
+            [s for s in model.steps if buckets.group_key(s) == (recip, sub_addr, msg_len)]
+        assert step in buckets.steps_of_protocol(step.step_type, parse_int(step.type_step_data["protocol_type"], -1))
+
+
+if __name__ == "__main__":
+    test_parse_site_value()
+    test_buckets_match_full_scan()
+    print("✅ 步骤分桶索引测试通过")
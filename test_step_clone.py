@@ -0,0 +1,113 @@
+import os
+import pickle
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from controllers.step_list_controller import StepListController
+from main_model import DataModel
+from models.step_model import StepModel, dumps_steps, loads_steps
+
+
+def create_periodic_step(rows=100):
+    step = StepModel()
+    step.update_base_data({"step_type": 1, "name": "周期步骤", "time": 2.0})
+    data_rows = [[{"data_type": "UINT16", "value": f"0x{i:04X}"}] for i in range(rows)]
+    step.get_expand_step_data()["periodic_file_data"] = data_rows
+    step.get_type_step_data()["data_region"] = data_rows[0]
+    step.set_protocol_data({"消息控制字": "0x0001"})
+    return step
+
+
+def test_clone_shares_periodic_rows():
+    """副本共用周期行数据，其余数据互不影响"""
+    step = create_periodic_step()
+    copy = step.clone()
+    rows = step.get_expand_step_data()["periodic_file_data"]
+    assert copy.get_expand_step_data()["periodic_file_data"] is rows
+    assert copy.get_type_step_data()["data_region"] is rows[0]
+    assert copy.get_expand_step_data() is not step.get_expand_step_data()
+
+    copy.get_protocol_data()["消息控制字"] = "0x0003"
+    copy.set_name("改名")
+    assert step.get_protocol_data()["消息控制字"] == "0x0001"
+    assert step.get_name() == "周期步骤"
+
+    # 修改副本的周期数据时整体替换，原步骤不变
+    copy.get_expand_step_data()["periodic_file_data"] = rows[:10]
+    assert len(step.get_expand_step_data()["periodic_file_data"]) == 100
+
+
+def test_duplicate_with_time_offset():
+    step = create_periodic_step(rows=3)
+    copies = step.duplicate(4, 0.5)
+    assert [s.get_value("time") for s in copies] == [2.5, 3.0, 3.5, 4.0]
+    assert [s.get_name() for s in copies] == [f"周期步骤 (副本{i})" for i in range(1, 5)]
+    assert all(s.get_expand_step_data()["periodic_file_data"] is
+               step.get_expand_step_data()["periodic_file_data"] for s in copies)
+    copies[0].get_protocol_data()["消息控制字"] = "0x0002"
+    assert copies[1].get_protocol_data()["消息控制字"] == "0x0001"
+
+
+def test_clipboard_payload():
+    """剪贴板数据可还原，且兼容旧版本直接pickle的步骤"""
+    step = create_periodic_step()
+    payload = dumps_steps([step])
+    assert len(payload) < len(pickle.dumps(step))
+    restored = loads_steps(payload)[0]
+    assert restored.get_expand_step_data() == step.get_expand_step_data()
+    assert restored.get_protocol_data() == step.get_protocol_data()
+    assert loads_steps(pickle.dumps(step))[0].get_name() == step.get_name()
+    try:
+        loads_steps(pickle.dumps({"name": "x"}))
+        assert False, "非步骤对象应报错"
+    except ValueError:
+        pass
+
+
+class _ListView:
+    def __init__(self, index):
+        self.index = index
+
+    def get_selected_index(self):
+        return self.index
+
+    def set_selected_index(self, index):
+        self.index = index
+
+
+class _Stub:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_copy_paste_and_duplicate_in_controller():
+    app = QApplication.instance() or QApplication([])  # 保持引用，访问剪贴板需要QApplication
+    model = DataModel()
+    model.add_step(create_periodic_step())
+    controller = StepListController(model, _ListView(0), _Stub(), _Stub(), None)
+    controller.update_step_list = lambda: None
+
+    assert controller.copy_step()
+    assert controller.paste_step()
+    assert len(model.steps) == 2 and model.is_dirty()
+    pasted = model.steps[1]
+    assert pasted.get_name() == "周期步骤 (副本)"
+    assert pasted.get_expand_step_data()["periodic_file_data"] is \
+        model.steps[0].get_expand_step_data()["periodic_file_data"]
+
+    controller.step_list_view.index = 0
+    assert controller.duplicate_step(3, 1.0)
+    assert [s.get_value("time") for s in model.steps] == [2.0, 3.0, 4.0, 5.0, 2.0]
+
+
+if __name__ == "__main__":
+    test_clone_shares_periodic_rows()
+    test_duplicate_with_time_offset()
+    test_clipboard_payload()
+    test_copy_paste_and_duplicate_in_controller()
+    print("✅ 步骤复制测试通过")
@@ -0,0 +1,61 @@
+import copy
+import os
+import pickle
+import sys
+import weakref
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.step_model import (
+    BASIC_TYPE_FIELDS, StepModel, get_step_type_field_list, init_default_dict,
+)
+
+
+def test_new_steps_share_defaults_until_written():
+    """新建步骤共用默认数据，修改后互不影响，取值与逐字段初始化一致"""
+    first, second = StepModel(), StepModel()
+    assert not hasattr(first, "__dict__")
+    assert weakref.ref(first)() is first
+
+    base_defaults, type_defaults = {}, {}
+    init_default_dict(base_defaults, BASIC_TYPE_FIELDS)
+    init_default_dict(type_defaults, get_step_type_field_list(n=0))
+    assert first.get_base_step_data() == base_defaults
+    assert first.get_type_step_data() == type_defaults
+    assert first.get_expand_step_data() == {} and first.get_protocol_data() == {}
+    assert first._placeholder_state is second._placeholder_state
+
+    first.update_type_data(0, {"local_site": "0x11", "recip_site": "0x22"})
+    first.get_type_step_data()["protocol_type"] = 1
+    first.add_extension("key", "value")
+    assert first.get_raw_input_string("local_site") == "0x11"
+    assert first.get_display_value("local_site", "") == "0x11"
+    assert second.get_raw_input_string("local_site") is None
+    assert second.get_display_value("local_site", "") == ""
+    assert second.get_type_step_data() == type_defaults
+    assert second.get_expand_step_data() == {}
+
+    second.update_base_data({"step_type": 1, "name": "周期", "time": 1.0})
+    assert second.get_step_type() == 1 and second.get_type_step_data() == {}
+
+
+def test_copy_and_pickle_keep_data():
+    """复制与pickle（剪贴板）后数据一致"""
+    step = StepModel()
+    step.update_base_data({"step_type": 0, "name": "步骤", "time": 2.0})
+    step.update_type_data(0, {"local_site": "0x11"})
+    step.set_protocol_data({"消息控制字": "0x0003"})
+    for copied in (copy.copy(step), copy.deepcopy(step), pickle.loads(pickle.dumps(step))):
+        assert copied.version == step.version
+        assert copied.get_base_step_data() == step.get_base_step_data()
+        assert copied.get_type_step_data() == step.get_type_step_data()
+        assert copied.get_protocol_data() == step.get_protocol_data()
+        assert copied.get_display_value("local_site", "") == "0x11"
+        assert copied.get_display_value("time", 0) == 2.0
+
+
+if __name__ == "__main__":
+    test_new_steps_share_defaults_until_written()
+    test_copy_and_pickle_keep_data()
+    print("✅ StepModel紧凑存储测试通过")
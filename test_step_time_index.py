@@ -0,0 +1,81 @@
+import os
+import random
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main_model import DataModel
+
+
+class _Step:
+    """只带时间和version的最小步骤"""
+
+    def __init__(self, time):
+        self.base_step_data = {"time": time}
+        self.version = 0
+
+    def set_time(self, time):
+        self.base_step_data["time"] = time
+        self.version += 1
+
+
+def reference_sort(steps):
+    """旧的sort_steps_by_time"""
+    return sorted(steps, key=lambda step: step.base_step_data.get("time", 0))
+
+
+def test_index_matches_full_sort():
+    """增量维护的时间索引与每次全量稳定排序的结果一致"""
+    rng = random.Random(7)
+    model = DataModel()
+    expected = []
+    for _ in range(2000):
+        op = rng.randrange(7)
+        if op == 0 or not model.steps:
+            step = _Step(float(rng.randrange(20)))
+            model.add_step(step)
+            expected.append(step)
+        elif op == 1:
+            index = rng.randrange(len(model.steps))
+            model.remove_step(index)
+            del expected[index]
+        elif op == 2:
+            index = rng.randrange(len(model.steps))
+            step = _Step(float(rng.randrange(20)))
+            model.update_step(index, step)
+            expected[index] = step
+        elif op == 3:
+            from_index, to_index = rng.randrange(len(model.steps)), rng.randrange(len(model.steps))
+            model.move_step(from_index, to_index)
+            expected.insert(to_index, expected.pop(from_index))
+        elif op == 4:
+            # 直接修改步骤时间（如详情页保存）
+            rng.choice(model.steps).set_time(float(rng.randrange(20)))
+        elif op == 5:
+            # 绕过DataModel直接插入（如粘贴）
+            step = _Step(float(rng.randrange(20)))
+            index = rng.randrange(len(model.steps) + 1)
+            model.steps.insert(index, step)
+            expected.insert(index, step)
+        if rng.random() < 0.5:
+            sorted_steps = reference_sort(expected)
+            assert model.sort_steps_by_time() == (sorted_steps != expected)
+            expected = sorted_steps
+            assert model.steps == expected
+
+    model.sort_steps_by_time()
+    times = [step.base_step_data["time"] for step in model.steps]
+    assert model.steps_between(5.0, 7.0) == [s for s, t in zip(model.steps, times) if 5.0 <= t <= 7.0]
+    after = [s for s, t in zip(model.steps, times) if t > 7.5]
+    assert model.next_step_after(7.5) is (after[0] if after else None)
+    assert model.next_step_after(1000.0) is None
+
+    model.steps = [_Step(3.0), _Step(1.0)]
+    assert model.sort_steps_by_time()
+    assert [step.base_step_data["time"] for step in model.steps] == [1.0, 3.0]
+
+
+if __name__ == "__main__":
+    test_index_matches_full_sort()
+    print("✅ 时间索引测试通过")
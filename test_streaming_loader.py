@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from utils.flow_db import LoadCancelled, read_xml_document
+from testing_helpers import MessageBoxStub, GlobalControllerStub, create_model
+
+
+def _save_model(xml_path, num_rows):
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    try:
+        model = create_model(num_rows=num_rows)
+        FileController(model, None, GlobalControllerStub(), None, None, None).save_to_file(xml_path)
+    finally:
+        file_controller_module.QMessageBox = original_box
+
+
+def test_large_file_is_loaded():
+    """超过10MB的配置文件不再被跳过"""
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<config>\n<global_params>')
+            f.write("<note>" + "x" * (11 * 1024 * 1024) + "</note>")
+            f.write("</global_params>\n<steps>\n")
+            for idx in range(3):
+                f.write(f"<step><base><step_type>0</step_type><time>{idx}.0</time></base></step>\n")
+            f.write("</steps>\n</config>")
+        assert os.path.getsize(xml_path) > 10 * 1024 * 1024
+
+        steps = FileController(None, None, None, None, None, None).read_steps_from_xml(xml_path)
+        assert [step.get_base_step_data()["time"] for step in steps] == [0.0, 1.0, 2.0]
+    finally:
+        os.remove(xml_path)
+
+
+def test_streaming_progress_and_cancel():
+    """流式加载上报进度，取消时抛出LoadCancelled"""
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        _save_model(xml_path, num_rows=5)
+        with open(xml_path, "a", encoding="utf-8") as f:
+            f.write("\n")
+        controller = FileController(None, None, None, None, None, None)
+
+        progress = []
+        document, steps = controller.load_steps(xml_path, progress=lambda done, total: progress.append((done, total)))
+        assert len(steps) == 2 and document["steps"] == []
+        assert progress[-1] == (os.path.getsize(xml_path),) * 2
+        assert len(steps[1].get_expand_step_data()["periodic_file_data"]) == 5
+
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write("<config><steps>")
+            f.write("<step><base><step_type>0</step_type></base></step>" * 1000)
+            f.write("</steps></config>")
+        loaded = []
+        try:
+            read_xml_document(xml_path, loaded.append, cancelled=lambda: len(loaded) >= 300)
+        except LoadCancelled:
+            pass
+        else:
+            raise AssertionError("取消后应抛出LoadCancelled")
+        assert 300 <= len(loaded) < 1000
+    finally:
+        os.remove(xml_path)
+
+
+def test_steps_outside_steps_element():
+    """没有config/steps结构时读取任意层级的<step>"""
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        with open(xml_path, "w", encoding="utf-8") as f:
+            f.write("<workflow><group><step><base><step_type>0</step_type><time>3.0</time></base></step></group>"
+                    "<step><base><step_type>0</step_type><time>4.0</time></base></step></workflow>")
+        steps = FileController(None, None, None, None, None, None).read_steps_from_xml(xml_path)
+        assert [step.get_base_step_data()["time"] for step in steps] == [3.0, 4.0]
+    finally:
+        os.remove(xml_path)
+
+
+if __name__ == "__main__":
+    test_large_file_is_loaded()
+    test_streaming_progress_and_cancel()
+    test_steps_outside_steps_element()
+    print("✅ 流式加载测试通过")
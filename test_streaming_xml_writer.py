@@ -0,0 +1,92 @@
+import os
+import sys
+import io
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.xml_writer import XmlStreamWriter, parsed_text
+import controllers.file_controller as file_controller_module
+from controllers.file_controller import FileController
+from testing_helpers import GlobalControllerStub, MessageBoxStub, create_model
+
+
+def legacy_pretty_xml(root):
+    """旧的保存流程：ET.tostring + minidom美化 + 去空行"""
+    rough_string = ET.tostring(root, encoding="utf-8", method="xml")
+    pretty_xml = minidom.parseString(rough_string).toprettyxml(indent="  ", encoding="utf-8")
+    return b'\n'.join(line for line in pretty_xml.splitlines() if line.strip()).decode("utf-8")
+
+
+def stream_element(writer, elem):
+    if len(elem):
+        writer.start(elem.tag, dict(elem.attrib))
+        for child in elem:
+            stream_element(writer, child)
+        writer.end()
+    else:
+        writer.element(elem.tag, elem.text, dict(elem.attrib))
+
+
+def test_writer_matches_minidom_layout():
+    """流式写出结果与minidom美化结果逐字节一致"""
+    root = ET.Element("config", {"path": 'C:\\a&b\\"c"<d>', "empty": ""})
+    ET.SubElement(root, "empty_section")
+    section = ET.SubElement(root, "section")
+    for idx, text in enumerate([
+        "plain", "", "  ", "a & b < c > d \"e\" 'f'", "中文 字段",
+        "line1\nline2", "l1\n\n   \nl2\r\nl3\rl4", "\n", "tail\n", "\t",
+        # 旧流程按字节分行：\x85、\u2028、\u2029不分行，只含非ASCII空白的行不丢弃
+        "a\u2028b\u2029c\x85d", "l1\n\u2028\nl2\n\u3000\nl3", "\x85",
+    ]):
+        ET.SubElement(section, f"field{idx}").text = text
+    ET.SubElement(root, "attr_lines", {"value": "x\u2028y\x85z"})
+    nested = ET.SubElement(ET.SubElement(root, "outer", {"name": "x"}), "inner")
+    ET.SubElement(nested, "leaf", {"flag": "true"}).text = "1"
+
+    buf = io.StringIO()
+    writer = XmlStreamWriter(buf)
+    writer.write_declaration()
+    stream_element(writer, root)
+    assert buf.getvalue() == legacy_pretty_xml(root)
+
+    # XML中不能出现的\v、\f等控制字符同样不分行，只由它们组成的行按ASCII空白丢弃
+    text = "a\x0bb\x0cc\x1cd\x1de\x1ef\n\x0b\x0c\ng"
+    legacy = b"\n".join(line for line in text.encode("utf-8").splitlines() if line.strip()).decode("utf-8")
+    assert parsed_text(text) == legacy == "a\x0bb\x0cc\x1cd\x1de\x1ef\ng"
+
+
+def test_save_to_file_streams_legacy_layout():
+    """save_to_file输出可被解析，且与旧的minidom美化布局一致"""
+    original_box = file_controller_module.QMessageBox
+    file_controller_module.QMessageBox = MessageBoxStub
+    fd, xml_path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        model = create_model(num_rows=20)
+        controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+        controller.save_to_file(xml_path)
+        assert not MessageBoxStub.errors
+
+        with open(xml_path, encoding="utf-8") as f:
+            content = f.read()
+        root = ET.fromstring(content.encode("utf-8"))
+        assert len(root.findall("./steps/step")) == 1
+        rows = root.findall("./steps/periodic_group/rows/row")
+        assert len(rows) == 20
+        times = [float(row.get("time")) for row in rows]
+        assert times == [2.0 + idx * 0.5 for idx in range(20)]
+        assert root.find("./steps/periodic_group/protocol").get("帧计数") == "true"
+        assert content == legacy_pretty_xml(root)
+    finally:
+        file_controller_module.QMessageBox = original_box
+        os.remove(xml_path)
+
+
+if __name__ == "__main__":
+    test_writer_matches_minidom_layout()
+    test_save_to_file_streams_legacy_layout()
+    print("✅ 流式XML写出测试通过")
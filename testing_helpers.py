@@ -0,0 +1,106 @@
+"""测试共用的替身对象和测试数据：代替QMessageBox、全局配置控制器，构造测试用的流程模型"""
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from controllers.file_controller import FileController
+from main_model import DataModel
+from models.step_model import StepModel
+
+
+class MessageBoxStub:
+    """代替QMessageBox：提示框忽略，错误提示记入errors"""
+    errors = []
+
+    @staticmethod
+    def information(*args):
+        pass
+
+    @staticmethod
+    def critical(*args):
+        MessageBoxStub.errors.append(args[-1])
+
+
+class StrictMessageBoxStub:
+    """代替QMessageBox：出现错误提示时抛出AssertionError"""
+
+    @staticmethod
+    def information(*args):
+        pass
+
+    @staticmethod
+    def critical(*args):
+        raise AssertionError(args[-1])
+
+
+class _GlobalView:
+    def get_current_protocol_key(self):
+        return "glink"
+
+
+class GlobalControllerStub:
+    """代替GlobalController：当前协议为glink，不从界面同步全局参数"""
+    global_view = _GlobalView()
+
+    def update_global_model(self):
+        pass
+
+
+def create_model(num_rows=20):
+    """一个普通步骤加一个带num_rows行文件数据的周期GLINK步骤"""
+    model = DataModel()
+    model.global_params.update({"name": "测试 & <流程>", "empty": ""})
+
+    step = StepModel()
+    step.update_base_data({"step_type": 0, "time": 1.0, "name": "普通步骤"})
+    step.update_type_data(0, {"local_site": "0x11", "recip_site": "0x22", "protocol_type": 0,
+                              "data_region": [{"data_type": 1, "value": "0x1234"}]})
+    step.set_protocol_data({"消息控制字": "0x0003", "数据区": "0x1234", "帧计数": None})
+    model.steps.append(step)
+
+    periodic = StepModel()
+    periodic.update_base_data({"step_type": 1, "time": 2.0, "name": "周期步骤"})
+    periodic.update_type_data(1, {"local_site": "0x01", "recip_site": "0x02",
+                                  "period": 0.5, "protocol_type": 0})
+    periodic.expand_step_data["periodic_file_data"] = [
+        [{"data_type": 1, "value": str(row)}] for row in range(num_rows)
+    ]
+    periodic.set_protocol_data({"消息控制字": "0x0003", "子地址": "0x10", "数据区": "0x0102"})
+    model.steps.append(periodic)
+    return model
+
+
+def create_periodic_step(num_rows):
+    """带num_rows行文件数据的周期GLINK步骤，最后一行的数据类型与其余行不同"""
+    step = StepModel()
+    step.update_base_data({"step_type": 1, "time": 1.0, "name": "周期步骤"})
+    step.update_type_data(1, {"local_site": "0x01", "recip_site": "0x02", "period": 0.25,
+                              "protocol_type": 0, "file_path": "periodic.txt"})
+    rows = [[{"data_type": 1, "value": f"0x{row:04X}"}, {"data_type": 0, "value": "7"}]
+            for row in range(num_rows)]
+    # 数据类型不一致的行以JSON形式保存
+    rows[-1] = [{"data_type": 2, "value": "0x12345678"}]
+    step.expand_step_data["periodic_file_data"] = rows
+    step.set_protocol_data({"消息控制字": "0x0003", "子地址": "0x10", "数据区": "0x0102"})
+    return step
+
+
+def save_model(model, xml_path):
+    controller = FileController(model, None, GlobalControllerStub(), None, None, None)
+    controller.save_to_file(xml_path)
+    return controller
+
+
+def load_steps(controller, xml_path):
+    """按open_config的方式解析步骤"""
+    root = ET.parse(xml_path).getroot()
+    steps = []
+    for elem in root.find("steps"):
+        if elem.tag == "step":
+            steps.append(controller._step_from_element(elem))
+        elif elem.tag == "periodic_group":
+            steps.append(controller._merged_periodic_step(controller._read_periodic_group(elem)))
+    return controller._merge_periodic_steps(steps)
@@ -0,0 +1,523 @@
+"""流程配置的SQLite二进制格式（.flowdb）。
+
+XML配置在步骤数很多时，解析和写出文本占了打开/保存的大部分时间。这里把同一份
+文档结构按列存入单个SQLite文件：
+
+  - meta            格式版本、根节点属性
+  - path_settings   各协议的路径设置
+  - global_params   全局参数
+  - field_keys      各区段出现过的字段名组合
+  - steps           每个步骤一行，base/type/expand/protocol 各占一列（只存字段值），
+                    另有 time/step_type/name 列便于按范围查询
+  - periodic_rows   周期分组的各行数据（time, crc, format, text）
+
+文档在内存中的表示与XML一一对应，XML <-> flowdb 互转无损：
+
+  document = {
+      "root_attrs": {属性名: 值},
+      "path_settings": None 或 [(协议名, [(tag, text)])],
+      "global_fields": None 或 [(tag, text)],
+      "steps": [entry],
+  }
+  entry = {"kind": "step", "sections": [(tag, attrs, [(tag, text)])]}
+       或 {"kind": "periodic_group", "attrs": {...}, "sections": [...],
+           "columns": 列定义文本或None, "rows": [(time, crc, format, text)]}
+"""
+import io
+import json
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+from itertools import islice
+
+from utils.xml_writer import XmlStreamWriter, parsed_attr, parsed_text
+
+FLOW_DB_EXTENSION = ".flowdb"
+FLOW_DB_FORMAT_VERSION = 1
+SECTION_TAGS = ("base", "type", "expand", "protocol")
+
+_SQLITE_HEADER = b"SQLite format 3\x00"
+# 写入steps表时每批的步骤数
+_INSERT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE path_settings (seq INTEGER PRIMARY KEY, proto TEXT, fields TEXT);
+CREATE TABLE global_params (seq INTEGER PRIMARY KEY, tag TEXT, text TEXT);
+CREATE TABLE field_keys (id INTEGER PRIMARY KEY, tags TEXT);
+CREATE TABLE steps (
+    idx INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    attrs TEXT,
+    time REAL,
+    step_type INTEGER,
+    name TEXT,
+    base_keys INTEGER,
+    base TEXT,
+    type_keys INTEGER,
+    type TEXT,
+    expand_keys INTEGER,
+    expand TEXT,
+    protocol_keys INTEGER,
+    protocol TEXT,
+    protocol_attrs TEXT,
+    columns TEXT,
+    row_count INTEGER
+);
+CREATE TABLE periodic_rows (
+    step_idx INTEGER,
+    row_idx INTEGER,
+    time TEXT,
+    crc TEXT,
+    format TEXT,
+    text TEXT,
+    PRIMARY KEY (step_idx, row_idx)
+) WITHOUT ROWID;
+"""
+
+
+def is_flow_db_path(file_path):
+    """按扩展名判断是否保存为flowdb格式"""
+    return str(file_path).lower().endswith(FLOW_DB_EXTENSION)
+
+
+def is_flow_db(file_path):
+    """按文件头判断是否为flowdb文件（不存在时按扩展名判断）"""
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    except OSError:
+        return is_flow_db_path(file_path)
+
+
+def _dumps(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _loads(text):
+    return None if text is None else json.loads(text)
+
+
+# ---------------------------------------------------------------- XML <-> 文档
+
+def element_to_entry(elem):
+    """将<step>或<periodic_group>元素转为文档中的步骤条目"""
+    sections = [
+        (child.tag, dict(child.attrib) or None, [(field.tag, field.text) for field in child])
+        for child in elem if child.tag in SECTION_TAGS
+    ]
+    if elem.tag != "periodic_group":
+        return {"kind": "step", "sections": sections}
+    columns_elem = elem.find("columns")
+    rows_elem = elem.find("rows")
+    rows = []
+    if rows_elem is not None:
+        rows = [
+            (row.get("time"), row.get("crc"), row.get("format"), row.text or "")
+            for row in rows_elem.findall("row")
+        ]
+    return {
+        "kind": "periodic_group",
+        "attrs": dict(elem.attrib),
+        "sections": sections,
+        "columns": None if columns_elem is None else (columns_elem.text or ""),
+        "rows": rows,
+    }
+
+
+class LoadCancelled(Exception):
+    """加载被用户取消"""
+
+
+# 流式解析时每处理多少个步骤上报一次进度
+_PROGRESS_INTERVAL = 200
+
+
+def read_xml_document(source, on_entry=None, progress=None, cancelled=None):
+    """流式解析XML配置（文件路径或二进制文件对象）为文档
+
+    基于ET.iterparse，每个<step>/<periodic_group>读完即转为条目并从树中移除，
+    内存占用与步骤数无关。on_entry不为None时条目交给on_entry(entry)处理，
+    文档中不保留steps。progress(已读字节, 总字节)定期调用；
+    cancelled()返回True时抛出LoadCancelled。
+
+    标准结构为 config/steps/step；没有这种结构时，取任意层级的<step>（不含嵌套在<step>中的）。
+    """
+    own_file = isinstance(source, (str, bytes, os.PathLike))
+    f = open(source, "rb") if own_file else source
+    try:
+        try:
+            total = os.fstat(f.fileno()).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            total = None
+        steps = []
+        fallback_entries = []
+        found_entries = False
+        path_settings = None
+        global_fields = None
+        root = None
+        stack = []
+        count = 0
+
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                stack.append(elem)
+                continue
+            stack.pop()
+            parent = stack[-1] if stack else None
+            if parent is None:
+                break
+            tag = elem.tag
+            if tag in ("step", "periodic_group") and parent.tag == "steps" and len(stack) == 2:
+                found_entries = True
+                entry = element_to_entry(elem)
+                if on_entry is None:
+                    steps.append(entry)
+                else:
+                    on_entry(entry)
+            elif tag == "step" and not any(ancestor.tag == "step" for ancestor in stack):
+                fallback_entries.append(element_to_entry(elem))
+            elif len(stack) == 1:
+                # 根节点的直接子节点：路径设置、全局参数读出后即释放
+                if tag == "path_settings":
+                    path_settings = [
+                        (proto_elem.get("name"), [(child.tag, child.text) for child in proto_elem])
+                        for proto_elem in elem.findall("protocol")
+                    ]
+                elif tag == "global_params":
+                    global_fields = [(child.tag, child.text) for child in elem]
+            else:
+                continue
+            parent.remove(elem)
+
+            count += 1
+            if count % _PROGRESS_INTERVAL == 0:
+                if cancelled is not None and cancelled():
+                    raise LoadCancelled()
+                if progress is not None:
+                    progress(f.tell(), total)
+
+        if not found_entries:
+            for entry in fallback_entries:
+                if on_entry is None:
+                    steps.append(entry)
+                else:
+                    on_entry(entry)
+        if progress is not None:
+            progress(total, total)
+        return {
+            "root_attrs": dict(root.attrib) if root is not None else {},
+            "path_settings": path_settings,
+            "global_fields": global_fields,
+            "steps": steps,
+        }
+    finally:
+        if own_file:
+            f.close()
+
+
+def write_step_entry(writer, entry):
+    """用XmlStreamWriter写出一个步骤条目"""
+    if entry["kind"] != "periodic_group":
+        writer.start("step")
+        for tag, attrs, fields in entry["sections"]:
+            writer.section(tag, fields, attrs)
+        writer.end()
+        return
+
+    writer.start("periodic_group", entry["attrs"])
+    for tag, attrs, fields in entry["sections"]:
+        writer.section(tag, fields, attrs)
+    if entry["columns"] is not None:
+        writer.element("columns", entry["columns"])
+    writer.start("rows")
+    for time_text, crc_text, row_format, text in entry["rows"]:
+        row_attrs = {}
+        if time_text is not None:
+            row_attrs["time"] = time_text
+        if crc_text is not None:
+            row_attrs["crc"] = crc_text
+        if row_format is not None:
+            row_attrs["format"] = row_format
+        writer.element("row", text, row_attrs)
+    writer.end()
+    writer.end()
+
+
+def write_xml_document(fp, document):
+    """将文档写为XML，格式与保存配置时一致"""
+    writer = XmlStreamWriter(fp)
+    writer.write_declaration()
+    writer.start("config", document["root_attrs"])
+    if document["path_settings"] is not None:
+        writer.start("path_settings")
+        for proto, fields in document["path_settings"]:
+            writer.section("protocol", fields, {"name": proto})
+        writer.end()
+    if document["global_fields"] is not None:
+        writer.section("global_params", document["global_fields"])
+    writer.start("steps")
+    for entry in document["steps"]:
+        write_step_entry(writer, entry)
+    writer.end()
+    writer.end()
+
+
+def xml_roundtrip_entry(entry):
+    """返回条目写为XML再读回后的结果（与element_to_entry一致），不实际写出和解析"""
+    sections = [
+        (tag, {k: parsed_attr(v) for k, v in attrs.items()} if attrs else None,
+         [(key, parsed_text(text)) for key, text in fields])
+        for tag, attrs, fields in entry["sections"]
+    ]
+    if entry["kind"] != "periodic_group":
+        return {"kind": "step", "sections": sections}
+    columns = entry["columns"]
+    return {
+        "kind": "periodic_group",
+        "attrs": {k: parsed_attr(v) for k, v in entry["attrs"].items()},
+        "sections": sections,
+        "columns": None if columns is None else (parsed_text(columns) or ""),
+        "rows": [
+            tuple(None if value is None else parsed_attr(value) for value in (time_text, crc_text, row_format))
+            + (parsed_text(text) or "",)
+            for time_text, crc_text, row_format, text in entry["rows"]
+        ],
+    }
+
+
+# ---------------------------------------------------------------- flowdb 读写
+
+# 区段字段按列存储：同一组字段名只在field_keys表中保存一次，各步骤只保存字段值，
+# 值之间以\x00分隔，None记为\x01（这两个字符不可能出现在XML文本中）。
+# 含有这两个字符的区段退回JSON存储（对应的 *_keys 列为NULL）。
+_FIELD_SEP = "\x00"
+_NONE_TEXT = "\x01"
+
+
+def _encode_fields(fields, key_ids):
+    """编码区段字段，返回 (字段名组ID或None, 文本)"""
+    tags = tuple(tag for tag, text in fields)
+    texts = [_NONE_TEXT if text is None else text for tag, text in fields]
+    for text in texts:
+        if not isinstance(text, str) or _FIELD_SEP in text or (_NONE_TEXT in text and text != _NONE_TEXT):
+            return None, json.dumps([list(item) for item in fields], ensure_ascii=False)
+    key_id = key_ids.get(tags)
+    if key_id is None:
+        key_id = key_ids[tags] = len(key_ids)
+    return key_id, _FIELD_SEP.join(texts)
+
+
+def _decode_fields(key_id, text, key_sets):
+    if key_id is None:
+        return [tuple(item) for item in json.loads(text)]
+    tags = key_sets[key_id]
+    if not tags:
+        return []
+    values = text.split(_FIELD_SEP)
+    if _NONE_TEXT in text:
+        values = [None if value == _NONE_TEXT else value for value in values]
+    return list(zip(tags, values))
+
+
+def _entry_summary(entry):
+    """取步骤base区段中的time/step_type/name，用于查询列"""
+    base = next((fields for tag, attrs, fields in entry["sections"] if tag == "base"), None) or []
+    values = dict(base)
+    summary = []
+    for key, convert in (("time", float), ("step_type", int)):
+        try:
+            summary.append(convert(values.get(key)))
+        except (TypeError, ValueError):
+            summary.append(None)
+    summary.append(values.get("name"))
+    return summary
+
+
+def _step_rows(indexed_steps, key_ids, group_rows, cancel_state, cancelled):
+    """由 (idx, entry) 生成steps表的各行，周期分组的行数据收集到group_rows"""
+    for idx, entry in indexed_steps:
+        if cancelled is not None and cancelled():
+            cancel_state.append(True)
+            return
+        sections = {tag: (attrs, fields) for tag, attrs, fields in entry["sections"]}
+        values = [idx, entry["kind"], _dumps(entry.get("attrs"))] + _entry_summary(entry)
+        for tag in SECTION_TAGS:
+            if tag in sections:
+                values.extend(_encode_fields(sections[tag][1], key_ids))
+            else:
+                values.extend((None, None))
+        rows = entry.get("rows")
+        values += [_dumps(sections.get("protocol", (None, None))[0]), entry.get("columns"),
+                   None if rows is None else len(rows)]
+        if rows:
+            group_rows.extend((idx, row_idx) + tuple(row) for row_idx, row in enumerate(rows))
+        yield values
+
+
+def write_flow_db(db_path, document, cancelled=None):
+    """将文档写入新的flowdb文件（db_path须不存在或为空文件）
+
+    steps可以是生成器；cancelled()返回True时中止并返回False。
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("format_version", str(FLOW_DB_FORMAT_VERSION)),
+            ("root_attrs", _dumps(document["root_attrs"])),
+            ("has_path_settings", "1" if document["path_settings"] is not None else "0"),
+            ("has_global_params", "1" if document["global_fields"] is not None else "0"),
+        ])
+        conn.executemany(
+            "INSERT INTO path_settings (proto, fields) VALUES (?, ?)",
+            [(proto, _dumps(fields)) for proto, fields in document["path_settings"] or []]
+        )
+        conn.executemany(
+            "INSERT INTO global_params (tag, text) VALUES (?, ?)",
+            document["global_fields"] or []
+        )
+
+        key_ids = {}
+        group_rows = []
+        cancel_state = []
+        insert_step = f"INSERT INTO steps VALUES ({', '.join('?' * 17)})"
+        steps = enumerate(document["steps"])
+        while True:
+            # 分批写入，周期分组的行数据随批次一起写出，避免全部积压在内存中
+            batch = list(_step_rows(islice(steps, _INSERT_BATCH_SIZE), key_ids, group_rows,
+                                    cancel_state, cancelled))
+            if cancel_state:
+                return False
+            if not batch:
+                break
+            conn.executemany(insert_step, batch)
+            conn.executemany("INSERT INTO periodic_rows VALUES (?, ?, ?, ?, ?, ?)", group_rows)
+            group_rows.clear()
+        conn.executemany(
+            "INSERT INTO field_keys VALUES (?, ?)",
+            [(key_id, _dumps(list(tags))) for tags, key_id in key_ids.items()]
+        )
+        conn.execute("CREATE INDEX steps_time ON steps (time)")
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+def _row_to_entry(conn, row, key_sets, protocol_attrs_cache):
+    idx, kind, attrs = row[:3]
+    sections = []
+    for pos, tag in enumerate(SECTION_TAGS):
+        key_id, text = row[3 + pos * 2], row[4 + pos * 2]
+        if text is not None:
+            attrs_value = None
+            if tag == "protocol" and row[11] is not None:
+                # 各步骤的protocol属性基本相同，解析结果按文本缓存
+                if row[11] not in protocol_attrs_cache:
+                    protocol_attrs_cache[row[11]] = json.loads(row[11])
+                attrs_value = protocol_attrs_cache[row[11]]
+            sections.append((tag, attrs_value, _decode_fields(key_id, text, key_sets)))
+    if kind != "periodic_group":
+        return {"kind": kind, "sections": sections}
+    rows = conn.execute(
+        "SELECT time, crc, format, text FROM periodic_rows WHERE step_idx = ? ORDER BY row_idx",
+        (idx,)
+    ).fetchall()
+    return {
+        "kind": kind,
+        "attrs": _loads(attrs) or {},
+        "sections": sections,
+        "columns": row[12],
+        "rows": rows,
+    }
+
+
+def read_flow_db(db_path, start=0, count=None):
+    """读取flowdb文件为文档；start/count指定只读取部分步骤（按保存顺序）"""
+    # 以只读方式打开，避免在不存在的路径上创建空数据库
+    conn = sqlite3.connect(f"file:{_uri_path(db_path)}?mode=ro", uri=True)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        version = int(meta.get("format_version", 0))
+        if version > FLOW_DB_FORMAT_VERSION:
+            raise ValueError(f"不支持的flowdb格式版本: {version}")
+        path_settings = None
+        if meta.get("has_path_settings") == "1":
+            path_settings = [
+                (proto, [tuple(item) for item in json.loads(fields)])
+                for proto, fields in conn.execute("SELECT proto, fields FROM path_settings ORDER BY seq")
+            ]
+        global_fields = None
+        if meta.get("has_global_params") == "1":
+            global_fields = conn.execute("SELECT tag, text FROM global_params ORDER BY seq").fetchall()
+        key_sets = {
+            key_id: tuple(json.loads(tags))
+            for key_id, tags in conn.execute("SELECT id, tags FROM field_keys")
+        }
+        cursor = conn.execute(
+            "SELECT idx, kind, attrs, base_keys, base, type_keys, type, expand_keys, expand, "
+            "protocol_keys, protocol, protocol_attrs, columns "
+            "FROM steps WHERE idx >= ? ORDER BY idx LIMIT ?",
+            (start, -1 if count is None else count)
+        )
+        protocol_attrs_cache = {}
+        steps = [_row_to_entry(conn, row, key_sets, protocol_attrs_cache) for row in cursor.fetchall()]
+        return {
+            "root_attrs": _loads(meta.get("root_attrs")) or {},
+            "path_settings": path_settings,
+            "global_fields": global_fields,
+            "steps": steps,
+        }
+    finally:
+        conn.close()
+
+
+def flow_db_step_count(db_path):
+    """flowdb文件中保存的步骤数"""
+    conn = sqlite3.connect(f"file:{_uri_path(db_path)}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM steps").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _uri_path(file_path):
+    # urllib.request导入较慢，用到时再导入
+    from urllib.request import pathname2url
+    return pathname2url(os.path.abspath(file_path))
+
+
+# ---------------------------------------------------------------- 格式转换
+
+def convert_xml_to_flow_db(xml_path, db_path):
+    """XML配置转换为flowdb文件（覆盖已有文件）"""
+    document = read_xml_document(xml_path)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    write_flow_db(db_path, document)
+
+
+def convert_flow_db_to_xml(db_path, xml_path):
+    """flowdb文件转换为XML配置"""
+    document = read_flow_db(db_path)
+    with open(xml_path, "w", encoding="utf-8") as f:
+        write_xml_document(f, document)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3:
+        print("用法: python -m utils.flow_db <输入.xml|输入.flowdb> <输出.flowdb|输出.xml>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    if is_flow_db(src):
+        convert_flow_db_to_xml(src, dst)
+    else:
+        convert_xml_to_flow_db(src, dst)
+    print(f"已转换: {src} -> {dst}")
@@ -0,0 +1,76 @@
+"""导出TXT文件的按行写出工具。
+
+各行先按批拼接、编码后追加到缓冲区，缓冲区满buffer_size字节后一次写入文件，
+避免每行一次write调用。换行与文本模式open(path, "w")相同（按os.linesep写出）。
+"""
+import os
+from itertools import islice
+
+# 默认缓冲区大小（字节）
+DEFAULT_BUFFER_SIZE = 1 << 20
+# 每批拼接的行数
+_BATCH_ROWS = 4096
+
+
+class LineSink:
+    """按行写出文本文件：write_lines传入的各行不含换行符，写出时每行后加换行
+
+    rows_written / bytes_written 为已写出的行数和编码后的字节数（含尚在缓冲区中的部分）。
+    需用with或close()结束，结束时写出缓冲区中剩余的内容。
+    """
+
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE, encoding="utf-8"):
+        self.path = path
+        self.buffer_size = max(int(buffer_size), 1)
+        self.encoding = encoding
+        self.rows_written = 0
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._file = open(path, "wb")
+
+    def write_lines(self, lines):
+        """写出多行（可迭代对象，按需逐批取出）"""
+        lines = iter(lines)
+        buffer = self._buffer
+        while True:
+            batch = list(islice(lines, _BATCH_ROWS))
+            if not batch:
+                break
+            batch.append("")
+            text = "\n".join(batch)
+            if os.linesep != "\n":
+                text = text.replace("\n", os.linesep)
+            data = text.encode(self.encoding)
+            buffer += data
+            self.rows_written += len(batch) - 1
+            self.bytes_written += len(data)
+            if len(buffer) >= self.buffer_size:
+                self.flush()
+
+    def write_line(self, line):
+        self.write_lines((line,))
+
+    def flush(self):
+        """把缓冲区中的内容写入文件"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            del self._buffer[:]
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 出错时也写出已生成的行并关闭文件，与直接写文件时一致
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f"LineSink({self.path!r}, {self.rows_written} rows, {self.bytes_written} bytes)"
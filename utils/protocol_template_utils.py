@@ -2,6 +2,9 @@ import re
 import struct
 from typing import Iterable, List, Sequence, Any, Dict
 
+# numpy导入较慢，首次批量计算CRC时再导入（见_numpy），不影响程序启动；None表示未安装
+np = False
+
 HEX_TOKEN_SPLIT = re.compile(r"[,\s]+")
 
 
@@ -134,6 +137,102 @@ def apply_serial_escape_sequence(byte_list: Sequence[int]) -> List[int]:
     return result
 
 
+# GLINK数据区CRC-16查表法使用的表（与StepDetailView.calc_glink_fields保持一致，
+# 已保存文件中的数据区crc校验和均由此表计算，不可替换为标准表）
+GLINK_CRC_TABLE = [
+    0x0000, 0x1021, 0x2042, 0x3063, 0x4084, 0x50a5, 0x60c6, 0x70e7,
+    0x8108, 0x9129, 0xa14a, 0xb16b, 0xc18c, 0xd1ad, 0xe1ce, 0xf1ef,
+    0x1231, 0x0210, 0x3273, 0x2252, 0x52b5, 0x4294, 0x72f7, 0x62d6,
+    0x9339, 0x8318, 0xb37b, 0xa35a, 0xd3bd, 0xc39c, 0xf3ff, 0xe3de,
+    0x2462, 0x3443, 0x0420, 0x1401, 0x64e6, 0x74c7, 0x44a4, 0x5485,
+    0xa56a, 0xb54b, 0x8528, 0x9509, 0xe5ee, 0xf5cf, 0xc5ac, 0xd58d,
+    0x3653, 0x2672, 0x1611, 0x0630, 0x76d7, 0x66f6, 0x5695, 0x46b4,
+    0xb75b, 0xa77a, 0x9719, 0x8738, 0xf7df, 0xe7fe, 0xd79d, 0xc7bc,
+    0x48c4, 0x58e5, 0x6886, 0x78a7, 0x0840, 0x1861, 0x2802, 0x3823,
+    0xc9cc, 0xd9ed, 0xe98e, 0xf9af, 0x8948, 0x9969, 0xa90a, 0xb92b,
+    0x5af5, 0x4ad4, 0x7ab7, 0x6a96, 0x1a71, 0x0a50, 0x3a33, 0x2a12,
+    0xdbfd, 0xcbdc, 0xfbbf, 0xeb9e, 0x9b79, 0x8b58, 0xbb3b, 0xab1a,
+    0x6ca6, 0x7c87, 0x4ce4, 0x5cc5, 0x2c22, 0x3c03, 0x0c60, 0x1c41,
+    0xedae, 0xfd8f, 0xcdec, 0xddcd, 0xad2a, 0xbd0b, 0x8d68, 0x9d49,
+    0x7e97, 0x6eb6, 0x5ed5, 0x4ef4, 0x3e13, 0x2e32, 0x1e51, 0x0e70,
+    0xff9f, 0xefbe, 0xdfdd, 0xcffc, 0xbf1b, 0xaf3a, 0x9f59, 0x8f78,
+    0x9188, 0x81a9, 0xb1ca, 0xa1eb, 0xd10c, 0xc12d, 0xf14e, 0xe16f,
+    0x1080, 0x00a1, 0x30c2, 0x20e3, 0x5004, 0x4025, 0x7046, 0x6067,
+    0x83b9, 0x9398, 0xa3fb, 0xb3da, 0xc33d, 0xd31c, 0xe37f, 0xf35e,
+    0x02b1, 0x1290, 0x22f3, 0x32d2, 0x4235, 0x5214, 0x6277, 0x7256,
+    0x7367, 0x6346, 0x5325, 0x4304, 0x33e3, 0x23c2, 0x13a1, 0x0380,
+    0xf26f, 0xe24e, 0xd22d, 0xc20c, 0xb2eb, 0xa2ca, 0x92a9, 0x8288,
+    0x7156, 0x6177, 0x5114, 0x4135, 0x31d2, 0x21f3, 0x1190, 0x01b1,
+    0xf05e, 0xe07f, 0xd01c, 0xc03d, 0xb0da, 0xa0fb, 0x9098, 0x80b9,
+    0x47c5, 0x57e4, 0x6787, 0x77a6, 0x0741, 0x1760, 0x2703, 0x3722,
+    0xc6cd, 0xd6ec, 0xe68f, 0xf6ae, 0x8649, 0x9668, 0xa60b, 0xb62a,
+    0x45f4, 0x55d5, 0x65b6, 0x7597, 0x0570, 0x1551, 0x2532, 0x3513,
+    0xc4fc, 0xd4dd, 0xe4be, 0xf49f, 0x8478, 0x9459, 0xa43a, 0xb41b,
+    0x4b63, 0x5b42, 0x6b21, 0x7b00, 0x0be7, 0x1bc6, 0x2ba5, 0x3b84,
+    0xca6b, 0xda4a, 0xea29, 0xfa08, 0x8aef, 0x9ace, 0xaaad, 0xba8c,
+    0x4952, 0x5973, 0x6910, 0x7931, 0x09d6, 0x19f7, 0x2994, 0x39b5,
+    0xc85a, 0xd87b, 0xe818, 0xf839, 0x88de, 0x98ff, 0xa89c, 0xb8bd,
+]
+
+
+_GLINK_CRC_TABLE_NP = None
+
+
+def _numpy():
+    global np
+    if np is False:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:  # 未安装numpy时使用纯Python实现
+            np = None
+    return np
+
+
+def _glink_crc_table_np():
+    global _GLINK_CRC_TABLE_NP
+    if _GLINK_CRC_TABLE_NP is None:
+        _GLINK_CRC_TABLE_NP = np.asarray(GLINK_CRC_TABLE, dtype=np.uint16)
+    return _GLINK_CRC_TABLE_NP
+
+
+def glink_crc16_rows(rows, initial: int = 0xFFFF, suffix: Sequence[int] = ()) -> List[int]:
+    """批量计算多行的GLINK CRC-16。
+
+    rows为二维的16位字数组（每行等长，可为numpy uint16数组或列表），每个字按高、低字节
+    依次参与计算，4字节的字段按两个字传入；suffix为各行共用、接在每行之后计算的字。
+    已安装numpy时按列对所有行同时查表。
+    """
+    if _numpy() is not None:
+        words = np.asarray(rows, dtype=np.uint16)
+        if words.ndim != 2:
+            raise ValueError("rows必须是二维数组")
+        table = _glink_crc_table_np()
+        crc = np.full(words.shape[0], initial & 0xFFFF, dtype=np.uint16)
+        columns = [words[:, col] for col in range(words.shape[1])]
+        columns.extend(np.uint16(word & 0xFFFF) for word in suffix)
+        for word in columns:
+            for byte in (word >> 8, word & 0xFF):
+                # uint16左移自动截断为16位
+                crc = (crc << 8) ^ table[(crc >> 8) ^ byte]
+        return crc.tolist()
+
+    table = GLINK_CRC_TABLE
+    suffix_bytes = []
+    for word in suffix:
+        suffix_bytes.extend(((word >> 8) & 0xFF, word & 0xFF))
+    result = []
+    for row in rows:
+        crc = initial & 0xFFFF
+        for word in row:
+            crc = ((crc << 8) ^ table[((crc >> 8) ^ (word >> 8)) & 0xFF]) & 0xFFFF
+            crc = ((crc << 8) ^ table[((crc >> 8) ^ word) & 0xFF]) & 0xFFFF
+        for byte in suffix_bytes:
+            crc = ((crc << 8) ^ table[(crc >> 8) ^ byte]) & 0xFFFF
+        result.append(crc)
+    return result
+
+
 def crc16_ccitt(data: Iterable[int], initial: int = 0xFFFF) -> int:
     """CRC-16/CCITT (XModem)"""
     crc = initial & 0xFFFF
@@ -0,0 +1,125 @@
+"""周期数据文件（GLINK/串口）的按需读取。
+
+文件以mmap方式打开，第一次读取时建立非空行的起始偏移索引（每行8字节），按路径和
+修改时间缓存；之后逐行从映射中取出文本，不把整个文件读入内存。
+"""
+import mmap
+import os
+import re
+from array import array
+from functools import partial
+
+# 含非空白字符的行（只匹配ASCII空白，解码后仍为空白的行在遍历时跳过）
+_NONBLANK_LINE = re.compile(rb"[^\n]*\S[^\n]*")
+
+_LINE_INDEX_CACHE = {}  # 绝对路径 -> ((修改时间, 文件大小), 非空行起始偏移)
+
+
+def _line_offsets(path, mm, stamp):
+    """返回mm中各非空行的起始偏移，文件未改动时复用上次建立的索引"""
+    cached = _LINE_INDEX_CACHE.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    offsets = array("Q", (match.start() for match in _NONBLANK_LINE.finditer(mm)))
+    _LINE_INDEX_CACHE[path] = (stamp, offsets)
+    return offsets
+
+
+def _compose(func, parse, text):
+    return func(parse(text))
+
+
+def _describe(func):
+    """解析函数的稳定描述（函数名及partial绑定的参数），用于比较两次读取的解析方式是否相同"""
+    if func is None:
+        return None
+    if isinstance(func, partial):
+        return [_describe(func.func),
+                [_describe(arg) if callable(arg) else repr(arg) for arg in func.args],
+                sorted((key, repr(value)) for key, value in func.keywords.items())]
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+class RowSource:
+    """一个或多个数据文件中的各行，可反复遍历，每次遍历都按需从文件读取
+
+    parse把一行文本（已去除首尾空白）转为一行数据，返回空值的行跳过；
+    skip_unreadable为True时跳过打不开的文件（导出时忽略出错文件），否则抛出OSError。
+    """
+
+    def __init__(self, paths, parse=None, encoding="utf-8", errors="strict", skip_unreadable=True):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.parse = parse
+        self.encoding = encoding
+        self.errors = errors
+        self.skip_unreadable = skip_unreadable
+
+    def map(self, func):
+        """返回对每行数据再调用func的新数据源（parse和func可以pickle时，数据源也可以传给子进程）"""
+        parse = self.parse
+        mapped = func if parse is None else partial(_compose, func, parse)
+        return RowSource(self.paths, mapped, self.encoding, self.errors, self.skip_unreadable)
+
+    def _mapped_files(self):
+        """依次生成各文件的 (mmap, 非空行起始偏移)，跳过空文件"""
+        for path in self.paths:
+            path = os.path.abspath(path)
+            try:
+                f = open(path, "rb")
+            except OSError:
+                if self.skip_unreadable:
+                    continue
+                raise
+            with f:
+                file_stat = os.fstat(f.fileno())
+                if file_stat.st_size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    yield mm, _line_offsets(path, mm, (file_stat.st_mtime_ns, file_stat.st_size))
+
+    def fingerprint(self):
+        """数据源的标识：各文件的路径、修改时间和大小，以及解析方式；文件改动后标识随之改变"""
+        files = []
+        for path in self.paths:
+            path = os.path.abspath(path)
+            try:
+                file_stat = os.stat(path)
+                files.append([path, file_stat.st_mtime_ns, file_stat.st_size])
+            except OSError:
+                files.append([path, None, None])
+        return {"files": files, "parse": _describe(self.parse), "encoding": self.encoding, "errors": self.errors}
+
+    def line_count(self):
+        """各文件非空行数之和（建立行索引），用于显示进度"""
+        return sum(len(offsets) for _, offsets in self._mapped_files())
+
+    def numbered_lines(self):
+        """依次生成 (行号, 去除首尾空白的文本)，行号从1开始，跳过空行"""
+        for mm, offsets in self._mapped_files():
+            line_no = 1
+            prev_end = 0
+            for start in offsets:
+                # 两个非空行之间只有空行，逐段计数换行得到行号
+                line_no += mm[prev_end:start].count(b"\n")
+                end = mm.find(b"\n", start)
+                if end < 0:
+                    end = len(mm)
+                text = mm[start:end].decode(self.encoding, self.errors).strip()
+                if text:
+                    yield line_no, text
+                prev_end = end
+
+    def __iter__(self):
+        parse = self.parse
+        for _, text in self.numbered_lines():
+            row = text if parse is None else parse(text)
+            if row:
+                yield row
+
+    def __bool__(self):
+        for _ in self:
+            return True
+        return False
+
+    def __repr__(self):
+        return f"RowSource({self.paths!r})"
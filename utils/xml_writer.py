@@ -0,0 +1,140 @@
+"""流式XML写出工具。
+
+按行直接写出带缩进的XML，输出格式与原先 ET.tostring + minidom.toprettyxml
++ 去空行 的结果逐字节一致：
+  - 首行 <?xml version="1.0" encoding="utf-8"?>，两空格缩进，行间以 "\\n" 连接，末尾无换行
+  - 叶子元素 <tag>text</tag>，无内容元素 <tag/>
+  - 文本与属性中的 & < " > 转义
+  - 文本/属性中换行产生的空白行被丢弃（与旧的 splitlines + strip 过滤一致）
+
+旧流程对编码后的UTF-8字节串分行，\\x85、\\u2028、\\u2029、\\v、\\f 等
+（str.splitlines() 会分行的字符）保留在行内，这里与之相同。
+"""
+import re
+
+XML_DECLARATION = '<?xml version="1.0" encoding="utf-8"?>'
+
+_NEWLINE_SPLIT = re.compile(r"\r\n|\r|\n")
+# bytes.strip() 去除的ASCII空白
+_ASCII_WHITESPACE = " \t\n\r\x0b\x0c"
+
+
+def escape_xml(text):
+    """按minidom规则转义文本/属性值。"""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _fold_lines(text):
+    """处理跨行内容：按旧格式去掉中间的空白行。
+
+    与旧流程的 bytes.splitlines() 一样只按 \\r\\n、\\r、\\n 分行（不能换成 str.splitlines()），
+    空白行按 bytes.strip() 判断，只去除ASCII空白。
+    """
+    if "\n" not in text and "\r" not in text:
+        return text
+    parts = _NEWLINE_SPLIT.split(text)
+    kept = [parts[0]]
+    kept.extend(p for p in parts[1:-1] if p.strip(_ASCII_WHITESPACE))
+    kept.append(parts[-1])
+    return "\n".join(kept)
+
+
+# XML解析器读取属性值时把制表符和换行规整为空格
+_ATTR_WHITESPACE = str.maketrans("\t\n\r", "   ")
+
+
+def parsed_text(text):
+    """文本写出后再由XML解析器读回的结果，空文本读回为None。"""
+    if not text:
+        return None
+    return _fold_lines(text)
+
+
+def parsed_attr(value):
+    """属性值写出后再由XML解析器读回的结果。"""
+    return _fold_lines(str(value)).translate(_ATTR_WHITESPACE)
+
+
+def _format_attrs(attrs):
+    if not attrs:
+        return ""
+    return "".join(f' {k}="{escape_xml(str(v))}"' for k, v in attrs.items())
+
+
+class XmlStreamWriter:
+    """带缩进的流式XML写出器，元素写完即落盘，内存占用与元素数量无关。"""
+
+    def __init__(self, fp, indent="  ", depth=0, first_line=True):
+        self.fp = fp
+        self.indent = indent
+        self.depth = depth
+        self._first_line = first_line
+        self._stack = []
+        self._pending = None  # 尚未输出的起始标签（用于判断是否写成 <tag/>）
+
+    def _line(self, content):
+        if self._first_line:
+            self._first_line = False
+            self.fp.write(_fold_lines(content))
+        else:
+            self.fp.write("\n" + _fold_lines(content))
+
+    def _flush_pending(self):
+        if self._pending is not None:
+            self._line(self._pending + ">")
+            self._pending = None
+
+    def write_declaration(self):
+        self._line(XML_DECLARATION)
+
+    def start(self, tag, attrs=None):
+        """开始一个包含子元素的元素。"""
+        self._flush_pending()
+        self._pending = f"{self.indent * self.depth}<{tag}{_format_attrs(attrs)}"
+        self._stack.append(tag)
+        self.depth += 1
+
+    def end(self):
+        """结束最近一个 start() 打开的元素。"""
+        tag = self._stack.pop()
+        self.depth -= 1
+        if self._pending is not None:
+            self._line(self._pending + "/>")
+            self._pending = None
+        else:
+            self._line(f"{self.indent * self.depth}</{tag}>")
+
+    def element(self, tag, text=None, attrs=None):
+        """写出一个叶子元素，text为空时写成 <tag/>。"""
+        self._flush_pending()
+        prefix = f"{self.indent * self.depth}<{tag}{_format_attrs(attrs)}"
+        if text:
+            self._line(f"{prefix}>{escape_xml(text)}</{tag}>")
+        else:
+            self._line(prefix + "/>")
+
+    def section(self, tag, fields, attrs=None):
+        """写出一个只包含叶子元素的区段，fields为 (tag, text) 序列。"""
+        self.start(tag, attrs)
+        for key, text in fields:
+            self.element(key, text)
+        self.end()
+
+    def write_fragment(self, text):
+        """写入已按当前层级序列化好的片段（由 first_line=False 的写出器生成）"""
+        self._flush_pending()
+        self._first_line = False
+        self.fp.write(text)
+
+    def close(self):
+        """关闭所有未结束的元素。"""
+        while self._stack:
+            self.end()
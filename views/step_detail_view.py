@@ -1,13 +1,15 @@
 import sys
 import json
 import struct
+from itertools import islice
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout,
     QGroupBox, QFormLayout, QLineEdit, QComboBox, QPushButton, QListWidget,
     QGraphicsView, QGraphicsScene, QGraphicsItem, QAction, QFileDialog,
     QDialog, QLabel, QTextEdit, QDialogButtonBox, QListWidgetItem, QSplitter,
-    QMessageBox, QInputDialog, QTableWidget, QHeaderView, QTableWidgetItem, QAbstractScrollArea, QSizePolicy
+    QMessageBox, QInputDialog, QTableWidget, QHeaderView, QTableWidgetItem, QAbstractScrollArea, QSizePolicy,
+    QProgressDialog
 )
 import json
 from PyQt5.QtWidgets import QLineEdit, QComboBox, QLabel, QScrollArea, QWidget, QVBoxLayout, QFormLayout
@@ -21,6 +23,8 @@ from models.step_model import GLINK_REQUIRED_FIELDS, FIELD_LABELS, FIELD_TYPES
 #注意错误处理
 import models.step_model as step_model
 from models.step_model import StepModel,DETAIL_STRINGS
+from models.periodic_table import CHUNK_ROWS, PeriodicTable
+from utils.row_source import RowSource
 from utils import conf
 from utils.protocol_template_utils import (
     calc_crc_tail_metrics,
@@ -38,6 +42,53 @@ class NoWheelComboBox(QComboBox):
         event.ignore()
 
 
+class PeriodicFileParserThread(QThread):
+    """后台解析周期数据文件：按块检查列数并按列存放，每块结果交给界面线程拼接"""
+    parsing_progress = pyqtSignal(int, int)  # 已解析行数, 总行数（为0时正在建立行索引）
+    rows_ready = pyqtSignal(object)  # 一块数据（PeriodicTable）
+    parsing_done = pyqtSignal(str, int)
+    parsing_error = pyqtSignal(str)
+    parsing_cancelled = pyqtSignal(str)
+
+    def __init__(self, file_path, data_types, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.data_types = data_types
+
+    def run(self):
+        try:
+            # 按需逐行读取文件（mmap），避免一次性加载大文件到内存
+            source = RowSource(self.file_path, skip_unreadable=False)
+            self.parsing_progress.emit(0, 0)
+            total = source.line_count()
+            width = len(self.data_types)
+            lines = source.numbered_lines()
+            line_count = 0
+            while True:
+                if self.isInterruptionRequested():
+                    self.parsing_cancelled.emit(self.file_path)
+                    return
+                block = list(islice(lines, CHUNK_ROWS))
+                if not block:
+                    break
+                value_rows = [line.split() for _, line in block]
+                # 整块检查列数，出错时再找出第一个不符的行
+                if set(map(len, value_rows)) != {width}:
+                    line_no, values = next((line_no, values) for (line_no, _), values in zip(block, value_rows)
+                                           if len(values) != width)
+                    self.parsing_error.emit(
+                        f"第 {line_no} 行数据列数 ({len(values)}) 与数据类型数量 ({width}) 不匹配"
+                    )
+                    return
+                # 各列的原始字符串按列写入（见models.periodic_table），各行读取时仍为 {"data_type", "value"} 列表
+                self.rows_ready.emit(PeriodicTable(self.data_types, value_rows))
+                line_count += len(value_rows)
+                self.parsing_progress.emit(line_count, max(total, line_count))
+            self.parsing_done.emit(self.file_path, line_count)
+        except Exception as e:
+            self.parsing_error.emit(f"读取文件时出错: {str(e)}")
+
+
 class StepDetailView(QGroupBox):
     step_save_signal = pyqtSignal()
     def __init__(self, step_data=None, parent=None, smodel:StepModel=None):
@@ -1098,72 +1149,65 @@ class StepDetailView(QGroupBox):
                 QMessageBox.warning(self, "数据类型未配置", "请先配置数据区的数据类型")
             return
         
-        # 创建后台线程来处理文件读取和解析
-        class FileParserThread(QThread):
-            parsing_done = pyqtSignal(list, str, int)
-            parsing_error = pyqtSignal(str)
-            
-            def __init__(self, file_path, data_types):
-                super().__init__()
-                self.file_path = file_path
-                self.data_types = data_types
-            
-            def run(self):
-                try:
-                    parsed_lines = []
-                    line_count = 0
-                    
-                    # 逐行读取文件，避免一次性加载大文件到内存
-                    with open(self.file_path, 'r', encoding='utf-8') as f:
-                        for line_idx, line in enumerate(f):
-                            line = line.strip()
-                            if not line:
-                                continue
-                            
-                            # 按空格分割
-                            values = line.split()
-                            
-                            # 检查数据列数是否匹配
-                            if len(values) != len(self.data_types):
-                                self.parsing_error.emit(
-                                    f"第 {line_idx + 1} 行数据列数 ({len(values)}) 与数据类型数量 ({len(self.data_types)}) 不匹配"
-                                )
-                                return
-                            
-                            # 解析每列数据
-                            parsed_row = []
-                            for col_idx, (value_str, dtype_idx) in enumerate(zip(values, self.data_types)):
-                                try:
-                                    # 根据数据类型转换值（保留原始字符串）
-                                    parsed_row.append({
-                                        "data_type": dtype_idx,
-                                        "value": value_str  # 保存原始字符串
-                                    })
-                                except Exception as e:
-                                    self.parsing_error.emit(
-                                        f"第 {line_idx + 1} 行第 {col_idx + 1} 列数据解析失败: {value_str}, 错误: {e}"
-                                    )
-                                    return
-                            
-                            parsed_lines.append(parsed_row)
-                            line_count += 1
-                    
-                    self.parsing_done.emit(parsed_lines, self.file_path, line_count)
-                except Exception as e:
-                    self.parsing_error.emit(f"读取文件时出错: {str(e)}")
-        
-        # 确保先清理旧线程
-        if hasattr(self, 'parser_thread') and self.parser_thread.isRunning():
-            self.parser_thread.quit()
-            self.parser_thread.wait()
-            del self.parser_thread
-        
-        # 创建并启动新线程
-        self.parser_thread = FileParserThread(file_path, data_types)
-        self.parser_thread.parsing_done.connect(self.on_parsing_done)
-        self.parser_thread.parsing_error.connect(self.on_parsing_error)
-        self.parser_thread.start()
-    
+        # 上一次选择的文件还在解析时直接取消，不等待其结束
+        self.cancel_periodic_parsing()
+
+        progress = QProgressDialog("正在读取周期数据文件...", "取消", 0, 0, self)
+        progress.setWindowTitle("读取文件")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+
+        # 后台线程分块解析，各块在界面线程中依次拼接
+        parsed_lines = PeriodicTable(data_types)
+        thread = PeriodicFileParserThread(file_path, data_types, self)
+        self.parser_thread = thread
+
+        def finish():
+            """关闭进度框，返回该线程的结果是否仍需处理"""
+            progress.close()
+            if self.parser_thread is not thread:
+                return False
+            self.parser_thread = None
+            return True
+
+        def on_rows(chunk):
+            if self.parser_thread is thread:
+                parsed_lines.extend_table(chunk)
+
+        def on_progress(done, total):
+            if self.parser_thread is thread:
+                progress.setMaximum(total)
+                progress.setValue(done)
+
+        def on_done(path, line_count):
+            if finish():
+                self.on_parsing_done(parsed_lines, path, line_count)
+
+        def on_error(message):
+            if finish():
+                self.on_parsing_error(message)
+
+        def on_cancelled(path):
+            finish()
+            print(f"已取消读取周期数据文件: {path}")
+
+        thread.rows_ready.connect(on_rows)
+        thread.parsing_progress.connect(on_progress)
+        thread.parsing_done.connect(on_done)
+        thread.parsing_error.connect(on_error)
+        thread.parsing_cancelled.connect(on_cancelled)
+        progress.canceled.connect(thread.requestInterruption)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+
+    def cancel_periodic_parsing(self):
+        """取消正在进行的周期数据文件解析：不等待线程结束，其后续结果不再处理"""
+        thread = getattr(self, 'parser_thread', None)
+        self.parser_thread = None
+        if thread is not None:
+            thread.requestInterruption()
     
     def on_parsing_done(self, parsed_lines, file_path, line_count):
         """文件解析完成后的处理"""
@@ -1191,6 +1235,7 @@ class StepDetailView(QGroupBox):
         # 保存所有行数据到smodel的expand_step_data中（用于后续展开）
         self.smodel.expand_step_data["periodic_file_data"] = parsed_lines
         self.smodel.expand_step_data["periodic_file_path"] = file_path
+        self.smodel.mark_dirty()
         
         QMessageBox.information(
             self,
@@ -1227,37 +1272,20 @@ class StepDetailView(QGroupBox):
         
         print("开始更新所有流程步的帧计数...")
         
-        # 首先按协议类型对流程步进行分组，并筛选出需要计算帧计数的流程步
-        protocol_groups = {}
+        # 按协议类型分组的帧计数流程步（消息控制字帧计数位为1），组内已按时间从大到小排序，由model增量维护
+        protocol_groups = self.model.frame_count_groups(0x01)
         
-        for step in self.model.steps:
-            step_type = step.get_step_type()
-            protocol_type = step.get_base_step_data().get("protocol_type", 0)
-            
+        for (step_type, protocol_type), steps in protocol_groups.items():
             if protocol_type == -1:  # 无协议类型
                 continue
-                
-            # 获取消息控制字，判断是否需要计算帧计数
-            protocol_data = step.get_protocol_data() or {}
-            ctrl_word_str = protocol_data.get("消息控制字", "0")
-            ctrl_word = self.safe_hex_to_int(ctrl_word_str)
-            
-            # 只有帧计数位为1时才参与帧计数
-            if (ctrl_word & 0x01) == 0x01:
-                key = (step_type, protocol_type)
-                if key not in protocol_groups:
-                    protocol_groups[key] = []
-                protocol_groups[key].append(step)
-        
-        # 对每个协议组按时间从大到小排序并计算帧计数
-        for (step_type, protocol_type), steps in protocol_groups.items():
-            # 按时间从大到小排序
-            steps.sort(key=lambda x: x.get_value("time", 0), reverse=True)
             
             # 计算帧计数
             for idx, step in enumerate(steps):
                 frame_count = (idx + 1) & 0xFFFF
                 protocol_data = step.get_protocol_data() or {}
+                # 帧计数未变化的流程步不再标记修改，保存时可直接复用已序列化的内容
+                if protocol_data.get("帧计数") == f"0x{frame_count:04X}":
+                    continue
                 protocol_data["帧计数"] = f"0x{frame_count:04X}"
                 step.set_protocol_data(protocol_data)
                 print(f"更新协议组({step_type}, {protocol_type})流程步: {step.get_name()}, 时间: {step.get_value('time', 0)}, 帧计数: {frame_count}")
@@ -1288,6 +1316,9 @@ class StepDetailView(QGroupBox):
     
     def refresh_fields(self, smodel=None, init=False):
         if smodel:
+            if smodel is not self.smodel:
+                # 切换步骤后，之前步骤的文件解析结果不再填入
+                self.cancel_periodic_parsing()
             self.smodel = smodel
         
         # 检查form_layout是否有效
@@ -1657,44 +1688,17 @@ class StepDetailView(QGroupBox):
                 current_protocol_type = self.smodel.get_base_step_data().get("protocol_type", 0)
                 current_time = self.smodel.get_value("time", 0)
                 
-                # 筛选出所有同协议且消息控制字帧计数位为1的流程步
-                eligible_steps = []
-                for step in self.model.steps:
-                    step_type = step.get_step_type()
-                    protocol_type = step.get_base_step_data().get("protocol_type", 0)
-                    
-                    # 只处理同协议的流程步
-                    if step_type == current_step_type and protocol_type == current_protocol_type:
-                        step_protocol_data = step.get_protocol_data()
-                        if step_protocol_data:
-                            step_ctrl_word_str = step_protocol_data.get("消息控制字", "0")
-                            step_ctrl_word = self.safe_hex_to_int(step_ctrl_word_str)
-                            if (step_ctrl_word & 0x02) == 0x02:  # 位1=1，即0x0002或0x0003
-                                step_time = step.get_value("time", 0)
-                                eligible_steps.append((step_time, step))
-                
-                # 按时间从大到小排序
-                eligible_steps.sort(key=lambda x: x[0], reverse=True)
-                
-                # 找到当前流程步在排序后的位置，帧计数为该位置+1
-                current_found = False
-                for idx, (step_time, step) in enumerate(eligible_steps):
-                    # 通过比较step对象来判断是否是当前流程步
-                    if step is self.smodel:
-                        frame_count = (idx + 1) & 0xFFFF
-                        print(f"帧计数计算: 当前流程步在排序后的位置为 {idx}，帧计数 = {frame_count}")
-                        current_found = True
-                        break
-                
-                if not current_found:
-                    # 如果当前流程步不在列表中（可能还未保存），将其加入并重新排序
-                    eligible_steps.append((current_time, self.smodel))
-                    eligible_steps.sort(key=lambda x: x[0], reverse=True)
-                    for idx, (step_time, step) in enumerate(eligible_steps):
-                        if step is self.smodel:
-                            frame_count = (idx + 1) & 0xFFFF
-                            print(f"帧计数计算: 当前流程步（未保存）在排序后的位置为 {idx}，帧计数 = {frame_count}")
-                            break
+                # 同协议且消息控制字帧计数位为1的流程步按时间从大到小排序，帧计数为当前流程步的位置+1（由model索引二分查找）
+                rank = self.model.frame_count_of(self.smodel, 0x02)
+                if rank is not None:
+                    frame_count = rank & 0xFFFF
+                    print(f"帧计数计算: 当前流程步在排序后的位置为 {rank - 1}，帧计数 = {frame_count}")
+                else:
+                    # 如果当前流程步不在列表中（可能还未保存），按其时间排在同时间流程步之后
+                    rank = self.model.frame_count_for_time(
+                        (current_step_type, current_protocol_type), current_time, 0x02)
+                    frame_count = rank & 0xFFFF
+                    print(f"帧计数计算: 当前流程步（未保存）在排序后的位置为 {rank - 1}，帧计数 = {frame_count}")
             else:
                 # 如果没有model引用，回退到原有逻辑
                 frame_count_str = data.get("帧计数", "0")
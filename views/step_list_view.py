@@ -243,10 +243,12 @@ class StepListView(QGroupBox):
         self.add_btn = self.create_tool_button(ADD_STRING, "SP_FileDialogNewFolder")
         # self.edit_btn = self.create_tool_button(EDIT_STRING, "SP_FileDialogDetailedView")
         self.remove_btn = self.create_tool_button(DELETE_STRING, "SP_TrashIcon")
+        self.duplicate_btn = self.create_tool_button("批量复制", "SP_FileDialogListView")
         
         btn_row1.addWidget(self.add_btn)
         # btn_row1.addWidget(self.edit_btn)
         btn_row1.addWidget(self.remove_btn)
+        btn_row1.addWidget(self.duplicate_btn)
         btn_row1.addStretch()
         
         # 第二行按钮